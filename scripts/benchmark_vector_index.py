@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the IVF vector index against exact search.
+
+Builds an exact VectorIndex and an IVFIndex over the same synthetic clustered
+embeddings, then reports recall@k and mean query latency for a sweep of
+n_probe values.
+
+Run with: python scripts/benchmark_vector_index.py --size 200000 --dim 256
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from compymac.storage.vector_index import IVFIndex, VectorIndex, recall_at_k
+
+
+def make_corpus(
+    size: int, dim: int, clusters: int, seed: int
+) -> tuple[np.ndarray, np.random.Generator]:
+    """Clustered embeddings plus the generator used to draw them."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    corpus = centers[rng.integers(0, clusters, size)] + 0.5 * rng.normal(size=(size, dim))
+    return corpus.astype(np.float32), rng
+
+
+def mean_latency_ms(index: VectorIndex, queries: np.ndarray, k: int, **kwargs) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, k, **kwargs)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    """Main entry point for the benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Report IVF recall@k and latency against exact search"
+    )
+    parser.add_argument("--size", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=128, help="Embedding dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Synthetic clusters")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("-k", type=int, default=10, help="Result depth")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF lists (default sqrt(size))")
+    parser.add_argument(
+        "--n-probe",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16, 32],
+        help="n_probe values to sweep",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    corpus, rng = make_corpus(args.size, args.dim, args.clusters, args.seed)
+    queries = corpus[rng.integers(0, args.size, args.queries)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32)
+    ids = [f"v{i}" for i in range(args.size)]
+
+    exact = VectorIndex()
+    exact.add_batch(ids, corpus)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(n_lists=args.n_lists, min_train_size=1, seed=args.seed)
+    ivf.add_batch(ids, corpus)
+    build_s = time.perf_counter() - start
+
+    print(f"Corpus: {args.size} x {args.dim}, {args.queries} queries, k={args.k}")
+    print(f"IVF build: {build_s:.1f}s, {len(ivf._centroids)} lists")
+    print(f"Exact search: {mean_latency_ms(exact, queries, args.k):.2f} ms/query")
+    print(f"\n{'n_probe':>8}  {'recall@k':>9}  {'ms/query':>9}")
+    for n_probe in args.n_probe:
+        ivf.n_probe = n_probe
+        recall = recall_at_k(ivf, exact, queries, args.k)
+        latency = mean_latency_ms(ivf, queries, args.k)
+        print(f"{n_probe:>8}  {recall:>9.3f}  {latency:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
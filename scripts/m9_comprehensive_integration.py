@@ -615,7 +615,7 @@ def test_document_ingestion_e2e():
         
         # Check embedding dimensions
         embedding_dim = None
-        if results and results[0].memory_unit.embedding:
+        if results and results[0].memory_unit.embedding is not None:
             embedding_dim = len(results[0].memory_unit.embedding)
         
         evidence = {
@@ -50,6 +50,7 @@ from compymac.tools import Tool, ToolRegistry, create_mock_tools
 from compymac.trace_store import (
     Artifact,
     ArtifactStore,
+    DurabilityMode,
     ProvenanceRelation,
     Span,
     SpanKind,
@@ -81,6 +82,7 @@ __all__ = [
     "create_browser_tools",
     "TraceStore",
     "ArtifactStore",
+    "DurabilityMode",
     "TraceContext",
     "TraceEvent",
     "TraceEventType",
@@ -30,7 +30,7 @@ from compymac.types import Message, ToolCall, ToolResult
 if TYPE_CHECKING:
     from compymac.memory import MemoryManager
     from compymac.storage.run_store import RunStore
-    from compymac.trace_store import TraceContext, TraceStore
+    from compymac.trace_store import LLMInputEncoder, TraceContext, TraceStore
     from compymac.workflows.ci_integration import CIIntegration
     from compymac.workflows.failure_recovery import FailureRecovery
     from compymac.workflows.swe_loop import SWEWorkflow
@@ -156,6 +156,7 @@ class AgentLoop:
         self._memory_manager: "MemoryManager | None" = None  # noqa: UP037
         self._trace_context: "TraceContext | None" = trace_context  # noqa: UP037
         self._trace_store: "TraceStore | None" = None  # noqa: UP037
+        self._llm_input_encoder: "LLMInputEncoder | None" = None  # noqa: UP037
         self._run_store: "RunStore | None" = None  # noqa: UP037
         self._run_id: str | None = self.config.run_id
         self._task_description: str = ""
@@ -349,15 +350,13 @@ class AgentLoop:
         if self._trace_context:
             from compymac.trace_store import SpanKind
 
-            # Store LLM input as artifact
-            llm_input_data = json.dumps({
-                "messages": messages_for_api,
-                "tools": tools,
-            }).encode()
-            llm_input_artifact = self._trace_context.store_artifact(
-                data=llm_input_data,
-                artifact_type="llm_input",
-                content_type="application/json",
+            # Store LLM input as a delta against the previous step's input
+            if self._llm_input_encoder is None:
+                from compymac.trace_store import LLMInputEncoder
+                self._llm_input_encoder = LLMInputEncoder(self._trace_context.store_artifact)
+            llm_input_artifact = self._llm_input_encoder.store(
+                messages=messages_for_api,
+                tools=tools,
                 metadata={"step": self.state.step_count},
             )
             llm_input_artifact_hash = llm_input_artifact.artifact_hash
@@ -407,9 +406,16 @@ class AgentLoop:
                 metadata={"step": self.state.step_count},
             )
 
+            # Record usage on the span itself so overviews never re-read artifacts
+            llm_config = getattr(self.llm_client, "config", None)
+            model = response.raw_response.get("model") or getattr(llm_config, "model", None)
             self._trace_context.end_span(
                 status=SpanStatus.OK,
                 output_artifact_hash=llm_output_artifact.artifact_hash,
+                additional_attributes={
+                    **response.usage.to_dict(),
+                    "model": model or None,
+                },
             )
 
         self._event_log.log_event(
@@ -12,7 +12,10 @@ import asyncio
 import json
 import logging
 import os
+import shutil
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -23,12 +26,14 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Request,
     Response,
     UploadFile,
     WebSocket,
     WebSocketDisconnect,
 )
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from compymac.agent_loop import AgentConfig, AgentLoop
@@ -36,13 +41,23 @@ from compymac.browser import BrowserConfig, BrowserMode, BrowserService
 from compymac.config import LLMConfig
 from compymac.harness import HarnessConfig
 from compymac.ingestion.chunker import DocumentChunker
+from compymac.ingestion.jobs import (
+    IngestionJob,
+    IngestionJobQueue,
+    JobCancelledError,
+    ProgressReporter,
+)
+from compymac.ingestion.parse_cache import ParseCache
 from compymac.ingestion.parsers import DocumentParser
 from compymac.llm import LLMClient
 from compymac.local_harness import LocalHarness, ToolCategory
 from compymac.locale2b import Locale2bClient, Locale2bConfig
 from compymac.session import Session
-from compymac.storage.library_store import DocumentStatus, LibraryStore
+from compymac.storage.library_store import DocumentStatus
 from compymac.storage.run_store import RunStatus, RunStore
+from compymac.storage.sqlite_library_store import SQLiteLibraryStore
+from compymac.trace_retention import RetentionEngine, RetentionPolicy
+from compymac.trace_store import TraceStore, create_trace_store
 from compymac.types import ToolCall
 
 logger = logging.getLogger(__name__)
@@ -50,14 +65,83 @@ logger = logging.getLogger(__name__)
 # Global RunStore for session persistence
 run_store = RunStore()
 
-# Global LibraryStore for document management
-library_store = LibraryStore()
+# Global LibraryStore for document management, persisted across restarts
+library_store = SQLiteLibraryStore(
+    os.environ.get("COMPYMAC_LIBRARY_DB", "~/.compymac/library.db")
+)
+
+# Parse artifacts keyed by file content, so re-uploads skip parsing
+parse_cache = ParseCache(os.environ.get("COMPYMAC_PARSE_CACHE", "~/.compymac/parse_cache.db"))
 
 # Upload directory for PDF files
 UPLOAD_DIR = Path("/tmp/compymac_uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-app = FastAPI(title="CompyMac API", version="0.2.0")
+# Trace directory shared with the CLI tools (see compymac.cli.trace_admin)
+TRACE_DIR = Path(os.environ.get("COMPYMAC_TRACE_DIR", "~/.compymac/traces")).expanduser()
+_trace_store: TraceStore | None = None
+
+
+def get_trace_store() -> TraceStore:
+    """Return the server's TraceStore, opening it on first use."""
+    global _trace_store
+    if _trace_store is None:
+        _trace_store, _ = create_trace_store(TRACE_DIR)
+    return _trace_store
+
+
+def _retention_policy_from_env() -> RetentionPolicy | None:
+    """
+    Build the background retention policy from the environment.
+
+    COMPYMAC_RETENTION_MAX_AGE_DAYS, COMPYMAC_RETENTION_KEEP_LAST and
+    COMPYMAC_RETENTION_STATUSES (comma-separated) map onto RetentionPolicy;
+    retention is disabled when none of them is set.
+    """
+    max_age = os.environ.get("COMPYMAC_RETENTION_MAX_AGE_DAYS")
+    keep_last = os.environ.get("COMPYMAC_RETENTION_KEEP_LAST")
+    statuses = os.environ.get("COMPYMAC_RETENTION_STATUSES")
+    if not (max_age or keep_last or statuses):
+        return None
+    return RetentionPolicy(
+        max_age_days=float(max_age) if max_age else None,
+        statuses=[s.strip() for s in statuses.split(",")] if statuses else None,
+        keep_last_per_task=int(keep_last) if keep_last else None,
+    )
+
+
+async def _retention_loop(policy: RetentionPolicy, interval_s: float) -> None:
+    """Periodically apply the retention policy to the trace store."""
+    while True:
+        try:
+            engine = RetentionEngine(get_trace_store(), [policy])
+            await asyncio.to_thread(engine.run, False)
+        except Exception as e:
+            logger.error(f"Trace retention run failed: {e}")
+        await asyncio.sleep(interval_s)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start background maintenance tasks for the lifetime of the app."""
+    global _server_loop
+    _server_loop = asyncio.get_running_loop()
+    ingestion_jobs.add_listener(_broadcast_job)
+    retention_task = None
+    policy = _retention_policy_from_env()
+    if policy is not None:
+        interval_s = float(os.environ.get("COMPYMAC_RETENTION_INTERVAL_HOURS", "24")) * 3600
+        retention_task = asyncio.create_task(_retention_loop(policy, interval_s))
+    try:
+        yield
+    finally:
+        if retention_task is not None:
+            retention_task.cancel()
+        ingestion_jobs.remove_listener(_broadcast_job)
+        await asyncio.to_thread(ingestion_jobs.shutdown)
+
+
+app = FastAPI(title="CompyMac API", version="0.2.0", lifespan=lifespan)
 
 # Enable CORS for the Next.js frontend
 app.add_middleware(
@@ -448,6 +532,12 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str) -> None:
             elif msg_type == "get_audit_log":
                 await handle_get_audit_log(websocket, runtime, message)
 
+            elif msg_type == "get_ingestion_jobs":
+                await handle_get_ingestion_jobs(websocket, message)
+
+            elif msg_type == "cancel_ingestion_job":
+                await handle_cancel_ingestion_job(websocket, message)
+
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session {session_id}")
         if session_id in active_connections:
@@ -1426,6 +1516,26 @@ async def handle_get_audit_log(
     })
 
 
+async def handle_get_ingestion_jobs(websocket: WebSocket, message: dict[str, Any]) -> None:
+    """Handle request for ingestion job progress."""
+    jobs = ingestion_jobs.jobs(message.get("user_id"))
+    await websocket.send_json({
+        "type": "ingestion_jobs",
+        "data": {"jobs": [job.to_dict() for job in jobs]},
+    })
+
+
+async def handle_cancel_ingestion_job(websocket: WebSocket, message: dict[str, Any]) -> None:
+    """Handle cancelling an ingestion job (progress follows as ingestion_progress events)."""
+    job_id = message.get("id", "")
+    if ingestion_jobs.cancel(job_id) is None:
+        await websocket.send_json({
+            "type": "error",
+            "code": "job_not_found",
+            "message": f"Ingestion job {job_id} not found",
+        })
+
+
 @app.get("/api/sessions")
 async def list_sessions(
     status: str | None = None,
@@ -1685,6 +1795,112 @@ async def delete_session(session_id: str) -> dict[str, Any]:
 # =============================================================================
 
 
+# Event loop the server runs on, for pushing job progress from worker threads
+_server_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _process_upload(job: IngestionJob, report: ProgressReporter) -> None:
+    """Parse, chunk and embed an uploaded document (runs on an ingestion worker)."""
+    library_store.update_document(job.doc_id, status=DocumentStatus.PROCESSING)
+    try:
+        # Parse, extract navigation (TOC/bookmarks) and chunk, reusing the
+        # artifacts of an identical earlier upload. PDF pages are extracted on
+        # the queue's process pool.
+        report(stage="parsing")
+        parsed = parse_cache.parse(
+            job.file_path,
+            DocumentParser(executor=ingestion_jobs.process_pool),
+            DocumentChunker(chunk_size=512, chunk_overlap=50),
+            doc_id=job.doc_id,
+            doc_format=job.doc_format,
+            progress=lambda done, total: report(pages_parsed=done, pages_total=total),
+        )
+        parse_result = parsed.parse_result
+
+        page_count = parse_result.metadata.get("page_count", 0)
+        if job.doc_format == "epub":
+            # For EPUB, use chapter count as "page count"
+            page_count = parse_result.metadata.get("chapter_count", 0)
+
+        # Convert chunks to dicts for storage
+        chunk_dicts = [
+            {
+                "id": chunk.id,
+                "content": chunk.content,
+                "start_char": chunk.start_char,
+                "end_char": chunk.end_char,
+                "metadata": chunk.metadata,
+            }
+            for chunk in parsed.chunks
+        ]
+
+        report(
+            stage="embedding",
+            pages_parsed=page_count,
+            pages_total=page_count,
+            chunks_total=len(chunk_dicts),
+        )
+        library_store.update_document(
+            job.doc_id,
+            chunks=chunk_dicts,
+            embedding_progress=lambda done, total: report(chunks_embedded=done),
+        )
+        report(stage="finalizing")
+
+        library_store.update_document(
+            job.doc_id,
+            status=DocumentStatus.READY,
+            page_count=page_count,
+            metadata=parse_result.metadata,
+            navigation=parsed.navigation,
+        )
+
+    except JobCancelledError:
+        library_store.update_document(
+            job.doc_id,
+            status=DocumentStatus.FAILED,
+            error="Ingestion cancelled",
+            chunks=[],
+            generate_embeddings=False,
+        )
+        raise
+    except Exception as e:
+        logger.error(f"Error processing document {job.doc_id}: {e}")
+        library_store.update_document(
+            job.doc_id,
+            status=DocumentStatus.FAILED,
+            error=str(e),
+        )
+        raise
+
+
+# Uploads are parsed and embedded in the background, at most
+# COMPYMAC_INGEST_CONCURRENCY documents at a time
+ingestion_jobs = IngestionJobQueue(
+    _process_upload,
+    max_concurrency=int(os.environ.get("COMPYMAC_INGEST_CONCURRENCY", "2")),
+    parse_workers=int(os.environ.get("COMPYMAC_PARSE_WORKERS", 0)) or None,
+)
+
+
+def _broadcast_job(job: IngestionJob) -> None:
+    """Push a job's status to every connected WebSocket client (from any thread)."""
+    if _server_loop is None or _server_loop.is_closed():
+        return
+    data = {"job": job.to_dict()}
+    for websocket in list(active_connections.values()):
+        asyncio.run_coroutine_threadsafe(
+            send_event(websocket, "ingestion_progress", data), _server_loop
+        )
+
+
+def _save_upload(file: UploadFile, file_path: Path) -> None:
+    """Copy an uploaded file to disk without reading it into memory."""
+    file.file.seek(0)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+
 @app.post("/api/documents/upload")
 async def upload_document(
     file: Annotated[UploadFile, File()],
@@ -1695,6 +1911,10 @@ async def upload_document(
     """
     Upload a PDF or EPUB document for processing.
 
+    The document is processed by a background ingestion job; follow it with
+    GET /api/ingestion/jobs/{job_id} or the "ingestion_progress" WebSocket
+    event.
+
     Args:
         file: The PDF or EPUB file to upload
         user_id: User ID for library storage (default: "default")
@@ -1702,10 +1922,8 @@ async def upload_document(
         add_to_library: Whether to add to persistent library (default: True)
 
     Returns:
-        Document metadata including ID and processing status.
+        Document metadata including ID and processing status, plus job_id.
     """
-    from compymac.ingestion.parsers import extract_navigation
-
     if not file.filename:
         return {"error": "No filename provided"}
 
@@ -1731,62 +1949,21 @@ async def upload_document(
     try:
         # Save uploaded file with correct extension
         file_path = UPLOAD_DIR / f"{doc.id}{ext}"
-        content = await file.read()
-        file_path.write_bytes(content)
+        await asyncio.to_thread(_save_upload, file, file_path)
 
         # Update document with file path
         library_store.update_document(doc.id, metadata={"file_path": str(file_path)})
 
-        # Process the document
-        library_store.update_document(doc.id, status=DocumentStatus.PROCESSING)
-
-        # Parse document
-        parser = DocumentParser()
-        parse_result = parser.parse(file_path)
-
-        # Extract navigation (TOC/bookmarks)
-        navigation = extract_navigation(file_path, doc_format)
-
-        # Chunk the text
-        chunker = DocumentChunker(chunk_size=512, chunk_overlap=50)
-        chunks = chunker.chunk(
-            text=parse_result.text,
+        job = ingestion_jobs.submit(
             doc_id=doc.id,
-            metadata=parse_result.metadata,
-        )
-
-        # Convert chunks to dicts for storage
-        chunk_dicts = [
-            {
-                "id": chunk.id,
-                "content": chunk.content,
-                "start_char": chunk.start_char,
-                "end_char": chunk.end_char,
-                "metadata": chunk.metadata,
-            }
-            for chunk in chunks
-        ]
-
-        # Update document with results
-        page_count = parse_result.metadata.get("page_count", 0)
-        if doc_format == "epub":
-            # For EPUB, use chapter count as "page count"
-            page_count = parse_result.metadata.get("chapter_count", 0)
-
-        library_store.update_document(
-            doc.id,
-            status=DocumentStatus.READY,
-            page_count=page_count,
-            chunks=chunk_dicts,
-            metadata=parse_result.metadata,
-            navigation=navigation,
+            file_path=str(file_path),
+            filename=file.filename,
+            doc_format=doc_format,
+            user_id=user_id,
         )
 
-        doc = library_store.get_document(doc.id)
-        return doc.to_dict() if doc else {"error": "Document not found after processing"}
-
     except Exception as e:
-        logger.error(f"Error processing document {doc.id}: {e}")
+        logger.error(f"Error saving document {doc.id}: {e}")
         library_store.update_document(
             doc.id,
             status=DocumentStatus.FAILED,
@@ -1795,6 +1972,11 @@ async def upload_document(
         doc = library_store.get_document(doc.id)
         return doc.to_dict() if doc else {"error": str(e)}
 
+    doc = library_store.get_document(doc.id)
+    if doc is None:
+        return {"error": "Document not found after upload"}
+    return {**doc.to_dict(), "job_id": job.id}
+
 
 def _sanitize_library_path(path: str) -> str:
     """Sanitize user-provided path to prevent traversal attacks."""
@@ -1815,16 +1997,16 @@ async def upload_batch(
     """
     Upload multiple documents with preserved folder structure.
 
+    Each document is processed by its own background ingestion job.
+
     Args:
         files: List of files to upload
         relative_paths: Corresponding relative paths (from webkitRelativePath)
         user_id: User ID for library storage
 
     Returns:
-        Batch upload results with per-file status.
+        Batch upload results with per-file status and job_id.
     """
-    from compymac.ingestion.parsers import extract_navigation
-
     results = []
 
     # Handle None relative_paths
@@ -1873,66 +2055,29 @@ async def upload_batch(
 
             # Save uploaded file
             file_path = UPLOAD_DIR / f"{doc.id}{ext}"
-            content = await file.read()
-            file_path.write_bytes(content)
+            await asyncio.to_thread(_save_upload, file, file_path)
 
             # Update document with file path
             library_store.update_document(doc.id, metadata={"file_path": str(file_path)})
 
-            # Process the document
-            library_store.update_document(doc.id, status=DocumentStatus.PROCESSING)
-
-            # Parse document
-            parser = DocumentParser()
-            parse_result = parser.parse(file_path)
-
-            # Extract navigation
-            navigation = extract_navigation(file_path, doc_format)
-
-            # Chunk the text
-            chunker = DocumentChunker(chunk_size=512, chunk_overlap=50)
-            chunks = chunker.chunk(
-                text=parse_result.text,
+            job = ingestion_jobs.submit(
                 doc_id=doc.id,
-                metadata=parse_result.metadata,
-            )
-
-            # Convert chunks to dicts
-            chunk_dicts = [
-                {
-                    "id": chunk.id,
-                    "content": chunk.content,
-                    "start_char": chunk.start_char,
-                    "end_char": chunk.end_char,
-                    "metadata": chunk.metadata,
-                }
-                for chunk in chunks
-            ]
-
-            # Update document with results
-            page_count = parse_result.metadata.get("page_count", 0)
-            if doc_format == "epub":
-                page_count = parse_result.metadata.get("chapter_count", 0)
-
-            library_store.update_document(
-                doc.id,
-                status=DocumentStatus.READY,
-                page_count=page_count,
-                chunks=chunk_dicts,
-                metadata=parse_result.metadata,
-                navigation=navigation,
+                file_path=str(file_path),
+                filename=file.filename,
+                doc_format=doc_format,
+                user_id=user_id,
             )
 
             results.append({
                 "filename": file.filename,
                 "id": doc.id,
-                "status": "ready",
+                "status": "queued",
                 "library_path": safe_path,
-                "navigation_count": len(navigation),
+                "job_id": job.id,
             })
 
         except Exception as e:
-            logger.error(f"Error processing {file.filename}: {e}")
+            logger.error(f"Error saving {file.filename}: {e}")
             results.append({
                 "filename": file.filename,
                 "id": None,
@@ -1943,11 +2088,41 @@ async def upload_batch(
     return {
         "total_files": len(files),
         "results": results,
-        "success_count": sum(1 for r in results if r["status"] == "ready"),
+        "success_count": sum(1 for r in results if r["status"] == "queued"),
         "failure_count": sum(1 for r in results if r["status"] == "failed"),
     }
 
 
+@app.get("/api/ingestion/jobs")
+async def list_ingestion_jobs(user_id: str | None = None) -> dict[str, Any]:
+    """List ingestion jobs with their progress, optionally for one user."""
+    jobs = ingestion_jobs.jobs(user_id)
+    return {"jobs": [job.to_dict() for job in jobs], "total": len(jobs)}
+
+
+@app.get("/api/ingestion/jobs/{job_id}")
+async def get_ingestion_job(job_id: str) -> dict[str, Any]:
+    """Get an ingestion job's status and progress."""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.post("/api/ingestion/jobs/{job_id}/cancel")
+async def cancel_ingestion_job(job_id: str) -> dict[str, Any]:
+    """
+    Cancel an ingestion job.
+
+    A queued job is cancelled immediately; a running job stops at its next
+    progress update and its document is marked failed.
+    """
+    job = ingestion_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @app.get("/api/documents/{document_id}")
 async def get_document(document_id: str) -> dict[str, Any]:
     """Get document details by ID, including chunks."""
@@ -2413,6 +2588,75 @@ async def close_port(session_id: str, port: int) -> dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+# =============================================================================
+# Trace Tailing
+# =============================================================================
+
+# How often trace streams poll for new events; keeps delivery well under 100ms
+TRACE_POLL_INTERVAL_S = 0.05
+TRACE_HEARTBEAT_S = 15.0
+
+
+@app.get("/api/traces/{trace_id}/events")
+async def tail_trace_events(
+    trace_id: str, after: int = 0, limit: int = 500
+) -> dict[str, Any]:
+    """Return events of a trace written after the ``after`` cursor."""
+    events = await asyncio.to_thread(
+        get_trace_store().tail, trace_id, after, min(max(limit, 1), 5000)
+    )
+    return {
+        "trace_id": trace_id,
+        "events": [{"cursor": cursor, **event.to_dict()} for cursor, event in events],
+        "cursor": events[-1][0] if events else after,
+    }
+
+
+@app.get("/api/traces/{trace_id}/stream")
+async def stream_trace_events(
+    trace_id: str, request: Request, after: int = 0
+) -> StreamingResponse:
+    """
+    Stream a trace's events as Server-Sent Events.
+
+    Each SSE message carries the event cursor as its id, so reconnecting
+    clients resume where they left off via the Last-Event-ID header. Each
+    stream polls through one read connection of its own.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else after
+    trace_store = get_trace_store()
+
+    async def event_stream() -> AsyncIterator[str]:
+        tail = trace_store.open_tail(trace_id, cursor)
+        try:
+            idle = 0.0
+            while not await request.is_disconnected():
+                events = await asyncio.to_thread(tail.poll, 500)
+                for event_cursor, event in events:
+                    yield (
+                        f"id: {event_cursor}\n"
+                        f"event: {event.event_type.value}\n"
+                        f"data: {json.dumps(event.to_dict())}\n\n"
+                    )
+                if events:
+                    idle = 0.0
+                    continue
+                idle += TRACE_POLL_INTERVAL_S
+                if idle >= TRACE_HEARTBEAT_S:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                await asyncio.sleep(TRACE_POLL_INTERVAL_S)
+        finally:
+            tail.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def run_server(host: str = "0.0.0.0", port: int = 8000) -> None:
     """Run the API server."""
     import uvicorn
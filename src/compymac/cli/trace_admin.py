@@ -0,0 +1,120 @@
+"""
+TraceAdmin - CLI for maintaining TraceStore databases.
+
+Commands:
+- rebuild-spans: Rebuild the materialized spans table from the event log
+- compact-checkpoints: Collapse long checkpoint patch chains
+- retention: Delete old traces and orphaned artifacts, then VACUUM
+  (dry run unless --apply is given)
+
+Usage:
+    python -m compymac.cli.trace_admin --trace-dir ~/.compymac/traces rebuild-spans
+    python -m compymac.cli.trace_admin retention --max-age-days 30 --keep-last 5
+"""
+
+from pathlib import Path
+
+from compymac.trace_retention import TRACE_STATUSES, RetentionEngine, RetentionPolicy
+from compymac.trace_store import TraceStore, create_trace_store
+
+
+def open_trace_store(trace_dir: str | Path) -> TraceStore:
+    """Open the TraceStore under a trace directory (as created by create_trace_store)."""
+    trace_store, _ = create_trace_store(Path(trace_dir).expanduser())
+    return trace_store
+
+
+def rebuild_spans(trace_store: TraceStore, trace_id: str | None = None) -> str:
+    """Rebuild the spans table and return a human-readable report."""
+    written = trace_store.rebuild_span_table(trace_id)
+    scope = f"trace {trace_id}" if trace_id else "all traces"
+    return f"Rebuilt {written} span row(s) for {scope}."
+
+
+def compact_checkpoints(
+    trace_store: TraceStore, trace_id: str | None = None, max_depth: int = 4
+) -> str:
+    """Compact checkpoint patch chains and return a human-readable report."""
+    rewritten = trace_store.compact_checkpoints(trace_id, max_depth=max_depth)
+    scope = f"trace {trace_id}" if trace_id else "all traces"
+    return f"Rewrote {rewritten} checkpoint(s) for {scope} (max chain depth {max_depth})."
+
+
+def run_retention(
+    trace_store: TraceStore,
+    policy: RetentionPolicy,
+    apply: bool = False,
+    vacuum_pages: int | None = None,
+) -> str:
+    """Run a retention pass (a dry run unless ``apply``) and return its report."""
+    engine = RetentionEngine(trace_store, [policy], vacuum_pages=vacuum_pages)
+    return engine.run(dry_run=not apply).summary()
+
+
+def main() -> None:
+    """CLI entry point for trace maintenance."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CompyMac Trace Admin")
+    parser.add_argument("--trace-dir", default="~/.compymac/traces",
+                        help="Directory containing traces.db and artifacts/")
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-spans", help="Rebuild the spans table from trace events"
+    )
+    rebuild_parser.add_argument("--trace-id", help="Only rebuild this trace")
+
+    compact_parser = subparsers.add_parser(
+        "compact-checkpoints", help="Collapse long checkpoint patch chains"
+    )
+    compact_parser.add_argument("--trace-id", help="Only compact this trace")
+    compact_parser.add_argument("--max-depth", type=int, default=4,
+                                help="Maximum patches between snapshots")
+
+    retention_parser = subparsers.add_parser(
+        "retention", help="Delete old traces and orphaned artifacts"
+    )
+    retention_parser.add_argument("--max-age-days", type=float,
+                                  help="Delete traces inactive for longer than this")
+    retention_parser.add_argument("--status", action="append", choices=TRACE_STATUSES,
+                                  help="Only delete traces with this status (repeatable)")
+    retention_parser.add_argument("--keep-last", type=int,
+                                  help="Always keep the N most recent traces per task")
+    retention_parser.add_argument("--vacuum-pages", type=int,
+                                  help="Free pages released per VACUUM step (default: all)")
+    retention_parser.add_argument("--apply", action="store_true",
+                                  help="Actually delete (default is a dry run)")
+
+    args = parser.parse_args()
+
+    if args.command is None:
+        parser.print_help()
+        return
+
+    policy: RetentionPolicy | None = None
+    if args.command == "retention":
+        try:
+            policy = RetentionPolicy(
+                max_age_days=args.max_age_days,
+                statuses=args.status,
+                keep_last_per_task=args.keep_last,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    trace_store = open_trace_store(args.trace_dir)
+    try:
+        if args.command == "rebuild-spans":
+            print(rebuild_spans(trace_store, args.trace_id))
+        elif args.command == "compact-checkpoints":
+            print(compact_checkpoints(trace_store, args.trace_id, args.max_depth))
+        elif args.command == "retention" and policy is not None:
+            print(run_retention(trace_store, policy, args.apply, args.vacuum_pages))
+    finally:
+        trace_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,26 @@ Provides document parsing, chunking, and ingestion into KnowledgeStore.
 
 Phase 5: Librarian sub-agent for document library interaction (see librarian_agent.py).
 Phase 6: Pluggable OCR provider for vision-based text extraction.
+Parse artifacts are cached by file content (see parse_cache.py).
+Uploads are ingested as background jobs (see jobs.py).
 """
 
 from compymac.ingestion.chunker import DocumentChunker
+from compymac.ingestion.jobs import IngestionJob, IngestionJobQueue, JobStatus
 from compymac.ingestion.librarian_agent import LibrarianAgent, create_librarian_tool_handler
 from compymac.ingestion.ocr_provider import OCRClient, OCRResult
+from compymac.ingestion.parse_cache import ParseCache
 from compymac.ingestion.pipeline import IngestionPipeline
 
 __all__ = [
     "DocumentChunker",
+    "IngestionJob",
+    "IngestionJobQueue",
     "IngestionPipeline",
+    "JobStatus",
     "LibrarianAgent",
     "OCRClient",
     "OCRResult",
+    "ParseCache",
     "create_librarian_tool_handler",
 ]
@@ -5,10 +5,15 @@ Provides configurable chunking with overlap for context preservation.
 
 Phase 3 Citation Linking: Supports mapping chunks to source chapters
 via chapter_ranges metadata for EPUB citation linking.
+
+Chunking streams: iter_chunks() consumes an iterator of page or chapter texts
+and yields chunks as soon as they are complete, holding only the current
+chunk and the text since the last sentence boundary in memory.
 """
 
 import re
 import uuid
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from typing import Any
 
@@ -24,6 +29,19 @@ class Chunk:
     metadata: dict[str, Any]
 
 
+@dataclass
+class Section:
+    """A piece of a document's text, such as a page or chapter."""
+
+    text: str
+    # Chapter info (href, chapter_title, chapter_index) for citation linking;
+    # its character range is filled in from the section's position
+    chapter: dict[str, Any] | None = None
+    # Document-level metadata learned while parsing (e.g. parser, page_count),
+    # added to every chunk yielded once this section has been read
+    metadata: dict[str, Any] | None = None
+
+
 def find_chapter_for_position(
     char_pos: int,
     chapter_ranges: list[dict[str, Any]],
@@ -103,75 +121,198 @@ class DocumentChunker:
         """
         if not text or not text.strip():
             return []
+        return list(self.iter_chunks([text], doc_id, metadata))
+
+    def iter_chunks(
+        self,
+        sections: Iterable[str | Section],
+        doc_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Iterator[Chunk]:
+        """
+        Chunk a document given as a stream of sections.
+
+        Sections are concatenated as-is (include any separators in them), so
+        the chunks and their character offsets are the same as chunking the
+        joined text with chunk(). Sections carrying chapter info add a chapter
+        range covering themselves, for citation linking; section metadata is
+        merged into the metadata of later chunks (the metadata argument still
+        takes precedence).
+
+        Args:
+            sections: Texts (e.g. pages or chapters) in document order
+            doc_id: Optional document ID for chunk IDs
+            metadata: Optional metadata to include in each chunk
+                      May include 'chapter_ranges' for EPUB citation linking
 
+        Yields:
+            Chunk objects, each as soon as it is complete
+        """
         doc_id = doc_id or str(uuid.uuid4())
         metadata = metadata or {}
+        # Updated in place as sections arrive; copied into each chunk as built
+        chunk_metadata = dict(metadata)
+
+        # Extract chapter_ranges for citation linking (Phase 3); extended as
+        # chapter sections arrive, always before any chunk starting in them
+        chapter_ranges = list(metadata.get("chapter_ranges", []))
+
+        def texts() -> Iterator[str]:
+            position = 0
+            for section in sections:
+                if isinstance(section, Section):
+                    text = section.text
+                    if section.chapter is not None:
+                        chapter_ranges.append({
+                            **section.chapter,
+                            "start_char": position,
+                            "end_char": position + len(text),
+                        })
+                    if section.metadata:
+                        chunk_metadata.update(section.metadata)
+                        chunk_metadata.update(metadata)
+                else:
+                    text = section
+                position += len(text)
+                yield text
 
-        # Extract chapter_ranges for citation linking (Phase 3)
-        chapter_ranges = metadata.get("chapter_ranges", [])
+        yield from self._make_chunks(
+            self._iter_spans(texts()), doc_id, chunk_metadata, chapter_ranges
+        )
 
-        # Split into sentences first
-        sentences = self._split_sentences(text)
+    def split(self, text: str) -> list[tuple[str, int, int]]:
+        """
+        Find chunk boundaries in text.
+
+        Boundaries depend only on the text and the chunker's settings, so they
+        can be cached and turned into chunks for any document ID with
+        build_chunks().
+
+        Args:
+            text: Text to chunk
 
-        # Build chunks from sentences
-        chunks = []
-        current_chunk = ""
-        current_start = 0
+        Returns:
+            List of (content, start_char, end_char) spans
+        """
+        if not text or not text.strip():
+            return []
+        return list(self._iter_spans([text]))
+
+    def _iter_spans(self, texts: Iterable[str]) -> Iterator[tuple[str, int, int]]:
+        """Yield (content, start_char, end_char) chunk spans of the concatenated texts."""
+        # The current chunk as (text, start_char) pieces. A piece's text matches
+        # the concatenated texts character for character from start_char, up to
+        # a collapsed trailing whitespace run, so any suffix of it can be
+        # located too.
+        pieces: list[tuple[str, int]] = []
+        current_len = 0
+        # Leading pieces repeated from the previous chunk as overlap
+        overlap_count = 0
         char_pos = 0
+        # Held back one chunk: a too-small final chunk is merged into it
+        previous: tuple[str, int, int] | None = None
 
-        for sentence in sentences:
+        for sentence, raw_len in self._iter_sentences(texts):
             sentence_len = len(sentence)
 
             # If adding this sentence would exceed chunk size
-            if len(current_chunk) + sentence_len > self.chunk_size and current_chunk:
-                # Build chunk metadata with chapter info if available
-                chunk_metadata = self._build_chunk_metadata(
-                    metadata, doc_id, len(chunks), current_start, chapter_ranges
-                )
-
+            if current_len + sentence_len > self.chunk_size and current_len:
                 # Save current chunk
-                chunks.append(Chunk(
-                    id=f"{doc_id}-{len(chunks)}",
-                    content=current_chunk.strip(),
-                    start_char=current_start,
-                    end_char=char_pos,
-                    metadata=chunk_metadata,
-                ))
+                current_chunk = "".join(text for text, _ in pieces)
+                if previous is not None:
+                    yield previous
+                previous = (current_chunk.strip(), pieces[0][1], char_pos)
 
                 # Start new chunk with overlap
-                overlap_text = self._get_overlap(current_chunk)
-                current_chunk = overlap_text + sentence
-                current_start = char_pos - len(overlap_text)
+                overlap = self._overlap_pieces(pieces, len(self._get_overlap(current_chunk)))
+                pieces = [*overlap, (sentence, char_pos)]
+                overlap_count = len(overlap)
+                current_len = sum(len(text) for text, _ in pieces)
             else:
-                current_chunk += sentence
+                pieces.append((sentence, char_pos))
+                current_len += sentence_len
 
-            char_pos += sentence_len
+            char_pos += raw_len
 
         # Add final chunk if it meets minimum size
-        if current_chunk.strip():
-            if len(current_chunk.strip()) >= self.min_chunk_size or not chunks:
-                chunk_metadata = self._build_chunk_metadata(
-                    metadata, doc_id, len(chunks), current_start, chapter_ranges
-                )
-                chunks.append(Chunk(
-                    id=f"{doc_id}-{len(chunks)}",
-                    content=current_chunk.strip(),
-                    start_char=current_start,
-                    end_char=char_pos,
-                    metadata=chunk_metadata,
-                ))
-            elif chunks:
-                # Merge with previous chunk if too small
-                prev_chunk = chunks[-1]
-                chunks[-1] = Chunk(
-                    id=prev_chunk.id,
-                    content=prev_chunk.content + " " + current_chunk.strip(),
-                    start_char=prev_chunk.start_char,
-                    end_char=char_pos,
-                    metadata=prev_chunk.metadata,
-                )
-
-        return chunks
+        final_chunk = "".join(text for text, _ in pieces).strip()
+        if final_chunk:
+            if len(final_chunk) >= self.min_chunk_size or previous is None:
+                if previous is not None:
+                    yield previous
+                previous = (final_chunk, pieces[0][1], char_pos)
+            else:
+                # Merge with previous chunk if too small (it already holds the overlap)
+                prev_content, prev_start, _ = previous
+                new_text = "".join(text for text, _ in pieces[overlap_count:]).strip()
+                previous = (prev_content + " " + new_text, prev_start, char_pos)
+
+        if previous is not None:
+            yield previous
+
+    @staticmethod
+    def _overlap_pieces(
+        pieces: list[tuple[str, int]],
+        length: int,
+    ) -> list[tuple[str, int]]:
+        """The last length characters of a chunk's pieces, as pieces."""
+        overlap: list[tuple[str, int]] = []
+        for text, start in reversed(pieces):
+            if length <= 0:
+                break
+            if len(text) <= length:
+                overlap.append((text, start))
+            else:
+                skip = len(text) - length
+                overlap.append((text[skip:], start + skip))
+            length -= len(text)
+        overlap.reverse()
+        return overlap
+
+    def build_chunks(
+        self,
+        spans: list[tuple[str, int, int]],
+        doc_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> list[Chunk]:
+        """
+        Turn spans from split() into chunks with IDs and metadata.
+
+        Args:
+            spans: (content, start_char, end_char) spans
+            doc_id: Optional document ID for chunk IDs
+            metadata: Optional metadata to include in each chunk
+                      May include 'chapter_ranges' for EPUB citation linking
+
+        Returns:
+            List of Chunk objects
+        """
+        doc_id = doc_id or str(uuid.uuid4())
+        metadata = metadata or {}
+
+        # Extract chapter_ranges for citation linking (Phase 3)
+        chapter_ranges = metadata.get("chapter_ranges", [])
+
+        return list(self._make_chunks(spans, doc_id, metadata, chapter_ranges))
+
+    def _make_chunks(
+        self,
+        spans: Iterable[tuple[str, int, int]],
+        doc_id: str,
+        metadata: dict[str, Any],
+        chapter_ranges: list[dict[str, Any]],
+    ) -> Iterator[Chunk]:
+        for index, (content, start_char, end_char) in enumerate(spans):
+            yield Chunk(
+                id=f"{doc_id}-{index}",
+                content=content,
+                start_char=start_char,
+                end_char=end_char,
+                # Build chunk metadata with chapter info if available
+                metadata=self._build_chunk_metadata(
+                    metadata, doc_id, index, start_char, chapter_ranges
+                ),
+            )
 
     def _build_chunk_metadata(
         self,
@@ -213,22 +354,42 @@ class DocumentChunker:
 
         return chunk_metadata
 
-    def _split_sentences(self, text: str) -> list[str]:
-        """Split text into sentences."""
-        # Split on sentence boundaries but keep the delimiter
-        parts = self._sentence_pattern.split(text)
-
-        # Reconstruct sentences with their trailing space
-        sentences = []
-        for i, part in enumerate(parts):
-            if part:
-                # Add space back if not the last part
-                if i < len(parts) - 1:
-                    sentences.append(part + " ")
-                else:
-                    sentences.append(part)
+    def _iter_sentences(self, texts: Iterable[str]) -> Iterator[tuple[str, int]]:
+        """
+        Split the concatenated texts into sentences.
+
+        Whitespace after sentence-ending punctuation is collapsed to a single
+        trailing space. Sentences may span texts; only the text since the last
+        sentence boundary is buffered.
 
-        return sentences if sentences else [text]
+        Yields:
+            (sentence, length of the text it covers, whitespace run included)
+        """
+        pending = ""
+        scan_from = 0
+        for text in texts:
+            if not text:
+                continue
+            pending += text
+            next_scan = len(pending)
+            pos = 0
+            for match in self._sentence_pattern.finditer(pending, scan_from):
+                if match.end() == len(pending):
+                    # The whitespace run may continue in the next text
+                    next_scan = match.start()
+                    break
+                yield pending[pos:match.start()] + " ", match.end() - pos
+                pos = match.end()
+            pending = pending[pos:]
+            scan_from = next_scan - pos
+
+        # Split the rest on sentence boundaries, keeping a trailing space
+        pos = 0
+        for match in self._sentence_pattern.finditer(pending, scan_from):
+            yield pending[pos:match.start()] + " ", match.end() - pos
+            pos = match.end()
+        if pos < len(pending):
+            yield pending[pos:], len(pending) - pos
 
     def _get_overlap(self, text: str) -> str:
         """Get overlap text from end of chunk."""
@@ -0,0 +1,326 @@
+"""
+Background ingestion jobs.
+
+Parsing, OCR and embedding a large document takes far longer than an HTTP
+request should. IngestionJobQueue runs each upload as a job on a fixed number
+of worker threads (the concurrency cap), so an upload endpoint can return a
+job ID immediately. CPU-bound PDF page extraction is sent to a process pool
+shared by all jobs (see DocumentParser's executor), keeping it off the server
+process.
+
+The job handler reports progress through a callback, which updates the job,
+notifies listeners (e.g. WebSocket clients) and raises JobCancelledError once
+the job has been cancelled, so cancellation takes effect at the next progress
+report. Queued jobs are cancelled without ever running.
+"""
+
+import functools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between listener notifications for one job's progress
+# (status changes are always notified)
+_NOTIFY_INTERVAL = 0.25
+
+# Queue sentinel telling a worker to exit
+_DONE = object()
+
+
+class JobStatus(str, Enum):
+    """Status of an ingestion job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelledError(Exception):
+    """Raised from a progress report once the job has been cancelled."""
+
+
+@dataclass
+class IngestionJob:
+    """An upload waiting for, or going through, ingestion."""
+    id: str
+    doc_id: str
+    file_path: str
+    filename: str
+    doc_format: str
+    user_id: str = "default"
+    status: JobStatus = JobStatus.QUEUED
+    stage: str = "queued"  # "parsing" | "embedding" | ...
+    pages_parsed: int = 0
+    pages_total: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+    _notified_at: float = field(default=0.0, repr=False)
+
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether cancel() has been called for this job."""
+        return self._cancelled.is_set()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for API responses."""
+        return {
+            "id": self.id,
+            "doc_id": self.doc_id,
+            "filename": self.filename,
+            "doc_format": self.doc_format,
+            "user_id": self.user_id,
+            "status": self.status.value,
+            "stage": self.stage,
+            "pages_parsed": self.pages_parsed,
+            "pages_total": self.pages_total,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# Updates job fields (e.g. report(pages_parsed=3, pages_total=10)); raises
+# JobCancelledError if the job has been cancelled
+ProgressReporter = Callable[..., None]
+JobHandler = Callable[[IngestionJob, ProgressReporter], None]
+JobListener = Callable[[IngestionJob], None]
+
+
+class IngestionJobQueue:
+    """
+    Runs ingestion jobs on a bounded pool of worker threads.
+
+    Thread-safe. Worker threads start on the first submit().
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        max_concurrency: int = 2,
+        parse_workers: int | None = None,
+        max_finished: int = 1000,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            handler: Called as handler(job, report) on a worker thread to
+                ingest the job's file; raising fails the job
+            max_concurrency: Jobs run at once
+            parse_workers: Processes in the shared parsing pool (defaults to
+                the CPU count)
+            max_finished: Finished jobs kept for status queries (oldest
+                dropped first)
+        """
+        self.handler = handler
+        self.max_concurrency = max(1, max_concurrency)
+        self.parse_workers = parse_workers
+        self.max_finished = max_finished
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._pending: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._listeners: list[JobListener] = []
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """The process pool shared by jobs for CPU-bound parsing, created on first use."""
+        with self._lock:
+            # A crashed worker breaks the whole pool; replace it for later jobs
+            if self._pool is None or getattr(self._pool, "_broken", False):
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                # spawn: forking a process that holds threads can deadlock the children
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def submit(
+        self,
+        doc_id: str,
+        file_path: str,
+        filename: str,
+        doc_format: str,
+        user_id: str = "default",
+    ) -> IngestionJob:
+        """
+        Queue a document for ingestion.
+
+        Returns:
+            The queued job
+        """
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            doc_id=doc_id,
+            file_path=file_path,
+            filename=filename,
+            doc_format=doc_format,
+            user_id=user_id,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+            if not self._threads:
+                self._threads = [
+                    threading.Thread(target=self._worker, name=f"ingestion-{i}", daemon=True)
+                    for i in range(self.max_concurrency)
+                ]
+                for thread in self._threads:
+                    thread.start()
+        self._pending.put(job)
+        self._notify(job)
+        return job
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        """Get a job by ID."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, user_id: str | None = None) -> list[IngestionJob]:
+        """All known jobs, oldest first, optionally only one user's."""
+        with self._lock:
+            return [
+                job for job in self._jobs.values()
+                if user_id is None or job.user_id == user_id
+            ]
+
+    def cancel(self, job_id: str) -> IngestionJob | None:
+        """
+        Cancel a job.
+
+        A queued job is cancelled immediately; a running job stops at its
+        next progress report. Finished jobs are left as they are.
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return job
+            job._cancelled.set()
+            if job.status != JobStatus.QUEUED:
+                return job
+            job.status = JobStatus.CANCELLED
+            job.stage = "cancelled"
+            job.finished_at = time.time()
+        self._notify(job)
+        return job
+
+    def add_listener(self, listener: JobListener) -> None:
+        """Call listener(job) whenever a job's status or progress changes."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        """Stop notifying a listener added with add_listener()."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancel queued and running jobs, then stop the workers and process pool.
+
+        Args:
+            wait: Wait for running jobs to stop
+        """
+        for job in self.jobs():
+            self.cancel(job.id)
+        with self._lock:
+            threads, self._threads = self._threads, []
+            pool, self._pool = self._pool, None
+        for _ in threads:
+            self._pending.put(_DONE)
+        if wait:
+            for thread in threads:
+                thread.join()
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _worker(self) -> None:
+        while True:
+            job = self._pending.get()
+            if job is _DONE:
+                return
+            with self._lock:
+                if job.status != JobStatus.QUEUED:
+                    # Cancelled while queued
+                    continue
+                job.status = JobStatus.RUNNING
+                job.stage = "starting"
+                job.started_at = time.time()
+            self._notify(job)
+
+            try:
+                self.handler(job, functools.partial(self._report, job))
+            except JobCancelledError:
+                self._finish(job, JobStatus.CANCELLED)
+            except Exception as e:
+                logger.error(f"Ingestion job {job.id} ({job.filename}) failed: {e}")
+                self._finish(job, JobStatus.FAILED, str(e))
+            else:
+                self._finish(job, JobStatus.COMPLETED)
+
+    def _report(self, job: IngestionJob, **fields: Any) -> None:
+        """Progress callback handed to the handler."""
+        if job.cancel_requested:
+            raise JobCancelledError(f"Ingestion job {job.id} was cancelled")
+        with self._lock:
+            stage_changed = "stage" in fields and fields["stage"] != job.stage
+            for name, value in fields.items():
+                setattr(job, name, value)
+            now = time.monotonic()
+            if not stage_changed and now - job._notified_at < _NOTIFY_INTERVAL:
+                return
+        self._notify(job)
+
+    def _finish(self, job: IngestionJob, status: JobStatus, error: str | None = None) -> None:
+        with self._lock:
+            job.status = status
+            job.stage = status.value
+            job.error = error
+            job.finished_at = time.time()
+        self._notify(job)
+
+    def _notify(self, job: IngestionJob) -> None:
+        with self._lock:
+            job._notified_at = time.monotonic()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.warning(f"Ingestion job listener failed: {e}")
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished (lock held)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -19,6 +19,7 @@ The librarian tool reduces cognitive load on the main agent by consolidating
 import json
 import logging
 import re
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import TYPE_CHECKING, Any
@@ -29,10 +30,12 @@ from compymac.citation_types import (
     PdfCitationLocator,
     TextQuoteSelector,
 )
+from compymac.retrieval.result_cache import QueryResultCache
 
 if TYPE_CHECKING:
     from compymac.llm import LLMClient
     from compymac.storage.library_store import LibraryStore
+    from compymac.trace_store import TraceContext
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +144,8 @@ class LibrarianAgent:
         library_store: "LibraryStore",
         session_id: str,
         llm_client: "LLMClient | None" = None,
+        result_cache: QueryResultCache | None = None,
+        get_trace_context: "Callable[[], TraceContext | None] | None" = None,
     ):
         """
         Initialize the librarian agent.
@@ -149,10 +154,16 @@ class LibrarianAgent:
             library_store: The LibraryStore instance for document access
             session_id: Session ID for source activation tracking
             llm_client: Optional LLM client for answer synthesis
+            result_cache: Cache for search results (a private one if None);
+                share one across agents to bound memory across sessions
+            get_trace_context: Returns the trace context searches are
+                recorded in, if any (e.g. LocalHarness.get_trace_context)
         """
         self.library_store = library_store
         self.session_id = session_id
         self.llm_client = llm_client
+        self.result_cache = result_cache if result_cache is not None else QueryResultCache()
+        self.get_trace_context = get_trace_context
         self._actions_taken: list[str] = []
 
     def _log_action(self, action: str) -> None:
@@ -168,13 +179,54 @@ class LibrarianAgent:
         active_docs = self.library_store.get_active_sources(self.session_id)
         doc_ids = [doc.id for doc in active_docs] if active_docs else None
 
-        results = self.library_store.search_chunks(
-            query=query,
-            doc_ids=doc_ids,
-            top_k=top_k,
-        )
+        # Results are reused until the library changes (or the entry expires)
+        generation_fn = getattr(self.library_store, "generation", None)
+        generation = generation_fn() if generation_fn is not None else None
+        filters = (tuple(sorted(doc_ids)) if doc_ids else None, top_k)
+        cached = None
+        if generation is not None:
+            cached = self.result_cache.get(
+                "library", query, filters, generation, self.session_id
+            )
 
-        return results or []
+        if cached is not None:
+            results = list(cached)
+        else:
+            results = self.library_store.search_chunks(
+                query=query,
+                doc_ids=doc_ids,
+                top_k=top_k,
+            ) or []
+            if generation is not None:
+                self.result_cache.put("library", query, filters, generation, tuple(results))
+
+        self._trace_search(query, top_k, len(results), cache_hit=cached is not None)
+        return results
+
+    def _trace_search(self, query: str, top_k: int, result_count: int, cache_hit: bool) -> None:
+        """Record a search, with the session's result-cache hit rate, in the trace."""
+        trace_ctx = self.get_trace_context() if self.get_trace_context else None
+        if trace_ctx is None:
+            return
+        from compymac.trace_store import SpanKind, SpanStatus
+
+        stats = self.result_cache.stats(self.session_id)
+        trace_ctx.start_span(
+            kind=SpanKind.MEMORY_OPERATION,
+            name="librarian:search",
+            actor_id="librarian",
+            attributes={"query": query, "top_k": top_k, "session_id": self.session_id},
+        )
+        trace_ctx.end_span(
+            status=SpanStatus.OK,
+            additional_attributes={
+                "result_count": result_count,
+                "cache_hit": cache_hit,
+                "session_cache_hits": stats["hits"],
+                "session_cache_lookups": stats["lookups"],
+                "session_cache_hit_rate": stats["hit_rate"],
+            },
+        )
 
     def _list_documents(self, user_id: str = "default") -> list[dict[str, Any]]:
         """List all documents in the library."""
@@ -597,6 +649,8 @@ def create_librarian_tool_handler(
     library_store: "LibraryStore",
     session_id: str,
     llm_client: "LLMClient | None" = None,
+    result_cache: QueryResultCache | None = None,
+    get_trace_context: "Callable[[], TraceContext | None] | None" = None,
 ):
     """
     Create a handler function for the librarian tool.
@@ -608,11 +662,19 @@ def create_librarian_tool_handler(
         library_store: The LibraryStore instance
         session_id: Session ID for source tracking
         llm_client: Optional LLM client for answer synthesis
+        result_cache: Optional search-result cache shared across sessions
+        get_trace_context: Returns the trace context to record searches in
 
     Returns:
         A handler function for the librarian tool
     """
-    agent = LibrarianAgent(library_store, session_id, llm_client)
+    agent = LibrarianAgent(
+        library_store,
+        session_id,
+        llm_client,
+        result_cache=result_cache,
+        get_trace_context=get_trace_context,
+    )
 
     def librarian_handler(
         action: str,
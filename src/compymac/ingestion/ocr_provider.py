@@ -5,6 +5,8 @@ Simple design:
 - Read config from env vars (OCR_BASE_URL, OCR_MODEL, OCR_PROMPT, LLM_API_KEY)
 - Send image to vision model with OCR prompt
 - Return extracted text
+- OCR many pages concurrently (ocr_pages), sharing one rate limiter and
+  retrying each page on rate limits and transient failures
 
 Supports any OpenAI-compatible vision API:
 - Venice.ai (default, Gemma 3 27B)
@@ -13,14 +15,21 @@ Supports any OpenAI-compatible vision API:
 """
 
 import base64
+import logging
 import os
 import re
 import time
+from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Any
 
 import httpx
 
+from compymac.ingestion.page_pipeline import process_pages
+from compymac.rate_limiter import RateLimiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
 # Default OCR prompt - works well with most vision models
 DEFAULT_OCR_PROMPT = """You are an OCR system. Transcribe ALL text visible in this image exactly as it appears.
 
@@ -88,6 +97,7 @@ class OCRClient:
         OCR_BASE_URL: API base URL (default: uses LLM_BASE_URL or Venice.ai)
         OCR_MODEL: Model to use (default: google-gemma-3-27b-it)
         OCR_PROMPT: Custom OCR prompt (optional, uses default if not set)
+        OCR_MAX_CONCURRENCY: Pages OCR'd at once by ocr_pages (default: 4)
         LLM_API_KEY: API key for authentication
     """
 
@@ -102,6 +112,10 @@ class OCRClient:
         api_key: str | None = None,
         prompt: str | None = None,
         timeout: float = 120.0,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        max_concurrency: int | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         """
         Initialize OCR client.
@@ -112,6 +126,12 @@ class OCRClient:
             api_key: API key. Reads from LLM_API_KEY env var.
             prompt: OCR prompt. Reads from OCR_PROMPT or uses default.
             timeout: Request timeout in seconds.
+            max_retries: Attempts per page before giving up.
+            retry_backoff: Base delay before retrying a failed request
+                (doubled each attempt; 429 responses use Retry-After instead).
+            max_concurrency: Pages OCR'd at once by ocr_pages. Reads from
+                OCR_MAX_CONCURRENCY or uses 4.
+            rate_limiter: Limiter shared with other clients of the same API.
         """
         self.base_url = (
             base_url
@@ -139,6 +159,12 @@ class OCRClient:
         )
 
         self.timeout = timeout
+        self.max_retries = max(1, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max(
+            1, max_concurrency or int(os.environ.get("OCR_MAX_CONCURRENCY", 4))
+        )
+        self.rate_limiter = rate_limiter or RateLimiter()
         self._client: httpx.Client | None = None
 
     @property
@@ -182,9 +208,7 @@ class OCRClient:
         }
 
         try:
-            response = self.client.post(f"{self.base_url}/chat/completions", json=payload)
-            response.raise_for_status()
-            data = response.json()
+            data = self._post_with_retries(payload)
 
             text = data["choices"][0]["message"]["content"].strip()
 
@@ -216,6 +240,78 @@ class OCRClient:
                 processing_time_ms=processing_time,
             )
 
+    def ocr_pages(
+        self,
+        pages: Iterable[tuple[int, bytes]],
+        max_queued: int | None = None,
+    ) -> list[OCRResult]:
+        """
+        OCR several pages concurrently.
+
+        Pages are pulled from the iterable only as fast as requests drain,
+        so a generator that renders each page on demand holds at most
+        max_queued rendered images (plus one per request in flight).
+
+        Args:
+            pages: (page_num, image bytes) pairs.
+            max_queued: Rendered pages waiting for a request slot
+                (defaults to max_concurrency).
+
+        Returns:
+            OCRResult per page, in input order.
+        """
+        # ocr_page reports failures as results rather than raising
+        results = process_pages(pages, self.ocr_page, self.max_concurrency, max_queued)
+        return [r for r in results if r is not None]
+
+    def _post_with_retries(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """
+        POST a chat completion, retrying rate limits and transient failures.
+
+        Waits on the shared rate limiter before each attempt. A 429 response
+        backs off every caller for the Retry-After delay; server errors and
+        connection failures are retried with exponential backoff.
+
+        Raises:
+            httpx.HTTPError: If the request fails after max_retries attempts,
+                or with a non-retryable status
+        """
+        last_error: Exception | None = None
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            try:
+                response = self.client.post(f"{self.base_url}/chat/completions", json=payload)
+            except httpx.TransportError as e:
+                last_error = e
+                time.sleep(self.retry_backoff * 2 ** attempt)
+                continue
+
+            if response.status_code == 429:
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"OCR API rate limited; backing off {delay:.1f}s")
+                self.rate_limiter.back_off(delay)
+                last_error = httpx.HTTPStatusError(
+                    "429 Too Many Requests", request=response.request, response=response
+                )
+                continue
+            if response.status_code >= 500:
+                last_error = httpx.HTTPStatusError(
+                    f"{response.status_code} server error",
+                    request=response.request,
+                    response=response,
+                )
+                time.sleep(self.retry_backoff * 2 ** attempt)
+                continue
+
+            response.raise_for_status()
+            result: dict[str, Any] = response.json()
+            return result
+
+        assert last_error is not None
+        raise last_error
+
     def close(self) -> None:
         """Close HTTP client."""
         if self._client:
@@ -0,0 +1,81 @@
+"""
+Pipelined per-page processing for OCR and vision analysis.
+
+Rendering a page and sending it to a vision model are separate stages: the
+caller's thread renders pages (PyMuPDF documents must not be shared between
+threads) and feeds them into a bounded queue, while a fixed number of worker
+threads drain the queue and make the API requests. The bound keeps at most a
+few rendered page images in memory however long the document is, and the
+renderer stays just ahead of the requests instead of waiting for each one.
+"""
+
+import logging
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Queue sentinel telling a worker to exit
+_DONE = object()
+
+
+def process_pages(
+    pages: Iterable[tuple[int, bytes]],
+    analyze: Callable[[bytes, int], R],
+    max_concurrency: int = 4,
+    max_queued: int | None = None,
+) -> list[R | None]:
+    """
+    Run analyze over rendered pages with bounded concurrency.
+
+    Args:
+        pages: (page_num, image bytes) pairs, typically a generator that
+            renders each page as it is pulled
+        analyze: Called as analyze(image, page_num) on a worker thread
+        max_concurrency: Worker threads (requests in flight at once)
+        max_queued: Rendered pages waiting for a worker (defaults to
+            max_concurrency)
+
+    Returns:
+        One result per page, in input order; None where analyze raised
+    """
+    max_concurrency = max(1, max_concurrency)
+    work: queue.Queue = queue.Queue(maxsize=max(1, max_queued or max_concurrency))
+    results: dict[int, R] = {}
+
+    def worker() -> None:
+        while True:
+            item = work.get()
+            if item is _DONE:
+                return
+            index, page_num, image = item
+            try:
+                results[index] = analyze(image, page_num)
+            except Exception as e:
+                logger.warning(f"Analysis of page {page_num} failed: {e}")
+
+    threads = [
+        threading.Thread(target=worker, name=f"page-pipeline-{i}", daemon=True)
+        for i in range(max_concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+
+    count = 0
+    try:
+        for page_num, image in pages:
+            # Blocks while the queue is full, pausing rendering
+            work.put((count, page_num, image))
+            count += 1
+    finally:
+        # Also reached if rendering raises: let the workers finish and exit
+        for _ in threads:
+            work.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    return [results.get(index) for index in range(count)]
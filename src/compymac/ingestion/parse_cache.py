@@ -0,0 +1,301 @@
+"""
+Content-addressed cache of parse artifacts.
+
+Parsing, OCR and navigation extraction dominate ingestion time, and the same
+file is often uploaded or ingested more than once. ParseCache keys the
+artifacts of a file by (SHA-256 of its bytes, parser key) - the parser key
+covers the parser's options, PARSER_VERSION and a fingerprint of the parser
+and chunker source - and stores the ParseResult, the navigation and the
+chunk spans for each chunker configuration. A repeat of an identical file
+skips straight to building chunks for the new document ID.
+
+Entries written by other parser code are deleted when the cache is opened;
+invalidate() drops entries explicitly.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from compymac.ingestion import chunker as chunker_module
+from compymac.ingestion import parsers as parsers_module
+from compymac.ingestion.chunker import Chunk, DocumentChunker
+from compymac.ingestion.parsers import (
+    DocumentParser,
+    ParseResult,
+    ProgressCallback,
+    extract_navigation,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path: Path | str) -> str:
+    """Hex SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.cache
+def code_version() -> str:
+    """PARSER_VERSION plus a fingerprint of the parser and chunker source."""
+    digest = hashlib.sha256()
+    for module in (parsers_module, chunker_module):
+        if module.__file__ is not None:
+            digest.update(Path(module.__file__).read_bytes())
+    return f"{parsers_module.PARSER_VERSION}-{digest.hexdigest()[:12]}"
+
+
+@dataclass
+class ParsedDocument:
+    """Parse artifacts for one file, with chunks built for one document."""
+
+    parse_result: ParseResult
+    chunks: list[Chunk]
+    navigation: list[dict[str, Any]]
+    file_hash: str
+    cached: bool  # Parsing was skipped
+
+
+class ParseCache:
+    """
+    SQLite-backed store of parse artifacts keyed by file content.
+
+    Thread-safe.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file (in-memory if None)
+        """
+        self.path = Path(path).expanduser() if path is not None else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path) if self.path is not None else ":memory:",
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS parses (
+                file_hash TEXT NOT NULL,
+                parser_key TEXT NOT NULL,
+                code_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                navigation TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (file_hash, parser_key)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_spans (
+                file_hash TEXT NOT NULL,
+                parser_key TEXT NOT NULL,
+                chunker_key TEXT NOT NULL,
+                spans TEXT NOT NULL,
+                PRIMARY KEY (file_hash, parser_key, chunker_key)
+            ) WITHOUT ROWID
+        """)
+        # Artifacts from other parser code can never be hit again
+        stale = self._conn.execute(
+            "DELETE FROM parses WHERE code_version != ?", (code_version(),)
+        ).rowcount
+        self._conn.execute(
+            "DELETE FROM chunk_spans WHERE NOT EXISTS (SELECT 1 FROM parses p"
+            " WHERE p.file_hash = chunk_spans.file_hash"
+            " AND p.parser_key = chunk_spans.parser_key)"
+        )
+        self._conn.commit()
+        if stale:
+            logger.info(f"Dropped {stale} cached parses from older parser code")
+
+    def parse(
+        self,
+        file_path: Path | str,
+        parser: DocumentParser,
+        chunker: DocumentChunker,
+        doc_id: str | None = None,
+        doc_format: str | None = None,
+        metadata: dict[str, Any] | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> ParsedDocument:
+        """
+        Parse, extract navigation and chunk a file, reusing cached artifacts.
+
+        Args:
+            file_path: Path to the document
+            parser: Parser to run on a miss (its options are part of the key)
+            chunker: Chunker whose settings select the cached chunk spans
+            doc_id: Document ID for chunk IDs
+            doc_format: "pdf" or "epub" to extract navigation (skipped if None)
+            metadata: Extra metadata for every chunk
+            progress: Passed to parser.parse() on a miss
+
+        Returns:
+            ParsedDocument; cached is True if parsing was skipped
+        """
+        file_path = Path(file_path)
+        file_hash = file_sha256(file_path)
+        parser_key = self._parser_key(parser)
+        chunker_key = f"{chunker.chunk_size}-{chunker.chunk_overlap}-{chunker.min_chunk_size}"
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, navigation FROM parses WHERE file_hash = ? AND parser_key = ?",
+                (file_hash, parser_key),
+            ).fetchone()
+            spans_row = self._conn.execute(
+                "SELECT spans FROM chunk_spans"
+                " WHERE file_hash = ? AND parser_key = ? AND chunker_key = ?",
+                (file_hash, parser_key, chunker_key),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        cached = row is not None
+        if cached:
+            parse_result = ParseResult.from_dict(json.loads(row[0]))
+            # The file may be a copy at another path
+            parse_result.metadata.update(DocumentParser.file_metadata(file_path))
+            navigation = json.loads(row[1]) if row[1] is not None else None
+        else:
+            parse_result = parser.parse(file_path, progress=progress)
+            navigation = None
+
+        new_navigation = False
+        if navigation is None and doc_format is not None:
+            navigation = extract_navigation(file_path, doc_format)
+            new_navigation = True
+
+        spans: list[tuple[str, int, int]]
+        new_spans = spans_row is None
+        if spans_row is not None:
+            spans = [(text, start, end) for text, start, end in json.loads(spans_row[0])]
+        else:
+            spans = chunker.split(parse_result.text)
+
+        if self._cacheable(parse_result):
+            self._store(
+                file_hash, parser_key, chunker_key,
+                parse_result if not cached else None,
+                navigation if new_navigation else None,
+                spans if new_spans else None,
+            )
+
+        chunks = chunker.build_chunks(
+            spans, doc_id, {**parse_result.metadata, **(metadata or {})}
+        )
+        return ParsedDocument(
+            parse_result=parse_result,
+            chunks=chunks,
+            navigation=navigation or [],
+            file_hash=file_hash,
+            cached=cached,
+        )
+
+    def invalidate(self, file_hash: str | None = None) -> int:
+        """
+        Drop cached artifacts for one file, or for every file if None.
+
+        Returns:
+            Number of cached parses removed
+        """
+        with self._lock:
+            if file_hash is None:
+                removed = self._conn.execute("DELETE FROM parses").rowcount
+                self._conn.execute("DELETE FROM chunk_spans")
+            else:
+                removed = self._conn.execute(
+                    "DELETE FROM parses WHERE file_hash = ?", (file_hash,)
+                ).rowcount
+                self._conn.execute("DELETE FROM chunk_spans WHERE file_hash = ?", (file_hash,))
+            self._conn.commit()
+            return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            count: int = self._conn.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+            return count
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counts since the cache was opened."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _parser_key(parser: DocumentParser) -> str:
+        key = f"{code_version()}|{parser.cache_key()}"
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _cacheable(parse_result: ParseResult) -> bool:
+        """Don't keep parses whose OCR failed; a retry may succeed."""
+        return not parse_result.metadata.get("vision_ocr_errors")
+
+    def _store(
+        self,
+        file_hash: str,
+        parser_key: str,
+        chunker_key: str,
+        parse_result: ParseResult | None,
+        navigation: list[dict[str, Any]] | None,
+        spans: list[tuple[str, int, int]] | None,
+    ) -> None:
+        """Write whichever artifacts were newly computed."""
+        with self._lock:
+            if parse_result is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO parses"
+                    " (file_hash, parser_key, code_version, result, navigation, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        file_hash,
+                        parser_key,
+                        code_version(),
+                        json.dumps(parse_result.to_dict(), default=str),
+                        json.dumps(navigation) if navigation is not None else None,
+                        time.time(),
+                    ),
+                )
+            elif navigation is not None:
+                self._conn.execute(
+                    "UPDATE parses SET navigation = ? WHERE file_hash = ? AND parser_key = ?",
+                    (json.dumps(navigation), file_hash, parser_key),
+                )
+            if spans is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chunk_spans"
+                    " (file_hash, parser_key, chunker_key, spans) VALUES (?, ?, ?, ?)",
+                    (file_hash, parser_key, chunker_key, json.dumps(spans)),
+                )
+            self._conn.commit()
@@ -24,11 +24,35 @@ Phase 4 additions (Folder Library):
 - PDF bookmark/outline extraction via get_toc()
 - EPUB chapter navigation extraction via EbookLib
 - Navigation tree structure for document internal navigation
+
+Page-parallel PDF parsing:
+- Each page is classified and extracted in a single get_text() pass
+- Large PDFs are split into page ranges across a process pool, each worker
+  opening its own fitz.Document; results are merged in page order
+
+Streaming: iter_sections() yields a document page by page (or chapter by
+chapter) as it is parsed, for chunking with DocumentChunker.iter_chunks().
+PDF pages are still extracted on the process pool, a few small ranges in
+flight at a time, and each range's scanned pages are OCR'd concurrently
+before its pages are yielded in order.
 """
 
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from compymac.ingestion.chunker import Section
+
 # Try to import PyMuPDF for PDF parsing
 try:
     import fitz  # PyMuPDF
@@ -85,6 +109,20 @@ except ImportError:
     BS4_AVAILABLE = False
     BeautifulSoup = None  # type: ignore[misc, assignment]
 
+logger = logging.getLogger(__name__)
+
+# Bump whenever parsing output for the same file changes; invalidates cached
+# parse artifacts (see parse_cache)
+PARSER_VERSION = 1
+
+# Pages per range when streaming a PDF: small ranges let early pages be
+# chunked while later ones are still being extracted
+_STREAM_RANGE_PAGES = 16
+
+# Called with (pages_parsed, page_count) as PDF pages are extracted; may raise
+# to abort parsing (e.g. when an ingestion job is cancelled)
+ProgressCallback = Callable[[int, int], None]
+
 
 class PDFClassification:
     """Classification of a PDF document type."""
@@ -114,6 +152,16 @@ class PDFClassification:
             "confidence": self.confidence,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PDFClassification":
+        """Create from dictionary."""
+        return cls(
+            doc_type=data["doc_type"],
+            text_pages=data["text_pages"],
+            ocr_required_pages=data["ocr_required_pages"],
+            confidence=data["confidence"],
+        )
+
 
 class TableResult:
     """Result from table extraction."""
@@ -139,6 +187,16 @@ class TableResult:
             "accuracy": self.accuracy,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TableResult":
+        """Create from dictionary."""
+        return cls(
+            page_num=data["page_num"],
+            table_index=data["table_index"],
+            markdown=data["markdown"],
+            accuracy=data["accuracy"],
+        )
+
 
 class ParseResult:
     """Result from parsing a document."""
@@ -157,6 +215,236 @@ class ParseResult:
         self.classification = classification
         self.tables = tables or []
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "text": self.text,
+            "metadata": self.metadata,
+            "format": self.format,
+            "classification": self.classification.to_dict() if self.classification else None,
+            "tables": [table.to_dict() for table in self.tables],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ParseResult":
+        """Create from dictionary."""
+        classification = data.get("classification")
+        return cls(
+            text=data["text"],
+            metadata=data["metadata"],
+            format=data["format"],
+            classification=PDFClassification.from_dict(classification) if classification else None,
+            tables=[TableResult.from_dict(table) for table in data.get("tables", [])],
+        )
+
+
+@dataclass
+class PageExtraction:
+    """Text and classification of one PDF page, from a single extraction pass."""
+    page_num: int  # 1-based
+    text: str
+    needs_ocr: bool
+    seconds: float
+    tesseract_text: str = ""  # Set when Tesseract ran alongside extraction
+
+
+def _classify_page(page: "fitz.Page", text: str) -> bool:
+    """
+    Decide whether a page needs OCR, given its extracted text.
+
+    A page is considered to require OCR if it has very little extractable text
+    relative to its image content, or if it has large images covering most
+    of the page (common for image-based PDFs with text overlays like stamps).
+    """
+    text = text.strip()
+    rect = page.rect
+    page_area = rect.width * rect.height
+
+    # Calculate text density (chars per 1000 sq points)
+    text_density = (len(text) / page_area) * 1000 if page_area > 0 else 0
+
+    # Check for large images that cover significant portion of page
+    for img in page.get_images():
+        # img format: (xref, smask, width, height, bpc, colorspace, alt, name, filter, referencer)
+        img_width = img[2] if len(img) > 2 else 0
+        img_height = img[3] if len(img) > 3 else 0
+        img_area = img_width * img_height
+        # Consider "large" if image covers >30% of page area (scaled by typical DPI ratio)
+        # Images are often stored at higher resolution than page dimensions
+        if img_area > 0 and (img_area / 4) > page_area * 0.3:
+            # Large image covering page = needs OCR, even if there's some text overlay
+            return True
+
+    # Classification logic:
+    # - High text density (>5 chars/1000 sq pts) AND no large images = digital
+    # - Has large images = likely image-based, needs OCR (even with some text overlay)
+    # - Very low text density (<1) = needs OCR
+    if text_density > 5:
+        # Good amount of text relative to page size = digital
+        return False
+    if text_density < 1:
+        # Almost no text = needs OCR
+        return True
+
+    # Ambiguous - check if text is just headers/footers
+    blocks = page.get_text("blocks")
+    # Filter to content area (not top/bottom 10%)
+    content_blocks = [
+        b for b in blocks
+        if b[1] > rect.height * 0.1 and b[3] < rect.height * 0.9
+    ]
+    # Only header/footer text, no real content = needs OCR
+    return len(content_blocks) < 2
+
+
+def _classification_from_pages(pages: list[PageExtraction]) -> PDFClassification:
+    """Summarize per-page OCR decisions as a document classification."""
+    text_pages = [p.page_num for p in pages if not p.needs_ocr]
+    ocr_required_pages = [p.page_num for p in pages if p.needs_ocr]
+
+    # Determine document type
+    if not ocr_required_pages:
+        doc_type = PDFClassification.DIGITAL
+        confidence = 1.0
+    elif not text_pages:
+        doc_type = PDFClassification.IMAGE_BASED
+        confidence = 1.0
+    else:
+        doc_type = PDFClassification.MIXED
+        # Confidence based on ratio of text pages
+        confidence = len(text_pages) / len(pages)
+
+    return PDFClassification(
+        doc_type=doc_type,
+        text_pages=text_pages,
+        ocr_required_pages=ocr_required_pages,
+        confidence=confidence,
+    )
+
+
+def _tesseract_page(page: "fitz.Page") -> str:
+    """
+    Perform OCR on a PDF page using pytesseract.
+
+    Converts the page to an image and runs OCR.
+    """
+    if not TESSERACT_AVAILABLE:
+        return ""
+
+    try:
+        # Render page to image at 300 DPI for better OCR
+        mat = fitz.Matrix(300 / 72, 300 / 72)
+        pix = page.get_pixmap(matrix=mat)
+
+        # Convert to PIL Image
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+        # Run OCR
+        return pytesseract.image_to_string(img)
+    except Exception:
+        # OCR failed, return empty string
+        return ""
+
+
+def _extract_page(doc: "fitz.Document", page_idx: int, run_tesseract: bool) -> PageExtraction:
+    """Classify and extract one page, OCRing it with Tesseract if requested and needed."""
+    started = time.perf_counter()
+    page = doc[page_idx]
+    text = page.get_text()
+    needs_ocr = _classify_page(page, text)
+    tesseract_text = _tesseract_page(page) if needs_ocr and run_tesseract else ""
+    return PageExtraction(
+        page_num=page_idx + 1,
+        text=text,
+        needs_ocr=needs_ocr,
+        seconds=time.perf_counter() - started,
+        tesseract_text=tesseract_text,
+    )
+
+
+def _extract_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    run_tesseract: bool,
+) -> list[PageExtraction]:
+    """Process-pool worker: extract pages [start, end) with its own fitz.Document."""
+    doc = fitz.open(file_path)
+    try:
+        return [_extract_page(doc, page_idx, run_tesseract) for page_idx in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _iter_epub_chapters(book: Any) -> Iterator[Section]:
+    """
+    Yield the non-empty spine documents of an EPUB as chapter sections.
+
+    Each section's text starts with a "--- Chapter N ---" header; its chapter
+    info carries href, chapter_index and chapter_title for citation linking.
+    """
+    chapter_count = 0
+    for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
+        href = item.get_name()
+        soup = BeautifulSoup(item.get_content(), "html.parser")
+        text = soup.get_text(separator="\n", strip=True)
+        if not text:
+            continue
+
+        chapter_count += 1
+
+        # Try to extract chapter title from HTML
+        chapter_title = None
+        title_tag = soup.find(["h1", "h2", "title"])
+        if title_tag:
+            chapter_title = title_tag.get_text(strip=True)
+
+        yield Section(
+            text=f"--- Chapter {chapter_count} ---\n{text}",
+            chapter={
+                "href": href,
+                "chapter_index": chapter_count,
+                "chapter_title": chapter_title,
+            },
+        )
+
+
+def _epub_title_author(book: Any) -> tuple[str | None, str | None]:
+    """Dublin Core title and first creator of an EPUB, if present."""
+    title = None
+    author = None
+    try:
+        title_meta = book.get_metadata("DC", "title")
+        if title_meta:
+            title = title_meta[0][0]
+        author_meta = book.get_metadata("DC", "creator")
+        if author_meta:
+            author = author_meta[0][0]
+    except (IndexError, KeyError):
+        pass
+    return title, author
+
+
+def _tables_text(tables: list[TableResult]) -> str:
+    """Tables as text appended after a PDF's pages."""
+    table_text = "\n\n--- Tables ---\n"
+    for table in tables:
+        table_text += f"\n[Table on Page {table.page_num}]\n{table.markdown}\n"
+    return table_text
+
+
+def _page_ranges(page_count: int, n_ranges: int) -> list[tuple[int, int]]:
+    """Split [0, page_count) into at most n_ranges contiguous, near-equal ranges."""
+    n_ranges = max(1, min(n_ranges, page_count))
+    size, extra = divmod(page_count, n_ranges)
+    ranges = []
+    start = 0
+    for i in range(n_ranges):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
 
 class DocumentParser:
     """
@@ -172,6 +460,9 @@ class DocumentParser:
         use_docling: bool = True,
         use_ocr: bool = True,
         ocr_api_key: str | None = None,
+        workers: int | None = None,
+        parallel_min_pages: int = 32,
+        executor: Executor | None = None,
     ):
         """
         Initialize document parser.
@@ -180,7 +471,19 @@ class DocumentParser:
             use_docling: Whether to use docling for PDF/EPUB parsing
             use_ocr: Whether to use vision-based OCR for complex pages
             ocr_api_key: API key for OCR (uses LLM_API_KEY env var if None)
+            workers: Processes for page-parallel PDF parsing (defaults to the
+                COMPYMAC_PARSE_WORKERS env var, then the CPU count; 1 parses
+                in-process)
+            parallel_min_pages: Smallest PDF worth parsing in parallel
+            executor: Process pool shared with other parsers (e.g. by the
+                ingestion job queue); when set, PDF pages are always extracted
+                on it, keeping the CPU-bound work out of this process
         """
+        if workers is None:
+            workers = int(os.environ.get("COMPYMAC_PARSE_WORKERS", 0)) or os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.parallel_min_pages = parallel_min_pages
+        self.executor = executor
         self.use_docling = use_docling and DOCLING_AVAILABLE
         self.use_ocr = use_ocr and OCR_AVAILABLE
         self._converter = None
@@ -192,12 +495,17 @@ class DocumentParser:
         if self.use_ocr and OCRClient is not None:
             self._ocr_client = OCRClient(api_key=ocr_api_key)
 
-    def parse(self, file_path: Path | str) -> ParseResult:
+    def parse(
+        self,
+        file_path: Path | str,
+        progress: ProgressCallback | None = None,
+    ) -> ParseResult:
         """
         Parse a document file.
 
         Args:
             file_path: Path to the document
+            progress: Called as PDF pages are extracted (see ProgressCallback)
 
         Returns:
             ParseResult with extracted text and metadata
@@ -212,17 +520,12 @@ class DocumentParser:
             raise FileNotFoundError(f"File not found: {file_path}")
 
         suffix = file_path.suffix.lower()
-        metadata = {
-            "filename": file_path.name,
-            "filepath": str(file_path.absolute()),
-            "format": suffix,
-            "size_bytes": file_path.stat().st_size,
-        }
+        metadata = self.file_metadata(file_path)
 
         if suffix == ".txt":
             return self._parse_text(file_path, metadata)
         elif suffix == ".pdf":
-            return self._parse_pdf(file_path, metadata)
+            return self._parse_pdf(file_path, metadata, progress)
         elif suffix == ".epub":
             return self._parse_epub(file_path, metadata)
         elif suffix in (".md", ".markdown"):
@@ -230,6 +533,120 @@ class DocumentParser:
         else:
             raise ValueError(f"Unsupported file format: {suffix}")
 
+    def iter_sections(self, file_path: Path | str) -> Iterator[str | Section]:
+        """
+        Parse a document incrementally, yielding its text in order.
+
+        Joined, the sections equal parse(file_path).text. PDF pages are
+        extracted in parallel like parse() does, but in small ranges yielded
+        as they complete; pages needing OCR are OCR'd concurrently a range at
+        a time. PDF pages and EPUB chapters are yielded as Sections carrying
+        the metadata known up front (parser, page_count, EPUB title and
+        author), and EPUB chapters also carry chapter info. Metadata only
+        known once the whole document is parsed (e.g. PDF classification) is
+        left to parse(). Formats that can't be streamed are parsed whole and
+        yielded as one section.
+
+        Args:
+            file_path: Path to the document
+
+        Yields:
+            Section texts (separators between pages/chapters are yielded as
+            plain strings)
+
+        Raises:
+            ValueError: If file format is not supported
+            FileNotFoundError: If file does not exist
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        suffix = file_path.suffix.lower()
+        if suffix in (".txt", ".md", ".markdown"):
+            with open(file_path, encoding="utf-8") as f:
+                while block := f.read(1 << 20):
+                    yield block
+        elif suffix == ".pdf" and PYMUPDF_AVAILABLE:
+            yield from self._iter_pdf_pages(file_path)
+        elif suffix == ".epub" and EBOOKLIB_AVAILABLE and BS4_AVAILABLE:
+            book = epub.read_epub(str(file_path))
+            title, author = _epub_title_author(book)
+            metadata = {"parser": "ebooklib", "epub_title": title, "epub_author": author}
+            for index, chapter in enumerate(_iter_epub_chapters(book)):
+                if index:
+                    yield "\n\n"
+                chapter.metadata = metadata
+                yield chapter
+        else:
+            yield self.parse(file_path).text
+
+    def _iter_pdf_pages(self, file_path: Path) -> Iterator[str | Section]:
+        """Yield a PDF's pages as parse() formats them, a range at a time."""
+        doc = fitz.open(str(file_path))
+        if doc.is_encrypted:
+            doc.close()
+            raise ValueError("PDF is password-protected. Please provide password.")
+
+        page_count = len(doc)
+        metadata = {"parser": "pymupdf", "page_count": page_count}
+        tesseract_in_extraction = TESSERACT_AVAILABLE and self._ocr_client is None
+        try:
+            first = True
+            for batch in self._iter_page_batches(
+                file_path, doc, page_count, tesseract_in_extraction
+            ):
+                vision_results = self._ocr_pages_with_vision(
+                    doc, [page.page_num for page in batch if page.needs_ocr]
+                )
+                for page in batch:
+                    text = self._page_text(
+                        doc, page, vision_results.get(page.page_num),
+                        tesseract_in_extraction, [], [],
+                    )
+                    if text.strip():
+                        if not first:
+                            yield "\n\n"
+                        yield Section(
+                            text=f"--- Page {page.page_num} ---\n{text}", metadata=metadata
+                        )
+                        first = False
+        finally:
+            doc.close()
+
+        if CAMELOT_AVAILABLE:
+            tables = self._extract_tables(file_path)
+            if tables:
+                yield _tables_text(tables)
+
+    @staticmethod
+    def file_metadata(file_path: Path) -> dict[str, Any]:
+        """Metadata describing the file itself, rather than its content."""
+        return {
+            "filename": file_path.name,
+            "filepath": str(file_path.absolute()),
+            "format": file_path.suffix.lower(),
+            "size_bytes": file_path.stat().st_size,
+        }
+
+    def cache_key(self) -> str:
+        """
+        Identify everything besides file content that affects parse output.
+
+        Used to key cached parse artifacts: parsers with different options or
+        optional backends installed produce different keys.
+        """
+        return json.dumps({
+            "version": PARSER_VERSION,
+            "pymupdf": PYMUPDF_AVAILABLE,
+            "docling": self.use_docling,
+            "camelot": CAMELOT_AVAILABLE,
+            "tesseract": TESSERACT_AVAILABLE,
+            "vision_ocr": self._ocr_client.model if self._ocr_client else None,
+            "ebooklib": EBOOKLIB_AVAILABLE,
+            "bs4": BS4_AVAILABLE,
+        }, sort_keys=True)
+
     def _parse_text(self, file_path: Path, metadata: dict[str, Any]) -> ParseResult:
         """Parse plain text file."""
         text = file_path.read_text(encoding="utf-8")
@@ -239,11 +656,16 @@ class DocumentParser:
             format="text",
         )
 
-    def _parse_pdf(self, file_path: Path, metadata: dict[str, Any]) -> ParseResult:
+    def _parse_pdf(
+        self,
+        file_path: Path,
+        metadata: dict[str, Any],
+        progress: ProgressCallback | None = None,
+    ) -> ParseResult:
         """Parse PDF file using PyMuPDF (preferred) or docling."""
         # Try PyMuPDF first (fast and reliable)
         if PYMUPDF_AVAILABLE:
-            return self._parse_with_pymupdf(file_path, metadata)
+            return self._parse_with_pymupdf(file_path, metadata, progress)
 
         # Fall back to docling if available
         if self.use_docling and self._converter:
@@ -255,7 +677,10 @@ class DocumentParser:
         )
 
     def _parse_with_pymupdf(
-        self, file_path: Path, metadata: dict[str, Any]
+        self,
+        file_path: Path,
+        metadata: dict[str, Any],
+        progress: ProgressCallback | None = None,
     ) -> ParseResult:
         """Parse PDF using PyMuPDF (fitz) with classification, OCR, and vision fallback."""
         doc = fitz.open(str(file_path))
@@ -269,45 +694,39 @@ class DocumentParser:
         vision_analyses: list[dict[str, Any]] = []
         ocr_errors: list[dict[str, Any]] = []  # Track OCR failures for debugging
 
-        # Phase 2: Classify document (digital vs scanned)
-        classification = self._classify_pdf(doc)
+        # Tesseract is only a fallback when vision OCR is configured; otherwise
+        # it runs during extraction, inside the workers
+        tesseract_in_extraction = TESSERACT_AVAILABLE and self._ocr_client is None
+
+        # Phase 2: Classify (digital vs scanned) and extract in one pass per page
+        pages, workers_used = self._extract_pages(
+            file_path, doc, page_count, tesseract_in_extraction, progress
+        )
+        classification = _classification_from_pages(pages)
+
+        # For pages that need OCR, use vision OCR as primary method (not Tesseract)
+        # This is more accurate than Tesseract for most documents
+        vision_results = self._ocr_pages_with_vision(doc, classification.ocr_required_pages)
 
         # Extract text based on classification
         pages_text = []
-        for page_num in range(page_count):
-            page = doc[page_num]
-            text = page.get_text()
-            needs_ocr = (page_num + 1) in classification.ocr_required_pages
-
-            # For pages that need OCR, use vision OCR as primary method (not Tesseract)
-            # This is more accurate than Tesseract for most documents
-            if needs_ocr and self._ocr_client is not None:
-                ocr_result = self._ocr_page_with_vision(doc, page_num)
-                if ocr_result:
-                    if ocr_result.confidence > 0 and ocr_result.text:
-                        # Successful OCR - use the extracted text
-                        vision_analyses.append(ocr_result.to_dict())
-                        pages_text.append(
-                            f"--- Page {page_num + 1} ---\n{ocr_result.text}"
-                        )
-                        continue
-                    elif ocr_result.confidence == 0:
-                        # OCR failed - track the error for debugging
-                        ocr_errors.append({
-                            "page_num": page_num + 1,
-                            "error": ocr_result.text,
-                            "model": ocr_result.model_used,
-                        })
-
-            # Fallback: If page needs OCR and Tesseract is available, try it
-            if needs_ocr and TESSERACT_AVAILABLE:
-                ocr_text = self._ocr_page(doc, page_num)
-                if ocr_text.strip():
-                    text = ocr_text
+        page_timings_ms = []
+        for page in pages:
+            started = time.perf_counter()
+            ocr_result = vision_results.get(page.page_num)
+            text = self._page_text(
+                doc, page, ocr_result, tesseract_in_extraction, vision_analyses, ocr_errors
+            )
 
             # Use whatever text we have (extracted or OCR'd)
             if text.strip():
-                pages_text.append(f"--- Page {page_num + 1} ---\n{text}")
+                pages_text.append(f"--- Page {page.page_num} ---\n{text}")
+            page_seconds = page.seconds
+            if ocr_result:
+                page_seconds += ocr_result.processing_time_ms / 1000
+            page_timings_ms.append(
+                round((page_seconds + time.perf_counter() - started) * 1000, 3)
+            )
 
         # Phase 2: Extract tables if Camelot is available
         tables = []
@@ -320,10 +739,7 @@ class DocumentParser:
 
         # Append table content to text
         if tables:
-            table_text = "\n\n--- Tables ---\n"
-            for table in tables:
-                table_text += f"\n[Table on Page {table.page_num}]\n{table.markdown}\n"
-            full_text += table_text
+            full_text += _tables_text(tables)
 
         return ParseResult(
             text=full_text,
@@ -337,125 +753,234 @@ class DocumentParser:
                 "vision_ocr_results": vision_analyses,
                 "vision_ocr_pages": len(vision_analyses),
                 "vision_ocr_errors": ocr_errors,
+                "parse_workers": workers_used,
+                # Per page, in page order: extraction, classification and OCR
+                # (vision OCR pages overlap, so these can sum to more than wall time)
+                "page_timings_ms": page_timings_ms,
             },
             format="pdf",
             classification=classification,
             tables=tables,
         )
 
-    def _classify_pdf(self, doc: "fitz.Document") -> PDFClassification:
+    def _page_text(
+        self,
+        doc: "fitz.Document",
+        page: PageExtraction,
+        ocr_result: "OCRResult | None",
+        tesseract_in_extraction: bool,
+        vision_analyses: list[dict[str, Any]],
+        ocr_errors: list[dict[str, Any]],
+    ) -> str:
+        """Choose a page's text: vision OCR, then Tesseract, then extracted text."""
+        page_num = page.page_num
+        if ocr_result:
+            if ocr_result.confidence > 0 and ocr_result.text:
+                # Successful OCR - use the extracted text
+                vision_analyses.append(ocr_result.to_dict())
+                return ocr_result.text
+            elif ocr_result.confidence == 0:
+                # OCR failed - track the error for debugging
+                ocr_errors.append({
+                    "page_num": page_num,
+                    "error": ocr_result.text,
+                    "model": ocr_result.model_used,
+                })
+
+        if page.needs_ocr and TESSERACT_AVAILABLE:
+            # Fallback: If page needs OCR and Tesseract is available, try it
+            tesseract_text = (
+                page.tesseract_text if tesseract_in_extraction
+                else self._ocr_page(doc, page_num - 1)
+            )
+            if tesseract_text.strip():
+                return tesseract_text
+
+        return page.text
+
+    def _extract_pages(
+        self,
+        file_path: Path,
+        doc: "fitz.Document",
+        page_count: int,
+        run_tesseract: bool,
+        progress: ProgressCallback | None = None,
+    ) -> tuple[list[PageExtraction], int]:
+        """
+        Classify and extract every page, across a process pool for large PDFs.
+
+        Returns:
+            Page extractions in page order, and the number of processes used
+        """
+        parallel = self.workers > 1 and page_count >= max(2, self.parallel_min_pages)
+        if page_count and (self.executor is not None or parallel):
+            # Several ranges per worker so a run of slow (e.g. OCR) pages
+            # doesn't leave the other workers idle
+            ranges = _page_ranges(page_count, self.workers * 4)
+            workers = min(self.workers, len(ranges))
+            try:
+                if self.executor is not None:
+                    pages = self._extract_on_pool(
+                        self.executor, file_path, ranges, run_tesseract, page_count, progress
+                    )
+                    return pages, workers
+                # spawn: forking a process that holds threads (e.g. the API
+                # server) can deadlock the children
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                ) as pool:
+                    pages = self._extract_on_pool(
+                        pool, file_path, ranges, run_tesseract, page_count, progress
+                    )
+                return pages, workers
+            except (BrokenProcessPool, OSError, pickle.PicklingError) as e:
+                logger.warning(f"Parallel PDF parsing failed, parsing serially: {e}")
+
+        pages = []
+        for page_idx in range(page_count):
+            pages.append(_extract_page(doc, page_idx, run_tesseract))
+            if progress is not None:
+                progress(page_idx + 1, page_count)
+        return pages, 1
+
+    @staticmethod
+    def _extract_on_pool(
+        pool: Executor,
+        file_path: Path,
+        ranges: list[tuple[int, int]],
+        run_tesseract: bool,
+        page_count: int,
+        progress: ProgressCallback | None,
+    ) -> list[PageExtraction]:
+        """Extract page ranges on a process pool, merging results in page order."""
+        pages: list[PageExtraction] = []
+        for batch in DocumentParser._iter_on_pool(
+            pool, file_path, ranges, run_tesseract, max_in_flight=len(ranges)
+        ):
+            pages.extend(batch)
+            if progress is not None:
+                progress(len(pages), page_count)
+        return pages
+
+    @staticmethod
+    def _iter_on_pool(
+        pool: Executor,
+        file_path: Path,
+        ranges: list[tuple[int, int]],
+        run_tesseract: bool,
+        max_in_flight: int,
+    ) -> Iterator[list[PageExtraction]]:
+        """Extract page ranges on a process pool, yielding each range's pages in order."""
+        pending: deque[Future] = deque()
+        remaining = iter(ranges)
+        try:
+            while True:
+                while len(pending) < max_in_flight and (page_range := next(remaining, None)):
+                    start, end = page_range
+                    pending.append(
+                        pool.submit(_extract_page_range, str(file_path), start, end, run_tesseract)
+                    )
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            # If we stop early, don't leave queued ranges occupying the pool
+            for future in pending:
+                future.cancel()
+
+    def _iter_page_batches(
+        self,
+        file_path: Path,
+        doc: "fitz.Document",
+        page_count: int,
+        run_tesseract: bool,
+    ) -> Iterator[list[PageExtraction]]:
         """
-        Classify PDF as digital, image-based, or mixed.
+        Classify and extract pages, yielding them in page order a range at a time.
 
-        A page is considered to require OCR if it has very little extractable text
-        relative to its image content, or if it has large images covering most
-        of the page (common for image-based PDFs with text overlays like stamps).
+        Like _extract_pages(), ranges are extracted on the process pool, but
+        only a few per worker are in flight, so memory stays bounded and early
+        pages are yielded while later ones are extracted. If the pool fails,
+        the remaining pages are extracted in-process.
         """
-        text_pages = []
-        ocr_required_pages = []
-
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text().strip()
-            rect = page.rect
-            page_area = rect.width * rect.height
-
-            # Calculate text density (chars per 1000 sq points)
-            text_density = (len(text) / page_area) * 1000 if page_area > 0 else 0
-
-            # Check for large images that cover significant portion of page
-            image_list = page.get_images()
-            has_large_images = False
-            for img in image_list:
-                # img format: (xref, smask, width, height, bpc, colorspace, alt, name, filter, referencer)
-                img_width = img[2] if len(img) > 2 else 0
-                img_height = img[3] if len(img) > 3 else 0
-                img_area = img_width * img_height
-                # Consider "large" if image covers >30% of page area (scaled by typical DPI ratio)
-                # Images are often stored at higher resolution than page dimensions
-                if img_area > 0 and (img_area / 4) > page_area * 0.3:
-                    has_large_images = True
-                    break
-
-            # Classification logic:
-            # - High text density (>5 chars/1000 sq pts) AND no large images = digital
-            # - Has large images = likely image-based, needs OCR (even with some text overlay)
-            # - Very low text density (<1) = needs OCR
-            if has_large_images:
-                # Large image covering page = needs OCR, even if there's some text overlay
-                ocr_required_pages.append(page_num + 1)
-            elif text_density > 5:
-                # Good amount of text relative to page size = digital
-                text_pages.append(page_num + 1)
-            elif text_density < 1:
-                # Almost no text = needs OCR
-                ocr_required_pages.append(page_num + 1)
-            else:
-                # Ambiguous - check if text is just headers/footers
-                blocks = page.get_text("blocks")
-                # Filter to content area (not top/bottom 10%)
-                content_blocks = [
-                    b for b in blocks
-                    if b[1] > rect.height * 0.1 and b[3] < rect.height * 0.9
-                ]
-                if len(content_blocks) < 2:
-                    # Only header/footer text, no real content = needs OCR
-                    ocr_required_pages.append(page_num + 1)
+        done = 0
+        parallel = self.workers > 1 and page_count >= max(2, self.parallel_min_pages)
+        if page_count and (self.executor is not None or parallel):
+            ranges = _page_ranges(page_count, -(-page_count // _STREAM_RANGE_PAGES))
+            max_in_flight = self.workers * 2
+            try:
+                if self.executor is not None:
+                    for batch in self._iter_on_pool(
+                        self.executor, file_path, ranges, run_tesseract, max_in_flight
+                    ):
+                        done += len(batch)
+                        yield batch
                 else:
-                    text_pages.append(page_num + 1)
-
-        # Determine document type
-        total_pages = len(doc)
-        if not ocr_required_pages:
-            doc_type = PDFClassification.DIGITAL
-            confidence = 1.0
-        elif not text_pages:
-            doc_type = PDFClassification.IMAGE_BASED
-            confidence = 1.0
-        else:
-            doc_type = PDFClassification.MIXED
-            # Confidence based on ratio of text pages
-            confidence = len(text_pages) / total_pages
-
-        return PDFClassification(
-            doc_type=doc_type,
-            text_pages=text_pages,
-            ocr_required_pages=ocr_required_pages,
-            confidence=confidence,
-        )
+                    # spawn: see _extract_pages()
+                    with ProcessPoolExecutor(
+                        max_workers=min(self.workers, len(ranges)),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    ) as pool:
+                        for batch in self._iter_on_pool(
+                            pool, file_path, ranges, run_tesseract, max_in_flight
+                        ):
+                            done += len(batch)
+                            yield batch
+            except (BrokenProcessPool, OSError, pickle.PicklingError) as e:
+                logger.warning(f"Parallel PDF parsing failed, parsing serially: {e}")
+
+        for start in range(done, page_count, _STREAM_RANGE_PAGES):
+            end = min(start + _STREAM_RANGE_PAGES, page_count)
+            yield [_extract_page(doc, page_idx, run_tesseract) for page_idx in range(start, end)]
+
+    def _classify_pdf(self, doc: "fitz.Document") -> PDFClassification:
+        """Classify PDF as digital, image-based, or mixed."""
+        return _classification_from_pages([
+            _extract_page(doc, page_idx, run_tesseract=False) for page_idx in range(len(doc))
+        ])
 
-    def _ocr_page_with_vision(
+    def _ocr_pages_with_vision(
         self,
         doc: "fitz.Document",
-        page_idx: int,
-    ) -> "OCRResult | None":
+        page_nums: list[int],
+    ) -> "dict[int, OCRResult]":
         """
-        Perform OCR on a PDF page using vision-language model.
+        Perform OCR on PDF pages using vision-language model, concurrently.
+
+        Pages are rendered here, one at a time, into a bounded queue that
+        the OCR client drains with concurrent requests.
 
         Args:
             doc: Open PyMuPDF document.
-            page_idx: Page index (0-based).
+            page_nums: Page numbers (1-based) to OCR.
 
         Returns:
-            OCRResult or None if OCR fails.
+            Dict of page number -> OCRResult (missing where rendering failed).
         """
-        if self._ocr_client is None:
-            return None
+        if self._ocr_client is None or not page_nums:
+            return {}
 
+        def rendered_pages() -> Iterator[tuple[int, bytes]]:
+            for page_num in page_nums:
+                page_image = self._render_page(doc, page_num - 1)
+                if page_image is not None:
+                    yield page_num, page_image
+
+        results = self._ocr_client.ocr_pages(rendered_pages())
+        return {result.page_num: result for result in results}
+
+    def _render_page(self, doc: "fitz.Document", page_idx: int) -> bytes | None:
+        """Render a PDF page to PNG bytes for vision OCR."""
         try:
             # Render page to image at 150 DPI (good balance of quality vs size)
             page = doc[page_idx]
             mat = fitz.Matrix(150 / 72, 150 / 72)
             pix = page.get_pixmap(matrix=mat)
-            page_image = pix.tobytes("png")
-
-            # Perform OCR
-            return self._ocr_client.ocr_page(
-                image_bytes=page_image,
-                page_num=page_idx + 1,
-            )
-        except Exception:
-            # OCR failed, return None
+            image: bytes = pix.tobytes("png")
+            return image
+        except Exception as e:
+            logger.warning(f"Failed to render page {page_idx + 1} for OCR: {e}")
             return None
 
     def _ocr_page(self, doc: "fitz.Document", page_num: int) -> str:
@@ -464,24 +989,7 @@ class DocumentParser:
 
         Converts the page to an image and runs OCR.
         """
-        if not TESSERACT_AVAILABLE:
-            return ""
-
-        try:
-            page = doc[page_num]
-            # Render page to image at 300 DPI for better OCR
-            mat = fitz.Matrix(300 / 72, 300 / 72)
-            pix = page.get_pixmap(matrix=mat)
-
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-            # Run OCR
-            text = pytesseract.image_to_string(img)
-            return text
-        except Exception:
-            # OCR failed, return empty string
-            return ""
+        return _tesseract_page(doc[page_num])
 
     def _extract_tables(self, file_path: Path) -> list[TableResult]:
         """
@@ -574,51 +1082,26 @@ class DocumentParser:
         chapter_count = 0
         current_pos = 0
 
-        for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
-            href = item.get_name()
-            soup = BeautifulSoup(item.get_content(), "html.parser")
-            text = soup.get_text(separator="\n", strip=True)
-
-            if text:
-                chapter_count += 1
-                chapter_header = f"--- Chapter {chapter_count} ---\n"
-                chapter_content = chapter_header + text
-
-                # Track chapter range for citation linking
-                chapter_start = current_pos
-                chapter_end = current_pos + len(chapter_content)
-
-                # Try to extract chapter title from HTML
-                chapter_title = None
-                title_tag = soup.find(["h1", "h2", "title"])
-                if title_tag:
-                    chapter_title = title_tag.get_text(strip=True)
-
-                chapter_ranges.append({
-                    "href": href,
-                    "chapter_index": chapter_count,
-                    "chapter_title": chapter_title,
-                    "start_char": chapter_start,
-                    "end_char": chapter_end,
-                })
+        for chapter in _iter_epub_chapters(book):
+            chapter_count += 1
+            chapter_content = chapter.text
+
+            # Track chapter range for citation linking
+            chapter_start = current_pos
+            chapter_end = current_pos + len(chapter_content)
+            chapter_ranges.append({
+                **(chapter.chapter or {}),
+                "start_char": chapter_start,
+                "end_char": chapter_end,
+            })
 
-                chapters_text.append(chapter_content)
-                current_pos = chapter_end + 2  # +2 for "\n\n" separator
+            chapters_text.append(chapter_content)
+            current_pos = chapter_end + 2  # +2 for "\n\n" separator
 
         full_text = "\n\n".join(chapters_text)
 
         # Extract metadata
-        title = None
-        author = None
-        try:
-            title_meta = book.get_metadata("DC", "title")
-            if title_meta:
-                title = title_meta[0][0]
-            author_meta = book.get_metadata("DC", "creator")
-            if author_meta:
-                author = author_meta[0][0]
-        except (IndexError, KeyError):
-            pass
+        title, author = _epub_title_author(book)
 
         return ParseResult(
             text=full_text,
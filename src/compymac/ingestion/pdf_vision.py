@@ -10,15 +10,24 @@ Key features:
 - Diagram and chart description extraction
 - Image content summarization
 - Fallback for pages where OCR fails
+- Concurrent page analysis fed by a bounded render queue, with shared rate limiting
 """
 
 import base64
+import logging
 import os
+import time
+from collections.abc import Iterator
 from dataclasses import dataclass
 from typing import Any
 
 import httpx
 
+from compymac.ingestion.page_pipeline import process_pages
+from compymac.rate_limiter import RateLimiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
 # Try to import PyMuPDF for page rendering
 try:
     import fitz  # PyMuPDF
@@ -68,6 +77,8 @@ class PDFVisionClient:
         model: str = "qwen/qwen2.5-vl-72b-instruct",
         timeout: float = 60.0,
         max_retries: int = 3,
+        max_concurrency: int = 4,
+        rate_limiter: RateLimiter | None = None,
     ):
         """
         Initialize PDF vision client.
@@ -78,12 +89,16 @@ class PDFVisionClient:
             model: Vision-capable model to use.
             timeout: Request timeout in seconds.
             max_retries: Maximum retries for failed requests.
+            max_concurrency: Pages analyzed at once by analyze_pdf_pages.
+            rate_limiter: Limiter shared with other clients of the same API.
         """
         self.api_key = api_key or os.environ.get("LLM_API_KEY", "")
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
         self.max_retries = max_retries
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = rate_limiter or RateLimiter()
         self._client: httpx.Client | None = None
 
     @property
@@ -116,8 +131,6 @@ class PDFVisionClient:
         Returns:
             VisionAnalysisResult with description and detected elements.
         """
-        import time
-
         start_time = time.time()
 
         # Encode image as base64
@@ -158,6 +171,7 @@ class PDFVisionClient:
         # Make API request with retries
         last_error: Exception | None = None
         for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
             try:
                 response = self.client.post(
                     f"{self.base_url}/chat/completions",
@@ -184,8 +198,12 @@ class PDFVisionClient:
             except httpx.HTTPStatusError as e:
                 last_error = e
                 if e.response.status_code == 429:
-                    # Rate limited, wait and retry
-                    time.sleep(2 ** attempt)
+                    # Rate limited: hold every caller for the Retry-After delay
+                    delay = parse_retry_after(e.response.headers.get("Retry-After"))
+                    if delay is None:
+                        delay = 2 ** attempt
+                    logger.warning(f"Vision API rate limited; backing off {delay:.1f}s")
+                    self.rate_limiter.back_off(delay)
                     continue
                 # Other HTTP errors, don't retry
                 break
@@ -214,6 +232,9 @@ class PDFVisionClient:
         """
         Analyze multiple pages from a PDF file.
 
+        Pages are rendered on the calling thread into a bounded queue and
+        analyzed by up to max_concurrency concurrent requests.
+
         Args:
             pdf_path: Path to PDF file.
             pages: List of page numbers to analyze (1-indexed). None = all pages.
@@ -225,29 +246,24 @@ class PDFVisionClient:
         if not PYMUPDF_AVAILABLE:
             return []
 
-        results = []
         doc = fitz.open(pdf_path)
 
-        try:
-            page_nums = pages or list(range(1, len(doc) + 1))
-
-            for page_num in page_nums:
+        def rendered_pages() -> Iterator[tuple[int, bytes]]:
+            for page_num in pages or range(1, len(doc) + 1):
                 if page_num < 1 or page_num > len(doc):
                     continue
 
                 # Render page to image
                 page_image = self._render_page(doc, page_num - 1, dpi)
-                if not page_image:
-                    continue
-
-                # Analyze page
-                result = self.analyze_page(page_image, page_num)
-                results.append(result)
+                if page_image:
+                    yield page_num, page_image
 
+        try:
+            results = process_pages(rendered_pages(), self.analyze_page, self.max_concurrency)
         finally:
             doc.close()
 
-        return results
+        return [r for r in results if r is not None]
 
     def _render_page(
         self,
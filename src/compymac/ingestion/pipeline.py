@@ -2,18 +2,30 @@
 Document Ingestion Pipeline for CompyMac memory system.
 
 Orchestrates: parse → chunk → embed → store
+
+Documents are streamed: chunks are produced as pages are parsed (PDF pages
+still extracted in parallel and OCR'd concurrently, see
+DocumentParser.iter_sections()), and are embedded and stored in rolling
+batches on a background thread while parsing continues, so memory stays
+bounded and early chunks land before parsing ends.
 """
 
-import hashlib
+import itertools
 import time
 import uuid
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from compymac.ingestion.chunker import DocumentChunker
+from compymac.ingestion.chunker import Chunk, DocumentChunker
+from compymac.ingestion.parse_cache import ParseCache, file_sha256
 from compymac.ingestion.parsers import DocumentParser
 from compymac.knowledge_store import KnowledgeStore, MemoryUnit
 
+if TYPE_CHECKING:
+    from compymac.retrieval.embedder import Embedder
+
 
 class IngestionPipeline:
     """
@@ -29,9 +41,11 @@ class IngestionPipeline:
     def __init__(
         self,
         store: KnowledgeStore,
-        embedder: Any | None = None,
+        embedder: "Embedder | None" = None,
         chunker: DocumentChunker | None = None,
         parser: DocumentParser | None = None,
+        parse_cache: ParseCache | None = None,
+        batch_size: int = 64,
     ):
         """
         Initialize ingestion pipeline.
@@ -41,11 +55,16 @@ class IngestionPipeline:
             embedder: Optional embedder for generating embeddings
             chunker: Optional custom chunker (default: DocumentChunker)
             parser: Optional custom parser (default: DocumentParser)
+            parse_cache: Optional cache of parse artifacts, so re-ingesting an
+                identical file skips parsing and chunking
+            batch_size: Chunks embedded and stored together
         """
         self.store = store
         self.embedder = embedder
         self.chunker = chunker or DocumentChunker()
         self.parser = parser or DocumentParser()
+        self.parse_cache = parse_cache
+        self.batch_size = max(1, batch_size)
 
     def ingest(
         self,
@@ -76,45 +95,25 @@ class IngestionPipeline:
         # Generate document ID from file content hash
         doc_id = self._generate_doc_id(file_path)
 
-        # Parse document
-        parse_result = self.parser.parse(file_path)
-
-        # Chunk text
-        chunks = self.chunker.chunk(
-            text=parse_result.text,
-            doc_id=doc_id,
-            metadata={
-                **parse_result.metadata,
-                **metadata,
-            },
-        )
-
-        # Generate embeddings if requested and embedder available
-        embeddings: list[list[float] | None] = [None] * len(chunks)
-        if generate_embeddings and self.embedder is not None:
-            texts = [chunk.content for chunk in chunks]
-            embeddings = self.embedder.embed_batch(texts)
-
-        # Store chunks as memory units
-        memory_units = []
-        for i, chunk in enumerate(chunks):
-            unit = MemoryUnit(
-                id=chunk.id,
-                content=chunk.content,
-                embedding=embeddings[i] if i < len(embeddings) else None,
-                source_type=source_type,
-                source_id=doc_id,
+        chunks: Iterable[Chunk]
+        if self.parse_cache is not None:
+            # Parse and chunk, reusing artifacts of an identical earlier file
+            chunks = self.parse_cache.parse(
+                file_path, self.parser, self.chunker, doc_id=doc_id, metadata=metadata
+            ).chunks
+        else:
+            # Chunk pages/chapters as they are parsed; sections add the parse
+            # metadata known up front (parser, page_count, chapters)
+            chunks = self.chunker.iter_chunks(
+                self.parser.iter_sections(file_path),
+                doc_id=doc_id,
                 metadata={
-                    **chunk.metadata,
-                    "start_char": chunk.start_char,
-                    "end_char": chunk.end_char,
+                    **DocumentParser.file_metadata(file_path),
+                    **metadata,
                 },
-                created_at=time.time(),
             )
-            memory_units.append(unit)
 
-        # Batch store
-        self.store.store_batch(memory_units)
+        self._store_chunks(chunks, doc_id, source_type, generate_embeddings)
 
         return doc_id
 
@@ -149,11 +148,62 @@ class IngestionPipeline:
             metadata=metadata,
         )
 
+        self._store_chunks(chunks, source_id, source_type, generate_embeddings)
+
+        return source_id
+
+    def _store_chunks(
+        self,
+        chunks: Iterable[Chunk],
+        source_id: str,
+        source_type: str,
+        generate_embeddings: bool,
+    ) -> int:
+        """
+        Embed and store chunks in rolling batches.
+
+        Each batch is embedded and stored on a background thread while the
+        next one is produced (e.g. while the parser reads the next pages).
+        If producing chunks fails, the chunks already stored are deleted.
+
+        Returns:
+            Number of chunks stored
+        """
+        stored_ids: list[str] = []
+        chunk_iter = iter(chunks)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending: Future | None = None
+            try:
+                while batch := list(itertools.islice(chunk_iter, self.batch_size)):
+                    if pending is not None:
+                        pending.result()
+                    pending = executor.submit(
+                        self._store_batch, batch, source_type, source_id, generate_embeddings
+                    )
+                    stored_ids.extend(chunk.id for chunk in batch)
+                if pending is not None:
+                    pending.result()
+            except BaseException:
+                if pending is not None:
+                    pending.exception()
+                for unit_id in stored_ids:
+                    self.store.delete(unit_id)
+                raise
+        return len(stored_ids)
+
+    def _store_batch(
+        self,
+        chunks: list[Chunk],
+        source_type: str,
+        source_id: str,
+        generate_embeddings: bool,
+    ) -> None:
+        """Embed (if requested) and store one batch of chunks as memory units."""
         # Generate embeddings if requested and embedder available
-        embeddings: list[list[float] | None] = [None] * len(chunks)
+        embeddings: list[list[float]] = []
         if generate_embeddings and self.embedder is not None:
             texts = [chunk.content for chunk in chunks]
-            embeddings = self.embedder.embed_batch(texts)
+            embeddings = self._embed(self.embedder, texts)
 
         # Store chunks as memory units
         memory_units = []
@@ -176,13 +226,9 @@ class IngestionPipeline:
         # Batch store
         self.store.store_batch(memory_units)
 
-        return source_id
-
     def _generate_doc_id(self, file_path: Path) -> str:
         """Generate document ID from file content hash."""
-        content = file_path.read_bytes()
-        hash_hex = hashlib.sha256(content).hexdigest()[:16]
-        return f"doc-{hash_hex}"
+        return f"doc-{file_sha256(file_path)[:16]}"
 
     def delete_document(self, doc_id: str) -> int:
         """
@@ -208,3 +254,11 @@ class IngestionPipeline:
                 deleted += 1
 
         return deleted
+
+    @staticmethod
+    def _embed(embedder: "Embedder", texts: list[str]) -> list[list[float]]:
+        """Embed chunk texts, first loading any persisted cache entries for them."""
+        warm_cache = getattr(embedder, "warm_cache", None)
+        if warm_cache is not None:
+            warm_cache(texts)
+        return embedder.embed_batch(texts)
@@ -2,36 +2,60 @@
 KnowledgeStore - Persistent storage for factual and working memory.
 
 Provides storage and retrieval of memory units with support for:
-- Keyword search (SQLite LIKE, PostgreSQL tsvector)
-- Vector similarity search (PostgreSQL pgvector)
+- Keyword search (SQLite FTS5 with BM25 ranking, LIKE fallback; PostgreSQL tsvector)
+- Vector similarity search (in-process NumPy index; PostgreSQL pgvector)
 - Hybrid retrieval combining both approaches
 """
 
 import json
+import logging
+import threading
+from collections.abc import Sequence
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from compymac.storage.embedding_codec import decode_embedding, encode_embedding
 from compymac.storage.sqlite_backend import SQLiteBackend
+from compymac.storage.vector_index import IVFIndex, VectorIndex
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class MemoryUnit:
-    """A unit of knowledge stored in the KnowledgeStore."""
+    """
+    A unit of knowledge stored in the KnowledgeStore.
+
+    Embeddings read back from the store are NumPy arrays (read-only views over
+    the stored bytes for float32/float16); callers may pass plain lists.
+    """
 
     id: str
     content: str
-    embedding: list[float] | None
+    embedding: list[float] | np.ndarray | None
     source_type: str
     source_id: str
     metadata: dict[str, Any]
     created_at: float
 
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for storage."""
+    def to_dict(self, embedding_dtype: str = "float32") -> dict[str, Any]:
+        """
+        Convert to dictionary for storage.
+
+        Args:
+            embedding_dtype: Binary encoding for the embedding
+                ("float32", "float16" or "int8")
+        """
+        embedding = _present_embedding(self.embedding)
         return {
             "id": self.id,
             "content": self.content,
-            "embedding": json.dumps(self.embedding) if self.embedding else None,
+            "embedding": (
+                encode_embedding(embedding, embedding_dtype) if embedding is not None else None
+            ),
             "source_type": self.source_type,
             "source_id": self.source_id,
             "metadata": json.dumps(self.metadata),
@@ -41,9 +65,7 @@ class MemoryUnit:
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "MemoryUnit":
         """Create from dictionary."""
-        embedding = data.get("embedding")
-        if embedding and isinstance(embedding, str):
-            embedding = json.loads(embedding)
+        embedding = _embedding_from_column(data.get("embedding"))
 
         metadata = data.get("metadata", "{}")
         if isinstance(metadata, str):
@@ -60,6 +82,46 @@ class MemoryUnit:
         )
 
 
+def _present_embedding(
+    embedding: list[float] | np.ndarray | None,
+) -> list[float] | np.ndarray | None:
+    """The embedding, or None if it is missing or empty (stored as NULL)."""
+    if embedding is None or len(embedding) == 0:
+        return None
+    return embedding
+
+
+def _embedding_from_column(value: Any) -> np.ndarray | None:
+    """Decode a stored embedding without building a Python float list."""
+    if isinstance(value, bytes | memoryview):
+        return decode_embedding(value)
+    if value and isinstance(value, str):
+        # Legacy JSON text, from before embeddings were stored as BLOBs
+        return np.asarray(json.loads(value), dtype=np.float32)
+    return None
+
+
+# Upsert rather than INSERT OR REPLACE: REPLACE deletes the old row without
+# firing delete triggers, which would leave stale entries in the FTS5 index
+_UPSERT_SQL = """
+    INSERT INTO memory_units
+    (id, content, embedding, source_type, source_id, metadata, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        content = excluded.content,
+        embedding = excluded.embedding,
+        source_type = excluded.source_type,
+        source_id = excluded.source_id,
+        metadata = excluded.metadata,
+        created_at = excluded.created_at
+"""
+
+
+def _fts_query(words: list[str]) -> str:
+    """Build an FTS5 MATCH expression OR-ing the query words as quoted terms."""
+    return " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
 @dataclass
 class RetrievalResult:
     """Result from a retrieval query."""
@@ -74,16 +136,49 @@ class KnowledgeStore:
     Storage and retrieval for memory units.
 
     Supports both SQLite (keyword search only) and PostgreSQL (hybrid search).
+    On SQLite builds with FTS5, keyword search runs against an external-content
+    FTS5 index of ``memory_units`` kept in sync by triggers and ranked by BM25.
+
+    Vector search uses an in-process index: exact by default, or an IVFIndex
+    for approximate search over large corpora. An IVF index is persisted next
+    to the SQLite file so its centroids survive restarts.
     """
 
-    def __init__(self, backend: SQLiteBackend | Any):
+    def __init__(
+        self,
+        backend: SQLiteBackend | Any,
+        vector_index: VectorIndex | None = None,
+        index_path: Path | str | None = None,
+        embedding_dtype: str = "float32",
+    ):
         """
         Initialize KnowledgeStore with a storage backend.
 
         Args:
             backend: Storage backend (SQLiteBackend or PostgresBackend)
+            vector_index: Empty index to load embeddings into (exact VectorIndex
+                if None; pass an IVFIndex for approximate search)
+            index_path: File to persist the vector index in (defaults to
+                ``<db>.ivf.npz`` for an IVFIndex on SQLite, otherwise not persisted)
+            embedding_dtype: How embeddings are stored: "float32", or "float16" /
+                "int8" to halve / quarter their size at some precision cost
         """
+        encode_embedding([], embedding_dtype)  # validate early
+        self.embedding_dtype = embedding_dtype
         self.backend = backend
+        self.use_fts = (
+            isinstance(backend, SQLiteBackend) and backend.supports_full_text_search()
+        )
+        if index_path is None and isinstance(vector_index, IVFIndex) and isinstance(
+            backend, SQLiteBackend
+        ):
+            index_path = backend.db_path.with_name(backend.db_path.name + ".ivf.npz")
+        self.index_path = Path(index_path) if index_path is not None else None
+        # Filled from the table on the first vector search, then kept in sync
+        # by store/store_batch/delete/clear
+        self._index = vector_index if vector_index is not None else VectorIndex()
+        self._vector_index: VectorIndex | None = None
+        self._vector_index_lock = threading.Lock()
         self._init_schema()
 
     def _init_schema(self) -> None:
@@ -93,7 +188,7 @@ class KnowledgeStore:
             CREATE TABLE IF NOT EXISTS memory_units (
                 id TEXT PRIMARY KEY,
                 content TEXT NOT NULL,
-                embedding TEXT,
+                embedding BLOB,
                 source_type TEXT NOT NULL,
                 source_id TEXT NOT NULL,
                 metadata TEXT DEFAULT '{}',
@@ -101,11 +196,9 @@ class KnowledgeStore:
             )
         """)
 
-        # Create index for keyword search
-        self.backend.execute("""
-            CREATE INDEX IF NOT EXISTS idx_memory_units_content
-            ON memory_units(content)
-        """)
+        # A B-tree index on content can't serve keyword search; drop it
+        # from databases created before the FTS5 index existed
+        self.backend.execute("DROP INDEX IF EXISTS idx_memory_units_content")
 
         # Create index for source lookup
         self.backend.execute("""
@@ -113,6 +206,132 @@ class KnowledgeStore:
             ON memory_units(source_type, source_id)
         """)
 
+        if isinstance(self.backend, SQLiteBackend):
+            self._init_generation()
+            self._migrate_json_embeddings()
+
+        if self.use_fts:
+            self._init_fts()
+
+    def _init_generation(self) -> None:
+        """Create a counter that every write to memory_units bumps."""
+        self.backend.execute("""
+            CREATE TABLE IF NOT EXISTS knowledge_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        self.backend.execute(
+            "INSERT OR IGNORE INTO knowledge_meta (key, value) VALUES ('generation', 0)"
+        )
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            self.backend.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS memory_units_generation_{event.lower()}
+                AFTER {event} ON memory_units BEGIN
+                    UPDATE knowledge_meta SET value = value + 1 WHERE key = 'generation';
+                END
+            """)
+
+    def _migrate_json_embeddings(self, batch_size: int = 1000) -> None:
+        """
+        One-shot migration of JSON text embeddings to binary BLOBs.
+
+        Databases created before embeddings were binary declare the column
+        TEXT; SQLite stores BLOBs in it unchanged, so only values are rewritten.
+        """
+        if self.backend.fetch_one(
+            "SELECT value FROM knowledge_meta WHERE key = 'embedding_format'"
+        ):
+            return
+
+        converted = 0
+        last_rowid = 0
+        while True:
+            rows = self.backend.fetch_all("""
+                SELECT rowid, id, embedding FROM memory_units
+                WHERE rowid > ? AND typeof(embedding) = 'text'
+                ORDER BY rowid
+                LIMIT ?
+            """, (last_rowid, batch_size))
+            if not rows:
+                break
+            last_rowid = rows[-1]["rowid"]
+            updates = []
+            for row in rows:
+                try:
+                    values = json.loads(row["embedding"])
+                    blob = encode_embedding(values, self.embedding_dtype) if values else None
+                except (ValueError, TypeError):
+                    logger.warning(f"Dropping unparseable embedding for memory unit {row['id']}")
+                    blob = None
+                updates.append((blob, row["id"]))
+            self.backend.execute_many(
+                "UPDATE memory_units SET embedding = ? WHERE id = ?", updates
+            )
+            converted += len(updates)
+
+        self.backend.execute(
+            "INSERT OR REPLACE INTO knowledge_meta (key, value) VALUES ('embedding_format', 1)"
+        )
+        if converted:
+            logger.info(f"Converted {converted} JSON embeddings to binary")
+
+    def generation(self) -> int | None:
+        """
+        Counter that changes whenever memory_units is written.
+
+        Returns:
+            The current generation, or None if the backend doesn't track one
+        """
+        if not isinstance(self.backend, SQLiteBackend):
+            return None
+        row = self.backend.fetch_one(
+            "SELECT value FROM knowledge_meta WHERE key = 'generation'"
+        )
+        return row["value"] if row else None
+
+    def _init_fts(self) -> None:
+        """Create the FTS5 index and its sync triggers, migrating existing rows."""
+        existed = self.backend.fetch_one(
+            "SELECT 1 AS present FROM sqlite_master WHERE name = 'memory_units_fts'"
+        ) is not None
+
+        self.backend.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS memory_units_fts USING fts5(
+                content,
+                content='memory_units',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS memory_units_fts_insert
+            AFTER INSERT ON memory_units BEGIN
+                INSERT INTO memory_units_fts(rowid, content) VALUES (new.rowid, new.content);
+            END
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS memory_units_fts_delete
+            AFTER DELETE ON memory_units BEGIN
+                INSERT INTO memory_units_fts(memory_units_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+            END
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS memory_units_fts_update
+            AFTER UPDATE OF content ON memory_units BEGIN
+                INSERT INTO memory_units_fts(memory_units_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+                INSERT INTO memory_units_fts(rowid, content) VALUES (new.rowid, new.content);
+            END
+        """)
+
+        if not existed:
+            # Migration: index rows written before the FTS5 table existed
+            self.backend.execute(
+                "INSERT INTO memory_units_fts(memory_units_fts) VALUES ('rebuild')"
+            )
+
     def store(self, unit: MemoryUnit) -> None:
         """
         Store a memory unit.
@@ -120,12 +339,8 @@ class KnowledgeStore:
         Args:
             unit: MemoryUnit to store
         """
-        data = unit.to_dict()
-        self.backend.execute("""
-            INSERT OR REPLACE INTO memory_units
-            (id, content, embedding, source_type, source_id, metadata, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
+        data = unit.to_dict(self.embedding_dtype)
+        self.backend.execute(_UPSERT_SQL, (
             data["id"],
             data["content"],
             data["embedding"],
@@ -134,6 +349,7 @@ class KnowledgeStore:
             data["metadata"],
             data["created_at"],
         ))
+        self._index_units([unit])
 
     def store_batch(self, units: list[MemoryUnit]) -> None:
         """
@@ -144,7 +360,7 @@ class KnowledgeStore:
         """
         params_list = []
         for unit in units:
-            data = unit.to_dict()
+            data = unit.to_dict(self.embedding_dtype)
             params_list.append((
                 data["id"],
                 data["content"],
@@ -155,11 +371,8 @@ class KnowledgeStore:
                 data["created_at"],
             ))
 
-        self.backend.execute_many("""
-            INSERT OR REPLACE INTO memory_units
-            (id, content, embedding, source_type, source_id, metadata, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, params_list)
+        self.backend.execute_many(_UPSERT_SQL, params_list)
+        self._index_units(units)
 
     def get(self, unit_id: str) -> MemoryUnit | None:
         """
@@ -198,6 +411,8 @@ class KnowledgeStore:
             "DELETE FROM memory_units WHERE id = ?",
             (unit_id,)
         )
+        if self._vector_index is not None:
+            self._vector_index.remove(unit_id)
         return True
 
     def retrieve(
@@ -211,6 +426,8 @@ class KnowledgeStore:
         Retrieve memory units matching a query.
 
         Uses keyword search for SQLite, hybrid search for PostgreSQL.
+        With FTS5, results are ranked by BM25 and ``score`` is the BM25
+        relevance (higher is better).
 
         Args:
             query: Search query
@@ -233,9 +450,12 @@ class KnowledgeStore:
             where_parts.append("source_id = ?")
             params.append(source_id)
 
+        words = query.lower().split()
+        if words and self.use_fts:
+            return self._retrieve_fts(words, limit, where_parts, params)
+
         # Keyword search using LIKE
         # Split query into words and search for each
-        words = query.lower().split()
         if words:
             word_conditions = []
             for word in words:
@@ -273,6 +493,176 @@ class KnowledgeStore:
         results.sort(key=lambda r: r.score, reverse=True)
         return results
 
+    def _retrieve_fts(
+        self,
+        words: list[str],
+        limit: int,
+        where_parts: list[str],
+        params: list[Any],
+    ) -> list[RetrievalResult]:
+        """Keyword search through the FTS5 index, ranked by BM25."""
+        filters = "".join(f" AND m.{part}" for part in where_parts)
+        rows = self.backend.fetch_all(f"""
+            SELECT m.*, bm25(memory_units_fts) AS bm25_rank
+            FROM memory_units_fts
+            JOIN memory_units m ON m.rowid = memory_units_fts.rowid
+            WHERE memory_units_fts MATCH ?{filters}
+            ORDER BY bm25_rank
+            LIMIT ?
+        """, (_fts_query(words), *params, limit))
+
+        # bm25() is lower-is-better; negate it so higher scores rank first
+        return [
+            RetrievalResult(
+                memory_unit=MemoryUnit.from_dict(row),
+                score=-row["bm25_rank"],
+                match_type="keyword",
+            )
+            for row in rows
+        ]
+
+    def vector_search(
+        self,
+        query_embedding: list[float],
+        limit: int = 10,
+        source_type: str | None = None,
+        source_id: str | None = None,
+    ) -> list[RetrievalResult]:
+        """
+        Retrieve the memory units whose embeddings are most similar to a query.
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum results to return
+            source_type: Optional filter by source type
+            source_id: Optional filter by source ID
+
+        Returns:
+            List of RetrievalResults ordered by cosine similarity
+        """
+        hits = self._get_vector_index().search(query_embedding, limit, source_type, source_id)
+        units = self.get_many([unit_id for unit_id, _ in hits])
+        return [
+            RetrievalResult(memory_unit=units[unit_id], score=score, match_type="vector")
+            for unit_id, score in hits
+            if unit_id in units
+        ]
+
+    def get_many(self, unit_ids: list[str]) -> dict[str, MemoryUnit]:
+        """Get several memory units by ID, keyed by ID. Missing IDs are omitted."""
+        if not unit_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in unit_ids)
+        rows = self.backend.fetch_all(
+            f"SELECT * FROM memory_units WHERE id IN ({placeholders})",
+            tuple(unit_ids),
+        )
+        return {row["id"]: MemoryUnit.from_dict(row) for row in rows}
+
+    @property
+    def vector_index(self) -> VectorIndex:
+        """The populated vector index (loaded on first access)."""
+        return self._get_vector_index()
+
+    def save_vector_index(self) -> bool:
+        """
+        Persist the vector index to index_path.
+
+        Returns:
+            True if saved, False if persistence isn't configured or the index
+            hasn't been loaded
+        """
+        generation = self.generation()
+        if self.index_path is None or self._vector_index is None or generation is None:
+            return False
+        self._vector_index.save(self.index_path, {"generation": generation})
+        return True
+
+    def _get_vector_index(self) -> VectorIndex:
+        """Return the vector index, loading it on first use."""
+        with self._vector_index_lock:
+            if self._vector_index is None:
+                index = self._index
+                # Read the generation first: a write racing the load then only
+                # makes the saved copy look stale, never current
+                generation = self.generation()
+                if self._load_saved_index(index, generation):
+                    self._vector_index = index
+                    return index
+
+                rows = self.backend.fetch_all("""
+                    SELECT id, embedding, source_type, source_id FROM memory_units
+                    WHERE embedding IS NOT NULL
+                """)
+                entries = []
+                for row in rows:
+                    embedding = _embedding_from_column(row["embedding"])
+                    if embedding is not None:
+                        entries.append(
+                            (row["id"], embedding, row["source_type"], row["source_id"])
+                        )
+                self._add_to_index(index, entries)
+                self._vector_index = index
+                if self.index_path is not None and generation is not None:
+                    index.save(self.index_path, {"generation": generation})
+            return self._vector_index
+
+    def _load_saved_index(self, index: VectorIndex, generation: int | None) -> bool:
+        """
+        Load index from index_path if it matches the table.
+
+        A stale IVF file still seeds the index with its trained centroids; the
+        caller then refills the rows from the table.
+        """
+        if self.index_path is None or not self.index_path.exists():
+            return False
+        try:
+            saved = index.load(self.index_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable vector index {self.index_path}: {e}")
+            index.clear()
+            return False
+        if generation is not None and saved.get("generation") == generation:
+            return True
+        index.clear()
+        return False
+
+    def _index_units(self, units: list[MemoryUnit]) -> None:
+        """Mirror stored units into the vector index, if it has been loaded."""
+        index = self._vector_index
+        if index is None:
+            return
+        entries = []
+        for unit in units:
+            # Matches what was stored: empty embeddings are NULL
+            embedding = _present_embedding(unit.embedding)
+            if embedding is None:
+                index.remove(unit.id)
+            else:
+                entries.append((unit.id, embedding, unit.source_type, unit.source_id))
+        self._add_to_index(index, entries)
+
+    @staticmethod
+    def _add_to_index(
+        index: VectorIndex,
+        entries: Sequence[tuple[str, Sequence[float] | np.ndarray, str, str]],
+    ) -> None:
+        entries = [entry for entry in entries if len(entry[1]) > 0]
+        if index.dim is None and entries:
+            index.dim = len(entries[0][1])
+        skipped = [entry for entry in entries if len(entry[1]) != index.dim]
+        if skipped:
+            logger.warning(
+                f"Not indexing {len(skipped)} embeddings whose dimension differs from "
+                f"{index.dim}"
+            )
+            for unit_id, *_ in skipped:
+                index.remove(unit_id)
+            entries = [entry for entry in entries if len(entry[1]) == index.dim]
+        if entries:
+            ids, embeddings, source_types, source_ids = zip(*entries, strict=True)
+            index.add_batch(ids, embeddings, source_types, source_ids)
+
     def retrieve_by_source(
         self,
         source_type: str,
@@ -307,3 +697,5 @@ class KnowledgeStore:
     def clear(self) -> None:
         """Delete all memory units."""
         self.backend.execute("DELETE FROM memory_units")
+        if self._vector_index is not None:
+            self._vector_index.clear()
@@ -1776,6 +1776,7 @@ class LocalHarness(Harness):
             library_store=library_store,
             session_id=session_id,
             llm_client=llm_client,
+            get_trace_context=self.get_trace_context,
         )
 
         # Register the single librarian tool
@@ -3992,7 +3993,7 @@ class LocalHarness(Harness):
             # Initialize store and retriever
             backend = SQLiteBackend(Path(db_path))
             store = KnowledgeStore(backend)
-            retriever = HybridRetriever(store)
+            retriever = HybridRetriever(store, get_trace_context=self.get_trace_context)
 
             # Search
             results = retriever.retrieve(
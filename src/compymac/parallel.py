@@ -28,6 +28,7 @@ from compymac.trace_store import (
     ToolProvenance,
     TraceContext,
     TraceStore,
+    TraceUsage,
 )
 from compymac.types import ToolCall, ToolResult
 
@@ -69,6 +70,7 @@ class ForkedTraceContext:
         self.trace_id = trace_id
         self._parent_span_id = parent_span_id
         self._span_stack: list[str] = []
+        self.usage = TraceUsage(trace_id=trace_id)
 
     @property
     def current_span_id(self) -> str | None:
@@ -107,6 +109,7 @@ class ForkedTraceContext:
         output_artifact_hash: str | None = None,
         error_class: str | None = None,
         error_message: str | None = None,
+        additional_attributes: dict[str, Any] | None = None,
     ) -> None:
         """End the current span."""
         if not self._span_stack:
@@ -120,7 +123,10 @@ class ForkedTraceContext:
             output_artifact_hash=output_artifact_hash,
             error_class=error_class,
             error_message=error_message,
+            additional_attributes=additional_attributes,
         )
+        if additional_attributes:
+            self.usage.record(additional_attributes)
 
     def store_artifact(
         self,
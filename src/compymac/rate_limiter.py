@@ -0,0 +1,66 @@
+"""
+Shared rate limiting for concurrent API clients.
+
+A RateLimiter is shared by every worker talking to one API. Workers call
+acquire() before each request; when any of them is told to back off (HTTP
+429 with Retry-After), back_off() pauses all of them until the deadline,
+rather than each worker discovering the limit separately.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Thread-safe request gate with optional request spacing and shared backoff.
+    """
+
+    def __init__(self, requests_per_second: float | None = None):
+        """
+        Initialize rate limiter.
+
+        Args:
+            requests_per_second: Maximum request rate across all callers
+                (unlimited if None; 429 backoff still applies)
+        """
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self.backoffs = 0
+
+    def acquire(self) -> None:
+        """Block until the caller may send a request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self, seconds: float) -> None:
+        """Hold every caller for at least seconds from now."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.backoffs += 1
@@ -1,13 +1,22 @@
 """
 Retrieval module for CompyMac memory system.
 
-Provides embedding generation and hybrid retrieval capabilities.
+Provides embedding generation (Venice.ai API or a local CPU embedder) and
+hybrid retrieval capabilities, with a query-result cache.
 """
 
-from compymac.retrieval.embedder import VeniceEmbedder
+from compymac.retrieval.embedder import Embedder, VeniceEmbedder, create_embedder
+from compymac.retrieval.embedding_cache import EmbeddingCache
 from compymac.retrieval.hybrid import HybridRetriever
+from compymac.retrieval.local_embedder import HashingEmbedder
+from compymac.retrieval.result_cache import QueryResultCache
 
 __all__ = [
+    "Embedder",
     "VeniceEmbedder",
+    "HashingEmbedder",
+    "create_embedder",
+    "EmbeddingCache",
     "HybridRetriever",
+    "QueryResultCache",
 ]
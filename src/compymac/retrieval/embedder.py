@@ -1,25 +1,99 @@
 """
-Venice.ai Embedder for generating vector embeddings.
+Embedders for generating vector embeddings.
 
-Uses Venice.ai API for embedding generation with caching and rate limiting.
+Defines the Embedder protocol shared by every provider, and VeniceEmbedder,
+which uses the Venice.ai API with caching and rate limiting. A local CPU
+provider lives in local_embedder; create_embedder() picks one by name.
 """
 
 import hashlib
+import logging
 import os
-import time
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Protocol, runtime_checkable
 
 import httpx
 
+from compymac.rate_limiter import RateLimiter, parse_retry_after
+from compymac.retrieval.embedding_cache import EmbeddingCache
+from compymac.retrieval.local_embedder import HashingEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Providers accepted by create_embedder() and the COMPYMAC_EMBEDDER env var
+EMBEDDER_PROVIDERS = ("auto", "venice", "local", "none")
+
+# Rough characters-per-token ratio used to size request batches
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (chars / 4, at least 1)."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def plan_batches(
+    texts: list[str],
+    max_batch_tokens: int,
+    max_batch_size: int,
+) -> list[list[int]]:
+    """
+    Split texts into request batches by estimated token count.
+
+    Batches hold consecutive indices; a text over the token budget on its
+    own gets a batch to itself.
+
+    Returns:
+        List of batches, each a list of indices into texts
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (
+            current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_size
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """
+    Interface for embedding providers.
+
+    Implementations return one vector per text, in input order, and expose
+    the model name so caches and indexes can tell embeddings apart.
+    """
+
+    model: str
+
+    def embed(self, text: str) -> list[float]:
+        """Generate embedding for a single text."""
+        ...
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Generate embeddings for multiple texts."""
+        ...
+
 
 class VeniceEmbedder:
     """
     Embedder that uses Venice.ai API for vector embeddings.
 
     Features:
-    - Single and batch embedding
-    - In-memory caching to avoid redundant API calls
-    - Rate limiting with exponential backoff
+    - Single and batch embedding; large batches are split by token budget
+      and sent concurrently, with results returned in input order
+    - Two-tier caching (bounded in-memory LRU, optional SQLite file) to
+      avoid redundant API calls, including across restarts
+    - Shared rate limiting that honours 429 Retry-After across all workers
     """
 
     def __init__(
@@ -29,6 +103,12 @@ class VeniceEmbedder:
         model: str = "text-embedding-3-small",
         cache_enabled: bool = True,
         max_retries: int = 3,
+        cache_path: Path | str | None = None,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 256,
+        max_concurrency: int = 4,
+        rate_limiter: RateLimiter | None = None,
     ):
         """
         Initialize Venice.ai embedder.
@@ -39,6 +119,14 @@ class VeniceEmbedder:
             model: Embedding model to use
             cache_enabled: Whether to cache embeddings
             max_retries: Maximum retries on rate limit
+            cache_path: SQLite file for the persistent cache tier (defaults to
+                the COMPYMAC_EMBEDDING_CACHE env var; memory-only if unset)
+            cache_max_bytes: Byte budget for the in-memory cache tier
+            max_batch_tokens: Estimated token budget per API request
+            max_batch_size: Maximum texts per API request
+            max_concurrency: Maximum API requests in flight at once
+            rate_limiter: Limiter shared with other clients of the same API
+                (a private one if None)
         """
         self.api_key = api_key or os.environ.get("VENICE_API_KEY")
         self.api_base = api_base or os.environ.get(
@@ -47,14 +135,19 @@ class VeniceEmbedder:
         self.model = model
         self.cache_enabled = cache_enabled
         self.max_retries = max_retries
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = rate_limiter or RateLimiter()
 
         if not self.api_key:
             raise ValueError(
                 "Venice.ai API key required. Set VENICE_API_KEY env var or pass api_key."
             )
 
-        # In-memory cache: hash(text) -> embedding
-        self._cache: dict[str, list[float]] = {}
+        # (model, hash(text)) -> embedding
+        cache_path = cache_path or os.environ.get("COMPYMAC_EMBEDDING_CACHE")
+        self._cache = EmbeddingCache(cache_path, max_memory_bytes=cache_max_bytes)
 
         # HTTP client
         self._client = httpx.Client(
@@ -80,20 +173,7 @@ class VeniceEmbedder:
         Returns:
             List of floats representing the embedding vector
         """
-        # Check cache
-        if self.cache_enabled:
-            cache_key = self._cache_key(text)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
-
-        # Call API
-        embedding = self._call_api([text])[0]
-
-        # Cache result
-        if self.cache_enabled:
-            self._cache[cache_key] = embedding
-
-        return embedding
+        return self.embed_batch([text])[0]
 
     def embed_batch(self, texts: list[str]) -> list[list[float]]:
         """
@@ -113,10 +193,11 @@ class VeniceEmbedder:
         texts_to_embed: list[tuple[int, str]] = []
 
         if self.cache_enabled:
+            keys = [self._cache_key(text) for text in texts]
+            cached = self._cache.get_many(self.model, keys)
             for i, text in enumerate(texts):
-                cache_key = self._cache_key(text)
-                if cache_key in self._cache:
-                    results[i] = self._cache[cache_key]
+                if keys[i] in cached:
+                    results[i] = cached[keys[i]].tolist()
                 else:
                     texts_to_embed.append((i, text))
         else:
@@ -125,20 +206,63 @@ class VeniceEmbedder:
         # Call API for uncached texts
         if texts_to_embed:
             indices, uncached_texts = zip(*texts_to_embed, strict=True)
-            embeddings = self._call_api(list(uncached_texts))
-
+            embeddings = self._embed_uncached(list(uncached_texts))
             for i, embedding in zip(indices, embeddings, strict=True):
                 results[i] = embedding
-                if self.cache_enabled:
-                    cache_key = self._cache_key(texts[i])
-                    self._cache[cache_key] = embedding
 
         return [r for r in results if r is not None]
 
+    def _embed_uncached(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts in token-budgeted batches, concurrently, in input order."""
+        batches = plan_batches(texts, self.max_batch_tokens, self.max_batch_size)
+        results: list[list[float]] = [[] for _ in texts]
+
+        def run(batch: list[int]) -> None:
+            batch_texts = [texts[i] for i in batch]
+            embeddings = self._call_api(batch_texts)
+            for i, embedding in zip(batch, embeddings, strict=True):
+                results[i] = embedding
+            # Cache per batch so a failure later on keeps the work done so far
+            if self.cache_enabled:
+                self._cache.put_many(self.model, [
+                    (self._cache_key(text), embedding)
+                    for text, embedding in zip(batch_texts, embeddings, strict=True)
+                ])
+
+        if len(batches) == 1:
+            run(batches[0])
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list() re-raises the first batch failure
+                list(executor.map(run, batches))
+        return results
+
+    def warm_cache(self, texts: list[str]) -> int:
+        """
+        Load any persisted embeddings for texts into the in-memory cache.
+
+        Call before embedding a large batch (e.g. a document's chunks) so
+        cache lookups are answered from memory in one pass.
+
+        Args:
+            texts: Texts about to be embedded
+
+        Returns:
+            Number of texts whose embeddings are now cached in memory
+        """
+        if not self.cache_enabled or not texts:
+            return 0
+        return self._cache.warm(self.model, [self._cache_key(text) for text in texts])
+
     def _call_api(self, texts: list[str]) -> list[list[float]]:
         """
         Call Venice.ai embeddings API.
 
+        Waits on the shared rate limiter before each attempt. A 429 response
+        backs off every worker for the Retry-After delay (exponential if the
+        header is absent).
+
         Args:
             texts: List of texts to embed
 
@@ -149,51 +273,47 @@ class VeniceEmbedder:
             Exception: If API call fails after retries
         """
         for attempt in range(self.max_retries):
-            try:
-                response = self._client.post(
-                    "/embeddings",
-                    json={
-                        "model": self.model,
-                        "input": texts,
-                    },
-                )
-
-                if response.status_code == 429:
-                    # Rate limited - exponential backoff
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                    continue
-
-                response.raise_for_status()
-                data = response.json()
-
-                # Extract embeddings from response
-                embeddings = []
-                for item in sorted(data["data"], key=lambda x: x["index"]):
-                    embeddings.append(item["embedding"])
-
-                return embeddings
-
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                    continue
-                raise
+            self.rate_limiter.acquire()
+            response = self._client.post(
+                "/embeddings",
+                json={
+                    "model": self.model,
+                    "input": texts,
+                },
+            )
+
+            if response.status_code == 429:
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = 2 ** attempt
+                logger.warning(f"Embedding API rate limited; backing off {delay:.1f}s")
+                self.rate_limiter.back_off(delay)
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+
+            # Extract embeddings from response
+            return [item["embedding"] for item in sorted(data["data"], key=lambda x: x["index"])]
 
         raise Exception(f"Failed to get embeddings after {self.max_retries} retries")
 
     def clear_cache(self) -> None:
-        """Clear the embedding cache."""
+        """Clear the embedding cache (both tiers)."""
         self._cache.clear()
 
     def cache_size(self) -> int:
         """Get number of cached embeddings."""
         return len(self._cache)
 
+    def cache_stats(self) -> dict[str, Any]:
+        """Get cache hit-rate and size metrics."""
+        return self._cache.stats()
+
     def close(self) -> None:
-        """Close the HTTP client."""
+        """Close the HTTP client and the persistent cache."""
         self._client.close()
+        self._cache.close()
 
     def __enter__(self) -> "VeniceEmbedder":
         """Context manager entry."""
@@ -202,3 +322,38 @@ class VeniceEmbedder:
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
         """Context manager exit."""
         self.close()
+
+
+def create_embedder(
+    provider: str | None = None,
+    api_key: str | None = None,
+) -> Embedder | None:
+    """
+    Create an embedder by provider name.
+
+    Args:
+        provider: "venice", "local", "none", or "auto" (Venice when an API key
+            is available, the local embedder otherwise). Defaults to the
+            COMPYMAC_EMBEDDER env var, then "auto".
+        api_key: Venice.ai API key (defaults to VENICE_API_KEY env var)
+
+    Returns:
+        The embedder, or None for "none"
+
+    Raises:
+        ValueError: If the provider is unknown, or "venice" has no API key
+    """
+    provider = (provider or os.environ.get("COMPYMAC_EMBEDDER") or "auto").lower()
+    if provider not in EMBEDDER_PROVIDERS:
+        raise ValueError(
+            f"Unknown embedder provider {provider!r}; expected one of {EMBEDDER_PROVIDERS}"
+        )
+    if provider == "none":
+        return None
+    if provider == "auto":
+        provider = "venice" if api_key or os.environ.get("VENICE_API_KEY") else "local"
+    if provider == "venice":
+        return VeniceEmbedder(api_key=api_key)
+
+    logger.info("Using local HashingEmbedder for embeddings")
+    return HashingEmbedder()
@@ -0,0 +1,208 @@
+"""
+Two-tier embedding cache.
+
+Embeddings are keyed by (model, SHA-256 of the text). The first tier is an
+in-memory LRU bounded by a byte budget; the optional second tier is a SQLite
+file that survives restarts, so re-embedding the same library chunks after a
+deploy is a disk read rather than an API call. Writes go through to both
+tiers; disk hits are promoted into memory.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from compymac.storage.embedding_codec import decode_embedding, encode_embedding
+
+# SQLite's default limit on host parameters is 999 on older builds
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU with a byte budget in front of an optional SQLite store.
+
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent tier (memory-only if None)
+            max_memory_bytes: Byte budget for the in-memory tier
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn: sqlite3.Connection | None = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                ) WITHOUT ROWID
+            """)
+            self._conn.commit()
+
+    def get(self, model: str, text_hash: str) -> np.ndarray | None:
+        """Look up one embedding."""
+        return self.get_many(model, [text_hash]).get(text_hash)
+
+    def get_many(self, model: str, text_hashes: Sequence[str]) -> dict[str, np.ndarray]:
+        """
+        Look up several embeddings, checking memory first and then disk.
+
+        Returns:
+            Dict of text_hash -> embedding for the hashes that were cached
+        """
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for text_hash in dict.fromkeys(text_hashes):
+                vector = self._memory.get((model, text_hash))
+                if vector is None:
+                    missing.append(text_hash)
+                else:
+                    self._memory.move_to_end((model, text_hash))
+                    found[text_hash] = vector
+            self.memory_hits += len(found)
+
+            from_disk = self._read_disk(model, missing)
+            for text_hash, vector in from_disk.items():
+                self._remember((model, text_hash), vector)
+            found.update(from_disk)
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing) - len(from_disk)
+        return found
+
+    def put(self, model: str, text_hash: str, embedding: Sequence[float] | np.ndarray) -> None:
+        """Cache one embedding."""
+        self.put_many(model, [(text_hash, embedding)])
+
+    def put_many(
+        self,
+        model: str,
+        items: Iterable[tuple[str, Sequence[float] | np.ndarray]],
+    ) -> None:
+        """Cache several (text_hash, embedding) pairs in both tiers."""
+        rows = []
+        now = time.time()
+        with self._lock:
+            for text_hash, embedding in items:
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._remember((model, text_hash), vector)
+                if self._conn is not None:
+                    rows.append((model, text_hash, encode_embedding(vector), now))
+            if rows and self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows
+                    )
+
+    def warm(self, model: str, text_hashes: Sequence[str]) -> int:
+        """
+        Promote disk entries for text_hashes into memory ahead of use.
+
+        Doesn't count towards hit-rate metrics.
+
+        Returns:
+            Number of the hashes now held in memory
+        """
+        with self._lock:
+            missing = [h for h in dict.fromkeys(text_hashes) if (model, h) not in self._memory]
+            for text_hash, vector in self._read_disk(model, missing).items():
+                self._remember((model, text_hash), vector)
+            return sum(1 for h in set(text_hashes) if (model, h) in self._memory)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM embeddings")
+
+    def __len__(self) -> int:
+        """Number of distinct cached embeddings (the disk tier holds them all)."""
+        with self._lock:
+            if self._conn is None:
+                return len(self._memory)
+            count: int = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return count
+
+    def stats(self) -> dict[str, Any]:
+        """Hit-rate and size metrics."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "persistent": self._conn is not None,
+            }
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _read_disk(self, model: str, text_hashes: list[str]) -> dict[str, np.ndarray]:
+        if self._conn is None or not text_hashes:
+            return {}
+        found: dict[str, np.ndarray] = {}
+        for start in range(0, len(text_hashes), _LOOKUP_BATCH):
+            batch = text_hashes[start:start + _LOOKUP_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self._conn.execute(
+                f"SELECT text_hash, embedding FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                (model, *batch),
+            )
+            for text_hash, blob in rows:
+                found[text_hash] = decode_embedding(blob)
+        return found
+
+    def _remember(self, key: tuple[str, str], vector: np.ndarray) -> None:
+        """Insert into the memory tier, evicting least-recently-used entries."""
+        cost = vector.nbytes
+        if cost > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += cost
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
@@ -8,10 +8,16 @@ Implements:
 - Optional cross-encoder reranking
 """
 
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from compymac.knowledge_store import KnowledgeStore, MemoryUnit, RetrievalResult
+from compymac.retrieval.embedder import Embedder
+from compymac.retrieval.result_cache import QueryResultCache
+
+if TYPE_CHECKING:
+    from compymac.trace_store import TraceContext
 
 
 @dataclass
@@ -35,26 +41,35 @@ class HybridRetriever:
     def __init__(
         self,
         store: KnowledgeStore,
-        embedder: Any | None = None,
+        embedder: Embedder | None = None,
         rrf_k: int = 60,
         sparse_weight: float = 0.5,
         dense_weight: float = 0.5,
+        result_cache: QueryResultCache | None = None,
+        get_trace_context: "Callable[[], TraceContext | None] | None" = None,
     ):
         """
         Initialize hybrid retriever.
 
         Args:
             store: KnowledgeStore to retrieve from
-            embedder: Optional embedder for dense retrieval (VeniceEmbedder)
+            embedder: Optional embedder for dense retrieval (e.g. VeniceEmbedder
+                or the local HashingEmbedder)
             rrf_k: RRF constant (default 60)
             sparse_weight: Weight for sparse retrieval in final score
             dense_weight: Weight for dense retrieval in final score
+            result_cache: Optional cache of results, invalidated by the
+                store's generation counter (unused if the store has none)
+            get_trace_context: Returns the trace context retrievals are
+                recorded in, if any (e.g. LocalHarness.get_trace_context)
         """
         self.store = store
         self.embedder = embedder
         self.rrf_k = rrf_k
         self.sparse_weight = sparse_weight
         self.dense_weight = dense_weight
+        self.result_cache = result_cache
+        self.get_trace_context = get_trace_context
 
     def retrieve(
         self,
@@ -63,6 +78,7 @@ class HybridRetriever:
         source_type: str | None = None,
         source_id: str | None = None,
         use_dense: bool = True,
+        session_id: str = "default",
     ) -> list[RetrievalResult]:
         """
         Retrieve memory units using hybrid search.
@@ -73,10 +89,79 @@ class HybridRetriever:
             source_type: Optional filter by source type
             source_id: Optional filter by source ID
             use_dense: Whether to use dense retrieval (requires embedder)
+            session_id: Session that result-cache hits are counted against
 
         Returns:
             List of RetrievalResults ordered by relevance
         """
+        result_cache = self.result_cache
+        generation = self.store.generation() if result_cache is not None else None
+        if result_cache is None or generation is None:
+            results = self._retrieve(query, limit, source_type, source_id, use_dense)
+            self._trace_retrieve(query, limit, len(results), None, session_id)
+            return results
+
+        namespace = self._cache_namespace()
+        filters = (limit, source_type, source_id, use_dense and self.embedder is not None)
+        cached = result_cache.get(namespace, query, filters, generation, session_id)
+        if cached is not None:
+            results = list(cached)
+        else:
+            results = self._retrieve(query, limit, source_type, source_id, use_dense)
+            result_cache.put(namespace, query, filters, generation, tuple(results))
+        self._trace_retrieve(query, limit, len(results), cached is not None, session_id)
+        return results
+
+    def _cache_namespace(self) -> str:
+        """
+        Result-cache namespace of the store, since one cache may serve several
+        retrievers. Retrievers over the same database file share entries.
+        """
+        db_path = getattr(self.store.backend, "db_path", None)
+        if db_path is not None:
+            return f"hybrid:{db_path.resolve()}"
+        return f"hybrid:{id(self.store)}"
+
+    def _trace_retrieve(
+        self,
+        query: str,
+        limit: int,
+        result_count: int,
+        cache_hit: bool | None,
+        session_id: str,
+    ) -> None:
+        """Record a retrieval, with the session's result-cache hit rate, in the trace."""
+        trace_ctx = self.get_trace_context() if self.get_trace_context else None
+        if trace_ctx is None:
+            return
+        from compymac.trace_store import SpanKind, SpanStatus
+
+        attributes: dict[str, Any] = {"result_count": result_count}
+        if cache_hit is not None and self.result_cache is not None:
+            stats = self.result_cache.stats(session_id)
+            attributes.update({
+                "cache_hit": cache_hit,
+                "session_cache_hits": stats["hits"],
+                "session_cache_lookups": stats["lookups"],
+                "session_cache_hit_rate": stats["hit_rate"],
+            })
+        trace_ctx.start_span(
+            kind=SpanKind.MEMORY_OPERATION,
+            name="hybrid:retrieve",
+            actor_id="retriever",
+            attributes={"query": query, "limit": limit, "session_id": session_id},
+        )
+        trace_ctx.end_span(status=SpanStatus.OK, additional_attributes=attributes)
+
+    def _retrieve(
+        self,
+        query: str,
+        limit: int,
+        source_type: str | None,
+        source_id: str | None,
+        use_dense: bool,
+    ) -> list[RetrievalResult]:
+        """Run sparse and dense retrieval and fuse the results."""
         # Get sparse results (keyword search)
         sparse_results = self._sparse_retrieve(
             query, limit * 2, source_type, source_id
@@ -124,69 +209,19 @@ class HybridRetriever:
         """
         Perform dense (vector) retrieval.
 
-        Note: This is a simplified implementation that works with SQLite.
-        For production, use PostgreSQL with pgvector for efficient similarity search.
+        Uses the KnowledgeStore's in-process vector index; for very large
+        corpora, use PostgreSQL with pgvector instead.
         """
         if self.embedder is None:
             return []
 
-        # Get query embedding
         query_embedding = self.embedder.embed(query)
-
-        # Get all memory units (inefficient for large datasets - use pgvector in production)
-        # Build WHERE clause for filters
-        where_parts = []
-        params: list[Any] = []
-
-        if source_type:
-            where_parts.append("source_type = ?")
-            params.append(source_type)
-
-        if source_id:
-            where_parts.append("source_id = ?")
-            params.append(source_id)
-
-        where_clause = " AND ".join(where_parts) if where_parts else "1=1"
-
-        sql = f"""
-            SELECT * FROM memory_units
-            WHERE {where_clause} AND embedding IS NOT NULL
-            LIMIT 1000
-        """
-
-        rows = self.store.backend.fetch_all(sql, tuple(params))
-
-        # Calculate cosine similarity for each
-        results = []
-        for row in rows:
-            unit = MemoryUnit.from_dict(row)
-            if unit.embedding is None:
-                continue
-
-            similarity = self._cosine_similarity(query_embedding, unit.embedding)
-            results.append(RetrievalResult(
-                memory_unit=unit,
-                score=similarity,
-                match_type="vector",
-            ))
-
-        # Sort by similarity descending
-        results.sort(key=lambda r: r.score, reverse=True)
-        return results[:limit]
-
-    def _cosine_similarity(self, a: list[float], b: list[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if len(a) != len(b):
-            return 0.0
-
-        dot_product = sum(x * y for x, y in zip(a, b, strict=True))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-
-        return dot_product / (norm_a * norm_b)
+        return self.store.vector_search(
+            query_embedding,
+            limit=limit,
+            source_type=source_type,
+            source_id=source_id,
+        )
 
     def _rrf_merge(
         self,
@@ -0,0 +1,165 @@
+"""
+Local CPU embedder using hashed character n-grams.
+
+HashingEmbedder needs no network, API key or model file. Each text is broken
+into character n-grams (with word boundaries marked by padding spaces), the
+n-grams are weighted by sublinear term frequency and optionally by IDF, and
+the weighted bag is projected to a dense vector with a sparse random
+projection: every n-gram adds its weight, with a pseudo-random sign, to a few
+pseudo-random dimensions. The result is L2-normalized.
+
+All hashing is vectorized with NumPy, so embedding a chunk takes tens of
+microseconds. Embeddings are deterministic for a given configuration and
+seed, which also makes them suitable for offline retrieval benchmarks.
+"""
+
+import hashlib
+from collections.abc import Iterable
+
+import numpy as np
+
+# Multiplier for the rolling polynomial hash of n-gram code points
+_POLY = np.uint64(0x100000001B3)
+# Buckets in the hashed document-frequency table used for IDF
+_DF_BUCKETS = 1 << 20
+
+
+class HashingEmbedder:
+    """
+    Embedder producing hashed character n-gram random projections.
+
+    Implements the Embedder protocol (embed / embed_batch).
+    """
+
+    def __init__(
+        self,
+        dim: int = 384,
+        ngram_range: tuple[int, int] = (3, 5),
+        projections: int = 2,
+        seed: int = 0,
+        lowercase: bool = True,
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Output dimension
+            ngram_range: Smallest and largest character n-gram length
+            projections: Dimensions each n-gram contributes to
+            seed: Seed for the projection hashes
+            lowercase: Whether to lowercase text first
+        """
+        min_n, max_n = ngram_range
+        if not 1 <= min_n <= max_n:
+            raise ValueError(f"Invalid ngram_range {ngram_range}")
+        self.dim = dim
+        self.ngram_range = (min_n, max_n)
+        self.lowercase = lowercase
+        self._base_model = f"hashing-ngram-{min_n}-{max_n}-d{dim}-p{projections}-s{seed}"
+        self.model = self._base_model
+
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing: one pair per projection
+        self._index_mults = rng.integers(1, 2**63, projections, dtype=np.uint64) | np.uint64(1)
+        self._sign_mults = rng.integers(1, 2**63, projections, dtype=np.uint64) | np.uint64(1)
+
+        self._doc_freq: np.ndarray | None = None
+        self._doc_count = 0
+
+    def fit(self, corpus: Iterable[str]) -> "HashingEmbedder":
+        """
+        Learn IDF weights from a corpus; later embeddings down-weight common n-grams.
+
+        The IDF weights change every embedding, so ``model`` gains a
+        fingerprint of them and embeddings cached or stored under the
+        previous name are not mixed with new ones.
+
+        Args:
+            corpus: Representative texts (e.g. a library's chunks)
+
+        Returns:
+            self
+        """
+        doc_freq = np.zeros(_DF_BUCKETS, dtype=np.int64)
+        count = 0
+        for text in corpus:
+            grams = np.unique(self._ngram_hashes(text))
+            np.add.at(doc_freq, (grams % np.uint64(_DF_BUCKETS)).astype(np.intp), 1)
+            count += 1
+        self._doc_freq = doc_freq
+        self._doc_count = count
+        buckets = np.flatnonzero(doc_freq)
+        fingerprint = hashlib.sha256(buckets.tobytes() + doc_freq[buckets].tobytes())
+        self.model = f"{self._base_model}-idf{count}-{fingerprint.hexdigest()[:12]}"
+        return self
+
+    def embed(self, text: str) -> list[float]:
+        """
+        Generate embedding for a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        embedding: list[float] = self.embed_array(text).tolist()
+        return embedding
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        Generate embeddings for multiple texts.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors, in input order
+        """
+        return [self.embed_array(text).tolist() for text in texts]
+
+    def embed_array(self, text: str) -> np.ndarray:
+        """Embed text as a float32 NumPy vector."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        grams, counts = np.unique(self._ngram_hashes(text), return_counts=True)
+        if len(grams) == 0:
+            return vector
+
+        weights = 1.0 + np.log(counts)
+        if self._doc_freq is not None:
+            df = self._doc_freq[(grams % np.uint64(_DF_BUCKETS)).astype(np.intp)]
+            weights *= np.log((1 + self._doc_count) / (1 + df)) + 1.0
+
+        for index_mult, sign_mult in zip(self._index_mults, self._sign_mults, strict=True):
+            positions = ((grams * index_mult) >> np.uint64(32)) % np.uint64(self.dim)
+            signs = np.where((grams * sign_mult) >> np.uint64(63), 1.0, -1.0)
+            vector += np.bincount(
+                positions.astype(np.intp), weights=signs * weights, minlength=self.dim
+            ).astype(np.float32)
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def _ngram_hashes(self, text: str) -> np.ndarray:
+        """64-bit hashes of every character n-gram in text."""
+        if self.lowercase:
+            text = text.lower()
+        # Collapse whitespace and pad so n-grams mark word boundaries
+        text = " " + " ".join(text.split()) + " "
+        points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+        min_n, max_n = self.ngram_range
+        hashes = []
+        for n in range(min_n, max_n + 1):
+            count = len(points) - n + 1
+            if count <= 0:
+                break
+            h = np.full(count, n, dtype=np.uint64)
+            for offset in range(n):
+                h = h * _POLY + points[offset:offset + count]
+            hashes.append(h)
+        if not hashes:
+            return np.zeros(0, dtype=np.uint64)
+        return np.concatenate(hashes)
@@ -0,0 +1,144 @@
+"""
+Query-result cache for retrieval.
+
+Agents often repeat the same search within a session. QueryResultCache keeps
+recent results keyed by (namespace, normalized query, filters, generation),
+where generation is the store's change counter: any write to the store
+produces a new generation, so stale results are never served. Entries also
+expire after a TTL, and the cache is bounded by entry count (LRU). Hits and
+misses are counted per session so hit rates can be reported in traces.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold a query and reduce it to its words, so near-identical queries share a key."""
+    return " ".join(_WORD_RE.findall(query.casefold()))
+
+
+class QueryResultCache:
+    """
+    Bounded, TTL-limited LRU of retrieval results with per-session hit counts.
+
+    Thread-safe. Callers own the cached values; treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float | None = 300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum cached results (least recently used evicted first)
+            ttl_seconds: Lifetime of a cached result (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        # namespace -> newest generation seen, to drop entries from older ones
+        self._generations: dict[str, Hashable] = {}
+        self._session_stats: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        namespace: str,
+        query: str,
+        filters: Hashable,
+        generation: Hashable,
+        session_id: str = "default",
+    ) -> Any | None:
+        """
+        Look up cached results.
+
+        Args:
+            namespace: Kind of search (e.g. "hybrid", "library")
+            query: Query text (normalized before lookup)
+            filters: Hashable summary of every other search parameter
+            generation: The store's current change counter
+            session_id: Session the lookup is counted against
+
+        Returns:
+            The cached results, or None on a miss
+        """
+        key = (namespace, normalize_query(query), filters, generation)
+        with self._lock:
+            self._observe_generation(namespace, generation)
+            stats = self._session_stats.setdefault(session_id, [0, 0])
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                stats[1] += 1
+                return None
+            self._entries.move_to_end(key)
+            stats[0] += 1
+            return entry[1]
+
+    def put(
+        self,
+        namespace: str,
+        query: str,
+        filters: Hashable,
+        generation: Hashable,
+        results: Any,
+    ) -> None:
+        """Cache results for a query (see get() for the key parts)."""
+        if self.max_entries <= 0:
+            return
+        key = (namespace, normalize_query(query), filters, generation)
+        with self._lock:
+            self._observe_generation(namespace, generation)
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result (hit counts are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self, session_id: str | None = None) -> dict[str, Any]:
+        """
+        Hit-rate metrics for one session, or across all sessions if None.
+        """
+        with self._lock:
+            if session_id is None:
+                hits = sum(s[0] for s in self._session_stats.values())
+                misses = sum(s[1] for s in self._session_stats.values())
+            else:
+                hits, misses = self._session_stats.get(session_id, [0, 0])
+            lookups = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "lookups": lookups,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
+
+    def _observe_generation(self, namespace: str, generation: Hashable) -> None:
+        """On a generation change, drop the namespace's entries from older generations."""
+        if self._generations.get(namespace, generation) == generation:
+            self._generations[namespace] = generation
+            return
+        self._generations[namespace] = generation
+        for key in [k for k in self._entries if k[0] == namespace and k[3] != generation]:
+            del self._entries[key]
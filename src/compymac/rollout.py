@@ -103,6 +103,7 @@ class RolloutResult:
     step_count: int = 0
     retry_count: int = 0
     error_count: int = 0
+    total_tokens: int = 0  # LLM tokens used, from the rollout's trace context
     # Workspace snapshot (for inspection)
     workspace_snapshot: dict[str, Any] = field(default_factory=dict)
     # Trace information
@@ -121,6 +122,7 @@ class RolloutResult:
             "step_count": self.step_count,
             "retry_count": self.retry_count,
             "error_count": self.error_count,
+            "total_tokens": self.total_tokens,
             "trace_id": self.trace_id,
             "root_span_id": self.root_span_id,
         }
@@ -375,6 +377,7 @@ class RolloutOrchestrator:
                 step_count=step_count,
                 retry_count=retry_count,
                 error_count=error_count,
+                total_tokens=rollout_trace_context.usage.total_tokens if rollout_trace_context else 0,
                 workspace_snapshot={"goal": workspace.goal, "is_complete": workspace.is_complete},
                 trace_id=rollout_trace_context.trace_id if rollout_trace_context else "",
                 root_span_id=rollout_span_id or "",
@@ -400,6 +403,7 @@ class RolloutOrchestrator:
                 final_result="",
                 error=str(e),
                 execution_time_ms=execution_time_ms,
+                total_tokens=rollout_trace_context.usage.total_tokens if rollout_trace_context else 0,
             )
 
     def _select_best_rollout(
@@ -412,7 +416,8 @@ class RolloutOrchestrator:
         Selection criteria (in order):
         1. Success > Failure
         2. Higher score (fewer errors, retries, faster execution)
-        3. First successful rollout (tie-breaker)
+        3. Fewer LLM tokens used
+        4. First successful rollout (tie-breaker)
         """
         if not results:
             raise ValueError("No rollout results to select from")
@@ -422,8 +427,8 @@ class RolloutOrchestrator:
         failed = [r for r in results if not r.success]
 
         if successful:
-            # Sort by score (descending)
-            successful.sort(key=lambda r: r.score, reverse=True)
+            # Sort by score (descending), then token usage (ascending)
+            successful.sort(key=lambda r: (-r.score, r.total_tokens))
             selected = successful[0]
 
             if len(successful) == 1:
@@ -432,6 +437,12 @@ class RolloutOrchestrator:
             elif successful[0].score > successful[1].score:
                 reason = f"Highest score ({selected.score:.1f}) among {len(successful)} successful rollouts"
                 confidence = min(1.0, (successful[0].score - successful[1].score) / 20.0 + 0.5)
+            elif successful[0].total_tokens < successful[1].total_tokens:
+                reason = (
+                    f"Fewest tokens ({selected.total_tokens}) among "
+                    f"{len(successful)} equally-scored successful rollouts"
+                )
+                confidence = 0.5
             else:
                 reason = f"First among {len(successful)} equally-scored successful rollouts"
                 confidence = 0.5
@@ -5,13 +5,20 @@ This module provides pluggable storage backends for TraceStore and KnowledgeStor
 Supports SQLite (local development) and PostgreSQL (production with pgvector).
 
 Gap 1: Also provides RunStore for session persistence and resume.
-Library: Provides LibraryStore for document collection management.
+Library: Provides LibraryStore for document collection management, and
+SQLiteLibraryStore, which persists it.
+Artifacts: Provides PackedArtifactStore, a compressed pack-file ArtifactStore backend.
+Vectors: Provides VectorIndex (exact) and IVFIndex (approximate), in-process
+NumPy indexes for dense retrieval.
 """
 
+from compymac.storage.artifact_pack import PackedArtifactStore
 from compymac.storage.backend import StorageBackend
 from compymac.storage.library_store import DocumentStatus, LibraryDocument, LibraryStore
 from compymac.storage.run_store import RunMetadata, RunStatus, RunStore, SavedRun
 from compymac.storage.sqlite_backend import SQLiteBackend
+from compymac.storage.sqlite_library_store import SQLiteLibraryStore
+from compymac.storage.vector_index import IVFIndex, VectorIndex
 
 # PostgresBackend is optional - requires psycopg2
 try:
@@ -25,8 +32,12 @@ try:
         "RunMetadata",
         "SavedRun",
         "LibraryStore",
+        "SQLiteLibraryStore",
         "LibraryDocument",
         "DocumentStatus",
+        "PackedArtifactStore",
+        "VectorIndex",
+        "IVFIndex",
     ]
 except ImportError:
     __all__ = [
@@ -37,6 +48,10 @@ except ImportError:
         "RunMetadata",
         "SavedRun",
         "LibraryStore",
+        "SQLiteLibraryStore",
         "LibraryDocument",
         "DocumentStatus",
+        "PackedArtifactStore",
+        "VectorIndex",
+        "IVFIndex",
     ]
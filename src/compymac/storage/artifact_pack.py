@@ -0,0 +1,665 @@
+"""
+PackedArtifactStore - compressed, chunked backend for TraceStore artifacts.
+
+The default ArtifactStore writes one file per artifact, which wastes inodes
+when a run produces millions of small JSON payloads and forces large
+Playwright traces and videos to be read fully into memory. This backend
+instead:
+
+- Appends artifacts to a small number of pack files (rolled at a size limit)
+  and records their locations in a SQLite index next to the packs
+- Compresses each chunk with zlib or zstd at a configurable level, keeping
+  the raw bytes when compression does not help
+- Splits large blobs into content-defined chunks (gear rolling hash), so
+  near-identical traces and videos share most of their stored bytes
+- Serves artifacts through a seekable streaming reader with range reads
+
+Artifact hashes are unchanged (SHA-256 of the full content), so TraceStore
+rows, provenance and delta-encoded LLM inputs work identically on top of it.
+Loose files written by the default backend under the same directory remain
+readable, which allows switching an existing store over in place.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import io
+import sqlite3
+import threading
+import weakref
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, cast
+
+import numpy as np
+
+from compymac.trace_store import (
+    DELTA_MAGIC,
+    Artifact,
+    ArtifactHashCache,
+    ArtifactStore,
+    _is_text_content,
+)
+
+# zstandard is optional - zlib is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment, unused-ignore]
+
+COMPRESSION_CODECS = ("zlib", "zstd", "none")
+DEFAULT_COMPRESSION_LEVELS = {"zlib": 6, "zstd": 3, "none": 0}
+
+# One gear value per byte value for the content-defined chunker. Derived from
+# SHA-256 so chunk boundaries are stable across processes and versions.
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "big") for i in range(256)]
+_MASK_64 = (1 << 64) - 1
+
+
+_GEAR_ARRAY = np.array(_GEAR, dtype=np.uint64)
+# Positions hashed per vectorized pass while looking for a cut point
+_SCAN_BLOCK = 64 * 1024
+
+
+def _cut_point(buf: bytes | bytearray, min_size: int, max_size: int, mask: int) -> int:
+    """
+    Return the length of the next content-defined chunk at the start of buf.
+
+    Equivalent to rolling ``h = (h << 1) + gear[byte]`` over bytes from
+    ``min_size`` on and cutting after the first byte where ``h & mask`` is
+    zero. Every byte is shifted out of the 64-bit hash after 64 steps, so
+    each position only depends on the 64 bytes before it and a whole block
+    of positions can be hashed at once with NumPy.
+    """
+    n = len(buf)
+    if n <= min_size:
+        return n
+    end = min(n, max_size)
+    data = np.frombuffer(buf, dtype=np.uint8, count=end)
+    np_mask = np.uint64(mask)
+    for block_start in range(min_size, end, _SCAN_BLOCK):
+        block_end = min(block_start + _SCAN_BLOCK, end)
+        lo = max(min_size, block_start - 63)
+        h = _GEAR_ARRAY[data[lo:block_end]]
+        shift = 1
+        while shift < 64:
+            h[shift:] += h[:-shift] << np.uint64(shift)
+            shift *= 2
+        hits = np.flatnonzero((h[block_start - lo:] & np_mask) == 0)
+        if hits.size:
+            return block_start + int(hits[0]) + 1
+    return end
+
+
+def cdc_chunks(
+    stream: BinaryIO,
+    min_size: int = 32 * 1024,
+    avg_size: int = 128 * 1024,
+    max_size: int = 512 * 1024,
+) -> Iterator[bytes]:
+    """
+    Split a stream into content-defined chunks.
+
+    Boundaries are placed where the top bits of a gear rolling hash are zero,
+    so inserting or removing bytes only moves the chunks around the edit.
+    At most ``max_size`` bytes are buffered at a time.
+    """
+    bits = max(1, avg_size.bit_length() - 1)
+    mask = ((1 << bits) - 1) << (64 - bits)
+    buf = bytearray()
+    eof = False
+    while True:
+        while not eof and len(buf) < max_size:
+            block = stream.read(max_size)
+            if not block:
+                eof = True
+            else:
+                buf += block
+        if not buf:
+            return
+        cut = _cut_point(buf, min_size, max_size, mask)
+        yield bytes(buf[:cut])
+        del buf[:cut]
+
+
+@dataclass
+class _ChunkLocation:
+    """Where one chunk of an artifact lives inside the pack files."""
+
+    raw_offset: int
+    raw_len: int
+    pack_id: int
+    pack_offset: int
+    stored_len: int
+    codec: str
+
+
+class PackedArtifactReader(io.RawIOBase):
+    """Seekable read-only view over a chunked, packed artifact."""
+
+    def __init__(self, store: PackedArtifactStore, chunks: list[_ChunkLocation]):
+        super().__init__()
+        self._store = store
+        self._chunks = chunks
+        self._offsets = [c.raw_offset for c in chunks]
+        self._size = chunks[-1].raw_offset + chunks[-1].raw_len if chunks else 0
+        self._pos = 0
+        self._cached_index = -1
+        self._cached_data = b""
+        self._packs: dict[int, BinaryIO] = {}
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self._pos < self._size:
+            index = bisect.bisect_right(self._offsets, self._pos) - 1
+            chunk = self._chunks[index]
+            data = self._chunk_data(index)
+            start = self._pos - chunk.raw_offset
+            n = min(len(view) - written, chunk.raw_len - start)
+            view[written:written + n] = data[start:start + n]
+            written += n
+            self._pos += n
+        return written
+
+    def readall(self) -> bytes:
+        parts = []
+        while self._pos < self._size:
+            index = bisect.bisect_right(self._offsets, self._pos) - 1
+            chunk = self._chunks[index]
+            parts.append(self._chunk_data(index)[self._pos - chunk.raw_offset:])
+            self._pos = chunk.raw_offset + chunk.raw_len
+        return b"".join(parts)
+
+    def close(self) -> None:
+        for f in self._packs.values():
+            f.close()
+        self._packs.clear()
+        super().close()
+
+    def _chunk_data(self, index: int) -> bytes:
+        if index != self._cached_index:
+            chunk = self._chunks[index]
+            f = self._packs.get(chunk.pack_id)
+            if f is None:
+                f = self._store._pack_path(chunk.pack_id).open("rb")
+                self._packs[chunk.pack_id] = f
+            f.seek(chunk.pack_offset)
+            self._cached_data = _decompress(chunk.codec, f.read(chunk.stored_len))
+            self._cached_index = index
+        return self._cached_data
+
+
+def _compressor(codec: str, level: int) -> Any:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level)
+    return None
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "none":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Artifact chunk is zstd-compressed but zstandard is not installed")
+        raw: bytes = zstandard.ZstdDecompressor().decompress(data)
+        return raw
+    raise ValueError(f"Unknown chunk codec: {codec}")
+
+
+class PackedArtifactStore(ArtifactStore):
+    """
+    ArtifactStore backend that packs, compresses and chunks artifacts.
+
+    Layout under ``base_path``::
+
+        index.db            SQLite index of objects and chunks
+        packs/pack-00000.pack
+        packs/pack-00001.pack
+        ...
+    """
+
+    def __init__(
+        self,
+        base_path: Path,
+        redact_secrets: bool = True,
+        hash_cache_size: int = 4096,
+        compression: str = "zlib",
+        compression_level: int | None = None,
+        chunk_threshold: int = 1024 * 1024,
+        min_chunk_size: int = 32 * 1024,
+        avg_chunk_size: int = 128 * 1024,
+        max_chunk_size: int = 512 * 1024,
+        max_pack_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Initialize PackedArtifactStore.
+
+        Args:
+            base_path: Directory holding the index and pack files
+            redact_secrets: If True, redact secrets before storing (default: True)
+            hash_cache_size: LRU size of the raw-content hash cache (0 disables it)
+            compression: Chunk codec for new writes: "zlib", "zstd" or "none"
+            compression_level: Codec level (defaults: zlib 6, zstd 3)
+            chunk_threshold: Blobs at least this large are split into
+                content-defined chunks; smaller ones are stored whole
+            min_chunk_size: Minimum content-defined chunk size
+            avg_chunk_size: Target average content-defined chunk size
+            max_chunk_size: Maximum content-defined chunk size
+            max_pack_bytes: Start a new pack file once the current one
+                reaches this size
+        """
+        if compression not in COMPRESSION_CODECS:
+            raise ValueError(
+                f"Unknown compression {compression!r}; expected one of {COMPRESSION_CODECS}"
+            )
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        super().__init__(
+            base_path, redact_secrets=redact_secrets, hash_cache_size=hash_cache_size
+        )
+        self.compression = compression
+        self.compression_level = (
+            compression_level
+            if compression_level is not None
+            else DEFAULT_COMPRESSION_LEVELS[compression]
+        )
+        self.chunk_threshold = chunk_threshold
+        self.min_chunk_size = min_chunk_size
+        self.avg_chunk_size = avg_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_pack_bytes = max_pack_bytes
+        # ZstdCompressor instances must not be shared between threads
+        self._codec_local = threading.local()
+
+        self._pack_dir = base_path / "packs"
+        self._pack_dir.mkdir(exist_ok=True)
+        self._index_lock = threading.Lock()
+        self._conn = sqlite3.connect(base_path / "index.db", check_same_thread=False)
+        self._init_index()
+
+        existing = sorted(self._pack_dir.glob("pack-*.pack"))
+        self._pack_id = int(existing[-1].stem.split("-")[1]) if existing else 0
+        self._pack_file: BinaryIO | None = None
+        self._finalizer = weakref.finalize(self, self._conn.close)
+
+    def _init_index(self) -> None:
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS objects (
+                artifact_hash TEXT PRIMARY KEY,
+                byte_len INTEGER NOT NULL,
+                chunk_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_hash TEXT PRIMARY KEY,
+                pack_id INTEGER NOT NULL,
+                pack_offset INTEGER NOT NULL,
+                stored_len INTEGER NOT NULL,
+                raw_len INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS object_chunks (
+                artifact_hash TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                raw_offset INTEGER NOT NULL,
+                PRIMARY KEY (artifact_hash, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_object_chunks_chunk ON object_chunks(chunk_hash);
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the index connection and the pack file being appended to."""
+        with self._index_lock:
+            if self._pack_file is not None:
+                self._pack_file.close()
+                self._pack_file = None
+        self._finalizer()
+
+    def _pack_path(self, pack_id: int) -> Path:
+        return self._pack_dir / f"pack-{pack_id:05d}.pack"
+
+    def _loose_path(self, artifact_hash: str) -> Path:
+        """Path a file-backed ArtifactStore would have used (no shard mkdir)."""
+        return self.base_path / artifact_hash[:2] / artifact_hash
+
+    # Writing
+
+    def _write_blob(self, artifact_hash: str, data: bytes) -> str:
+        if len(data) < self.chunk_threshold:
+            chunks: Iterable[bytes] = [data]
+        else:
+            chunks = self._chunk_stream(io.BytesIO(data))
+        self._write_object(artifact_hash, chunks)
+        return self._storage_path(artifact_hash)
+
+    def _storage_path(self, artifact_hash: str) -> str:
+        return f"pack:{artifact_hash}"
+
+    def store_file(
+        self,
+        file_path: Path,
+        artifact_type: str,
+        content_type: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> Artifact:
+        """
+        Store a file without loading it fully into memory.
+
+        Text content still goes through redaction (and therefore memory);
+        binary content such as videos and trace zips is hashed and chunked
+        straight from disk.
+        """
+        size = file_path.stat().st_size
+        if (self._scanner and _is_text_content(content_type)) or size < self.chunk_threshold:
+            return super().store_file(file_path, artifact_type, content_type, metadata)
+
+        digest = hashlib.sha256()
+        with file_path.open("rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        artifact_hash = digest.hexdigest()
+
+        with self._lock:
+            with file_path.open("rb") as f:
+                self._write_object(artifact_hash, self._chunk_stream(f))
+
+        return Artifact(
+            artifact_hash=artifact_hash,
+            artifact_type=artifact_type,
+            content_type=content_type,
+            byte_len=size,
+            storage_path=self._storage_path(artifact_hash),
+            created_ts=datetime.now(UTC),
+            metadata=metadata.copy() if metadata else {},
+        )
+
+    def _chunk_stream(self, stream: BinaryIO) -> Iterator[bytes]:
+        return cdc_chunks(stream, self.min_chunk_size, self.avg_chunk_size, self.max_chunk_size)
+
+    def _write_object(self, artifact_hash: str, chunks: Iterable[bytes]) -> None:
+        """
+        Append any new chunks of an object to the current pack and index it.
+
+        Chunking, hashing and compression run outside ``_index_lock`` so
+        readers are only blocked for the per-chunk lookup and append and the
+        final commit. Each chunk's object_chunks row goes in with the append,
+        which keeps a concurrent delete() from dropping a shared chunk the
+        object is about to reference.
+        """
+        with self._index_lock:
+            if self._object_exists(artifact_hash):
+                return
+        seq = 0
+        raw_offset = 0
+        try:
+            for chunk in chunks:
+                chunk_hash = hashlib.sha256(chunk).hexdigest()
+                with self._index_lock:
+                    known = self._chunk_exists(chunk_hash)
+                encoded = None if known else self._encode(chunk)
+                with self._index_lock:
+                    if not self._chunk_exists(chunk_hash):
+                        # Deleted since the lookup above, or new
+                        codec, stored = encoded or self._encode(chunk)
+                        self._append_chunk(chunk_hash, codec, stored, len(chunk))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO object_chunks "
+                        "(artifact_hash, seq, chunk_hash, raw_offset) VALUES (?, ?, ?, ?)",
+                        (artifact_hash, seq, chunk_hash, raw_offset),
+                    )
+                seq += 1
+                raw_offset += len(chunk)
+            with self._index_lock:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO objects (artifact_hash, byte_len, chunk_count) "
+                    "VALUES (?, ?, ?)",
+                    (artifact_hash, raw_offset, seq),
+                )
+                self._commit()
+        except BaseException:
+            # Appended pack bytes become dead space for compact() to reclaim
+            with self._index_lock:
+                self._conn.rollback()
+            raise
+
+    def _chunk_exists(self, chunk_hash: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM chunks WHERE chunk_hash = ?", (chunk_hash,)
+        ).fetchone()
+        return row is not None
+
+    def _encode(self, chunk: bytes) -> tuple[str, bytes]:
+        """Compress a chunk with the configured codec, or keep it raw if that does not help."""
+        codec = self.compression
+        stored = chunk
+        if codec == "zlib":
+            stored = zlib.compress(chunk, self.compression_level)
+        elif codec == "zstd":
+            compressor = getattr(self._codec_local, "zstd", None)
+            if compressor is None:
+                compressor = _compressor(codec, self.compression_level)
+                self._codec_local.zstd = compressor
+            stored = compressor.compress(chunk)
+        if len(stored) >= len(chunk):
+            return "none", chunk
+        return codec, stored
+
+    def _append_chunk(self, chunk_hash: str, codec: str, stored: bytes, raw_len: int) -> None:
+        f = self._current_pack(len(stored))
+        pack_offset = f.tell()
+        f.write(stored)
+        self._conn.execute(
+            "INSERT INTO chunks (chunk_hash, pack_id, pack_offset, stored_len, raw_len, codec) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (chunk_hash, self._pack_id, pack_offset, len(stored), raw_len, codec),
+        )
+
+    def _commit(self) -> None:
+        """Commit the index; pack bytes must be on disk before the index points at them."""
+        if self._pack_file is not None:
+            self._pack_file.flush()
+        self._conn.commit()
+
+    def _current_pack(self, incoming: int) -> BinaryIO:
+        """Return the pack to append to, rolling over if ``incoming`` would overflow it."""
+        if self._pack_file is None:
+            self._pack_file = self._pack_path(self._pack_id).open("ab")
+        size = self._pack_file.tell()
+        if size > 0 and size + incoming > self.max_pack_bytes:
+            self._pack_file.close()
+            self._pack_id += 1
+            self._pack_file = self._pack_path(self._pack_id).open("ab")
+        return self._pack_file
+
+    # Reading
+
+    def _object_exists(self, artifact_hash: str) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM objects WHERE artifact_hash = ?", (artifact_hash,)
+        ).fetchone()
+        return row is not None
+
+    def _chunk_locations(self, artifact_hash: str) -> list[_ChunkLocation] | None:
+        with self._index_lock:
+            if not self._object_exists(artifact_hash):
+                return None
+            rows = self._conn.execute(
+                """
+                SELECT oc.raw_offset, c.raw_len, c.pack_id, c.pack_offset, c.stored_len, c.codec
+                FROM object_chunks oc JOIN chunks c ON c.chunk_hash = oc.chunk_hash
+                WHERE oc.artifact_hash = ?
+                ORDER BY oc.seq
+                """,
+                (artifact_hash,),
+            ).fetchall()
+        return [_ChunkLocation(*row) for row in rows]
+
+    def _open_raw(self, artifact_hash: str) -> BinaryIO | None:
+        chunks = self._chunk_locations(artifact_hash)
+        if chunks is None:
+            path = self._loose_path(artifact_hash)
+            return path.open("rb") if path.exists() else None
+        return cast(BinaryIO, PackedArtifactReader(self, chunks))
+
+    def open(self, artifact_hash: str) -> BinaryIO | None:
+        f = self._open_raw(artifact_hash)
+        if f is None:
+            return None
+        if f.read(len(DELTA_MAGIC)) == DELTA_MAGIC:
+            f.close()
+            data = self.retrieve(artifact_hash)
+            return io.BytesIO(data) if data is not None else None
+        f.seek(0)
+        return f
+
+    def retrieve_raw(self, artifact_hash: str) -> bytes | None:
+        f = self._open_raw(artifact_hash)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def exists(self, artifact_hash: str) -> bool:
+        with self._index_lock:
+            if self._object_exists(artifact_hash):
+                return True
+        return self._loose_path(artifact_hash).exists()
+
+    # Deleting and repacking
+
+    def delete(self, artifact_hashes: Iterable[str]) -> int:
+        """
+        Remove artifacts from the index and drop chunks nothing else uses.
+
+        Returns the stored bytes that became dead. The pack files only
+        shrink once compact() rewrites them.
+        """
+        hashes = list(artifact_hashes)
+        freed = 0
+        with self._index_lock:
+            for artifact_hash in hashes:
+                if not self._object_exists(artifact_hash):
+                    continue
+                chunk_hashes = [
+                    row[0] for row in self._conn.execute(
+                        "SELECT chunk_hash FROM object_chunks WHERE artifact_hash = ?",
+                        (artifact_hash,),
+                    )
+                ]
+                self._conn.execute(
+                    "DELETE FROM object_chunks WHERE artifact_hash = ?", (artifact_hash,)
+                )
+                self._conn.execute("DELETE FROM objects WHERE artifact_hash = ?", (artifact_hash,))
+                for chunk_hash in set(chunk_hashes):
+                    still_used = self._conn.execute(
+                        "SELECT 1 FROM object_chunks WHERE chunk_hash = ? LIMIT 1", (chunk_hash,)
+                    ).fetchone()
+                    if still_used is None:
+                        row = self._conn.execute(
+                            "SELECT stored_len FROM chunks WHERE chunk_hash = ?", (chunk_hash,)
+                        ).fetchone()
+                        self._conn.execute(
+                            "DELETE FROM chunks WHERE chunk_hash = ?", (chunk_hash,)
+                        )
+                        freed += row[0] if row else 0
+            self._commit()
+        # Artifacts written by the file backend before switching over
+        freed += super().delete(h for h in hashes if self._loose_path(h).exists())
+        if self.hash_cache is not None:
+            self.hash_cache.forget(hashes)
+        else:
+            ArtifactHashCache.invalidate(self.base_path / "raw_hashes.db", hashes)
+        return freed
+
+    def compact(self, min_dead_ratio: float = 0.5) -> int:
+        """
+        Rewrite pack files that are mostly dead space after deletes.
+
+        Live chunks of such packs are copied into the current pack and the
+        old files removed. Returns the number of bytes freed on disk.
+        """
+        freed = 0
+        with self._index_lock:
+            live = dict(self._conn.execute(
+                "SELECT pack_id, SUM(stored_len) FROM chunks GROUP BY pack_id"
+            ).fetchall())
+            for path in sorted(self._pack_dir.glob("pack-*.pack")):
+                pack_id = int(path.stem.split("-")[1])
+                if pack_id == self._pack_id:
+                    continue
+                size = path.stat().st_size
+                live_bytes = live.get(pack_id, 0)
+                if size == 0 or (size - live_bytes) / size < min_dead_ratio:
+                    continue
+                rows = self._conn.execute(
+                    "SELECT chunk_hash, pack_offset, stored_len FROM chunks WHERE pack_id = ?",
+                    (pack_id,),
+                ).fetchall()
+                with path.open("rb") as src:
+                    for chunk_hash, pack_offset, stored_len in rows:
+                        src.seek(pack_offset)
+                        data = src.read(stored_len)
+                        f = self._current_pack(len(data))
+                        offset = f.tell()
+                        f.write(data)
+                        self._conn.execute(
+                            "UPDATE chunks SET pack_id = ?, pack_offset = ? WHERE chunk_hash = ?",
+                            (self._pack_id, offset, chunk_hash),
+                        )
+                self._commit()
+                path.unlink()
+                freed += size - live_bytes
+        return freed
+
+    def stats(self) -> dict[str, Any]:
+        """Return object/chunk counts and raw vs stored byte totals."""
+        with self._index_lock:
+            objects, object_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(byte_len), 0) FROM objects"
+            ).fetchone()
+            chunks, raw_bytes, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_len), 0), COALESCE(SUM(stored_len), 0) "
+                "FROM chunks"
+            ).fetchone()
+        return {
+            "objects": objects,
+            "object_bytes": object_bytes,
+            "chunks": chunks,
+            "chunk_raw_bytes": raw_bytes,
+            "chunk_stored_bytes": stored_bytes,
+            "packs": len(list(self._pack_dir.glob("pack-*.pack"))),
+        }
+
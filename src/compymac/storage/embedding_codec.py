@@ -0,0 +1,82 @@
+"""
+Binary encoding for stored embeddings.
+
+An encoded embedding is an 8-byte header (magic, dtype code, dimension)
+followed by little-endian values:
+
+- float32: the raw vector; decoding is a zero-copy np.frombuffer view
+- float16: half the size; decoding is also a zero-copy view
+- int8: a float32 scale, then values quantized symmetrically to [-127, 127];
+  a quarter of the size, decoded as float32 values * scale
+"""
+
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+_MAGIC = b"CE"
+_HEADER = struct.Struct("<2sBxI")  # magic, dtype code, pad, dimension
+_SCALE = struct.Struct("<f")
+_NUMPY_DTYPES = {"float32": "<f4", "float16": "<f2", "int8": "i1"}
+
+
+def encode_embedding(embedding: Sequence[float] | np.ndarray, dtype: str = "float32") -> bytes:
+    """
+    Encode an embedding as a header plus little-endian values.
+
+    Args:
+        embedding: Vector to encode
+        dtype: Storage type ("float32", "float16" or "int8")
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        ValueError: If dtype is unknown or the embedding isn't one-dimensional
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unknown embedding dtype {dtype!r}; expected one of {EMBEDDING_DTYPES}")
+    vector = np.asarray(embedding, dtype=np.float32)
+    if vector.ndim != 1:
+        raise ValueError("embedding must be one-dimensional")
+
+    header = _HEADER.pack(_MAGIC, EMBEDDING_DTYPES.index(dtype), len(vector))
+    if dtype == "int8":
+        peak = float(np.max(np.abs(vector))) if len(vector) else 0.0
+        scale = peak / 127 if peak else 1.0
+        quantized: np.ndarray = np.clip(np.rint(vector / scale), -127, 127).astype("i1")
+        return header + _SCALE.pack(scale) + quantized.tobytes()
+    return header + vector.astype(_NUMPY_DTYPES[dtype]).tobytes()
+
+
+def decode_embedding(blob: bytes | memoryview) -> np.ndarray:
+    """
+    Decode bytes written by encode_embedding.
+
+    float32 and float16 embeddings are returned as read-only views over blob.
+
+    Raises:
+        ValueError: If blob isn't an encoded embedding
+    """
+    if not is_encoded_embedding(blob):
+        raise ValueError("Not an encoded embedding")
+    _, code, dim = _HEADER.unpack_from(blob)
+    dtype = EMBEDDING_DTYPES[code]
+    if dtype == "int8":
+        (scale,) = _SCALE.unpack_from(blob, _HEADER.size)
+        quantized = np.frombuffer(blob, dtype="i1", count=dim, offset=_HEADER.size + _SCALE.size)
+        return quantized.astype(np.float32) * np.float32(scale)
+    return np.frombuffer(blob, dtype=_NUMPY_DTYPES[dtype], count=dim, offset=_HEADER.size)
+
+
+def is_encoded_embedding(value: object) -> bool:
+    """Whether value looks like the output of encode_embedding."""
+    return (
+        isinstance(value, bytes | memoryview)
+        and len(value) >= _HEADER.size
+        and bytes(value[:2]) == _MAGIC
+        and value[2] < len(EMBEDDING_DTYPES)
+    )
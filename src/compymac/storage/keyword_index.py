@@ -0,0 +1,206 @@
+"""
+In-memory inverted index with BM25 scoring.
+
+Maps each term to postings of (item ID -> term frequency), maintained
+incrementally as items are added and removed, so keyword search touches only
+the postings of the query terms rather than every stored text. Items are
+labelled with a source ID (e.g. the document a chunk belongs to); searches
+can be scoped to a set of sources by intersecting postings with the sources'
+items.
+"""
+
+import bisect
+import math
+import re
+import threading
+from collections import Counter
+from collections.abc import Collection, Iterable
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens of text."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordIndex:
+    """
+    Incremental inverted index scored with Okapi BM25.
+
+    Query terms of at least min_prefix_length characters also match longer
+    indexed terms they prefix ("probe" matches "probes"). Thread-safe.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, min_prefix_length: int = 3):
+        """
+        Initialize keyword index.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+            min_prefix_length: Shortest query term expanded to prefix matches
+                (0 disables prefix matching)
+        """
+        self.k1 = k1
+        self.b = b
+        self.min_prefix_length = min_prefix_length
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        # Forward index, so removal only touches the item's own postings
+        self._terms: dict[str, tuple[str, ...]] = {}
+        self._sources: dict[str, str] = {}
+        self._source_items: dict[str, set[str]] = {}
+        self._total_length = 0
+        self._vocabulary: list[str] | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._lengths
+
+    def add(self, item_id: str, text: str, source_id: str = "") -> None:
+        """Index text under item_id, replacing any previous text for it."""
+        self.add_batch([(item_id, text)], source_id)
+
+    def add_batch(self, items: Iterable[tuple[str, str]], source_id: str = "") -> None:
+        """Index several (item_id, text) pairs from one source."""
+        with self._lock:
+            for item_id, text in items:
+                self._remove(item_id)
+                terms = Counter(tokenize(text))
+                for term, count in terms.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = {}
+                        self._vocabulary = None
+                    postings[item_id] = count
+                length = sum(terms.values())
+                self._lengths[item_id] = length
+                self._terms[item_id] = tuple(terms)
+                self._total_length += length
+                self._sources[item_id] = source_id
+                self._source_items.setdefault(source_id, set()).add(item_id)
+
+    def remove(self, item_id: str) -> bool:
+        """Remove one item; returns whether it was indexed."""
+        with self._lock:
+            return self._remove(item_id)
+
+    def remove_source(self, source_id: str) -> int:
+        """Remove every item from source_id; returns how many were removed."""
+        with self._lock:
+            items = list(self._source_items.get(source_id, ()))
+            for item_id in items:
+                self._remove(item_id)
+            return len(items)
+
+    def clear(self) -> None:
+        """Remove every item."""
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._terms.clear()
+            self._sources.clear()
+            self._source_items.clear()
+            self._total_length = 0
+            self._vocabulary = None
+
+    def search(
+        self,
+        query: str,
+        source_id: str | Collection[str] | None = None,
+    ) -> dict[str, float]:
+        """
+        Score the items matching any query term.
+
+        Args:
+            query: Query text (tokenized like indexed text)
+            source_id: Only score items from this source, or any of these sources
+
+        Returns:
+            Dict of item_id -> BM25 score, for items matching at least one term
+        """
+        with self._lock:
+            n_items = len(self._lengths)
+            if n_items == 0:
+                return {}
+            average_length = self._total_length / n_items or 1.0
+            scope = self._scope_items(source_id)
+
+            scores: dict[str, float] = {}
+            for term in dict.fromkeys(tokenize(query)):
+                frequencies = self._term_frequencies(term, scope)
+                if not frequencies:
+                    continue
+                df = len(frequencies) if scope is None else self._document_frequency(term)
+                idf = math.log(1 + (n_items - df + 0.5) / (df + 0.5))
+                for item_id, tf in frequencies.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[item_id] / average_length)
+                    scores[item_id] = scores.get(item_id, 0.0) + idf * tf * (self.k1 + 1) / (
+                        tf + norm
+                    )
+            return scores
+
+    def _scope_items(self, source_id: str | Collection[str] | None) -> set[str] | None:
+        """Items of the requested sources, or None for no scoping."""
+        if source_id is None:
+            return None
+        sources = [source_id] if isinstance(source_id, str) else source_id
+        scope: set[str] = set()
+        for source in sources:
+            scope |= self._source_items.get(source, set())
+        return scope
+
+    def _matching_terms(self, term: str) -> list[str]:
+        """Indexed terms a query term matches: itself, plus extensions of long prefixes."""
+        if not self.min_prefix_length or len(term) < self.min_prefix_length:
+            return [term] if term in self._postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\U0010ffff", start)
+        return self._vocabulary[start:end]
+
+    def _term_frequencies(self, term: str, scope: set[str] | None) -> dict[str, int]:
+        """item_id -> occurrences of term (and its extensions), within scope."""
+        frequencies: dict[str, int] = {}
+        for matched in self._matching_terms(term):
+            postings = self._postings[matched]
+            items: Iterable[str]
+            if scope is None:
+                items = postings.keys()
+            elif len(scope) < len(postings):
+                items = [item_id for item_id in scope if item_id in postings]
+            else:
+                items = [item_id for item_id in postings if item_id in scope]
+            for item_id in items:
+                frequencies[item_id] = frequencies.get(item_id, 0) + postings[item_id]
+        return frequencies
+
+    def _document_frequency(self, term: str) -> int:
+        """Number of items containing term (or its extensions) across the whole index."""
+        matched = self._matching_terms(term)
+        if len(matched) == 1:
+            return len(self._postings[matched[0]])
+        return len(set().union(*(self._postings[m].keys() for m in matched)))
+
+    def _remove(self, item_id: str) -> bool:
+        length = self._lengths.pop(item_id, None)
+        if length is None:
+            return False
+        self._total_length -= length
+        source_id = self._sources.pop(item_id)
+        items = self._source_items[source_id]
+        items.discard(item_id)
+        if not items:
+            del self._source_items[source_id]
+        for term in self._terms.pop(item_id):
+            postings = self._postings[term]
+            del postings[item_id]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+        return True
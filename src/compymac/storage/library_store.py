@@ -1,27 +1,34 @@
 """
 Library Store for managing user document collections.
 
-Provides in-memory storage for Phase 1, with hooks for persistent storage later.
+Provides in-memory storage for Phase 1; SQLiteLibraryStore (in
+sqlite_library_store) persists the same API to disk.
 
 Phase 4 additions:
 - Vector embeddings for semantic search
 - Hybrid search (keyword + vector)
 """
 
-import math
+import heapq
+import logging
+import threading
 import time
 import uuid
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-# Try to import Venice embedder for vector search
-try:
-    from compymac.retrieval.embedder import VeniceEmbedder
-    EMBEDDER_AVAILABLE = True
-except ImportError:
-    EMBEDDER_AVAILABLE = False
-    VeniceEmbedder = None  # type: ignore[misc, assignment]
+from compymac.storage.keyword_index import KeywordIndex
+from compymac.storage.vector_index import VectorIndex
+
+if TYPE_CHECKING:
+    from compymac.retrieval.embedder import Embedder
+
+logger = logging.getLogger(__name__)
+
+# Chunks embedded between progress reports
+_EMBEDDING_PROGRESS_BATCH = 256
 
 
 class DocumentStatus(str, Enum):
@@ -86,6 +93,8 @@ class LibraryStore:
         self,
         use_embeddings: bool = True,
         embedder_api_key: str | None = None,
+        vector_index: VectorIndex | None = None,
+        embedder: "Embedder | None" = None,
     ) -> None:
         """
         Initialize library store.
@@ -93,23 +102,39 @@ class LibraryStore:
         Args:
             use_embeddings: Whether to use vector embeddings for search
             embedder_api_key: API key for embedder (uses env var if None)
+            embedder: Embedder to use (chosen by create_embedder() if None,
+                which honours the COMPYMAC_EMBEDDER env var)
+            vector_index: Index for chunk embeddings (exact VectorIndex if None;
+                pass an IVFIndex for approximate search over large libraries)
         """
+        # Guards the dicts below; ingestion job threads write documents while
+        # request handlers read and search them
+        self._lock = threading.RLock()
         self._documents: dict[str, LibraryDocument] = {}
         self._user_documents: dict[str, list[str]] = {}  # user_id -> [doc_ids]
         self._active_sources: dict[str, list[str]] = {}  # session_id -> [doc_ids]
+        # chunk_id -> (doc_id, position in doc.chunks)
+        self._chunk_locations: dict[str, tuple[str, int]] = {}
+        # term -> chunk postings, labelled by doc_id (None if a subclass
+        # searches another index)
+        self._keyword_index: KeywordIndex | None = KeywordIndex()
+        # Bumped on every change, so callers can tell when cached results are stale
+        self._generation = 0
 
         # Phase 4: Vector embeddings storage
-        self._chunk_embeddings: dict[str, list[float]] = {}  # chunk_id -> embedding
-        self._embedder: VeniceEmbedder | None = None
-        self.use_embeddings = use_embeddings and EMBEDDER_AVAILABLE
+        # chunk_id -> embedding, labelled by doc_id
+        self._vector_index = vector_index if vector_index is not None else VectorIndex()
+        self._embedder: Embedder | None = embedder if use_embeddings else None
+
+        if use_embeddings and embedder is None:
+            # Imported here: compymac.retrieval imports the storage package
+            from compymac.retrieval.embedder import create_embedder
 
-        if self.use_embeddings and VeniceEmbedder is not None:
             try:
-                self._embedder = VeniceEmbedder(api_key=embedder_api_key)
-            except (ValueError, Exception):
-                # Embedder initialization failed (e.g., no API key)
-                self.use_embeddings = False
-                self._embedder = None
+                self._embedder = create_embedder(api_key=embedder_api_key)
+            except Exception as e:
+                logger.warning(f"Embedder unavailable, using keyword search only: {e}")
+        self.use_embeddings = self._embedder is not None
 
     def create_document(
         self,
@@ -144,22 +169,30 @@ class LibraryStore:
             doc_format=doc_format,
         )
 
-        self._documents[doc_id] = doc
+        with self._lock:
+            self._documents[doc_id] = doc
+            self._generation += 1
 
-        if user_id not in self._user_documents:
-            self._user_documents[user_id] = []
-        self._user_documents[user_id].append(doc_id)
+            if user_id not in self._user_documents:
+                self._user_documents[user_id] = []
+            self._user_documents[user_id].append(doc_id)
 
         return doc
 
+    def generation(self) -> int:
+        """Counter that changes whenever a document is created, updated or deleted."""
+        return self._generation
+
     def get_document(self, doc_id: str) -> LibraryDocument | None:
         """Get a document by ID."""
-        return self._documents.get(doc_id)
+        with self._lock:
+            return self._documents.get(doc_id)
 
     def get_user_documents(self, user_id: str) -> list[LibraryDocument]:
         """Get all documents for a user."""
-        doc_ids = self._user_documents.get(user_id, [])
-        return [self._documents[doc_id] for doc_id in doc_ids if doc_id in self._documents]
+        with self._lock:
+            doc_ids = self._user_documents.get(user_id, [])
+            return [self._documents[doc_id] for doc_id in doc_ids if doc_id in self._documents]
 
     def update_document(
         self,
@@ -171,6 +204,7 @@ class LibraryStore:
         metadata: dict[str, Any] | None = None,
         navigation: list[dict[str, Any]] | None = None,
         generate_embeddings: bool = True,
+        embedding_progress: Callable[[int, int], None] | None = None,
     ) -> LibraryDocument | None:
         """
         Update a document's properties.
@@ -184,34 +218,72 @@ class LibraryStore:
             metadata: Additional metadata
             navigation: Document navigation (TOC/bookmarks)
             generate_embeddings: Whether to generate embeddings for new chunks
+            embedding_progress: Called with (chunks_embedded, chunk_count) as
+                chunks are embedded in batches; may raise to stop embedding
+
+        Embeddings are generated without holding the store lock, so searches
+        keep running while a large document is embedded.
         """
-        doc = self._documents.get(doc_id)
-        if not doc:
-            return None
-
-        if status is not None:
-            doc.status = status
-        if page_count is not None:
-            doc.page_count = page_count
-        if error is not None:
-            doc.error = error
-        if chunks is not None:
-            doc.chunks = chunks
-            # Phase 4: Generate embeddings for chunks
-            if generate_embeddings and self.use_embeddings:
-                self._generate_chunk_embeddings(doc_id, chunks)
-        if metadata is not None:
-            doc.metadata.update(metadata)
-        if navigation is not None:
-            doc.navigation = navigation
-
-        doc.updated_at = time.time()
+        with self._lock:
+            doc = self._documents.get(doc_id)
+            if not doc:
+                return None
+
+            if status is not None:
+                doc.status = status
+            if page_count is not None:
+                doc.page_count = page_count
+            if error is not None:
+                doc.error = error
+            if chunks is not None:
+                self._set_chunks(doc, chunks)
+        # Phase 4: Generate embeddings for chunks
+        if chunks is not None and generate_embeddings and self.use_embeddings:
+            self._generate_chunk_embeddings(doc_id, chunks, embedding_progress)
+        with self._lock:
+            if metadata is not None:
+                doc.metadata.update(metadata)
+            if navigation is not None:
+                doc.navigation = navigation
+
+            doc.updated_at = time.time()
+            self._generation += 1
         return doc
 
+    def _set_chunks(self, doc: LibraryDocument, chunks: list[dict[str, Any]]) -> None:
+        """Replace a document's chunks and re-index their locations and terms."""
+        with self._lock:
+            self._unindex_chunks(doc)
+            doc.chunks = chunks
+            for i, chunk in enumerate(chunks):
+                self._chunk_locations[_chunk_id(doc.id, i, chunk)] = (doc.id, i)
+            if self._keyword_index is not None:
+                self._keyword_index.add_batch(
+                    (
+                        (_chunk_id(doc.id, i, chunk), chunk.get("content", ""))
+                        for i, chunk in enumerate(chunks)
+                    ),
+                    source_id=doc.id,
+                )
+
+    def _unindex_chunks(self, doc: LibraryDocument) -> None:
+        """Drop a document's chunks from the location and keyword indexes."""
+        if self._keyword_index is not None:
+            self._keyword_index.remove_source(doc.id)
+        for i, chunk in enumerate(doc.chunks):
+            chunk_id = _chunk_id(doc.id, i, chunk)
+            if self._chunk_locations.get(chunk_id, (None,))[0] == doc.id:
+                del self._chunk_locations[chunk_id]
+
+    def _get_vector_index(self) -> VectorIndex:
+        """Index holding chunk embeddings, labelled by doc_id."""
+        return self._vector_index
+
     def _generate_chunk_embeddings(
         self,
         doc_id: str,
         chunks: list[dict[str, Any]],
+        progress: Callable[[int, int], None] | None = None,
     ) -> None:
         """
         Generate embeddings for document chunks.
@@ -219,44 +291,73 @@ class LibraryStore:
         Args:
             doc_id: Document ID
             chunks: List of chunks to embed
+            progress: Called with (chunks_embedded, chunk_count) after each
+                batch; embeds everything in one batch if None
         """
         if not self._embedder or not chunks:
             return
 
-        try:
-            # Extract chunk contents
-            chunk_texts = [chunk.get("content", "") for chunk in chunks]
-            chunk_ids = [chunk.get("id", f"{doc_id}_{i}") for i, chunk in enumerate(chunks)]
-
-            # Generate embeddings in batch
-            embeddings = self._embedder.embed_batch(chunk_texts)
+        # Extract chunk contents
+        chunk_texts = [chunk.get("content", "") for chunk in chunks]
+        chunk_ids = [_chunk_id(doc_id, i, chunk) for i, chunk in enumerate(chunks)]
+        batch_size = _EMBEDDING_PROGRESS_BATCH if progress is not None else len(chunks)
 
-            # Store embeddings
-            for chunk_id, embedding in zip(chunk_ids, embeddings, strict=True):
-                self._chunk_embeddings[chunk_id] = embedding
-
-        except Exception:
-            # Embedding generation failed, continue without embeddings
-            pass
+        embeddings: list[list[float]] = []
+        for start in range(0, len(chunks), batch_size):
+            try:
+                batch_texts = chunk_texts[start:start + batch_size]
+                # Pull previously embedded chunks (e.g. from before a restart)
+                # into memory, then generate embeddings in batch
+                warm_cache = getattr(self._embedder, "warm_cache", None)
+                if warm_cache is not None:
+                    warm_cache(batch_texts)
+                embeddings.extend(self._embedder.embed_batch(batch_texts))
+            except Exception as e:
+                # Embedding generation failed, continue without embeddings
+                logger.warning(f"Failed to embed chunks for document {doc_id}: {e}")
+                return
+            if progress is not None:
+                progress(len(embeddings), len(chunks))
+
+        self._store_chunk_embeddings(doc_id, chunk_ids, embeddings)
+
+    def _store_chunk_embeddings(
+        self,
+        doc_id: str,
+        chunk_ids: list[str],
+        embeddings: list[list[float]],
+    ) -> None:
+        """Index a document's chunk embeddings, replacing any previous set."""
+        with self._lock:
+            # Deleted while its chunks were being embedded
+            if doc_id not in self._documents:
+                return
+            index = self._get_vector_index()
+            index.remove_source(doc_id)
+            index.add_batch(chunk_ids, embeddings, source_ids=[doc_id] * len(chunk_ids))
 
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document from the library."""
-        doc = self._documents.get(doc_id)
-        if not doc:
-            return False
-
-        del self._documents[doc_id]
-
-        if doc.user_id in self._user_documents:
-            self._user_documents[doc.user_id] = [
-                d for d in self._user_documents[doc.user_id] if d != doc_id
-            ]
-
-        # Remove from active sources
-        for session_id in self._active_sources:
-            self._active_sources[session_id] = [
-                d for d in self._active_sources[session_id] if d != doc_id
-            ]
+        with self._lock:
+            doc = self._documents.get(doc_id)
+            if not doc:
+                return False
+
+            del self._documents[doc_id]
+            self._generation += 1
+            self._unindex_chunks(doc)
+            self._get_vector_index().remove_source(doc_id)
+
+            if doc.user_id in self._user_documents:
+                self._user_documents[doc.user_id] = [
+                    d for d in self._user_documents[doc.user_id] if d != doc_id
+                ]
+
+            # Remove from active sources
+            for session_id in self._active_sources:
+                self._active_sources[session_id] = [
+                    d for d in self._active_sources[session_id] if d != doc_id
+                ]
 
         return True
 
@@ -264,37 +365,40 @@ class LibraryStore:
 
     def add_active_source(self, session_id: str, doc_id: str) -> bool:
         """Add a document to the active sources for a session."""
-        if doc_id not in self._documents:
-            return False
+        with self._lock:
+            if doc_id not in self._documents:
+                return False
 
-        if session_id not in self._active_sources:
-            self._active_sources[session_id] = []
+            if session_id not in self._active_sources:
+                self._active_sources[session_id] = []
 
-        if doc_id not in self._active_sources[session_id]:
-            self._active_sources[session_id].append(doc_id)
+            if doc_id not in self._active_sources[session_id]:
+                self._active_sources[session_id].append(doc_id)
 
         return True
 
     def remove_active_source(self, session_id: str, doc_id: str) -> bool:
         """Remove a document from the active sources for a session."""
-        if session_id not in self._active_sources:
-            return False
+        with self._lock:
+            if session_id not in self._active_sources:
+                return False
 
-        if doc_id in self._active_sources[session_id]:
-            self._active_sources[session_id].remove(doc_id)
-            return True
+            if doc_id in self._active_sources[session_id]:
+                self._active_sources[session_id].remove(doc_id)
+                return True
 
         return False
 
     def get_active_sources(self, session_id: str) -> list[LibraryDocument]:
         """Get all active source documents for a session."""
-        doc_ids = self._active_sources.get(session_id, [])
-        return [self._documents[doc_id] for doc_id in doc_ids if doc_id in self._documents]
+        with self._lock:
+            doc_ids = self._active_sources.get(session_id, [])
+            return [self._documents[doc_id] for doc_id in doc_ids if doc_id in self._documents]
 
     def clear_active_sources(self, session_id: str) -> None:
         """Clear all active sources for a session."""
-        if session_id in self._active_sources:
-            del self._active_sources[session_id]
+        with self._lock:
+            self._active_sources.pop(session_id, None)
 
     # Search within documents (Phase 4: hybrid vector + keyword search)
 
@@ -320,47 +424,40 @@ class LibraryStore:
         Returns:
             List of matching chunks with scores
         """
-        # Get documents to search
-        if doc_ids:
-            docs = [self._documents[d] for d in doc_ids if d in self._documents]
-        else:
-            docs = list(self._documents.values())
-
-        # Collect all chunks from target documents
-        all_chunks: list[tuple[LibraryDocument, dict[str, Any]]] = []
-        for doc in docs:
-            for chunk in doc.chunks:
-                all_chunks.append((doc, chunk))
-
-        if not all_chunks:
+        scope = self._search_scope(doc_ids)
+        if not scope:
             return []
 
         # Phase 4: Try vector search if available
         vector_scores: dict[str, float] = {}
         if use_vector_search and self.use_embeddings and self._embedder:
-            vector_scores = self._vector_search(query, all_chunks)
+            vector_scores = self._vector_search(query, scope)
 
         # Keyword search (always performed for hybrid scoring)
-        keyword_scores = self._keyword_search(query, all_chunks)
+        keyword_scores = self._keyword_search(query, scope)
 
-        # Combine scores (hybrid search)
-        results = []
-        for doc, chunk in all_chunks:
-            chunk_id = chunk.get("id", "")
+        # Combine scores (hybrid search); chunks with no relevance are skipped.
+        # Keyword hits come first (in document order) so ties rank stably
+        combined: dict[str, float] = {}
+        for chunk_id in {**keyword_scores, **vector_scores}:
             vector_score = vector_scores.get(chunk_id, 0.0)
             keyword_score = keyword_scores.get(chunk_id, 0.0)
-
-            # Skip chunks with no relevance
             if vector_score == 0.0 and keyword_score == 0.0:
                 continue
-
-            # Hybrid score: weighted combination
             # Vector similarity is more important when available
             if vector_score > 0:
-                combined_score = 0.7 * vector_score + 0.3 * keyword_score
+                combined[chunk_id] = 0.7 * vector_score + 0.3 * keyword_score
             else:
-                combined_score = keyword_score
+                combined[chunk_id] = keyword_score
 
+        top_ids = heapq.nlargest(top_k, combined, key=combined.__getitem__)
+        located = self._locate_chunks(top_ids)
+
+        results = []
+        for chunk_id in top_ids:
+            if chunk_id not in located:
+                continue
+            doc, chunk = located[chunk_id]
             # Include chunk metadata and doc_format for citation locator building
             chunk_metadata = chunk.get("metadata", {})
             results.append({
@@ -369,9 +466,9 @@ class LibraryStore:
                 "chunk_id": chunk_id,
                 "content": chunk.get("content", ""),
                 "page": chunk_metadata.get("page", 0),
-                "score": combined_score,
-                "vector_score": vector_score,
-                "keyword_score": keyword_score,
+                "score": combined[chunk_id],
+                "vector_score": vector_scores.get(chunk_id, 0.0),
+                "keyword_score": keyword_scores.get(chunk_id, 0.0),
                 # Include metadata for citation locator building (EPUB href, format, etc.)
                 "metadata": {
                     **chunk_metadata,
@@ -379,22 +476,42 @@ class LibraryStore:
                 },
                 "doc_format": doc.doc_format,
             })
+        return results
+
+    def _search_scope(self, doc_ids: list[str] | None) -> list[str]:
+        """IDs of the existing documents to search (all documents if doc_ids is empty)."""
+        with self._lock:
+            if doc_ids:
+                return [doc_id for doc_id in doc_ids if doc_id in self._documents]
+            return list(self._documents)
 
-        # Sort by combined score and return top_k
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+    def _locate_chunks(
+        self,
+        chunk_ids: list[str],
+    ) -> dict[str, tuple[LibraryDocument, dict[str, Any]]]:
+        """Look up (document, chunk) pairs by chunk ID."""
+        located = {}
+        with self._lock:
+            for chunk_id in chunk_ids:
+                location = self._chunk_locations.get(chunk_id)
+                if location is None:
+                    continue
+                doc_id, position = location
+                doc = self._documents[doc_id]
+                located[chunk_id] = (doc, doc.chunks[position])
+        return located
 
     def _vector_search(
         self,
         query: str,
-        chunks: list[tuple["LibraryDocument", dict[str, Any]]],
+        doc_ids: list[str],
     ) -> dict[str, float]:
         """
         Perform vector similarity search.
 
         Args:
             query: Search query
-            chunks: List of (document, chunk) tuples
+            doc_ids: Documents whose chunks should be scored
 
         Returns:
             Dict mapping chunk_id to similarity score (0-1)
@@ -406,17 +523,17 @@ class LibraryStore:
             # Get query embedding
             query_embedding = self._embedder.embed(query)
 
-            # Calculate cosine similarity for each chunk
-            scores: dict[str, float] = {}
-            for _doc, chunk in chunks:
-                chunk_id = chunk.get("id", "")
-                if chunk_id in self._chunk_embeddings:
-                    chunk_embedding = self._chunk_embeddings[chunk_id]
-                    similarity = self._cosine_similarity(query_embedding, chunk_embedding)
-                    # Normalize to 0-1 range (cosine similarity is -1 to 1)
-                    scores[chunk_id] = (similarity + 1) / 2
+            # One matrix-vector product over the indexed chunks of these documents
+            # (only the probed lists when the index is an IVFIndex)
+            similarities = self._get_vector_index().similarities(
+                query_embedding, source_id=doc_ids
+            )
 
-            return scores
+            # Normalize to 0-1 range (cosine similarity is -1 to 1)
+            return {
+                chunk_id: (similarity + 1) / 2
+                for chunk_id, similarity in similarities.items()
+            }
 
         except Exception:
             return {}
@@ -424,45 +541,38 @@ class LibraryStore:
     def _keyword_search(
         self,
         query: str,
-        chunks: list[tuple["LibraryDocument", dict[str, Any]]],
+        doc_ids: list[str],
     ) -> dict[str, float]:
         """
         Perform keyword-based search.
 
+        Scores chunks with BM25 over the keyword index, touching only the
+        postings of the query terms (intersected with doc_ids' chunks).
+
         Args:
             query: Search query
-            chunks: List of (document, chunk) tuples
+            doc_ids: Documents whose chunks should be scored
 
         Returns:
-            Dict mapping chunk_id to relevance score (0-1)
+            Dict mapping chunk_id to relevance score (0-1, best match 1)
         """
-        query_lower = query.lower()
-        query_terms = query_lower.split()
-        scores: dict[str, float] = {}
-
-        for _doc, chunk in chunks:
-            chunk_id = chunk.get("id", "")
-            content = chunk.get("content", "").lower()
-
-            # Count term matches
-            term_matches = sum(1 for term in query_terms if term in content)
-            if term_matches > 0:
-                # Normalize by number of query terms
-                scores[chunk_id] = term_matches / len(query_terms)
-
-        return scores
+        if self._keyword_index is None:
+            return {}
+        # Searching every document needs no scoping
+        with self._lock:
+            scope = None if len(doc_ids) >= len(self._documents) else doc_ids
+        return _normalize_scores(self._keyword_index.search(query, source_id=scope))
 
-    @staticmethod
-    def _cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if len(vec1) != len(vec2):
-            return 0.0
 
-        dot_product = sum(a * b for a, b in zip(vec1, vec2, strict=True))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
+def _chunk_id(doc_id: str, position: int, chunk: dict[str, Any]) -> str:
+    """A chunk's ID, defaulting to <doc_id>_<position> for chunks without one."""
+    chunk_id: str = chunk.get("id", f"{doc_id}_{position}")
+    return chunk_id
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
 
-        return dot_product / (norm1 * norm2)
+def _normalize_scores(scores: dict[str, float]) -> dict[str, float]:
+    """Scale positive scores so the best is 1.0."""
+    best = max(scores.values(), default=0.0)
+    if best <= 0:
+        return {}
+    return {item_id: score / best for item_id, score in scores.items() if score > 0}
@@ -2,11 +2,14 @@
 SQLite Storage Backend.
 
 Provides SQLite-based storage for local development and single-machine deployments.
-Does not support vector search or full-text search (uses basic LIKE queries).
+Does not support vector search. Full-text search uses FTS5 when the SQLite
+build includes it (see KnowledgeStore).
 """
 
 import sqlite3
 import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
 
@@ -16,7 +19,7 @@ class SQLiteBackend:
     SQLite storage backend implementation.
 
     Thread-safe via connection-per-thread pattern.
-    Does not support vector search or full-text search natively.
+    Does not support vector search natively.
     """
 
     def __init__(self, db_path: Path | str):
@@ -31,6 +34,7 @@ class SQLiteBackend:
 
         # Thread-local storage for connections
         self._local = threading.local()
+        self._has_fts5: bool | None = None
 
         # Create initial connection to verify path is valid
         self._get_connection()
@@ -76,6 +80,18 @@ class SQLiteBackend:
         cursor.executemany(query, params_list)
         conn.commit()
 
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run several writes as one transaction.
+
+        Yields this thread's connection; the writes are committed together
+        when the block exits, or rolled back if it raises.
+        """
+        conn = self._get_connection()
+        with conn:
+            yield conn
+
     def fetch_one(self, query: str, params: tuple = ()) -> dict[str, Any] | None:
         """
         Fetch a single row as a dictionary.
@@ -123,13 +139,20 @@ class SQLiteBackend:
 
     def supports_full_text_search(self) -> bool:
         """
-        SQLite has FTS5 but we don't use it by default.
-        Could be extended to use FTS5 in the future.
+        Check whether this SQLite build includes the FTS5 extension.
 
         Returns:
-            False (for now - basic LIKE queries used instead)
-        """
-        return False
+            True if FTS5 virtual tables (with bm25() ranking) can be created
+        """
+        if self._has_fts5 is None:
+            conn = self._get_connection()
+            try:
+                conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(content)")
+                conn.execute("DROP TABLE temp.fts5_probe")
+                self._has_fts5 = True
+            except sqlite3.OperationalError:
+                self._has_fts5 = False
+        return self._has_fts5
 
     def close(self) -> None:
         """Close the database connection for current thread."""
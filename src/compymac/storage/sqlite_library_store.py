@@ -0,0 +1,555 @@
+"""
+SQLite-backed Library Store.
+
+Persists documents, chunks (with their embeddings) and active sources, so
+the library survives API server restarts without re-upload or re-embedding.
+Documents are loaded lazily on first access and cached; the vector index is
+rebuilt from stored embeddings on first use. Keyword search runs through an
+FTS5 index over chunk content, ranked by BM25 (LIKE on builds without FTS5),
+so search_chunks only touches matching chunks instead of scanning the whole
+library.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from compymac.storage.embedding_codec import decode_embedding, encode_embedding
+from compymac.storage.keyword_index import tokenize
+from compymac.storage.library_store import (
+    DocumentStatus,
+    LibraryDocument,
+    LibraryStore,
+    _chunk_id,
+    _normalize_scores,
+)
+from compymac.storage.sqlite_backend import SQLiteBackend
+from compymac.storage.vector_index import VectorIndex
+
+if TYPE_CHECKING:
+    from compymac.retrieval.embedder import Embedder
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters is 999 on older builds
+_PARAM_BATCH = 500
+
+_DOCUMENT_COLUMNS = (
+    "id", "user_id", "filename", "title", "page_count", "status", "created_at",
+    "updated_at", "file_path", "file_size_bytes", "error", "metadata",
+    "library_path", "doc_format", "navigation",
+)
+
+
+def _batches(items: list[str]) -> list[list[str]]:
+    return [items[i:i + _PARAM_BATCH] for i in range(0, len(items), _PARAM_BATCH)]
+
+
+def _placeholders(items: Sequence[Any]) -> str:
+    return ", ".join("?" for _ in items)
+
+
+def _term_match_score(query_terms: list[str], content: str) -> float:
+    """Fraction of query terms (lowercased) that occur in content."""
+    content = content.lower()
+    return sum(1 for term in query_terms if term in content) / len(query_terms)
+
+
+class SQLiteLibraryStore(LibraryStore):
+    """
+    Durable LibraryStore backed by a SQLite database.
+
+    Same public API as LibraryStore. Document objects returned are cached
+    views; change them through update_document() so changes are persisted.
+    The in-memory caches and the rows behind them change together under the
+    store lock, so ingestion threads can write while requests search.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str = "~/.compymac/library.db",
+        use_embeddings: bool = True,
+        embedder_api_key: str | None = None,
+        vector_index: VectorIndex | None = None,
+        embedder: "Embedder | None" = None,
+        keyword_candidates: int = 1000,
+    ) -> None:
+        """
+        Initialize SQLite library store.
+
+        Args:
+            db_path: SQLite database file (created if it doesn't exist)
+            use_embeddings: Whether to use vector embeddings for search
+            embedder_api_key: API key for embedder (uses env var if None)
+            vector_index: Index for chunk embeddings (exact VectorIndex if None)
+            embedder: Embedder to use (chosen by create_embedder() if None)
+            keyword_candidates: Maximum chunks scored per keyword search
+                (best full-text matches first)
+        """
+        super().__init__(
+            use_embeddings=use_embeddings,
+            embedder_api_key=embedder_api_key,
+            vector_index=vector_index,
+            embedder=embedder,
+        )
+        # Keyword search runs through FTS5 rather than the in-memory index
+        self._keyword_index = None
+        self.backend = SQLiteBackend(Path(db_path).expanduser())
+        self.keyword_candidates = keyword_candidates
+        self.use_fts = self.backend.supports_full_text_search()
+        self._vector_index_loaded = False
+        self._vector_index_lock = threading.Lock()
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """Create tables and indexes."""
+        self.backend.execute("""
+            CREATE TABLE IF NOT EXISTS library_documents (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                title TEXT NOT NULL,
+                page_count INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                file_path TEXT,
+                file_size_bytes INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                metadata TEXT NOT NULL DEFAULT '{}',
+                library_path TEXT NOT NULL DEFAULT '',
+                doc_format TEXT NOT NULL DEFAULT 'pdf',
+                navigation TEXT NOT NULL DEFAULT '[]'
+            )
+        """)
+        self.backend.execute("""
+            CREATE INDEX IF NOT EXISTS idx_library_documents_user
+            ON library_documents(user_id, created_at)
+        """)
+        # Chunk dicts are stored as content plus the remaining keys as JSON
+        self.backend.execute("""
+            CREATE TABLE IF NOT EXISTS library_chunks (
+                doc_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                data TEXT NOT NULL,
+                embedding BLOB,
+                embedding_model TEXT,
+                PRIMARY KEY (doc_id, position)
+            )
+        """)
+        self.backend.execute(
+            "CREATE INDEX IF NOT EXISTS idx_library_chunks_id ON library_chunks(id)"
+        )
+        self.backend.execute("""
+            CREATE TABLE IF NOT EXISTS library_active_sources (
+                session_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (session_id, doc_id)
+            )
+        """)
+        if self.use_fts:
+            self._init_fts()
+
+    def _init_fts(self) -> None:
+        """Create the FTS5 index over chunk content and its sync triggers."""
+        self.backend.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS library_chunks_fts USING fts5(
+                content,
+                content='library_chunks',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS library_chunks_fts_insert
+            AFTER INSERT ON library_chunks BEGIN
+                INSERT INTO library_chunks_fts(rowid, content) VALUES (new.rowid, new.content);
+            END
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS library_chunks_fts_delete
+            AFTER DELETE ON library_chunks BEGIN
+                INSERT INTO library_chunks_fts(library_chunks_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+            END
+        """)
+        self.backend.execute("""
+            CREATE TRIGGER IF NOT EXISTS library_chunks_fts_update
+            AFTER UPDATE OF content ON library_chunks BEGIN
+                INSERT INTO library_chunks_fts(library_chunks_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+                INSERT INTO library_chunks_fts(rowid, content) VALUES (new.rowid, new.content);
+            END
+        """)
+
+    # Documents
+
+    def create_document(
+        self,
+        user_id: str,
+        filename: str,
+        title: str | None = None,
+        file_path: str | None = None,
+        file_size_bytes: int = 0,
+        library_path: str = "",
+        doc_format: str = "pdf",
+    ) -> LibraryDocument:
+        """Create a new document entry in the library."""
+        doc = super().create_document(
+            user_id=user_id,
+            filename=filename,
+            title=title,
+            file_path=file_path,
+            file_size_bytes=file_size_bytes,
+            library_path=library_path,
+            doc_format=doc_format,
+        )
+        self._save_document(doc)
+        return doc
+
+    def get_document(self, doc_id: str) -> LibraryDocument | None:
+        """Get a document by ID, loading it from the database on first access."""
+        with self._lock:
+            doc = self._documents.get(doc_id)
+            if doc is not None:
+                return doc
+
+            row = self.backend.fetch_one(
+                "SELECT * FROM library_documents WHERE id = ?", (doc_id,)
+            )
+            if row is None:
+                return None
+            doc = self._document_from_row(row)
+            chunk_rows = self.backend.fetch_all(
+                "SELECT content, data FROM library_chunks WHERE doc_id = ? ORDER BY position",
+                (doc_id,),
+            )
+            chunks = []
+            for chunk_row in chunk_rows:
+                chunk = json.loads(chunk_row["data"])
+                chunk["content"] = chunk_row["content"]
+                chunks.append(chunk)
+
+            self._documents[doc_id] = doc
+            # Index only: the chunks came from the database
+            super()._set_chunks(doc, chunks)
+            return doc
+
+    def get_user_documents(self, user_id: str) -> list[LibraryDocument]:
+        """Get all documents for a user."""
+        rows = self.backend.fetch_all(
+            "SELECT id FROM library_documents WHERE user_id = ? ORDER BY created_at, rowid",
+            (user_id,),
+        )
+        docs = [self.get_document(row["id"]) for row in rows]
+        return [doc for doc in docs if doc is not None]
+
+    def update_document(
+        self,
+        doc_id: str,
+        status: DocumentStatus | None = None,
+        page_count: int | None = None,
+        error: str | None = None,
+        chunks: list[dict[str, Any]] | None = None,
+        metadata: dict[str, Any] | None = None,
+        navigation: list[dict[str, Any]] | None = None,
+        generate_embeddings: bool = True,
+        embedding_progress: Callable[[int, int], None] | None = None,
+    ) -> LibraryDocument | None:
+        """Update a document's properties and persist them."""
+        if self.get_document(doc_id) is None:
+            return None
+        doc = super().update_document(
+            doc_id,
+            status=status,
+            page_count=page_count,
+            error=error,
+            chunks=chunks,
+            metadata=metadata,
+            navigation=navigation,
+            generate_embeddings=generate_embeddings,
+            embedding_progress=embedding_progress,
+        )
+        if doc is not None:
+            with self._lock:
+                # Not if a concurrent delete_document() removed it meanwhile
+                if doc_id in self._documents:
+                    self._save_document(doc)
+        return doc
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document from the library."""
+        with self._lock:
+            if self.get_document(doc_id) is None:
+                return False
+            super().delete_document(doc_id)
+            with self.backend.transaction() as conn:
+                conn.execute("DELETE FROM library_chunks WHERE doc_id = ?", (doc_id,))
+                conn.execute("DELETE FROM library_active_sources WHERE doc_id = ?", (doc_id,))
+                conn.execute("DELETE FROM library_documents WHERE id = ?", (doc_id,))
+        return True
+
+    def _save_document(self, doc: LibraryDocument) -> None:
+        values = (
+            doc.id, doc.user_id, doc.filename, doc.title, doc.page_count, doc.status.value,
+            doc.created_at, doc.updated_at, doc.file_path, doc.file_size_bytes, doc.error,
+            json.dumps(doc.metadata), doc.library_path, doc.doc_format,
+            json.dumps(doc.navigation),
+        )
+        self.backend.execute(
+            f"INSERT OR REPLACE INTO library_documents ({', '.join(_DOCUMENT_COLUMNS)}) "
+            f"VALUES ({_placeholders(values)})",
+            values,
+        )
+
+    @staticmethod
+    def _document_from_row(row: dict[str, Any]) -> LibraryDocument:
+        return LibraryDocument(
+            id=row["id"],
+            user_id=row["user_id"],
+            filename=row["filename"],
+            title=row["title"],
+            page_count=row["page_count"],
+            status=DocumentStatus(row["status"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            file_path=row["file_path"],
+            file_size_bytes=row["file_size_bytes"],
+            error=row["error"],
+            metadata=json.loads(row["metadata"]),
+            library_path=row["library_path"],
+            doc_format=row["doc_format"],
+            navigation=json.loads(row["navigation"]),
+        )
+
+    # Chunks and embeddings
+
+    def _set_chunks(self, doc: LibraryDocument, chunks: list[dict[str, Any]]) -> None:
+        """Replace a document's chunks and write them through to the database."""
+        rows = []
+        for i, chunk in enumerate(chunks):
+            data = {key: value for key, value in chunk.items() if key != "content"}
+            rows.append((
+                doc.id, i, _chunk_id(doc.id, i, chunk), chunk.get("content", ""),
+                json.dumps(data),
+            ))
+        with self._lock:
+            super()._set_chunks(doc, chunks)
+            # One transaction, so readers never see the document without chunks
+            with self.backend.transaction() as conn:
+                conn.execute("DELETE FROM library_chunks WHERE doc_id = ?", (doc.id,))
+                conn.executemany(
+                    "INSERT INTO library_chunks (doc_id, position, id, content, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def _store_chunk_embeddings(
+        self,
+        doc_id: str,
+        chunk_ids: list[str],
+        embeddings: list[list[float]],
+    ) -> None:
+        """Persist chunk embeddings alongside the chunks, then index them."""
+        model = self._embedding_model()
+        rows = [
+            (encode_embedding(embedding), model, doc_id, i)
+            for i, embedding in enumerate(embeddings)
+        ]
+        with self._lock:
+            self.backend.execute_many(
+                "UPDATE library_chunks SET embedding = ?, embedding_model = ? "
+                "WHERE doc_id = ? AND position = ?",
+                rows,
+            )
+            super()._store_chunk_embeddings(doc_id, chunk_ids, embeddings)
+
+    def _embedding_model(self) -> str:
+        return getattr(self._embedder, "model", "") or ""
+
+    def _get_vector_index(self) -> VectorIndex:
+        """Index of chunk embeddings, built from the database on first use."""
+        if self._vector_index_loaded:
+            return self._vector_index
+        with self._vector_index_lock:
+            if not self._vector_index_loaded:
+                self._load_vector_index()
+                self._vector_index_loaded = True
+        return self._vector_index
+
+    def _load_vector_index(self, batch_size: int = 5000) -> None:
+        """Add stored embeddings made by the current embedder's model to the index."""
+        model = self._embedding_model()
+        loaded = 0
+        last_rowid = 0
+        while True:
+            rows = self.backend.fetch_all("""
+                SELECT rowid, id, doc_id, embedding FROM library_chunks
+                WHERE rowid > ? AND embedding IS NOT NULL AND embedding_model = ?
+                ORDER BY rowid
+                LIMIT ?
+            """, (last_rowid, model, batch_size))
+            if not rows:
+                break
+            last_rowid = rows[-1]["rowid"]
+            self._vector_index.add_batch(
+                [row["id"] for row in rows],
+                [decode_embedding(row["embedding"]) for row in rows],
+                source_ids=[row["doc_id"] for row in rows],
+            )
+            loaded += len(rows)
+        if loaded:
+            logger.info(f"Loaded {loaded} chunk embeddings into the library vector index")
+
+    # Active sources
+
+    def add_active_source(self, session_id: str, doc_id: str) -> bool:
+        """Add a document to the active sources for a session."""
+        if not self._search_scope([doc_id]):
+            return False
+        next_position = self.backend.fetch_one(
+            "SELECT COALESCE(MAX(position), 0) + 1 AS position "
+            "FROM library_active_sources WHERE session_id = ?",
+            (session_id,),
+        )
+        self.backend.execute(
+            "INSERT OR IGNORE INTO library_active_sources (session_id, doc_id, position) "
+            "VALUES (?, ?, ?)",
+            (session_id, doc_id, next_position["position"] if next_position else 1),
+        )
+        return True
+
+    def remove_active_source(self, session_id: str, doc_id: str) -> bool:
+        """Remove a document from the active sources for a session."""
+        present = self.backend.fetch_one(
+            "SELECT 1 AS present FROM library_active_sources WHERE session_id = ? AND doc_id = ?",
+            (session_id, doc_id),
+        )
+        if present is None:
+            return False
+        self.backend.execute(
+            "DELETE FROM library_active_sources WHERE session_id = ? AND doc_id = ?",
+            (session_id, doc_id),
+        )
+        return True
+
+    def get_active_sources(self, session_id: str) -> list[LibraryDocument]:
+        """Get all active source documents for a session."""
+        rows = self.backend.fetch_all(
+            "SELECT doc_id FROM library_active_sources WHERE session_id = ? ORDER BY position",
+            (session_id,),
+        )
+        docs = [self.get_document(row["doc_id"]) for row in rows]
+        return [doc for doc in docs if doc is not None]
+
+    def clear_active_sources(self, session_id: str) -> None:
+        """Clear all active sources for a session."""
+        self.backend.execute(
+            "DELETE FROM library_active_sources WHERE session_id = ?", (session_id,)
+        )
+
+    # Search
+
+    def _search_scope(self, doc_ids: list[str] | None) -> list[str]:
+        """IDs of the existing documents to search (all documents if doc_ids is empty)."""
+        if not doc_ids:
+            rows = self.backend.fetch_all(
+                "SELECT id FROM library_documents ORDER BY created_at, rowid"
+            )
+            return [row["id"] for row in rows]
+        existing: set[str] = set()
+        for batch in _batches(list(doc_ids)):
+            rows = self.backend.fetch_all(
+                f"SELECT id FROM library_documents WHERE id IN ({_placeholders(batch)})",
+                tuple(batch),
+            )
+            existing.update(row["id"] for row in rows)
+        return [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id in existing]
+
+    def _locate_chunks(
+        self,
+        chunk_ids: list[str],
+    ) -> dict[str, tuple[LibraryDocument, dict[str, Any]]]:
+        """Look up (document, chunk) pairs by chunk ID, loading their documents."""
+        with self._lock:
+            unknown = [
+                chunk_id for chunk_id in chunk_ids if chunk_id not in self._chunk_locations
+            ]
+        for batch in _batches(unknown):
+            rows = self.backend.fetch_all(
+                f"SELECT DISTINCT doc_id FROM library_chunks WHERE id IN ({_placeholders(batch)})",
+                tuple(batch),
+            )
+            for row in rows:
+                self.get_document(row["doc_id"])
+        return super()._locate_chunks(chunk_ids)
+
+    def _scope_filter(self, doc_ids: list[str]) -> tuple[str, tuple[str, ...]]:
+        """
+        SQL condition (and its parameters) restricting library_chunks c to doc_ids.
+
+        Scopes too large to pass as parameters go through a temp table, so
+        the filter still applies before any LIMIT.
+        """
+        if len(doc_ids) <= _PARAM_BATCH:
+            return f" AND c.doc_id IN ({_placeholders(doc_ids)})", tuple(doc_ids)
+        # Temp tables are per connection, and connections are per thread
+        with self.backend.transaction() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_scope (doc_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.search_scope")
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.search_scope (doc_id) VALUES (?)",
+                [(doc_id,) for doc_id in doc_ids],
+            )
+        return " AND c.doc_id IN (SELECT doc_id FROM temp.search_scope)", ()
+
+    def _keyword_search(
+        self,
+        query: str,
+        doc_ids: list[str],
+    ) -> dict[str, float]:
+        """
+        Keyword search over the chunks of doc_ids.
+
+        Uses the FTS5 index, ranked by BM25 like LibraryStore's in-memory
+        index (query words of 3+ characters match as prefixes). Without FTS5,
+        chunks are matched with LIKE and scored by the fraction of query
+        terms they contain.
+        """
+        words = tokenize(query)
+        if not words or not doc_ids:
+            return {}
+
+        scope_filter, scope_params = self._scope_filter(doc_ids)
+
+        if not self.use_fts:
+            query_terms = query.lower().split()
+            likes = " OR ".join("c.content LIKE ?" for _ in query_terms)
+            rows = self.backend.fetch_all(f"""
+                SELECT c.id, c.doc_id, c.content FROM library_chunks c
+                WHERE ({likes}){scope_filter}
+                LIMIT ?
+            """, (*(f"%{term}%" for term in query_terms), *scope_params,
+                  self.keyword_candidates))
+            return {row["id"]: _term_match_score(query_terms, row["content"]) for row in rows}
+
+        match = " OR ".join(
+            '"' + word.replace('"', '""') + ('"*' if len(word) >= 3 else '"')
+            for word in dict.fromkeys(words)
+        )
+        rows = self.backend.fetch_all(f"""
+            SELECT c.id, c.doc_id, bm25(library_chunks_fts) AS bm25_rank
+            FROM library_chunks_fts
+            JOIN library_chunks c ON c.rowid = library_chunks_fts.rowid
+            WHERE library_chunks_fts MATCH ?{scope_filter}
+            ORDER BY bm25_rank
+            LIMIT ?
+        """, (match, *scope_params, self.keyword_candidates))
+        # bm25() is lower-is-better; negate it so higher scores rank first
+        return _normalize_scores({row["id"]: -row["bm25_rank"] for row in rows})
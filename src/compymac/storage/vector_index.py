@@ -0,0 +1,577 @@
+"""
+In-process vector indexes for dense retrieval.
+
+VectorIndex holds embeddings as one contiguous float32 matrix with
+L2-normalized rows, so a cosine-similarity query is a single matrix-vector
+product followed by an argpartition top-k. Rows carry integer-coded
+source_type/source_id labels that are turned into boolean masks for filtered
+queries.
+
+IVFIndex adds an inverted-file layer for corpora too large to scan: rows are
+bucketed under k-means centroids and a query only scores the n_probe buckets
+whose centroids are closest to it.
+
+Both can be saved to and loaded from a .npz file. Used by KnowledgeStore
+(memory units) and LibraryStore (document chunks).
+"""
+
+import json
+import os
+import threading
+from collections.abc import Collection, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_INITIAL_CAPACITY = 256
+
+# Rows scored per matrix product when assigning vectors to centroids
+_ASSIGN_BATCH = 16384
+
+
+class VectorIndex:
+    """
+    Mutable exact cosine-similarity index over string-keyed embeddings.
+
+    Adds and removes are incremental: the matrix grows by doubling and a
+    removed row is back-filled with the last row. Thread-safe.
+    """
+
+    kind = "flat"
+
+    def __init__(self, dim: int | None = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            dim: Embedding dimension (inferred from the first add if None)
+        """
+        self.dim = dim
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self._type_codes = np.zeros(0, dtype=np.int32)
+        self._source_codes = np.zeros(0, dtype=np.int32)
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._codes: dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._positions
+
+    def add(
+        self,
+        item_id: str,
+        embedding: Sequence[float],
+        source_type: str = "",
+        source_id: str = "",
+    ) -> None:
+        """Insert or replace one embedding."""
+        self.add_batch([item_id], [embedding], [source_type], [source_id])
+
+    def add_batch(
+        self,
+        item_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float] | np.ndarray],
+        source_types: Sequence[str] | None = None,
+        source_ids: Sequence[str] | None = None,
+    ) -> None:
+        """
+        Insert or replace several embeddings.
+
+        Raises:
+            ValueError: If an embedding's dimension doesn't match the index
+        """
+        if not item_ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(item_ids):
+            raise ValueError("embeddings must be a list of equal-length vectors")
+        source_types = source_types or [""] * len(item_ids)
+        source_ids = source_ids or [""] * len(item_ids)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            if matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match index dimension "
+                    f"{self.dim}"
+                )
+
+            positions = np.empty(len(item_ids), dtype=np.intp)
+            for row, item_id in enumerate(item_ids):
+                pos = self._positions.get(item_id)
+                if pos is None:
+                    pos = len(self._ids)
+                    self._reserve(pos + 1)
+                    self._ids.append(item_id)
+                    self._positions[item_id] = pos
+                positions[row] = pos
+                self._vectors[pos] = matrix[row]
+                self._type_codes[pos] = self._code(source_types[row])
+                self._source_codes[pos] = self._code(source_ids[row])
+            self._rows_written(positions, matrix)
+
+    def remove(self, item_id: str) -> bool:
+        """Remove an embedding. Returns False if it wasn't indexed."""
+        with self._lock:
+            pos = self._positions.pop(item_id, None)
+            if pos is None:
+                return False
+            last = len(self._ids) - 1
+            if pos != last:
+                moved = self._ids[last]
+                self._ids[pos] = moved
+                self._positions[moved] = pos
+                self._move_row(last, pos)
+            self._ids.pop()
+            self._rows_written(np.zeros(0, dtype=np.intp), None)
+            return True
+
+    def remove_source(self, source_id: str) -> int:
+        """Remove every embedding labelled with source_id. Returns the count removed."""
+        with self._lock:
+            code = self._codes.get(source_id)
+            if code is None:
+                return 0
+            rows = np.flatnonzero(self._source_codes[:len(self._ids)] == code)
+            doomed = [self._ids[row] for row in rows]
+            for item_id in doomed:
+                self.remove(item_id)
+            return len(doomed)
+
+    def clear(self) -> None:
+        """Remove every embedding, keeping the dimension."""
+        with self._lock:
+            self._ids.clear()
+            self._positions.clear()
+            self._codes.clear()
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        source_type: str | None = None,
+        source_id: str | Collection[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Find the k embeddings most cosine-similar to query.
+
+        Args:
+            query: Query embedding
+            k: Maximum number of results
+            source_type: Optional filter by source type
+            source_id: Optional filter by one source ID or a collection of them
+
+        Returns:
+            List of (item_id, cosine similarity) pairs, best first
+        """
+        with self._lock:
+            q = self._normalize_query(query)
+            if q is None or k <= 0:
+                return []
+            return self._top_k(*self._score(q, source_type, source_id), k)
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        source_type: str | None = None,
+        source_id: str | Collection[str] | None = None,
+    ) -> dict[str, float]:
+        """Cosine similarity of query against every matching embedding."""
+        with self._lock:
+            q = self._normalize_query(query)
+            if q is None:
+                return {}
+            return self._to_dict(*self._score(q, source_type, source_id))
+
+    def save(self, path: Path | str, metadata: dict[str, Any] | None = None) -> None:
+        """
+        Write the index to a .npz file, atomically replacing any existing one.
+
+        Args:
+            path: Destination file
+            metadata: Optional JSON-serializable data returned by load()
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            arrays: dict[str, Any] = self._state()
+        arrays["metadata"] = np.array(json.dumps(metadata or {}))
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path | str) -> dict[str, Any]:
+        """
+        Replace this index's contents with a file written by save().
+
+        Returns:
+            The metadata passed to save()
+
+        Raises:
+            ValueError: If the file was written by a different kind of index
+        """
+        with np.load(path) as data:
+            if str(data["kind"]) != self.kind:
+                raise ValueError(f"{path} holds a {data['kind']} index, not {self.kind}")
+            with self._lock:
+                self._restore(data)
+            metadata: dict[str, Any] = json.loads(str(data["metadata"]))
+            return metadata
+
+    def _state(self) -> dict[str, np.ndarray]:
+        """Arrays that make up the persisted index."""
+        n = len(self._ids)
+        return {
+            "kind": np.array(self.kind),
+            "dim": np.array(self.dim or 0),
+            "ids": np.array(self._ids, dtype=str),
+            "vectors": self._vectors[:n],
+            "type_codes": self._type_codes[:n],
+            "source_codes": self._source_codes[:n],
+            "labels": np.array(list(self._codes), dtype=str),
+        }
+
+    def _restore(self, data: Any) -> None:
+        self.dim = int(data["dim"]) or None
+        self._ids = data["ids"].tolist()
+        self._positions = {item_id: pos for pos, item_id in enumerate(self._ids)}
+        self._codes = {label: code for code, label in enumerate(data["labels"].tolist())}
+        self._vectors = np.array(data["vectors"], dtype=np.float32).reshape(-1, self.dim or 0)
+        self._type_codes = np.array(data["type_codes"], dtype=np.int32)
+        self._source_codes = np.array(data["source_codes"], dtype=np.int32)
+
+    def _rows_written(self, positions: np.ndarray, matrix: np.ndarray | None) -> None:
+        """Hook called after rows are added, replaced or removed."""
+
+    def _move_row(self, src: int, dst: int) -> None:
+        self._vectors[dst] = self._vectors[src]
+        self._type_codes[dst] = self._type_codes[src]
+        self._source_codes[dst] = self._source_codes[src]
+
+    def _normalize_query(self, query: Sequence[float]) -> np.ndarray | None:
+        """Return the unit-length query, or None if it can't match anything."""
+        q = np.asarray(query, dtype=np.float32)
+        if not self._ids or q.shape != (self.dim,):
+            return None
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return None
+        return q / norm
+
+    def _score(
+        self,
+        q: np.ndarray,
+        source_type: str | None,
+        source_id: str | Collection[str] | None,
+        rows: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row positions, similarities) for rows passing the filters.
+
+        Scores every row unless rows restricts the candidates.
+        """
+        n = len(self._ids)
+        scan_all = rows is None
+        if rows is None:
+            rows = np.arange(n)
+            type_codes, source_codes = self._type_codes[:n], self._source_codes[:n]
+        else:
+            type_codes, source_codes = self._type_codes[rows], self._source_codes[rows]
+
+        mask: np.ndarray | None = None
+        if source_type:
+            mask = type_codes == self._codes.get(source_type, -1)
+        if source_id:
+            ids = [source_id] if isinstance(source_id, str) else source_id
+            codes = [self._codes[s] for s in ids if s in self._codes]
+            source_mask = np.isin(source_codes, codes)
+            mask = source_mask if mask is None else mask & source_mask
+
+        if mask is not None:
+            rows = rows[mask]
+        elif scan_all:
+            # Unfiltered full scan: avoid gathering a copy of the matrix
+            return rows, self._vectors[:n] @ q
+        return rows, self._vectors[rows] @ q
+
+    def _top_k(self, rows: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[str, float]]:
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(self._ids[rows[i]], float(scores[i])) for i in order]
+
+    def _to_dict(self, rows: np.ndarray, scores: np.ndarray) -> dict[str, float]:
+        return {self._ids[row]: score for row, score in zip(rows, scores.tolist(), strict=True)}
+
+    def _code(self, label: str) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._codes)
+        return code
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        capacity = max(_INITIAL_CAPACITY, capacity * 2, size)
+        vectors = np.zeros((capacity, self.dim or 0), dtype=np.float32)
+        if self._ids:
+            vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+        self._vectors = vectors
+        self._type_codes = np.resize(self._type_codes, capacity)
+        self._source_codes = np.resize(self._source_codes, capacity)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Approximate cosine-similarity index using an inverted file (IVF-flat).
+
+    Until the index holds min_train_size embeddings it behaves exactly like
+    VectorIndex. It then trains n_lists spherical k-means centroids and files
+    every row under its nearest centroid; later inserts are filed under the
+    existing centroids, and the centroids are retrained once the index has
+    grown by retrain_factor. A query scores only the rows in the n_probe
+    lists nearest to it, trading recall for latency.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        dim: int | None = None,
+        n_lists: int | None = None,
+        n_probe: int = 8,
+        min_train_size: int = 10_000,
+        retrain_factor: float = 4.0,
+        train_sample_per_list: int = 256,
+        n_iter: int = 20,
+        seed: int = 0,
+    ):
+        """
+        Initialize an empty IVF index.
+
+        Args:
+            dim: Embedding dimension (inferred from the first add if None)
+            n_lists: Number of centroids (sqrt of the size at training if None)
+            n_probe: Lists scored per query; higher is slower with better recall
+            min_train_size: Embeddings required before centroids are trained
+            retrain_factor: Retrain once the index grows by this factor
+            train_sample_per_list: k-means sample size per centroid
+            n_iter: k-means iterations
+            seed: Random seed for k-means initialization and sampling
+        """
+        super().__init__(dim)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.train_sample_per_list = train_sample_per_list
+        self.n_iter = n_iter
+        self.seed = seed
+        self._centroids: np.ndarray | None = None
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+        # Rows sorted by list, with per-list offsets; rebuilt lazily after writes
+        self._list_order: np.ndarray | None = None
+        self._list_offsets: np.ndarray | None = None
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def train(self) -> None:
+        """Fit centroids to the current embeddings and re-file every row."""
+        with self._lock:
+            n = len(self._ids)
+            if n == 0:
+                return
+            vectors = self._vectors[:n]
+            n_lists = min(self.n_lists or max(1, round(np.sqrt(n))), n)
+            rng = np.random.default_rng(self.seed)
+            sample_size = min(n, n_lists * self.train_sample_per_list)
+            sample = vectors[np.sort(rng.choice(n, sample_size, replace=False))]
+            centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+            for _ in range(self.n_iter):
+                assign = _nearest(sample, centroids)
+                order = np.argsort(assign, kind="stable")
+                sorted_assign = assign[order]
+                starts = np.r_[0, np.flatnonzero(np.diff(sorted_assign)) + 1]
+                sums = np.add.reduceat(sample[order], starts, axis=0)
+                filled = sorted_assign[starts]
+                updated = centroids.copy()
+                updated[filled] = sums
+                # Reseed empty lists with random sample points
+                empty = np.setdiff1d(np.arange(n_lists), filled)
+                if len(empty):
+                    updated[empty] = sample[rng.choice(sample_size, len(empty))]
+                norms = np.linalg.norm(updated, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                centroids = (updated / norms).astype(np.float32)
+
+            self._centroids = centroids
+            self._lists = np.resize(self._lists, len(self._vectors))
+            self._lists[:n] = _nearest(vectors, centroids)
+            self._trained_size = n
+            self._list_order = None
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        source_type: str | None = None,
+        source_id: str | Collection[str] | None = None,
+        n_probe: int | None = None,
+    ) -> list[tuple[str, float]]:
+        """
+        Find approximately the k embeddings most cosine-similar to query.
+
+        Args:
+            query: Query embedding
+            k: Maximum number of results
+            source_type: Optional filter by source type
+            source_id: Optional filter by one source ID or a collection of them
+            n_probe: Lists to score for this query (defaults to self.n_probe)
+
+        Returns:
+            List of (item_id, cosine similarity) pairs, best first
+        """
+        with self._lock:
+            q = self._normalize_query(query)
+            if q is None or k <= 0:
+                return []
+            rows = self._probe(q, n_probe)
+            return self._top_k(*self._score(q, source_type, source_id, rows), k)
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        source_type: str | None = None,
+        source_id: str | Collection[str] | None = None,
+        n_probe: int | None = None,
+    ) -> dict[str, float]:
+        """Cosine similarity of query against the matching embeddings in the probed lists."""
+        with self._lock:
+            q = self._normalize_query(query)
+            if q is None:
+                return {}
+            return self._to_dict(*self._score(q, source_type, source_id, self._probe(q, n_probe)))
+
+    def clear(self) -> None:
+        """Remove every embedding, keeping the trained centroids."""
+        with self._lock:
+            super().clear()
+            self._list_order = None
+
+    def _probe(self, q: np.ndarray, n_probe: int | None) -> np.ndarray | None:
+        """Rows in the lists nearest to q, or None to scan everything."""
+        if self._centroids is None:
+            return None
+        n_lists = len(self._centroids)
+        n_probe = min(n_probe or self.n_probe, n_lists)
+        if n_probe >= n_lists:
+            return None
+        nearest = np.argpartition(-(self._centroids @ q), n_probe - 1)[:n_probe]
+        order, offsets = self._inverted_lists(n_lists)
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in nearest])
+
+    def _inverted_lists(self, n_lists: int) -> tuple[np.ndarray, np.ndarray]:
+        if self._list_order is None or self._list_offsets is None:
+            lists = self._lists[:len(self._ids)]
+            self._list_order = np.argsort(lists, kind="stable")
+            counts = np.bincount(lists, minlength=n_lists)
+            self._list_offsets = np.r_[0, np.cumsum(counts)]
+        return self._list_order, self._list_offsets
+
+    def _rows_written(self, positions: np.ndarray, matrix: np.ndarray | None) -> None:
+        self._list_order = None
+        if matrix is None:
+            return
+        n = len(self._ids)
+        if self._centroids is None:
+            if n >= self.min_train_size:
+                self.train()
+        elif n >= self._trained_size * self.retrain_factor:
+            self.train()
+        else:
+            self._lists[positions] = _nearest(matrix, self._centroids)
+
+    def _move_row(self, src: int, dst: int) -> None:
+        super()._move_row(src, dst)
+        self._lists[dst] = self._lists[src]
+
+    def _reserve(self, size: int) -> None:
+        super()._reserve(size)
+        if len(self._lists) < len(self._vectors):
+            self._lists = np.resize(self._lists, len(self._vectors))
+
+    def _state(self) -> dict[str, np.ndarray]:
+        state = super()._state()
+        if self._centroids is not None:
+            state["centroids"] = self._centroids
+            state["lists"] = self._lists[:len(self._ids)]
+            state["trained_size"] = np.array(self._trained_size)
+        return state
+
+    def _restore(self, data: Any) -> None:
+        super()._restore(data)
+        if "centroids" in data:
+            self._centroids = np.array(data["centroids"], dtype=np.float32)
+            self._lists = np.array(data["lists"], dtype=np.int32)
+            self._trained_size = int(data["trained_size"])
+        else:
+            self._centroids = None
+            self._lists = np.zeros(len(self._ids), dtype=np.int32)
+            self._trained_size = 0
+        self._list_order = None
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each row, computed in batches."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BATCH):
+        batch = vectors[start:start + _ASSIGN_BATCH]
+        assign[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return assign
+
+
+def recall_at_k(
+    approx: VectorIndex,
+    exact: VectorIndex,
+    queries: Sequence[Sequence[float]],
+    k: int = 10,
+) -> float:
+    """
+    Mean fraction of the exact top-k that an approximate index also returns.
+
+    Args:
+        approx: Index under test (e.g. an IVFIndex)
+        exact: Exact index over the same embeddings
+        queries: Query embeddings
+        k: Result depth
+
+    Returns:
+        Recall@k in [0, 1]
+    """
+    if not len(queries):
+        return 0.0
+    total = 0.0
+    for query in queries:
+        truth = {item_id for item_id, _ in exact.search(query, k)}
+        if not truth:
+            continue
+        found = {item_id for item_id, _ in approx.search(query, k)}
+        total += len(truth & found) / len(truth)
+    return total / len(queries)
@@ -0,0 +1,347 @@
+"""
+Retention, compaction and vacuum for TraceStore databases.
+
+Nothing in TraceStore deletes data on its own, so trace databases and
+artifact directories grow without bound. RetentionEngine applies a list of
+RetentionPolicy rules to decide which traces to delete, then:
+
+1. Deletes the selected traces' events, spans, checkpoints and provenance
+2. Deletes artifacts no remaining span, checkpoint or provenance row
+   references, directly or through delta/patch chains (see LLMInputEncoder
+   and TraceStore.create_checkpoint)
+3. Compacts the artifact backend and incrementally VACUUMs the database
+
+Every run can be a dry run that only reports what would be reclaimed.
+Runnable from `python -m compymac.cli.trace_admin retention` and as a
+periodic background task of the API server.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from compymac.trace_store import DELTA_MAGIC, TraceStore
+
+logger = logging.getLogger(__name__)
+
+# Trace statuses, matching SessionOverview.status
+TRACE_STATUSES = ("in_progress", "completed", "completed_with_errors")
+
+# Artifact types that may be stored delta-encoded and reference other artifacts
+_DELTA_ARTIFACT_TYPES = ("llm_input", "checkpoint_state")
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    A rule selecting traces to delete.
+
+    A trace matches when it satisfies every criterion that is set:
+    - max_age_days: last activity is older than this
+    - statuses: its status is one of these. In-progress traces are only
+      ever matched when "in_progress" is listed explicitly.
+    - keep_last_per_task: it is not among the N most recent traces of its
+      task (the name of the trace's first root span)
+    """
+    max_age_days: float | None = None
+    statuses: list[str] | None = None
+    keep_last_per_task: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.max_age_days is None and self.statuses is None and self.keep_last_per_task is None:
+            raise ValueError("RetentionPolicy needs at least one criterion")
+        for status in self.statuses or []:
+            if status not in TRACE_STATUSES:
+                raise ValueError(f"Unknown trace status {status!r}; expected one of {TRACE_STATUSES}")
+
+    def matches(self, trace: TraceInfo, rank_in_task: int, now: datetime) -> bool:
+        """Whether a trace (the ``rank_in_task``-th most recent of its task) matches."""
+        if trace.status == "in_progress" and "in_progress" not in (self.statuses or []):
+            return False
+        if self.statuses is not None and trace.status not in self.statuses:
+            return False
+        if self.max_age_days is not None:
+            if trace.last_ts > now - timedelta(days=self.max_age_days):
+                return False
+        if self.keep_last_per_task is not None and rank_in_task < self.keep_last_per_task:
+            return False
+        return True
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "max_age_days": self.max_age_days,
+            "statuses": self.statuses,
+            "keep_last_per_task": self.keep_last_per_task,
+        }
+
+
+@dataclass
+class TraceInfo:
+    """Summary of one trace used for retention decisions."""
+    trace_id: str
+    task: str
+    status: str
+    start_ts: datetime
+    last_ts: datetime
+
+
+@dataclass
+class RetentionReport:
+    """What a retention run deleted (or, for a dry run, would delete)."""
+    dry_run: bool
+    trace_ids: list[str] = field(default_factory=list)
+    event_rows: int = 0
+    span_rows: int = 0
+    checkpoint_rows: int = 0
+    event_bytes: int = 0
+    orphan_artifacts: int = 0
+    artifact_bytes: int = 0
+    reclaimed_artifact_bytes: int = 0
+    reclaimed_db_bytes: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "dry_run": self.dry_run,
+            "traces": len(self.trace_ids),
+            "trace_ids": self.trace_ids,
+            "event_rows": self.event_rows,
+            "span_rows": self.span_rows,
+            "checkpoint_rows": self.checkpoint_rows,
+            "event_bytes": self.event_bytes,
+            "orphan_artifacts": self.orphan_artifacts,
+            "artifact_bytes": self.artifact_bytes,
+            "reclaimed_artifact_bytes": self.reclaimed_artifact_bytes,
+            "reclaimed_db_bytes": self.reclaimed_db_bytes,
+        }
+
+    def summary(self) -> str:
+        """Human-readable report."""
+        verb = "Would delete" if self.dry_run else "Deleted"
+        lines = [
+            f"{verb} {len(self.trace_ids)} trace(s): {self.event_rows} event(s), "
+            f"{self.span_rows} span(s), {self.checkpoint_rows} checkpoint(s), "
+            f"~{_format_bytes(self.event_bytes)} of event data",
+            f"{verb} {self.orphan_artifacts} orphaned artifact(s), "
+            f"{_format_bytes(self.artifact_bytes)}",
+        ]
+        if not self.dry_run:
+            lines.append(
+                f"Reclaimed {_format_bytes(self.reclaimed_artifact_bytes)} of artifact storage "
+                f"and {_format_bytes(self.reclaimed_db_bytes)} of database pages"
+            )
+        return "\n".join(lines)
+
+
+def _format_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{n} B"
+
+
+class RetentionEngine:
+    """Applies retention policies to a TraceStore and reclaims the freed space."""
+
+    def __init__(
+        self,
+        trace_store: TraceStore,
+        policies: list[RetentionPolicy],
+        artifact_grace_seconds: float = 3600.0,
+        vacuum_pages: int | None = None,
+    ):
+        """
+        Args:
+            trace_store: The store to clean up
+            policies: A trace is deleted if any policy matches it
+            artifact_grace_seconds: Unreferenced artifacts younger than this are
+                kept, since a span referencing them may still be in flight
+            vacuum_pages: Free pages released per incremental VACUUM (None = all)
+        """
+        self.trace_store = trace_store
+        self.policies = policies
+        self.artifact_grace_seconds = artifact_grace_seconds
+        self.vacuum_pages = vacuum_pages
+
+    def list_traces(self) -> list[TraceInfo]:
+        """
+        Summarize every trace that has spans or checkpoints.
+
+        Traces forked from a checkpoint may hold only checkpoints; their task
+        is empty and their activity is the time of their latest checkpoint.
+        """
+        with self.trace_store._connect() as conn:
+            rows = conn.execute("""
+                WITH span_traces AS (
+                    SELECT s.trace_id,
+                           MIN(s.start_ts) AS start_ts,
+                           MAX(COALESCE(s.end_ts, s.start_ts)) AS last_ts,
+                           SUM(s.end_ts IS NULL) AS open_spans,
+                           SUM(s.status = 'error') AS errors,
+                           (SELECT r.name FROM spans r
+                            WHERE r.trace_id = s.trace_id AND r.parent_span_id IS NULL
+                            ORDER BY r.start_ts LIMIT 1) AS root_name
+                    FROM spans s
+                    GROUP BY s.trace_id
+                ),
+                checkpoint_traces AS (
+                    SELECT trace_id, MIN(created_ts) AS start_ts, MAX(created_ts) AS last_ts
+                    FROM checkpoints
+                    GROUP BY trace_id
+                )
+                SELECT trace_id, start_ts, last_ts, open_spans, errors, root_name
+                FROM span_traces
+                UNION ALL
+                SELECT c.trace_id, c.start_ts, c.last_ts, 0, 0, NULL
+                FROM checkpoint_traces c
+                WHERE c.trace_id NOT IN (SELECT trace_id FROM span_traces)
+            """).fetchall()
+
+        traces = []
+        for trace_id, start_ts, last_ts, open_spans, errors, root_name in rows:
+            if open_spans:
+                status = "in_progress"
+            elif errors:
+                status = "completed_with_errors"
+            else:
+                status = "completed"
+            traces.append(TraceInfo(
+                trace_id=trace_id,
+                task=root_name or "",
+                status=status,
+                start_ts=datetime.fromisoformat(start_ts),
+                last_ts=datetime.fromisoformat(last_ts),
+            ))
+        return traces
+
+    def select_traces(self, now: datetime | None = None) -> list[str]:
+        """Return the IDs of traces matched by any policy."""
+        now = now or datetime.now(UTC)
+        by_task: dict[str, list[TraceInfo]] = defaultdict(list)
+        for trace in self.list_traces():
+            by_task[trace.task].append(trace)
+
+        selected = []
+        for traces in by_task.values():
+            traces.sort(key=lambda t: t.last_ts, reverse=True)
+            for rank, trace in enumerate(traces):
+                if any(policy.matches(trace, rank, now) for policy in self.policies):
+                    selected.append(trace.trace_id)
+        return sorted(selected)
+
+    def find_orphan_artifacts(
+        self,
+        deleted_traces: list[str] | None = None,
+        now: datetime | None = None,
+    ) -> list[tuple[str, int]]:
+        """
+        Return (hash, byte_len) of artifacts nothing references.
+
+        References come from spans, checkpoints and provenance of traces not
+        in ``deleted_traces``, followed transitively through delta and patch
+        artifacts. Artifacts created or stored again within the grace period
+        are never orphans.
+        """
+        now = now or datetime.now(UTC)
+        cutoff = now - timedelta(seconds=self.artifact_grace_seconds)
+        with self.trace_store._connect() as conn:
+            conn.execute("CREATE TEMP TABLE doomed (trace_id TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT INTO doomed (trace_id) VALUES (?)",
+                [(t,) for t in deleted_traces or []],
+            )
+            live = {
+                row[0] for row in conn.execute("""
+                    SELECT input_artifact_hash FROM spans
+                    WHERE trace_id NOT IN (SELECT trace_id FROM doomed)
+                    UNION SELECT output_artifact_hash FROM spans
+                    WHERE trace_id NOT IN (SELECT trace_id FROM doomed)
+                    UNION SELECT state_artifact_hash FROM checkpoints
+                    WHERE trace_id NOT IN (SELECT trace_id FROM doomed)
+                    UNION SELECT object_artifact_hash FROM provenance
+                    WHERE trace_id NOT IN (SELECT trace_id FROM doomed)
+                """)
+                if row[0] is not None
+            }
+            artifacts = conn.execute(
+                "SELECT artifact_hash, artifact_type, byte_len, "
+                "COALESCE(last_stored_ts, created_ts) FROM artifacts"
+            ).fetchall()
+
+        delta_types = {h for h, artifact_type, _, _ in artifacts
+                       if artifact_type in _DELTA_ARTIFACT_TYPES}
+        pending = [h for h in live if h in delta_types]
+        while pending:
+            artifact_hash = pending.pop()
+            for ref in self._delta_references(artifact_hash):
+                if ref not in live:
+                    live.add(ref)
+                    if ref in delta_types:
+                        pending.append(ref)
+
+        return [
+            (artifact_hash, byte_len)
+            for artifact_hash, _, byte_len, stored_ts in artifacts
+            if artifact_hash not in live and datetime.fromisoformat(stored_ts) < cutoff
+        ]
+
+    def _delta_references(self, artifact_hash: str) -> list[str]:
+        raw = self.trace_store.artifact_store.retrieve_raw(artifact_hash)
+        if raw is None or not raw.startswith(DELTA_MAGIC):
+            return []
+        payload = json.loads(raw[len(DELTA_MAGIC):])
+        return [payload[key] for key in ("base", "tools_ref") if payload.get(key)]
+
+    def run(self, dry_run: bool = True, now: datetime | None = None) -> RetentionReport:
+        """
+        Apply the policies.
+
+        With ``dry_run`` nothing is modified and the report describes what
+        would be reclaimed.
+        """
+        now = now or datetime.now(UTC)
+        trace_ids = self.select_traces(now)
+        report = RetentionReport(dry_run=dry_run, trace_ids=trace_ids)
+        self._count_rows(report)
+
+        orphans = self.find_orphan_artifacts(trace_ids, now)
+        report.orphan_artifacts = len(orphans)
+        report.artifact_bytes = sum(byte_len for _, byte_len in orphans)
+        if dry_run:
+            return report
+
+        if trace_ids:
+            self.trace_store.delete_traces(trace_ids)
+        if orphans:
+            report.reclaimed_artifact_bytes = self.trace_store.delete_artifacts(
+                [artifact_hash for artifact_hash, _ in orphans]
+            )
+        report.reclaimed_artifact_bytes += self.trace_store.artifact_store.compact()
+        report.reclaimed_db_bytes = self.trace_store.vacuum(self.vacuum_pages)
+        logger.info(f"Retention run: {report.summary()}")
+        return report
+
+    def _count_rows(self, report: RetentionReport) -> None:
+        if not report.trace_ids:
+            return
+        with self.trace_store._connect() as conn:
+            conn.execute("CREATE TEMP TABLE doomed (trace_id TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT INTO doomed (trace_id) VALUES (?)", [(t,) for t in report.trace_ids]
+            )
+            report.event_rows, report.event_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM trace_events "
+                "WHERE trace_id IN (SELECT trace_id FROM doomed)"
+            ).fetchone()
+            report.span_rows = conn.execute(
+                "SELECT COUNT(*) FROM spans WHERE trace_id IN (SELECT trace_id FROM doomed)"
+            ).fetchone()[0]
+            report.checkpoint_rows = conn.execute(
+                "SELECT COUNT(*) FROM checkpoints WHERE trace_id IN (SELECT trace_id FROM doomed)"
+            ).fetchone()[0]
@@ -21,15 +21,24 @@ Based on:
 from __future__ import annotations
 
 import hashlib
+import io
 import json
+import logging
+import queue
 import sqlite3
 import threading
+import time
 import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
+
+logger = logging.getLogger(__name__)
 
 
 def generate_id() -> str:
@@ -52,6 +61,18 @@ def compute_hash(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def span_duration_ms(start_ts: datetime, end_ts: datetime) -> int:
+    """Whole milliseconds between two timestamps, rounded half up."""
+    delta = end_ts - start_ts
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return (micros + 500) // 1000
+
+
+def _sql_span_duration_ms(start_ts: str, end_ts: str) -> int:
+    """span_duration_ms() over ISO timestamps, registered as a SQL function."""
+    return span_duration_ms(datetime.fromisoformat(start_ts), datetime.fromisoformat(end_ts))
+
+
 class SpanKind(str, Enum):
     """Types of spans in the trace."""
     AGENT_TURN = "agent_turn"
@@ -93,6 +114,20 @@ class ProvenanceRelation(str, Enum):
     WAS_INFORMED_BY = "wasInformedBy"
 
 
+class DurabilityMode(str, Enum):
+    """How TraceStore writes reach disk.
+
+    - SYNC: each write is committed on the caller's thread before returning
+    - GROUP: writes are queued and committed in batches by a writer thread;
+      callers block until the batch holding their write has committed
+    - ASYNC: writes are queued and the caller returns immediately; use
+      TraceStore.flush() as a barrier when durability matters
+    """
+    SYNC = "sync"
+    GROUP = "group"
+    ASYNC = "async"
+
+
 class CheckpointStatus(str, Enum):
     """Status of a checkpoint."""
     ACTIVE = "active"
@@ -271,8 +306,7 @@ class Span:
     def duration_ms(self) -> int | None:
         if self.end_ts is None:
             return None
-        delta = self.end_ts - self.start_ts
-        return int(delta.total_seconds() * 1000)
+        return span_duration_ms(self.start_ts, self.end_ts)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -297,6 +331,116 @@ class Span:
         }
 
 
+@dataclass
+class SpanRecord:
+    """
+    A row of the materialized ``spans`` table.
+
+    Carries the typed summary columns of a span without its attributes,
+    links or provenance, which stay in the event log.
+    """
+    span_id: str
+    trace_id: str
+    parent_span_id: str | None
+    kind: SpanKind
+    name: str
+    actor_id: str
+    status: SpanStatus
+    start_ts: datetime
+    end_ts: datetime | None
+    duration_ms: int | None
+    tool_name: str | None
+    error_class: str | None
+    error_message: str | None
+    input_artifact_hash: str | None
+    output_artifact_hash: str | None
+    prompt_tokens: int | None
+    completion_tokens: int | None
+    total_tokens: int | None
+    model: str | None
+
+    @classmethod
+    def from_row(cls, row: tuple[Any, ...]) -> SpanRecord:
+        return cls(
+            span_id=row[0],
+            trace_id=row[1],
+            parent_span_id=row[2],
+            kind=SpanKind(row[3]),
+            name=row[4],
+            actor_id=row[5],
+            status=SpanStatus(row[6]),
+            start_ts=datetime.fromisoformat(row[7]),
+            end_ts=datetime.fromisoformat(row[8]) if row[8] else None,
+            duration_ms=row[9],
+            tool_name=row[10],
+            error_class=row[11],
+            error_message=row[12],
+            input_artifact_hash=row[13],
+            output_artifact_hash=row[14],
+            prompt_tokens=row[15],
+            completion_tokens=row[16],
+            total_tokens=row[17],
+            model=row[18],
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_span_id": self.parent_span_id,
+            "kind": self.kind.value,
+            "name": self.name,
+            "actor_id": self.actor_id,
+            "status": self.status.value,
+            "start_ts": self.start_ts.isoformat(),
+            "end_ts": self.end_ts.isoformat() if self.end_ts else None,
+            "duration_ms": self.duration_ms,
+            "tool_name": self.tool_name,
+            "error_class": self.error_class,
+            "error_message": self.error_message,
+            "input_artifact_hash": self.input_artifact_hash,
+            "output_artifact_hash": self.output_artifact_hash,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "model": self.model,
+        }
+
+
+@dataclass
+class TraceUsage:
+    """
+    Running LLM usage totals for a trace.
+
+    Maintained in the ``trace_usage`` table as LLM spans end, so reading
+    a trace's usage is a single-row lookup. Trace contexts also keep one
+    in memory for the spans they end (e.g. per rollout).
+    """
+    trace_id: str
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+    def record(self, attributes: dict[str, Any]) -> None:
+        """Add the token counts from a span's end attributes."""
+        if "total_tokens" not in attributes:
+            return
+        self.llm_calls += 1
+        self.prompt_tokens += attributes.get("prompt_tokens") or 0
+        self.completion_tokens += attributes.get("completion_tokens") or 0
+        self.total_tokens += attributes.get("total_tokens") or 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+
 @dataclass
 class Checkpoint:
     """
@@ -419,6 +563,524 @@ class Artifact:
         )
 
 
+Statement = tuple[str, tuple[Any, ...]]
+
+_EVENT_COLUMNS = "event_id, timestamp, event_type, trace_id, span_id, data"
+
+
+def _row_to_event(row: tuple[Any, ...]) -> TraceEvent:
+    """Build a TraceEvent from a row selected with _EVENT_COLUMNS."""
+    return TraceEvent(
+        event_id=row[0],
+        timestamp=datetime.fromisoformat(row[1]),
+        event_type=TraceEventType(row[2]),
+        trace_id=row[3],
+        span_id=row[4],
+        data=json.loads(row[5]),
+    )
+
+
+def fold_span_events(events: Iterable[TraceEvent]) -> list[Span]:
+    """
+    Fold a stream of trace events into spans in a single pass.
+
+    Events may belong to any number of spans and should be in timestamp
+    order. Attributes recorded at SPAN_END or via SPAN_ATTRIBUTE events
+    are merged over the start attributes. Spans without a SPAN_START
+    event are dropped. The result is ordered by (start_ts, span_id).
+    """
+    starts: dict[str, TraceEvent] = {}
+    ends: dict[str, TraceEvent] = {}
+    links: dict[str, list[str]] = {}
+    extra_attrs: dict[str, dict[str, Any]] = {}
+
+    for event in events:
+        if event.event_type == TraceEventType.SPAN_START:
+            starts[event.span_id] = event
+        elif event.event_type == TraceEventType.SPAN_END:
+            ends[event.span_id] = event
+            extra_attrs.setdefault(event.span_id, {}).update(
+                event.data.get("additional_attributes", {})
+            )
+        elif event.event_type == TraceEventType.SPAN_LINK:
+            links.setdefault(event.span_id, []).append(event.data["linked_span_id"])
+        elif event.event_type == TraceEventType.SPAN_ATTRIBUTE:
+            extra_attrs.setdefault(event.span_id, {}).update(event.data.get("attributes", {}))
+
+    spans = []
+    for span_id, start_event in starts.items():
+        end_event = ends.get(span_id)
+        start_data = start_event.data
+        tool_prov = None
+        if start_data.get("tool_provenance"):
+            tool_prov = ToolProvenance.from_dict(start_data["tool_provenance"])
+
+        attributes = start_data.get("attributes", {})
+        attributes.update(extra_attrs.get(span_id, {}))
+
+        spans.append(Span(
+            span_id=span_id,
+            trace_id=start_event.trace_id,
+            parent_span_id=start_data.get("parent_span_id"),
+            kind=SpanKind(start_data["kind"]),
+            name=start_data["name"],
+            actor_id=start_data["actor_id"],
+            seq=start_data["seq"],
+            start_ts=start_event.timestamp,
+            end_ts=end_event.timestamp if end_event else None,
+            status=SpanStatus(end_event.data["status"]) if end_event else SpanStatus.STARTED,
+            attributes=attributes,
+            links=links.get(span_id, []) + start_data.get("links", []),
+            tool_provenance=tool_prov,
+            input_artifact_hash=start_data.get("input_artifact_hash"),
+            output_artifact_hash=end_event.data.get("output_artifact_hash") if end_event else None,
+            error_class=end_event.data.get("error_class") if end_event else None,
+            error_message=end_event.data.get("error_message") if end_event else None,
+        ))
+
+    spans.sort(key=lambda s: (s.start_ts, s.span_id))
+    return spans
+
+
+_SPAN_COLUMNS = (
+    "span_id, trace_id, parent_span_id, kind, name, actor_id, status, start_ts, end_ts,"
+    " duration_ms, tool_name, error_class, error_message, input_artifact_hash,"
+    " output_artifact_hash, prompt_tokens, completion_tokens, total_tokens, model"
+)
+_SPAN_PLACEHOLDERS = ", ".join("?" * len(_SPAN_COLUMNS.split(",")))
+
+
+def _span_row(span: Span) -> tuple[Any, ...]:
+    """Build a ``spans`` table row from a reconstructed span."""
+    attrs = span.attributes
+    return (
+        span.span_id,
+        span.trace_id,
+        span.parent_span_id,
+        span.kind.value,
+        span.name,
+        span.actor_id,
+        span.status.value,
+        span.start_ts.isoformat(),
+        span.end_ts.isoformat() if span.end_ts else None,
+        span.duration_ms,
+        span.tool_provenance.tool_name if span.tool_provenance else None,
+        span.error_class,
+        span.error_message,
+        span.input_artifact_hash,
+        span.output_artifact_hash,
+        attrs.get("prompt_tokens"),
+        attrs.get("completion_tokens"),
+        attrs.get("total_tokens"),
+        attrs.get("model"),
+    )
+
+
+def _usage_upsert(trace_id: str, attrs: dict[str, Any], llm_calls: int = 1) -> Statement:
+    """Statement adding one span's token counts to the trace's running totals."""
+    return (
+        """
+        INSERT INTO trace_usage (trace_id, llm_calls, prompt_tokens, completion_tokens, total_tokens)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(trace_id) DO UPDATE SET
+            llm_calls = llm_calls + excluded.llm_calls,
+            prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+            completion_tokens = completion_tokens + excluded.completion_tokens,
+            total_tokens = total_tokens + excluded.total_tokens
+        """,
+        (
+            trace_id,
+            llm_calls,
+            attrs.get("prompt_tokens") or 0,
+            attrs.get("completion_tokens") or 0,
+            attrs.get("total_tokens") or 0,
+        ),
+    )
+
+
+# Prefix marking a delta-encoded artifact (LLM inputs, see LLMInputEncoder,
+# and checkpoint state patches, see TraceStore.create_checkpoint)
+DELTA_MAGIC = b"compymac-delta/1\n"
+
+# Hard limit on delta chain length followed by ArtifactStore.retrieve
+MAX_DELTA_CHAIN = 256
+
+# Checkpoint state is re-snapshotted after this many patches on top of a snapshot
+CHECKPOINT_SNAPSHOT_INTERVAL = 16
+
+
+def _pointer_token(key: str | int) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def diff_json(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """
+    Compute JSON-patch (RFC 6902) style operations turning ``old`` into ``new``.
+
+    Only ``add``, ``remove`` and ``replace`` are emitted. Lists are diffed
+    element-wise when their length is unchanged and as appends/truncations
+    when one is a prefix of the other; anything else is replaced wholesale.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(diff_json(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new, strict=True)):
+                ops.extend(diff_json(a, b, f"{path}/{i}"))
+            return ops
+        if len(new) > len(old) and new[:len(old)] == old:
+            return [{"op": "add", "path": f"{path}/-", "value": v} for v in new[len(old):]]
+        if len(new) < len(old) and old[:len(new)] == new:
+            return [{"op": "remove", "path": f"{path}/{i}"}
+                    for i in range(len(old) - 1, len(new) - 1, -1)]
+    if type(old) is not type(new) or old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_json_patch(doc: Any, ops: list[dict[str, Any]]) -> Any:
+    """Apply operations produced by diff_json to ``doc`` (mutated in place) and return it."""
+    for op in ops:
+        if op["path"] == "":
+            doc = op["value"]
+            continue
+        tokens = [t.replace("~1", "/").replace("~0", "~") for t in op["path"].split("/")[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op["op"] == "add" and last == "-":
+                parent.append(op["value"])
+            elif op["op"] == "add":
+                parent.insert(int(last), op["value"])
+            elif op["op"] == "remove":
+                del parent[int(last)]
+            else:
+                parent[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return doc
+
+
+class LLMInputEncoder:
+    """
+    Delta encoder for the per-step ``llm_input`` artifacts of one agent loop.
+
+    The conversation sent to the LLM mostly grows by appending, so storing
+    every step's full message list makes artifact bytes quadratic in the
+    number of steps. Instead each step is stored as a reference to the
+    previous step's artifact, the length of the shared message prefix, and
+    the messages after it. Tool schemas are stored once as their own
+    content-addressed artifact and referenced by hash.
+
+    A full snapshot is written every ``max_chain`` steps, and whenever most
+    of the history was rewritten (e.g. by memory compression), so rebuilding any
+    input follows at most ``max_chain`` deltas. ArtifactStore.retrieve
+    returns the same ``{"messages": ..., "tools": ...}`` JSON as before.
+    """
+
+    def __init__(
+        self,
+        store_artifact: Callable[..., Artifact],
+        max_chain: int = 20,
+    ):
+        """
+        Args:
+            store_artifact: Callable with the signature of
+                TraceContext.store_artifact
+            max_chain: Maximum number of deltas between full snapshots
+        """
+        self._store_artifact = store_artifact
+        self.max_chain = max(0, min(max_chain, MAX_DELTA_CHAIN))
+        self._prev_messages: list[dict[str, Any]] = []
+        self._base_hash: str | None = None
+        self._depth = 0
+        self._tools_digest: str | None = None
+        self._tools_hash: str | None = None
+
+    def store(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Artifact:
+        """Store one step's LLM input and return its artifact."""
+        tools_hash = self._store_tools(tools or [])
+
+        keep = 0
+        for prev, cur in zip(self._prev_messages, messages, strict=False):
+            if prev != cur:
+                break
+            keep += 1
+
+        # Snapshot when the chain is full or most of the history was rewritten
+        if self._base_hash is None or self._depth >= self.max_chain or keep * 2 < len(messages):
+            payload: dict[str, Any] = {
+                "type": "snapshot",
+                "messages": messages,
+                "tools_ref": tools_hash,
+            }
+            depth = 0
+        else:
+            payload = {
+                "type": "delta",
+                "base": self._base_hash,
+                "keep": keep,
+                "append": messages[keep:],
+                "tools_ref": tools_hash,
+            }
+            depth = self._depth + 1
+
+        artifact_metadata = dict(metadata or {})
+        artifact_metadata.update({"encoding": payload["type"], "chain_depth": depth})
+        artifact = self._store_artifact(
+            data=DELTA_MAGIC + json.dumps(payload).encode(),
+            artifact_type="llm_input",
+            content_type="application/json",
+            metadata=artifact_metadata,
+        )
+
+        self._prev_messages = list(messages)
+        self._base_hash = artifact.artifact_hash
+        self._depth = depth
+        return artifact
+
+    def _store_tools(self, tools: list[dict[str, Any]]) -> str:
+        """Store tool schemas once per distinct set and return their hash."""
+        data = json.dumps(tools).encode()
+        digest = compute_hash(data)
+        if digest != self._tools_digest or self._tools_hash is None:
+            artifact = self._store_artifact(
+                data=data,
+                artifact_type="tool_schemas",
+                content_type="application/json",
+                metadata={"tool_count": len(tools)},
+            )
+            self._tools_digest = digest
+            self._tools_hash = artifact.artifact_hash
+        return self._tools_hash
+
+
+def _is_text_content(content_type: str) -> bool:
+    """Whether artifacts of this content type are scanned for secrets."""
+    return content_type.startswith(("text/", "application/json"))
+
+
+def scanner_fingerprint(scanner: Any) -> str:
+    """Identify a SecretScanner configuration, so cached redaction results can be invalidated."""
+    config = {
+        "patterns": sorted((name, list(spec)) for name, spec in scanner.patterns.items()),
+        "placeholder": getattr(scanner, "redaction_placeholder", None),
+        "min_confidence": getattr(scanner, "min_confidence", None),
+        "enabled": getattr(scanner, "enabled", True),
+    }
+    return compute_hash(json.dumps(config, sort_keys=True).encode())
+
+
+@dataclass
+class CachedArtifact:
+    """What storing a given raw payload produced the last time it was seen."""
+    artifact_hash: str
+    byte_len: int
+    secrets_redacted: bool
+
+
+def _create_hash_index(conn: sqlite3.Connection) -> None:
+    """Create the tables of a raw-hash index (see ArtifactHashCache)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS raw_hashes (
+            raw_hash TEXT PRIMARY KEY,
+            artifact_hash TEXT NOT NULL,
+            byte_len INTEGER NOT NULL,
+            secrets_redacted INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_raw_hashes_artifact ON raw_hashes(artifact_hash);
+    """)
+
+
+def _hash_index_epoch(conn: sqlite3.Connection) -> int:
+    """Number of times artifacts were deleted from under a raw-hash index."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()
+    return int(row[0]) if row is not None else 0
+
+
+def _forget_in_hash_index(conn: sqlite3.Connection, artifact_hashes: set[str]) -> int:
+    """Delete entries for artifacts and bump the index's epoch; returns the new epoch."""
+    with conn:
+        conn.executemany(
+            "DELETE FROM raw_hashes WHERE artifact_hash = ?", [(h,) for h in artifact_hashes]
+        )
+        epoch = _hash_index_epoch(conn) + 1
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('epoch', ?)", (str(epoch),)
+        )
+    return epoch
+
+
+class ArtifactHashCache:
+    """
+    Maps raw (pre-redaction) content hashes to the artifacts they were stored as.
+
+    Lookups go through an in-memory LRU, then a bloom filter, then a small
+    SQLite index that persists across processes. The index is only a cache:
+    it is cleared whenever the scanner configuration changes, and losing it
+    just means content is redacted again.
+
+    Deleting artifacts (from any process sharing the index) removes their
+    entries and bumps an epoch stored in the index; every instance drops its
+    LRU when it sees the epoch move, so hits never touch the filesystem.
+    """
+
+    BLOOM_BITS = 1 << 23
+    BLOOM_HASHES = 4
+
+    def __init__(self, index_path: Path, fingerprint: str, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru: OrderedDict[str, CachedArtifact] = OrderedDict()
+        self._bloom = bytearray(self.BLOOM_BITS // 8)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        _create_hash_index(self._conn)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            self._conn.execute("DELETE FROM raw_hashes")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                (fingerprint,),
+            )
+        self._conn.commit()
+        self._epoch = _hash_index_epoch(self._conn)
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        for (raw_hash,) in self._conn.execute("SELECT raw_hash FROM raw_hashes"):
+            self._bloom_add(raw_hash)
+        weakref.finalize(self, self._conn.close)
+
+    def _sync(self) -> None:
+        """Drop the LRU if another process deleted artifacts since we last looked (lock held)."""
+        # data_version only changes when another connection commits, so the
+        # epoch is only read after someone else wrote to the index
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        epoch = _hash_index_epoch(self._conn)
+        if epoch != self._epoch:
+            self._epoch = epoch
+            self._lru.clear()
+
+    def _bloom_positions(self, raw_hash: str) -> Iterator[int]:
+        # raw_hash is already a uniformly distributed hex digest; slice it
+        for i in range(self.BLOOM_HASHES):
+            yield int(raw_hash[i * 8:(i + 1) * 8], 16) % self.BLOOM_BITS
+
+    def _bloom_add(self, raw_hash: str) -> None:
+        for pos in self._bloom_positions(raw_hash):
+            self._bloom[pos >> 3] |= 1 << (pos & 7)
+
+    def _bloom_contains(self, raw_hash: str) -> bool:
+        return all(
+            self._bloom[pos >> 3] & (1 << (pos & 7)) for pos in self._bloom_positions(raw_hash)
+        )
+
+    def get(self, raw_hash: str) -> CachedArtifact | None:
+        """Look up a raw content hash, counting the hit or miss."""
+        with self._lock:
+            self._sync()
+            entry = self._lru.get(raw_hash)
+            if entry is not None:
+                self._lru.move_to_end(raw_hash)
+            elif self._bloom_contains(raw_hash):
+                row = self._conn.execute(
+                    "SELECT artifact_hash, byte_len, secrets_redacted FROM raw_hashes "
+                    "WHERE raw_hash = ?",
+                    (raw_hash,),
+                ).fetchone()
+                if row is not None:
+                    entry = CachedArtifact(row[0], row[1], bool(row[2]))
+                    self._remember(raw_hash, entry)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, raw_hash: str, entry: CachedArtifact) -> None:
+        """Record that a raw payload was stored as ``entry``."""
+        with self._lock:
+            self._remember(raw_hash, entry)
+            self._bloom_add(raw_hash)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO raw_hashes "
+                "(raw_hash, artifact_hash, byte_len, secrets_redacted) VALUES (?, ?, ?, ?)",
+                (raw_hash, entry.artifact_hash, entry.byte_len, int(entry.secrets_redacted)),
+            )
+            self._conn.commit()
+
+    def forget(self, artifact_hashes: Iterable[str]) -> None:
+        """Drop entries pointing at artifacts that no longer exist."""
+        doomed = set(artifact_hashes)
+        if not doomed:
+            return
+        with self._lock:
+            for raw_hash in [k for k, v in self._lru.items() if v.artifact_hash in doomed]:
+                del self._lru[raw_hash]
+            self._epoch = _forget_in_hash_index(self._conn, doomed)
+
+    @staticmethod
+    def invalidate(index_path: Path, artifact_hashes: Iterable[str]) -> None:
+        """
+        Forget deleted artifacts in an index without opening a cache on it.
+
+        For stores that delete artifacts but don't cache hashes themselves
+        (e.g. without a secret scanner), so other processes still notice.
+        """
+        doomed = set(artifact_hashes)
+        if not doomed or not index_path.exists():
+            return
+        conn = sqlite3.connect(index_path)
+        try:
+            _create_hash_index(conn)
+            _forget_in_hash_index(conn, doomed)
+        finally:
+            conn.close()
+
+    def _remember(self, raw_hash: str, entry: CachedArtifact) -> None:
+        self._lru[raw_hash] = entry
+        self._lru.move_to_end(raw_hash)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current LRU size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "lru_entries": len(self._lru),
+            }
+
+
 class ArtifactStore:
     """
     Content-addressed storage for large payloads.
@@ -427,13 +1089,20 @@ class ArtifactStore:
     Optionally redacts secrets before storage using SecretScanner.
     """
 
-    def __init__(self, base_path: Path, redact_secrets: bool = True):
+    def __init__(
+        self,
+        base_path: Path,
+        redact_secrets: bool = True,
+        hash_cache_size: int = 4096,
+    ):
         """
         Initialize ArtifactStore.
 
         Args:
             base_path: Directory to store artifacts
             redact_secrets: If True, redact secrets before storing (default: True)
+            hash_cache_size: LRU size of the raw-content hash cache that lets
+                repeated text payloads skip redaction (0 disables the cache)
         """
         self.base_path = base_path
         self.base_path.mkdir(parents=True, exist_ok=True)
@@ -446,6 +1115,13 @@ class ArtifactStore:
                 self._scanner = SecretScanner()
             except ImportError:
                 pass  # SecretScanner not available
+        self.hash_cache: ArtifactHashCache | None = None
+        if self._scanner is not None and hash_cache_size > 0:
+            self.hash_cache = ArtifactHashCache(
+                self.base_path / "raw_hashes.db",
+                scanner_fingerprint(self._scanner),
+                max_entries=hash_cache_size,
+            )
 
     def _get_artifact_path(self, artifact_hash: str) -> Path:
         """Get the storage path for an artifact (sharded by first 2 chars)."""
@@ -464,28 +1140,40 @@ class ArtifactStore:
         """Store data and return artifact metadata.
 
         If redact_secrets is enabled and the content is text-based,
-        secrets will be redacted before storage.
+        secrets will be redacted before storage. Text payloads that were
+        stored before are recognised by their raw hash and skip both the
+        redaction and the write.
         """
-        # Redact secrets from text content if scanner is available
-        stored_data = data
-        secrets_redacted = False
-        if self._scanner and content_type.startswith(("text/", "application/json")):
-            try:
-                text = data.decode("utf-8")
-                redacted_text = self._scanner.redact(text)
-                if redacted_text != text:
-                    stored_data = redacted_text.encode("utf-8")
-                    secrets_redacted = True
-            except (UnicodeDecodeError, Exception):
-                pass  # Not text or redaction failed, store original
+        raw_hash = None
+        hash_cache = self.hash_cache
+        if hash_cache is not None and _is_text_content(content_type):
+            raw_hash = compute_hash(data)
+            # Deletes by any store sharing the index are forgotten there, so
+            # a hit needs no filesystem check
+            cached = hash_cache.get(raw_hash)
+            if cached is not None:
+                artifact_metadata = metadata.copy() if metadata else {}
+                if cached.secrets_redacted:
+                    artifact_metadata["secrets_redacted"] = True
+                return Artifact(
+                    artifact_hash=cached.artifact_hash,
+                    artifact_type=artifact_type,
+                    content_type=content_type,
+                    byte_len=cached.byte_len,
+                    storage_path=self._storage_path(cached.artifact_hash),
+                    created_ts=datetime.now(UTC),
+                    metadata=artifact_metadata,
+                )
 
+        stored_data, secrets_redacted = self._redact(data, content_type)
         artifact_hash = compute_hash(stored_data)
 
         with self._lock:
-            path = self._get_artifact_path(artifact_hash)
-
-            if not path.exists():
-                path.write_bytes(stored_data)
+            storage_path = self._write_blob(artifact_hash, stored_data)
+            if hash_cache is not None and raw_hash is not None:
+                hash_cache.put(
+                    raw_hash, CachedArtifact(artifact_hash, len(stored_data), secrets_redacted)
+                )
 
             # Track if secrets were redacted in metadata
             artifact_metadata = metadata.copy() if metadata else {}
@@ -497,13 +1185,43 @@ class ArtifactStore:
                 artifact_type=artifact_type,
                 content_type=content_type,
                 byte_len=len(stored_data),
-                storage_path=str(path),
+                storage_path=storage_path,
                 created_ts=datetime.now(UTC),
                 metadata=artifact_metadata,
             )
 
         return artifact
 
+    def _redact(self, data: bytes, content_type: str) -> tuple[bytes, bool]:
+        """Redact secrets from text content if scanner is available."""
+        if not self._scanner or not _is_text_content(content_type):
+            return data, False
+        try:
+            text = data.decode("utf-8")
+            redacted_text = self._scanner.redact(text)
+            if redacted_text != text:
+                return redacted_text.encode("utf-8"), True
+        except (UnicodeDecodeError, Exception):
+            pass  # Not text or redaction failed, store original
+        return data, False
+
+    def _write_blob(self, artifact_hash: str, data: bytes) -> str:
+        """Persist content under its hash (if new) and return its storage path."""
+        path = self._get_artifact_path(artifact_hash)
+        if not path.exists():
+            path.write_bytes(data)
+        return str(path)
+
+    def _storage_path(self, artifact_hash: str) -> str:
+        """Storage path recorded for an artifact that is already stored."""
+        return str(self._get_artifact_path(artifact_hash))
+
+    def hash_cache_stats(self) -> dict[str, Any]:
+        """Return hit/miss counters of the raw-content hash cache."""
+        if self.hash_cache is None:
+            return {"hits": 0, "misses": 0, "hit_rate": 0.0, "lru_entries": 0}
+        return self.hash_cache.stats()
+
     def store_file(
         self,
         file_path: Path,
@@ -515,17 +1233,351 @@ class ArtifactStore:
         data = file_path.read_bytes()
         return self.store(data, artifact_type, content_type, metadata)
 
+    def open(self, artifact_hash: str) -> BinaryIO | None:
+        """
+        Open an artifact for streaming reads.
+
+        Returns a seekable binary file object, or None if the artifact does
+        not exist. Delta-encoded artifacts are rebuilt in memory first.
+        """
+        path = self._get_artifact_path(artifact_hash)
+        if not path.exists():
+            return None
+        f = path.open("rb")
+        if f.read(len(DELTA_MAGIC)) == DELTA_MAGIC:
+            f.close()
+            data = self.retrieve(artifact_hash)
+            return io.BytesIO(data) if data is not None else None
+        f.seek(0)
+        return f
+
+    def read_range(self, artifact_hash: str, offset: int, length: int) -> bytes | None:
+        """Read ``length`` bytes of an artifact starting at ``offset``."""
+        f = self.open(artifact_hash)
+        if f is None:
+            return None
+        with f:
+            f.seek(offset)
+            return f.read(length)
+
     def retrieve(self, artifact_hash: str) -> bytes | None:
-        """Retrieve artifact data by hash."""
+        """
+        Retrieve artifact data by hash.
+
+        Delta-encoded artifacts (see LLMInputEncoder) are transparently
+        rebuilt into their full payload.
+        """
+        data = self.retrieve_raw(artifact_hash)
+        if data is not None and data.startswith(DELTA_MAGIC):
+            return self._rebuild_delta(artifact_hash, data)
+        return data
+
+    def retrieve_raw(self, artifact_hash: str) -> bytes | None:
+        """Retrieve the stored bytes of an artifact without decoding deltas."""
         path = self._get_artifact_path(artifact_hash)
         if path.exists():
             return path.read_bytes()
         return None
 
+    def _rebuild_delta(self, artifact_hash: str, data: bytes) -> bytes | None:
+        """Walk a delta chain back to its snapshot and replay it forward."""
+        head = json.loads(data[len(DELTA_MAGIC):])
+        if head["type"] == "patch":
+            return self._rebuild_patch(artifact_hash, head)
+        chain: list[dict[str, Any]] = []
+        payload = head
+        while payload["type"] == "delta":
+            chain.append(payload)
+            if len(chain) > MAX_DELTA_CHAIN:
+                raise ValueError(f"Delta chain too long for artifact {artifact_hash}")
+            base = self.retrieve_raw(payload["base"])
+            if base is None or not base.startswith(DELTA_MAGIC):
+                return None
+            payload = json.loads(base[len(DELTA_MAGIC):])
+
+        messages = payload["messages"]
+        for delta in reversed(chain):
+            messages = messages[:delta["keep"]] + delta["append"]
+
+        tools_data = self.retrieve_raw(head["tools_ref"])
+        if tools_data is None:
+            return None
+        return json.dumps({"messages": messages, "tools": json.loads(tools_data)}).encode()
+
+    def _rebuild_patch(self, artifact_hash: str, head: dict[str, Any]) -> bytes | None:
+        """Apply a chain of JSON patches on top of the plain JSON snapshot it starts from."""
+        chain = [head]
+        while True:
+            if len(chain) > MAX_DELTA_CHAIN:
+                raise ValueError(f"Patch chain too long for artifact {artifact_hash}")
+            base = self.retrieve_raw(chain[-1]["base"])
+            if base is None:
+                return None
+            if not base.startswith(DELTA_MAGIC):
+                break
+            chain.append(json.loads(base[len(DELTA_MAGIC):]))
+
+        doc = json.loads(base)
+        for patch in reversed(chain):
+            doc = apply_json_patch(doc, patch["ops"])
+        return json.dumps(doc).encode()
+
     def exists(self, artifact_hash: str) -> bool:
         """Check if artifact exists."""
         return self._get_artifact_path(artifact_hash).exists()
 
+    def delete(self, artifact_hashes: Iterable[str]) -> int:
+        """
+        Delete artifacts and return the number of stored bytes freed.
+
+        Callers are responsible for making sure nothing references them
+        any more (see compymac.trace_retention).
+        """
+        freed = 0
+        deleted = []
+        with self._lock:
+            for artifact_hash in artifact_hashes:
+                path = self.base_path / artifact_hash[:2] / artifact_hash
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                freed += size
+                deleted.append(artifact_hash)
+        if self.hash_cache is not None:
+            self.hash_cache.forget(deleted)
+        else:
+            ArtifactHashCache.invalidate(self.base_path / "raw_hashes.db", deleted)
+        return freed
+
+    def compact(self) -> int:
+        """Reclaim space left behind by deletes; returns bytes freed on disk."""
+        return 0
+
+
+
+class TraceWriter:
+    """
+    Long-lived, single-connection writer for a trace database.
+
+    Replaces connection-per-write with one SQLite connection in WAL mode.
+    In SYNC mode writes are applied on the caller's thread. In GROUP and
+    ASYNC modes they are queued and a dedicated thread commits them in
+    batches of up to ``batch_size`` writes, waiting at most
+    ``batch_interval_ms`` after the first queued write.
+
+    Each submitted write is a list of statements applied atomically.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        durability: DurabilityMode = DurabilityMode.SYNC,
+        batch_size: int = 64,
+        batch_interval_ms: float = 5.0,
+    ):
+        self.db_path = db_path
+        self.durability = durability
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = max(0.0, batch_interval_ms) / 1000.0
+
+        self._conn = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Live span ends compute durations exactly as rebuilt spans do
+        self._conn.create_function(
+            "span_duration_ms", 2, _sql_span_duration_ms, deterministic=True
+        )
+        synchronous = "NORMAL" if durability == DurabilityMode.ASYNC else "FULL"
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._committed = 0
+        self._errors: dict[int, Exception] = {}
+        self._closed = False
+        self._queue: queue.Queue[tuple[int, list[Statement]] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        if durability != DurabilityMode.SYNC:
+            self._thread = threading.Thread(
+                target=self._run, name="trace-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, statements: list[Statement]) -> None:
+        """
+        Submit a write.
+
+        In SYNC and GROUP modes this returns once the write is committed and
+        raises if it failed. In ASYNC mode it returns immediately and
+        failures are logged.
+        """
+        if self._closed:
+            raise RuntimeError("TraceWriter is closed")
+
+        if self._thread is None:
+            with self._lock:
+                errors = self._apply_batch([(0, statements)])
+            if errors:
+                raise errors[0]
+            return
+
+        seq = self._enqueue(statements)
+        if self.durability == DurabilityMode.GROUP:
+            self._wait_for(seq)
+            with self._cond:
+                error = self._errors.pop(seq, None)
+            if error is not None:
+                raise error
+
+    def flush(self) -> None:
+        """Block until every write submitted so far has been committed."""
+        if self._thread is None:
+            return
+        with self._cond:
+            if self._committed >= self._submitted:
+                return
+        # An empty write acts as a barrier that ends the current batch early
+        self._wait_for(self._enqueue([]))
+
+    def close(self) -> None:
+        """Commit outstanding writes, stop the writer thread and close the connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._conn.close()
+
+    def _enqueue(self, statements: list[Statement]) -> int:
+        # Sequence numbers must reach the queue in order so that
+        # "committed >= seq" implies the write with that seq is committed.
+        with self._cond:
+            self._submitted += 1
+            seq = self._submitted
+            self._queue.put((seq, statements))
+        return seq
+
+    def _wait_for(self, seq: int) -> None:
+        with self._cond:
+            while self._committed < seq:
+                self._cond.wait()
+
+    def _run(self) -> None:
+        """Writer thread: drain the queue in batches until closed."""
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size and batch[-1][1]:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        nxt = self._queue.get(timeout=timeout)
+                    else:
+                        nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            errors = self._apply_batch(batch)
+            for seq, error in errors.items():
+                if self.durability == DurabilityMode.ASYNC:
+                    logger.error(f"Trace write {seq} failed: {error}")
+            with self._cond:
+                if self.durability == DurabilityMode.GROUP:
+                    self._errors.update(errors)
+                self._committed = batch[-1][0]
+                self._cond.notify_all()
+
+    def _apply_batch(self, batch: list[tuple[int, list[Statement]]]) -> dict[int, Exception]:
+        """Apply a batch in one transaction; a failing write only rolls back itself."""
+        errors: dict[int, Exception] = {}
+        conn = self._conn
+        try:
+            conn.execute("BEGIN")
+            for seq, statements in batch:
+                if not statements:
+                    continue
+                conn.execute("SAVEPOINT trace_write")
+                try:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO trace_write")
+                    errors[seq] = e
+                conn.execute("RELEASE trace_write")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            errors = {seq: e for seq, _ in batch}
+        return errors
+
+
+class TraceTail:
+    """
+    Follows one trace's committed events through a single read connection.
+
+    Meant for long-lived pollers such as SSE streams: the connection is
+    opened once, and a poll only queries trace_events when PRAGMA
+    data_version shows that another connection committed since the last
+    one. Used from one thread at a time (it may move between threads).
+    """
+
+    def __init__(self, db_path: Path, trace_id: str, after_cursor: int = 0):
+        self.trace_id = trace_id
+        self.cursor = after_cursor
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._data_version: int | None = None
+        self._finalizer = weakref.finalize(self, self._conn.close)
+
+    def poll(self, limit: int = 500) -> list[tuple[int, TraceEvent]]:
+        """
+        Return events committed after the cursor (at most ``limit``) and advance it.
+
+        Returns:
+            (cursor, event) pairs in write order
+        """
+        data_version: int = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return []
+        rows = self._conn.execute(
+            f"""
+            SELECT rowid, {_EVENT_COLUMNS} FROM trace_events
+            WHERE trace_id = ? AND rowid > ?
+            ORDER BY rowid ASC
+            LIMIT ?
+            """,
+            (self.trace_id, self.cursor, limit),
+        ).fetchall()
+        # A full page may have more rows behind it; query again next time
+        self._data_version = data_version if len(rows) < limit else None
+        if rows:
+            self.cursor = rows[-1][0]
+        return [(row[0], _row_to_event(row[1:])) for row in rows]
+
+    def close(self) -> None:
+        """Close the read connection."""
+        self._finalizer()
+
+    def __enter__(self) -> TraceTail:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
 
 class TraceStore:
     """
@@ -533,18 +1585,82 @@ class TraceStore:
 
     Uses SQLite for structured data with append-only semantics.
     Spans are represented as START/END event pairs for auditability.
+    All writes go through a single TraceWriter; see DurabilityMode for
+    the trade-off between latency and durability.
     """
 
-    def __init__(self, db_path: Path, artifact_store: ArtifactStore):
+    def __init__(
+        self,
+        db_path: Path,
+        artifact_store: ArtifactStore,
+        durability: DurabilityMode = DurabilityMode.SYNC,
+        batch_size: int = 64,
+        batch_interval_ms: float = 5.0,
+    ):
         self.db_path = db_path
         self.artifact_store = artifact_store
         self._lock = threading.Lock()
         self._actor_seq: dict[str, int] = {}
-        self._init_db()
+        # Latest checkpoint state per trace: (artifact hash, patch depth, parsed state)
+        self._checkpoint_heads: OrderedDict[str, tuple[str, int, Any]] = OrderedDict()
+        self._checkpoint_lock = threading.Lock()
+        needs_span_rebuild = self._init_db()
+        self._writer = TraceWriter(db_path, durability, batch_size, batch_interval_ms)
+        self._finalizer = weakref.finalize(self, self._writer.close)
+        if needs_span_rebuild:
+            self.rebuild_span_table()
+
+    @property
+    def durability(self) -> DurabilityMode:
+        """The durability mode of this store's writer."""
+        return self._writer.durability
+
+    def flush(self) -> None:
+        """
+        Block until all queued writes are committed.
+
+        Checkpoint creation and forking call this so that a checkpoint never
+        refers to events that are still in the write queue.
+        """
+        self._writer.flush()
+
+    def close(self) -> None:
+        """Flush pending writes and release the writer connection."""
+        self._finalizer()
 
-    def _init_db(self) -> None:
-        """Initialize the database schema."""
+    def _write(self, sql: str, params: tuple[Any, ...]) -> None:
+        """Submit a single-statement write through the writer."""
+        self._writer.submit([(sql, params)])
+
+    def _connect(self, flush: bool = True) -> sqlite3.Connection:
+        """
+        Open a read connection.
+
+        By default queued writes are flushed first so they are visible;
+        pollers that only need committed data pass ``flush=False`` so they
+        don't cut write batches short.
+        """
+        if flush:
+            self._writer.flush()
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self) -> bool:
+        """
+        Initialize the database schema.
+
+        Returns True if the spans table had to be created for a database
+        that already holds events, i.e. it needs a rebuild.
+        """
         with sqlite3.connect(self.db_path) as conn:
+            # New databases support incremental VACUUM (see TraceStore.vacuum);
+            # this is a no-op once the file has tables
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            had_spans = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spans'"
+            ).fetchone() is not None
+            had_events = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trace_events'"
+            ).fetchone() is not None
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS trace_events (
                     event_id TEXT PRIMARY KEY,
@@ -563,6 +1679,48 @@ class TraceStore:
                     ON trace_events(timestamp);
                 CREATE INDEX IF NOT EXISTS idx_trace_events_type
                     ON trace_events(event_type);
+                CREATE INDEX IF NOT EXISTS idx_trace_events_trace_type_ts
+                    ON trace_events(trace_id, event_type, timestamp);
+
+                -- Materialized view of spans, maintained in the same
+                -- transaction as the START/END events it is derived from
+                CREATE TABLE IF NOT EXISTS spans (
+                    span_id TEXT PRIMARY KEY,
+                    trace_id TEXT NOT NULL,
+                    parent_span_id TEXT,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    actor_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    start_ts TEXT NOT NULL,
+                    end_ts TEXT,
+                    duration_ms INTEGER,
+                    tool_name TEXT,
+                    error_class TEXT,
+                    error_message TEXT,
+                    input_artifact_hash TEXT,
+                    output_artifact_hash TEXT,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    total_tokens INTEGER,
+                    model TEXT
+                );
+
+                -- Running per-trace LLM usage, updated as LLM spans end
+                CREATE TABLE IF NOT EXISTS trace_usage (
+                    trace_id TEXT PRIMARY KEY,
+                    llm_calls INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_spans_trace_kind
+                    ON spans(trace_id, kind);
+                CREATE INDEX IF NOT EXISTS idx_spans_trace_status
+                    ON spans(trace_id, status);
+                CREATE INDEX IF NOT EXISTS idx_spans_trace_start
+                    ON spans(trace_id, start_ts);
 
                 CREATE TABLE IF NOT EXISTS artifacts (
                     artifact_hash TEXT PRIMARY KEY,
@@ -571,7 +1729,9 @@ class TraceStore:
                     byte_len INTEGER NOT NULL,
                     storage_path TEXT NOT NULL,
                     created_ts TEXT NOT NULL,
-                    metadata TEXT NOT NULL
+                    metadata TEXT NOT NULL,
+                    -- Last time the content was stored again, for retention grace
+                    last_stored_ts TEXT
                 );
 
                 CREATE TABLE IF NOT EXISTS provenance (
@@ -627,6 +1787,79 @@ class TraceStore:
                 CREATE INDEX IF NOT EXISTS idx_cognitive_events_timestamp
                     ON cognitive_events(timestamp);
             """)
+            span_columns = {row[1] for row in conn.execute("PRAGMA table_info(spans)")}
+            if "model" not in span_columns:
+                conn.execute("ALTER TABLE spans ADD COLUMN model TEXT")
+                had_spans = False
+            artifact_columns = {row[1] for row in conn.execute("PRAGMA table_info(artifacts)")}
+            if "last_stored_ts" not in artifact_columns:
+                conn.execute("ALTER TABLE artifacts ADD COLUMN last_stored_ts TEXT")
+            if had_spans or not had_events:
+                return False
+            return conn.execute("SELECT 1 FROM trace_events LIMIT 1").fetchone() is not None
+
+    # Tables holding per-trace rows, cleared by delete_traces
+    TRACE_TABLES = (
+        "trace_events", "spans", "trace_usage", "provenance", "checkpoints", "cognitive_events"
+    )
+
+    def delete_traces(self, trace_ids: Iterable[str], batch_size: int = 200) -> None:
+        """
+        Delete every row belonging to the given traces.
+
+        Each batch of traces is removed atomically. Artifacts are not touched;
+        those left unreferenced are reclaimed by compymac.trace_retention.
+        """
+        ids = list(trace_ids)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            self._writer.submit([
+                (f"DELETE FROM {table} WHERE trace_id IN ({placeholders})", tuple(batch))
+                for table in self.TRACE_TABLES
+            ])
+        with self._checkpoint_lock:
+            for trace_id in ids:
+                self._checkpoint_heads.pop(trace_id, None)
+        self.flush()
+
+    def delete_artifacts(self, artifact_hashes: Iterable[str], batch_size: int = 500) -> int:
+        """Delete artifact rows and their stored content; returns stored bytes freed."""
+        hashes = list(artifact_hashes)
+        for start in range(0, len(hashes), batch_size):
+            batch = hashes[start:start + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            self._write(
+                f"DELETE FROM artifacts WHERE artifact_hash IN ({placeholders})", tuple(batch)
+            )
+        self.flush()
+        return self.artifact_store.delete(hashes)
+
+    def vacuum(self, max_pages: int | None = None) -> int:
+        """
+        Return free database pages to the filesystem.
+
+        Databases created with incremental auto-vacuum release up to
+        ``max_pages`` free pages (all of them if None). Older databases are
+        converted with one full VACUUM. Returns the number of bytes freed.
+        """
+        self.flush()
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            page_size: int = conn.execute("PRAGMA page_size").fetchone()[0]
+            before: int = conn.execute("PRAGMA page_count").fetchone()[0]
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            elif max_pages is None:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+            else:
+                conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            after: int = conn.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            conn.close()
+        return max(0, before - after) * page_size
 
     def _next_seq(self, actor_id: str) -> int:
         """Get next sequence number for an actor."""
@@ -635,23 +1868,32 @@ class TraceStore:
             self._actor_seq[actor_id] = seq + 1
             return seq
 
-    def _append_event(self, event: TraceEvent) -> None:
-        """Append an event to the trace store."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO trace_events (event_id, timestamp, event_type, trace_id, span_id, data)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    event.event_id,
-                    event.timestamp.isoformat(),
-                    event.event_type.value,
-                    event.trace_id,
-                    event.span_id,
-                    json.dumps(event.data),
-                ),
-            )
+    def _append_event(
+        self,
+        event: TraceEvent,
+        extra_statements: list[Statement] | None = None,
+    ) -> None:
+        """
+        Append an event to the trace store.
+
+        ``extra_statements`` are committed atomically with the event; they
+        keep derived tables such as ``spans`` in step with the log.
+        """
+        insert: Statement = (
+            """
+            INSERT INTO trace_events (event_id, timestamp, event_type, trace_id, span_id, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                event.event_id,
+                event.timestamp.isoformat(),
+                event.event_type.value,
+                event.trace_id,
+                event.span_id,
+                json.dumps(event.data),
+            ),
+        )
+        self._writer.submit([insert, *(extra_statements or [])])
 
     def start_span(
         self,
@@ -691,7 +1933,31 @@ class TraceStore:
             },
         )
 
-        self._append_event(event)
+        span_row: Statement = (
+            f"INSERT OR REPLACE INTO spans ({_SPAN_COLUMNS}) VALUES ({_SPAN_PLACEHOLDERS})",
+            (
+                span_id,
+                trace_id,
+                parent_span_id,
+                kind.value,
+                name,
+                actor_id,
+                SpanStatus.STARTED.value,
+                event.timestamp.isoformat(),
+                None,
+                None,
+                tool_provenance.tool_name if tool_provenance else None,
+                None,
+                None,
+                input_artifact_hash,
+                None,
+                None,
+                None,
+                None,
+                None,
+            ),
+        )
+        self._append_event(event, [span_row])
         return span_id
 
     def end_span(
@@ -707,7 +1973,10 @@ class TraceStore:
         """
         End a span.
 
-        This appends a SPAN_END event to the trace.
+        This appends a SPAN_END event to the trace. Token usage passed in
+        ``additional_attributes`` (prompt_tokens, completion_tokens,
+        total_tokens, model) is also recorded on the span row and added to
+        the trace's running usage totals.
         """
         event = TraceEvent(
             event_id=generate_id(),
@@ -724,7 +1993,41 @@ class TraceStore:
             },
         )
 
-        self._append_event(event)
+        attrs = additional_attributes or {}
+        end_ts = event.timestamp.isoformat()
+        span_update: Statement = (
+            """
+            UPDATE spans SET
+                status = ?,
+                end_ts = ?,
+                duration_ms = span_duration_ms(start_ts, ?),
+                output_artifact_hash = ?,
+                error_class = ?,
+                error_message = ?,
+                prompt_tokens = COALESCE(?, prompt_tokens),
+                completion_tokens = COALESCE(?, completion_tokens),
+                total_tokens = COALESCE(?, total_tokens),
+                model = COALESCE(?, model)
+            WHERE span_id = ?
+            """,
+            (
+                status.value,
+                end_ts,
+                end_ts,
+                output_artifact_hash,
+                error_class,
+                error_message,
+                attrs.get("prompt_tokens"),
+                attrs.get("completion_tokens"),
+                attrs.get("total_tokens"),
+                attrs.get("model"),
+                span_id,
+            ),
+        )
+        statements = [span_update]
+        if "total_tokens" in attrs:
+            statements.append(_usage_upsert(trace_id, attrs))
+        self._append_event(event, statements)
 
     def add_span_link(
         self,
@@ -762,21 +2065,20 @@ class TraceStore:
         - artifact WAS_GENERATED_BY span (LLM output)
         - span WAS_INFORMED_BY span (dependency)
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO provenance (trace_id, relation, subject_span_id, object_span_id, object_artifact_hash, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    trace_id,
-                    relation.value,
-                    subject_span_id,
-                    object_span_id,
-                    object_artifact_hash,
-                    datetime.now(UTC).isoformat(),
-                ),
-            )
+        self._write(
+            """
+            INSERT INTO provenance (trace_id, relation, subject_span_id, object_span_id, object_artifact_hash, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                trace_id,
+                relation.value,
+                subject_span_id,
+                object_span_id,
+                object_artifact_hash,
+                datetime.now(UTC).isoformat(),
+            ),
+        )
 
     def store_artifact(
         self,
@@ -787,35 +2089,55 @@ class TraceStore:
     ) -> Artifact:
         """Store an artifact and record it in the database."""
         artifact = self.artifact_store.store(data, artifact_type, content_type, metadata)
+        self._record_artifact(artifact)
+        return artifact
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO artifacts (artifact_hash, artifact_type, content_type, byte_len, storage_path, created_ts, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    artifact.artifact_hash,
-                    artifact.artifact_type,
-                    artifact.content_type,
-                    artifact.byte_len,
-                    artifact.storage_path,
-                    artifact.created_ts.isoformat(),
-                    json.dumps(artifact.metadata),
-                ),
-            )
+    def store_artifact_file(
+        self,
+        file_path: Path,
+        artifact_type: str,
+        content_type: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> Artifact:
+        """
+        Store a file as an artifact and record it in the database.
 
+        Backends that support it (PackedArtifactStore) stream the file
+        instead of reading it into memory.
+        """
+        artifact = self.artifact_store.store_file(file_path, artifact_type, content_type, metadata)
+        self._record_artifact(artifact)
         return artifact
 
+    def _record_artifact(self, artifact: Artifact) -> None:
+        # Storing existing content again keeps its created_ts but restarts
+        # the retention grace period, as a span may be about to reference it
+        self._write(
+            """
+            INSERT INTO artifacts (artifact_hash, artifact_type, content_type, byte_len, storage_path, created_ts, metadata, last_stored_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(artifact_hash) DO UPDATE SET last_stored_ts = excluded.last_stored_ts
+            """,
+            (
+                artifact.artifact_hash,
+                artifact.artifact_type,
+                artifact.content_type,
+                artifact.byte_len,
+                artifact.storage_path,
+                artifact.created_ts.isoformat(),
+                json.dumps(artifact.metadata),
+                artifact.created_ts.isoformat(),
+            ),
+        )
+
     def store_video(
         self,
         video_path: Path,
         video_metadata: VideoMetadata,
     ) -> Artifact:
         """Store a video artifact with sidecar metadata."""
-        data = video_path.read_bytes()
-        artifact = self.store_artifact(
-            data=data,
+        artifact = self.store_artifact_file(
+            video_path,
             artifact_type="video",
             content_type=f"video/{video_metadata.container}",
             metadata=video_metadata.to_dict(),
@@ -828,9 +2150,8 @@ class TraceStore:
         span_id: str,
     ) -> Artifact:
         """Store a Playwright trace.zip as-is."""
-        data = trace_path.read_bytes()
-        artifact = self.store_artifact(
-            data=data,
+        artifact = self.store_artifact_file(
+            trace_path,
             artifact_type="playwright_trace",
             content_type="application/zip",
             metadata={"span_id": span_id},
@@ -847,7 +2168,7 @@ class TraceStore:
         limit: int | None = None,
     ) -> list[TraceEvent]:
         """Query events with optional filters."""
-        query = "SELECT event_id, timestamp, event_type, trace_id, span_id, data FROM trace_events WHERE 1=1"
+        query = f"SELECT {_EVENT_COLUMNS} FROM trace_events WHERE 1=1"
         params: list[Any] = []
 
         if trace_id:
@@ -872,88 +2193,248 @@ class TraceStore:
             query += " LIMIT ?"
             params.append(limit)
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(query, params)
             rows = cursor.fetchall()
 
-        return [
-            TraceEvent(
-                event_id=row[0],
-                timestamp=datetime.fromisoformat(row[1]),
-                event_type=TraceEventType(row[2]),
-                trace_id=row[3],
-                span_id=row[4],
-                data=json.loads(row[5]),
-            )
-            for row in rows
-        ]
+        return [_row_to_event(row) for row in rows]
+
+    def tail(
+        self,
+        trace_id: str,
+        after_cursor: int = 0,
+        limit: int = 500,
+    ) -> list[tuple[int, TraceEvent]]:
+        """
+        Return committed events of a trace written after ``after_cursor``.
+
+        The cursor is the event's rowid, which increases monotonically with
+        every write to the database, so polling with the last cursor seen
+        only reads new rows (via the trace_id index) instead of rescanning
+        the trace. Pass 0 to start from the beginning. Long-lived pollers
+        should use open_tail(), which keeps one connection open.
+
+        Returns:
+            (cursor, event) pairs in write order
+        """
+        with self._connect(flush=False) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT rowid, {_EVENT_COLUMNS} FROM trace_events
+                WHERE trace_id = ? AND rowid > ?
+                ORDER BY rowid ASC
+                LIMIT ?
+                """,
+                (trace_id, after_cursor, limit),
+            ).fetchall()
+        return [(row[0], _row_to_event(row[1:])) for row in rows]
+
+    def open_tail(self, trace_id: str, after_cursor: int = 0) -> TraceTail:
+        """Follow a trace's committed events from ``after_cursor`` (see TraceTail)."""
+        return TraceTail(self.db_path, trace_id, after_cursor)
+
+    def latest_cursor(self, trace_id: str | None = None) -> int:
+        """Cursor of the newest committed event (of a trace, or of the database)."""
+        with self._connect(flush=False) as conn:
+            if trace_id is None:
+                row = conn.execute("SELECT MAX(rowid) FROM trace_events").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT MAX(rowid) FROM trace_events WHERE trace_id = ?", (trace_id,)
+                ).fetchone()
+        return row[0] or 0
 
     def reconstruct_span(self, trace_id: str, span_id: str) -> Span | None:
         """Reconstruct a span from its START/END events."""
         events = self.get_events(trace_id=trace_id, span_id=span_id)
+        spans = fold_span_events(events)
+        return spans[0] if spans else None
 
-        start_event = None
-        end_event = None
-        links: list[str] = []
-        additional_attrs: dict[str, Any] = {}
-
-        for event in events:
-            if event.event_type == TraceEventType.SPAN_START:
-                start_event = event
-            elif event.event_type == TraceEventType.SPAN_END:
-                end_event = event
-            elif event.event_type == TraceEventType.SPAN_LINK:
-                links.append(event.data["linked_span_id"])
-            elif event.event_type == TraceEventType.SPAN_ATTRIBUTE:
-                additional_attrs.update(event.data.get("attributes", {}))
-
-        if start_event is None:
-            return None
+    def get_trace_spans(
+        self,
+        trace_id: str,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[Span]:
+        """
+        Get spans for a trace, ordered by start time.
 
-        start_data = start_event.data
-        tool_prov = None
-        if start_data.get("tool_provenance"):
-            tool_prov = ToolProvenance.from_dict(start_data["tool_provenance"])
+        All events are read in one ordered scan and folded into spans,
+        rather than issuing one query per span.
 
-        attributes = start_data.get("attributes", {})
-        attributes.update(additional_attrs)
+        Args:
+            trace_id: The trace to read
+            offset: Number of spans (in start order) to skip
+            limit: Maximum number of spans to return (all if None)
+        """
+        if limit is None and offset == 0:
+            query = (
+                f"SELECT {_EVENT_COLUMNS} FROM trace_events"
+                " WHERE trace_id = ? ORDER BY timestamp ASC, rowid ASC"
+            )
+            with self._connect() as conn:
+                rows = conn.execute(query, (trace_id,)).fetchall()
+            return fold_span_events(_row_to_event(row) for row in rows)
 
-        return Span(
-            span_id=span_id,
+        return self._fetch_span_page(trace_id, limit=limit, offset=offset)
+
+    def iter_trace_spans(self, trace_id: str, page_size: int = 500) -> Iterator[Span]:
+        """
+        Stream spans for a trace in start order, one page query at a time.
+
+        Pages are selected by keyset on (start timestamp, span_id), so the
+        cost of each page does not grow with how far into the trace it is.
+        """
+        after: tuple[str, str] | None = None
+        while True:
+            spans = self._fetch_span_page(trace_id, limit=page_size, after=after)
+            yield from spans
+            if len(spans) < page_size:
+                return
+            last = spans[-1]
+            after = (last.start_ts.isoformat(), last.span_id)
+
+    def _fetch_span_page(
+        self,
+        trace_id: str,
+        limit: int | None,
+        offset: int = 0,
+        after: tuple[str, str] | None = None,
+    ) -> list[Span]:
+        """Fetch all events of one page of spans in a single query and fold them."""
+        page = "SELECT span_id FROM trace_events WHERE trace_id = ? AND event_type = ?"
+        params: list[Any] = [trace_id, TraceEventType.SPAN_START.value]
+        if after is not None:
+            page += " AND (timestamp, span_id) > (?, ?)"
+            params.extend(after)
+        page += " ORDER BY timestamp ASC, span_id ASC LIMIT ? OFFSET ?"
+        params.extend([limit if limit is not None else -1, offset])
+
+        query = (
+            f"SELECT {_EVENT_COLUMNS} FROM trace_events"
+            f" WHERE trace_id = ? AND span_id IN ({page})"
+            " ORDER BY timestamp ASC, rowid ASC"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(query, [trace_id, *params]).fetchall()
+        return fold_span_events(_row_to_event(row) for row in rows)
+
+    def rebuild_span_table(self, trace_id: str | None = None) -> int:
+        """
+        Rebuild the materialized ``spans`` table from the event log.
+
+        Used to migrate databases created before the table existed, or to
+        repair it. Each trace is replaced in its own transaction, together
+        with its ``trace_usage`` totals. LLM spans from before token usage
+        was recorded at span end are backfilled from their output artifacts.
+
+        Args:
+            trace_id: Only rebuild this trace (all traces if None)
+
+        Returns:
+            Number of span rows written
+        """
+        if trace_id is not None:
+            trace_ids = [trace_id]
+        else:
+            with self._connect() as conn:
+                trace_ids = [
+                    row[0] for row in conn.execute("SELECT DISTINCT trace_id FROM trace_events")
+                ]
+
+        written = 0
+        for tid in trace_ids:
+            spans = fold_span_events(self.get_events(trace_id=tid))
+            usage = TraceUsage(trace_id=tid)
+            statements: list[Statement] = [
+                ("DELETE FROM spans WHERE trace_id = ?", (tid,)),
+                ("DELETE FROM trace_usage WHERE trace_id = ?", (tid,)),
+            ]
+            for span in spans:
+                if span.kind == SpanKind.LLM_CALL and "total_tokens" not in span.attributes:
+                    span.attributes.update(self._usage_from_output_artifact(span))
+                usage.record(span.attributes)
+                statements.append((
+                    f"INSERT OR REPLACE INTO spans ({_SPAN_COLUMNS}) VALUES ({_SPAN_PLACEHOLDERS})",
+                    _span_row(span),
+                ))
+            if usage.llm_calls:
+                statements.append(_usage_upsert(tid, usage.to_dict(), usage.llm_calls))
+            self._writer.submit(statements)
+            written += len(spans)
+        return written
+
+    def _usage_from_output_artifact(self, span: Span) -> dict[str, Any]:
+        """
+        Recover token usage for an LLM span recorded before usage was
+        captured at span end, from its llm_output artifact.
+        """
+        if not span.output_artifact_hash:
+            return {}
+        data = self.get_artifact_data(span.output_artifact_hash)
+        if not data:
+            return {}
+        try:
+            usage = json.loads(data.decode()).get("usage") or {}
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            return {}
+        if "total_tokens" not in usage:
+            return {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+    def get_trace_usage(self, trace_id: str) -> TraceUsage:
+        """Get running LLM usage totals for a trace (single-row lookup)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT llm_calls, prompt_tokens, completion_tokens, total_tokens
+                FROM trace_usage WHERE trace_id = ?
+                """,
+                (trace_id,),
+            ).fetchone()
+        if row is None:
+            return TraceUsage(trace_id=trace_id)
+        return TraceUsage(
             trace_id=trace_id,
-            parent_span_id=start_data.get("parent_span_id"),
-            kind=SpanKind(start_data["kind"]),
-            name=start_data["name"],
-            actor_id=start_data["actor_id"],
-            seq=start_data["seq"],
-            start_ts=start_event.timestamp,
-            end_ts=end_event.timestamp if end_event else None,
-            status=SpanStatus(end_event.data["status"]) if end_event else SpanStatus.STARTED,
-            attributes=attributes,
-            links=links + start_data.get("links", []),
-            tool_provenance=tool_prov,
-            input_artifact_hash=start_data.get("input_artifact_hash"),
-            output_artifact_hash=end_event.data.get("output_artifact_hash") if end_event else None,
-            error_class=end_event.data.get("error_class") if end_event else None,
-            error_message=end_event.data.get("error_message") if end_event else None,
+            llm_calls=row[0],
+            prompt_tokens=row[1],
+            completion_tokens=row[2],
+            total_tokens=row[3],
         )
 
-    def get_trace_spans(self, trace_id: str) -> list[Span]:
-        """Get all spans for a trace."""
-        events = self.get_events(trace_id=trace_id, event_type=TraceEventType.SPAN_START)
-        span_ids = [e.span_id for e in events]
+    def list_span_records(
+        self,
+        trace_id: str,
+        kind: SpanKind | None = None,
+        status: SpanStatus | None = None,
+    ) -> list[SpanRecord]:
+        """
+        Read spans of a trace from the materialized ``spans`` table.
 
-        spans = []
-        for span_id in span_ids:
-            span = self.reconstruct_span(trace_id, span_id)
-            if span:
-                spans.append(span)
+        Unlike get_trace_spans this does not replay events, so it is the
+        cheap path for summaries and dashboards.
+        """
+        query = f"SELECT {_SPAN_COLUMNS} FROM spans WHERE trace_id = ?"
+        params: list[Any] = [trace_id]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind.value)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status.value)
+        query += " ORDER BY start_ts ASC, span_id ASC"
 
-        return sorted(spans, key=lambda s: s.start_ts)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [SpanRecord.from_row(row) for row in rows]
 
     def get_artifact(self, artifact_hash: str) -> Artifact | None:
         """Get artifact metadata by hash."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT artifact_hash, artifact_type, content_type, byte_len, storage_path, created_ts, metadata
@@ -996,6 +2477,11 @@ class TraceStore:
         """
         Create a checkpoint capturing the complete agent state.
 
+        JSON state is stored as a patch against the trace's previous
+        checkpoint when that is smaller than the state itself, with a full
+        snapshot at least every CHECKPOINT_SNAPSHOT_INTERVAL checkpoints.
+        get_checkpoint_state always returns the complete state.
+
         Args:
             trace_id: The trace this checkpoint belongs to
             step_number: Current step number in the execution
@@ -1007,17 +2493,18 @@ class TraceStore:
         Returns:
             The created Checkpoint
         """
-        # Store state as artifact
-        state_artifact = self.store_artifact(
-            data=state_data,
-            artifact_type="checkpoint_state",
-            content_type="application/json",
-            metadata={"step_number": step_number, "description": description},
-        )
+        with self._checkpoint_lock:
+            head = self._checkpoint_head(trace_id)
+            state_artifact, head = self._store_checkpoint_state(
+                state_data,
+                head,
+                CHECKPOINT_SNAPSHOT_INTERVAL,
+                {"step_number": step_number, "description": description},
+            )
+            self._remember_checkpoint_head(trace_id, head)
 
-        checkpoint_id = f"cp-{uuid.uuid4().hex[:16]}"
         checkpoint = Checkpoint(
-            checkpoint_id=checkpoint_id,
+            checkpoint_id=f"cp-{uuid.uuid4().hex[:16]}",
             trace_id=trace_id,
             created_ts=datetime.now(UTC),
             status=CheckpointStatus.ACTIVE,
@@ -1027,29 +2514,169 @@ class TraceStore:
             parent_checkpoint_id=parent_checkpoint_id,
             metadata=metadata or {},
         )
+        self._insert_checkpoint(checkpoint)
+        return checkpoint
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+    def _insert_checkpoint(self, checkpoint: Checkpoint) -> None:
+        self._write(
+            """
+            INSERT INTO checkpoints
+            (checkpoint_id, trace_id, created_ts, status, step_number,
+             description, state_artifact_hash, parent_checkpoint_id, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                checkpoint.checkpoint_id,
+                checkpoint.trace_id,
+                checkpoint.created_ts.isoformat(),
+                checkpoint.status.value,
+                checkpoint.step_number,
+                checkpoint.description,
+                checkpoint.state_artifact_hash,
+                checkpoint.parent_checkpoint_id,
+                json.dumps(checkpoint.metadata),
+            ),
+        )
+
+        # A checkpoint must be durable together with every event before it
+        self.flush()
+
+    def _store_checkpoint_state(
+        self,
+        state_data: bytes,
+        head: tuple[str, int, Any] | None,
+        max_depth: int,
+        metadata: dict[str, Any],
+    ) -> tuple[Artifact, tuple[str, int, Any] | None]:
+        """
+        Store checkpoint state as a snapshot or as a patch against ``head``.
+
+        Returns the artifact and the new head, or None as the head when the
+        state is not JSON (such states are always stored whole).
+        """
+        try:
+            doc = json.loads(state_data)
+            canonical = json.dumps(doc).encode() == state_data
+        except (UnicodeDecodeError, ValueError):
+            doc, canonical = None, False
+
+        if canonical and head is not None and head[1] < max_depth:
+            base_hash, depth, base_doc = head
+            ops = diff_json(base_doc, doc)
+            payload = json.dumps(
+                {"type": "patch", "base": base_hash, "depth": depth + 1, "ops": ops}
+            ).encode()
+            # Patches only pay off (and only round-trip exactly) in the common case
+            if len(payload) * 2 < len(state_data) and json.dumps(
+                apply_json_patch(json.loads(json.dumps(base_doc)), ops)
+            ).encode() == state_data:
+                artifact = self.store_artifact(
+                    data=DELTA_MAGIC + payload,
+                    artifact_type="checkpoint_state",
+                    content_type="application/json",
+                    metadata={**metadata, "encoding": "patch", "chain_depth": depth + 1},
+                )
+                return artifact, (artifact.artifact_hash, depth + 1, doc)
+
+        artifact = self.store_artifact(
+            data=state_data,
+            artifact_type="checkpoint_state",
+            content_type="application/json",
+            metadata=metadata,
+        )
+        return artifact, (artifact.artifact_hash, 0, doc) if canonical else None
+
+    def _checkpoint_head(self, trace_id: str) -> tuple[str, int, Any] | None:
+        """Return (hash, depth, state) of the latest checkpoint of a trace."""
+        head = self._checkpoint_heads.get(trace_id)
+        if head is not None:
+            self._checkpoint_heads.move_to_end(trace_id)
+            return head
+
+        with self._connect() as conn:
+            row = conn.execute(
                 """
-                INSERT INTO checkpoints
-                (checkpoint_id, trace_id, created_ts, status, step_number,
-                 description, state_artifact_hash, parent_checkpoint_id, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                SELECT state_artifact_hash FROM checkpoints WHERE trace_id = ?
+                ORDER BY step_number DESC, created_ts DESC LIMIT 1
                 """,
-                (
-                    checkpoint.checkpoint_id,
-                    checkpoint.trace_id,
-                    checkpoint.created_ts.isoformat(),
-                    checkpoint.status.value,
-                    checkpoint.step_number,
-                    checkpoint.description,
-                    checkpoint.state_artifact_hash,
-                    checkpoint.parent_checkpoint_id,
-                    json.dumps(checkpoint.metadata),
-                ),
-            )
+                (trace_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._load_checkpoint_head(row[0])
 
-        return checkpoint
+    def _load_checkpoint_head(self, artifact_hash: str) -> tuple[str, int, Any] | None:
+        raw = self.artifact_store.retrieve_raw(artifact_hash)
+        if raw is None:
+            return None
+        depth = 0
+        if raw.startswith(DELTA_MAGIC):
+            depth = json.loads(raw[len(DELTA_MAGIC):]).get("depth", MAX_DELTA_CHAIN)
+        try:
+            doc = json.loads(self.artifact_store.retrieve(artifact_hash) or b"")
+        except (UnicodeDecodeError, ValueError):
+            return None
+        return artifact_hash, depth, doc
+
+    def _remember_checkpoint_head(self, trace_id: str, head: tuple[str, int, Any] | None) -> None:
+        if head is None:
+            self._checkpoint_heads.pop(trace_id, None)
+            return
+        self._checkpoint_heads[trace_id] = head
+        self._checkpoint_heads.move_to_end(trace_id)
+        while len(self._checkpoint_heads) > 64:
+            self._checkpoint_heads.popitem(last=False)
+
+    def compact_checkpoints(self, trace_id: str | None = None, max_depth: int = 4) -> int:
+        """
+        Re-encode checkpoint state so no checkpoint is more than ``max_depth``
+        patches away from a snapshot.
+
+        Checkpoints are rewritten in step order per trace, each trace's chain
+        starting from a fresh snapshot, so the first checkpoint of a forked
+        trace no longer shares its parent's state artifact. Superseded patch
+        artifacts are not deleted here; once nothing references them,
+        RetentionEngine (see find_orphan_artifacts in trace_retention)
+        deletes them.
+
+        Returns:
+            Number of checkpoints whose state artifact changed
+        """
+        query = """
+            SELECT checkpoint_id, trace_id, state_artifact_hash FROM checkpoints
+        """
+        params: tuple[Any, ...] = ()
+        if trace_id is not None:
+            query += " WHERE trace_id = ?"
+            params = (trace_id,)
+        query += " ORDER BY trace_id, step_number, created_ts"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        rewritten = 0
+        with self._checkpoint_lock:
+            head: tuple[str, int, Any] | None = None
+            current_trace = None
+            for checkpoint_id, cp_trace_id, state_hash in rows:
+                if cp_trace_id != current_trace:
+                    current_trace, head = cp_trace_id, None
+                state_data = self.get_artifact_data(state_hash)
+                if state_data is None:
+                    head = None
+                    continue
+                artifact, head = self._store_checkpoint_state(
+                    state_data, head, max_depth, {"compacted": True}
+                )
+                if artifact.artifact_hash != state_hash:
+                    self._write(
+                        "UPDATE checkpoints SET state_artifact_hash = ? WHERE checkpoint_id = ?",
+                        (artifact.artifact_hash, checkpoint_id),
+                    )
+                    rewritten += 1
+                self._checkpoint_heads.pop(cp_trace_id, None)
+        self.flush()
+        return rewritten
 
     def list_checkpoints(
         self,
@@ -1079,7 +2706,7 @@ class TraceStore:
 
         query += " ORDER BY step_number ASC"
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(query, params)
             rows = cursor.fetchall()
 
@@ -1108,7 +2735,7 @@ class TraceStore:
         Returns:
             The checkpoint or None if not found
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT checkpoint_id, trace_id, created_ts, status, step_number,
@@ -1161,11 +2788,10 @@ class TraceStore:
             checkpoint_id: The checkpoint ID
             status: The new status
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "UPDATE checkpoints SET status = ? WHERE checkpoint_id = ?",
-                (status.value, checkpoint_id),
-            )
+        self._write(
+            "UPDATE checkpoints SET status = ? WHERE checkpoint_id = ?",
+            (status.value, checkpoint_id),
+        )
 
     def fork_from_checkpoint(
         self,
@@ -1176,7 +2802,8 @@ class TraceStore:
         Fork execution from a checkpoint, creating a new trace.
 
         This marks the original checkpoint as FORKED and creates a new
-        checkpoint in the forked trace that references the parent.
+        checkpoint in the forked trace that references the parent. The new
+        checkpoint shares the parent's state artifact instead of copying it.
 
         Args:
             checkpoint_id: The checkpoint to fork from
@@ -1195,23 +2822,26 @@ class TraceStore:
         # Create new trace
         new_trace_id = new_trace_id or generate_trace_id()
 
-        # Get parent state
-        state_data = self.get_checkpoint_state(checkpoint_id)
-        if state_data is None:
+        if not self.artifact_store.exists(parent_checkpoint.state_artifact_hash):
             raise ValueError(f"Checkpoint state not found: {checkpoint_id}")
 
-        # Create new checkpoint in forked trace
-        new_checkpoint = self.create_checkpoint(
+        # The fork shares the parent's state artifact (copy-on-write): its
+        # first own checkpoint is stored as a patch against it
+        new_checkpoint = Checkpoint(
+            checkpoint_id=f"cp-{uuid.uuid4().hex[:16]}",
             trace_id=new_trace_id,
+            created_ts=datetime.now(UTC),
+            status=CheckpointStatus.ACTIVE,
             step_number=parent_checkpoint.step_number,
             description=f"Forked from {checkpoint_id}",
-            state_data=state_data,
+            state_artifact_hash=parent_checkpoint.state_artifact_hash,
             parent_checkpoint_id=checkpoint_id,
             metadata={
                 "forked_from_trace": parent_checkpoint.trace_id,
                 "forked_from_checkpoint": checkpoint_id,
             },
         )
+        self._insert_checkpoint(new_checkpoint)
 
         return new_trace_id, new_checkpoint
 
@@ -1231,7 +2861,7 @@ class TraceStore:
         Returns:
             SessionOverview with summary statistics
         """
-        spans = self.get_trace_spans(trace_id)
+        spans = self.list_span_records(trace_id)
         checkpoints = self.list_checkpoints(trace_id)
 
         # Calculate statistics
@@ -1240,18 +2870,7 @@ class TraceStore:
         agent_turns = [s for s in spans if s.kind == SpanKind.AGENT_TURN]
         errors = [s for s in spans if s.status == SpanStatus.ERROR]
 
-        # Calculate total tokens from LLM output artifacts
-        total_tokens = 0
-        for span in llm_calls:
-            if span.output_artifact_hash:
-                artifact_data = self.get_artifact_data(span.output_artifact_hash)
-                if artifact_data:
-                    try:
-                        output = json.loads(artifact_data.decode())
-                        usage = output.get("usage", {})
-                        total_tokens += usage.get("total_tokens", 0)
-                    except (json.JSONDecodeError, UnicodeDecodeError):
-                        pass
+        total_tokens = self.get_trace_usage(trace_id).total_tokens
 
         # Determine session status
         if not spans:
@@ -1284,8 +2903,8 @@ class TraceStore:
         # Key milestones (PR created, tests run, etc.)
         milestones = []
         for span in spans:
-            if span.kind == SpanKind.TOOL_CALL and span.tool_provenance:
-                tool_name = span.tool_provenance.tool_name
+            if span.kind == SpanKind.TOOL_CALL and span.tool_name:
+                tool_name = span.tool_name
                 if tool_name in ["git_create_pr", "git_pr_checks", "bash"]:
                     milestones.append({
                         "timestamp": span.start_ts.isoformat(),
@@ -1354,21 +2973,20 @@ class TraceStore:
             trace_id: The trace this event belongs to
             event: The cognitive event to store
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO cognitive_events (trace_id, event_type, timestamp, phase, content, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    trace_id,
-                    event.event_type,
-                    event.timestamp,
-                    event.phase,
-                    event.content,
-                    json.dumps(event.metadata),
-                ),
-            )
+        self._write(
+            """
+            INSERT INTO cognitive_events (trace_id, event_type, timestamp, phase, content, metadata)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                trace_id,
+                event.event_type,
+                event.timestamp,
+                event.phase,
+                event.content,
+                json.dumps(event.metadata),
+            ),
+        )
 
     def get_cognitive_events(self, trace_id: str) -> list[CognitiveEvent]:
         """Retrieve all cognitive events for a trace (V5 metacognitive tracking).
@@ -1379,7 +2997,7 @@ class TraceStore:
         Returns:
             List of CognitiveEvent objects in chronological order
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT event_type, timestamp, phase, content, metadata
@@ -1416,7 +3034,7 @@ class SummaryEventLog:
 
     def get_summary(self, trace_id: str) -> list[dict[str, Any]]:
         """Get a summary of events for a trace."""
-        spans = self.trace_store.get_trace_spans(trace_id)
+        spans = self.trace_store.list_span_records(trace_id)
 
         summary = []
         for span in spans:
@@ -1436,8 +3054,8 @@ class SummaryEventLog:
             if span.error_message:
                 entry["error"] = span.error_message
 
-            if span.tool_provenance:
-                entry["tool"] = span.tool_provenance.tool_name
+            if span.tool_name:
+                entry["tool"] = span.tool_name
 
             summary.append(entry)
 
@@ -1445,22 +3063,21 @@ class SummaryEventLog:
 
     def get_tool_calls(self, trace_id: str) -> list[dict[str, Any]]:
         """Get just the tool calls for a trace."""
-        spans = self.trace_store.get_trace_spans(trace_id)
+        spans = self.trace_store.list_span_records(trace_id, kind=SpanKind.TOOL_CALL)
         return [
             {
                 "timestamp": s.start_ts.isoformat(),
-                "tool": s.tool_provenance.tool_name if s.tool_provenance else s.name,
+                "tool": s.tool_name or s.name,
                 "status": s.status.value,
                 "duration_ms": s.duration_ms,
                 "trace_ref": {"trace_id": s.trace_id, "span_id": s.span_id},
             }
             for s in spans
-            if s.kind == SpanKind.TOOL_CALL
         ]
 
     def get_errors(self, trace_id: str) -> list[dict[str, Any]]:
         """Get just the errors for a trace."""
-        spans = self.trace_store.get_trace_spans(trace_id)
+        spans = self.trace_store.list_span_records(trace_id, status=SpanStatus.ERROR)
         return [
             {
                 "timestamp": s.start_ts.isoformat(),
@@ -1470,7 +3087,6 @@ class SummaryEventLog:
                 "trace_ref": {"trace_id": s.trace_id, "span_id": s.span_id},
             }
             for s in spans
-            if s.status == SpanStatus.ERROR
         ]
 
 
@@ -1485,6 +3101,7 @@ class TraceContext:
         self.trace_store = trace_store
         self.trace_id = trace_id or generate_trace_id()
         self._span_stack: list[str] = []
+        self.usage = TraceUsage(trace_id=self.trace_id)
 
     @property
     def current_span_id(self) -> str | None:
@@ -1520,6 +3137,7 @@ class TraceContext:
         output_artifact_hash: str | None = None,
         error_class: str | None = None,
         error_message: str | None = None,
+        additional_attributes: dict[str, Any] | None = None,
     ) -> None:
         """End the current span."""
         if not self._span_stack:
@@ -1533,7 +3151,10 @@ class TraceContext:
             output_artifact_hash=output_artifact_hash,
             error_class=error_class,
             error_message=error_message,
+            additional_attributes=additional_attributes,
         )
+        if additional_attributes:
+            self.usage.record(additional_attributes)
 
     def store_artifact(
         self,
@@ -1576,17 +3197,39 @@ class TraceContext:
         self.trace_store.store_cognitive_event(self.trace_id, event)
 
 
-def create_trace_store(base_path: Path) -> tuple[TraceStore, ArtifactStore]:
+def create_trace_store(
+    base_path: Path,
+    durability: DurabilityMode = DurabilityMode.SYNC,
+    artifact_backend: str = "files",
+    compression: str = "zlib",
+    compression_level: int | None = None,
+) -> tuple[TraceStore, ArtifactStore]:
     """
     Create a TraceStore with its ArtifactStore.
 
     Args:
         base_path: Base directory for all trace data
+        durability: Write durability mode for the trace database
+        artifact_backend: "files" (one file per artifact) or "pack"
+            (compressed, chunked pack files; see PackedArtifactStore)
+        compression: Codec for the "pack" backend ("zlib", "zstd" or "none")
+        compression_level: Codec level for the "pack" backend
 
     Returns:
         Tuple of (TraceStore, ArtifactStore)
     """
     base_path.mkdir(parents=True, exist_ok=True)
-    artifact_store = ArtifactStore(base_path / "artifacts")
-    trace_store = TraceStore(base_path / "traces.db", artifact_store)
+    artifact_store: ArtifactStore
+    if artifact_backend == "files":
+        artifact_store = ArtifactStore(base_path / "artifacts")
+    elif artifact_backend == "pack":
+        from compymac.storage.artifact_pack import PackedArtifactStore
+        artifact_store = PackedArtifactStore(
+            base_path / "artifacts",
+            compression=compression,
+            compression_level=compression_level,
+        )
+    else:
+        raise ValueError(f"Unknown artifact backend: {artifact_backend}")
+    trace_store = TraceStore(base_path / "traces.db", artifact_store, durability=durability)
     return trace_store, artifact_store
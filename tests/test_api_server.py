@@ -0,0 +1,165 @@
+"""
+Tests for the FastAPI server module.
+"""
+
+import runpy
+import threading
+import time
+import warnings
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def wait_for(predicate, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.01)
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    """The server module, with every store it opens at import under a temp dir."""
+    home = tmp_path_factory.mktemp("home")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("HOME", str(home))
+        mp.setenv("COMPYMAC_LIBRARY_DB", str(home / "library.db"))
+        mp.setenv("COMPYMAC_PARSE_CACHE", str(home / "parse_cache.db"))
+        mp.setenv("COMPYMAC_TRACE_DIR", str(home / "traces"))
+        mp.setenv("COMPYMAC_EMBEDDER", "none")
+        from compymac.api import server
+
+        yield server
+        server.ingestion_jobs.shutdown()
+
+
+@pytest.fixture
+def client(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_DIR", tmp_path)
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def pdf_bytes():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for i in range(2):
+        page = doc.new_page()
+        # Enough text per page that it is not sent to OCR
+        for line in range(30):
+            page.insert_text((72, 72 + line * 20), f"Page {i + 1} line {line}: quarterly revenue")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def upload(client, filename: str, data: bytes) -> dict:
+    response = client.post(
+        "/api/documents/upload", files={"file": (filename, data, "application/pdf")}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def job_status(client, job_id: str) -> str:
+    return client.get(f"/api/ingestion/jobs/{job_id}").json()["status"]
+
+
+def test_main_registers_trace_routes(server, monkeypatch):
+    uvicorn = pytest.importorskip("uvicorn")
+    served = {}
+
+    def run(app, **kwargs):
+        served["paths"] = {route.path for route in app.routes}
+
+    monkeypatch.setattr(uvicorn, "run", run)
+    with warnings.catch_warnings():
+        # The module is already imported by the fixture
+        warnings.simplefilter("ignore", RuntimeWarning)
+        runpy.run_module("compymac.api.server", run_name="__main__")
+
+    assert "/api/traces/{trace_id}/events" in served["paths"]
+    assert "/api/traces/{trace_id}/stream" in served["paths"]
+
+
+def test_upload_returns_job(server, client, pdf_bytes):
+    doc = upload(client, "report.pdf", pdf_bytes)
+    assert doc["status"] in ("pending", "processing")
+
+    wait_for(lambda: job_status(client, doc["job_id"]) == "completed")
+    job = client.get(f"/api/ingestion/jobs/{doc['job_id']}").json()
+    assert job["doc_id"] == doc["id"]
+    assert job["filename"] == "report.pdf"
+    stored = server.library_store.get_document(doc["id"])
+    assert stored.status.value == "ready"
+    assert stored.chunks
+
+
+def test_batch_upload_returns_job_per_file(server, client, pdf_bytes):
+    response = client.post(
+        "/api/documents/upload-batch",
+        files=[
+            ("files", ("a.pdf", pdf_bytes, "application/pdf")),
+            ("files", ("notes.txt", b"text", "text/plain")),
+        ],
+        data={"relative_paths": ["papers/a.pdf", "papers/notes.txt"]},
+    )
+    data = response.json()
+
+    assert (data["success_count"], data["failure_count"]) == (1, 1)
+    queued, rejected = data["results"]
+    assert queued["status"] == "queued" and queued["library_path"] == "papers/a.pdf"
+    assert rejected["status"] == "failed" and "job_id" not in rejected
+    wait_for(lambda: job_status(client, queued["job_id"]) == "completed")
+    listed = client.get("/api/ingestion/jobs").json()["jobs"]
+    assert queued["job_id"] in {job["id"] for job in listed}
+
+
+def test_cancelled_job_fails_document_and_clears_chunks(server, client, pdf_bytes):
+    embedding = threading.Event()
+    resume = threading.Event()
+
+    def pause_after_parsing(job):
+        # Hold the worker once parsing is done, so the cancel lands mid-ingestion
+        if job.stage == "embedding":
+            embedding.set()
+            resume.wait(10)
+
+    server.ingestion_jobs.add_listener(pause_after_parsing)
+    try:
+        doc = upload(client, "cancel.pdf", pdf_bytes)
+        assert embedding.wait(30)
+        response = client.post(f"/api/ingestion/jobs/{doc['job_id']}/cancel")
+        assert response.status_code == 200
+        resume.set()
+        wait_for(lambda: job_status(client, doc["job_id"]) == "cancelled")
+    finally:
+        resume.set()
+        server.ingestion_jobs.remove_listener(pause_after_parsing)
+
+    stored = server.library_store.get_document(doc["id"])
+    assert stored.status.value == "failed"
+    assert stored.error == "Ingestion cancelled"
+    assert stored.chunks == []
+
+
+def test_failed_job_sets_error(server, client):
+    doc = upload(client, "corrupt.pdf", b"not a pdf")
+    wait_for(lambda: job_status(client, doc["job_id"]) == "failed")
+
+    job = client.get(f"/api/ingestion/jobs/{doc['job_id']}").json()
+    stored = server.library_store.get_document(doc["id"])
+    assert job["error"]
+    assert stored.status.value == "failed"
+    assert stored.error == job["error"]
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/ingestion/jobs/missing").status_code == 404
+    assert client.post("/api/ingestion/jobs/missing/cancel").status_code == 404
@@ -0,0 +1,249 @@
+"""
+Tests for the packed, compressed ArtifactStore backend.
+"""
+
+import hashlib
+import io
+import random
+import tempfile
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from compymac.storage.artifact_pack import PackedArtifactStore, _cut_point, cdc_chunks
+from compymac.trace_store import (
+    ArtifactStore,
+    LLMInputEncoder,
+    VideoMetadata,
+    compute_hash,
+    create_trace_store,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for tests."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def small_chunk_store(path: Path, **kwargs) -> PackedArtifactStore:
+    """A store that chunks anything over 16 KiB into ~4 KiB pieces."""
+    return PackedArtifactStore(
+        path,
+        chunk_threshold=16 * 1024,
+        min_chunk_size=1024,
+        avg_chunk_size=4096,
+        max_chunk_size=16 * 1024,
+        **kwargs,
+    )
+
+
+def random_bytes(n: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(n)
+
+
+def reference_cut_point(buf: bytes, min_size: int, max_size: int, mask: int) -> int:
+    """Byte-at-a-time gear hash the vectorized _cut_point must agree with."""
+    gear = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "big") for i in range(256)]
+    end = min(len(buf), max_size)
+    if len(buf) <= min_size:
+        return len(buf)
+    h = 0
+    for i in range(min_size, end):
+        h = ((h << 1) + gear[buf[i]]) & ((1 << 64) - 1)
+        if not h & mask:
+            return i + 1
+    return end
+
+
+class TestCDCChunks:
+    def test_cut_point_matches_rolling_hash(self):
+        for seed in range(20):
+            buf = random_bytes(200_000, seed=seed)
+            for bits in (6, 12, 16):
+                mask = ((1 << bits) - 1) << (64 - bits)
+                assert _cut_point(buf, 100, 150_000, mask) == reference_cut_point(
+                    buf, 100, 150_000, mask
+                )
+        # No cut point found before max_size, or a buffer shorter than min_size
+        assert _cut_point(random_bytes(5000), 100, 4000, (1 << 64) - 1) == 4000
+        assert _cut_point(b"abc", 100, 4000, 1 << 63) == 3
+
+    def test_chunks_reassemble(self):
+        data = random_bytes(200_000)
+        chunks = list(cdc_chunks(io.BytesIO(data), 1024, 4096, 16 * 1024))
+        assert b"".join(chunks) == data
+        assert all(len(c) <= 16 * 1024 for c in chunks)
+        assert all(len(c) >= 1024 for c in chunks[:-1])
+
+    def test_insert_only_changes_nearby_chunks(self):
+        data = random_bytes(200_000)
+        edited = data[:100_000] + b"inserted" + data[100_000:]
+        before = set(cdc_chunks(io.BytesIO(data), 1024, 4096, 16 * 1024))
+        after = list(cdc_chunks(io.BytesIO(edited), 1024, 4096, 16 * 1024))
+        shared = sum(1 for c in after if c in before)
+        assert shared >= len(after) - 3
+
+
+class TestPackedArtifactStore:
+    def test_roundtrip_small_artifacts(self, temp_dir):
+        store = PackedArtifactStore(temp_dir)
+        artifacts = [
+            store.store(f'{{"n": {i}}}'.encode(), "tool_output", "application/json")
+            for i in range(50)
+        ]
+
+        for i, artifact in enumerate(artifacts):
+            assert artifact.storage_path == f"pack:{artifact.artifact_hash}"
+            assert store.retrieve(artifact.artifact_hash) == f'{{"n": {i}}}'.encode()
+        # Everything lives in one pack file rather than 50 loose files
+        assert store.stats()["packs"] == 1
+        assert not any(p.is_dir() and p.name != "packs" for p in temp_dir.iterdir())
+
+    def test_compresses_and_deduplicates(self, temp_dir):
+        store = PackedArtifactStore(temp_dir, compression_level=9)
+        data = b"hello world " * 1000
+        a1 = store.store(data, "test", "text/plain")
+        a2 = store.store(data, "test", "text/plain")
+
+        assert a1.artifact_hash == a2.artifact_hash == compute_hash(data)
+        stats = store.stats()
+        assert stats["objects"] == 1
+        assert stats["chunk_stored_bytes"] < len(data) // 10
+
+    def test_incompressible_chunk_stored_raw(self, temp_dir):
+        store = PackedArtifactStore(temp_dir)
+        data = random_bytes(4096)
+        store.store(data, "test", "application/octet-stream")
+        stats = store.stats()
+        assert stats["chunk_stored_bytes"] == len(data)
+
+    def test_large_blobs_share_chunks(self, temp_dir):
+        store = small_chunk_store(temp_dir)
+        data = random_bytes(300_000)
+        edited = data[:150_000] + b"x" + data[150_000:]
+        store.store(data, "video", "video/webm")
+        stored_once = store.stats()["chunk_stored_bytes"]
+        a2 = store.store(edited, "video", "video/webm")
+
+        assert store.retrieve(a2.artifact_hash) == edited
+        # The second blob only adds the chunks around the edit
+        assert store.stats()["chunk_stored_bytes"] - stored_once < 40_000
+
+    def test_open_and_read_range(self, temp_dir):
+        store = small_chunk_store(temp_dir)
+        data = random_bytes(100_000, seed=1)
+        artifact = store.store(data, "video", "video/webm")
+
+        assert store.read_range(artifact.artifact_hash, 40_000, 30_000) == data[40_000:70_000]
+        with store.open(artifact.artifact_hash) as f:
+            f.seek(-10, io.SEEK_END)
+            assert f.read() == data[-10:]
+            f.seek(5)
+            assert f.read(3) == data[5:8]
+        assert store.open("0" * 64) is None
+
+    def test_reads_not_blocked_while_chunking(self, temp_dir):
+        store = small_chunk_store(temp_dir)
+        existing = store.store(b"already stored", "test", "application/octet-stream")
+        data = random_bytes(100_000, seed=3)
+        read_back = []
+
+        def chunks():
+            for chunk in cdc_chunks(io.BytesIO(data), 1024, 4096, 16 * 1024):
+                # A reader gets through while the writer is between chunks
+                read_back.append(store.retrieve(existing.artifact_hash))
+                yield chunk
+
+        writer = threading.Thread(
+            target=store._write_object, args=(compute_hash(data), chunks()), daemon=True
+        )
+        writer.start()
+        writer.join(timeout=10)
+
+        assert not writer.is_alive()
+        assert read_back and all(r == b"already stored" for r in read_back)
+        assert store.retrieve(compute_hash(data)) == data
+
+    def test_store_file_streams_binary(self, temp_dir):
+        store = small_chunk_store(temp_dir / "artifacts")
+        path = temp_dir / "trace.zip"
+        data = random_bytes(80_000, seed=2)
+        path.write_bytes(data)
+
+        artifact = store.store_file(path, "playwright_trace", "application/zip")
+        assert artifact.artifact_hash == compute_hash(data)
+        assert artifact.byte_len == len(data)
+        assert store.retrieve(artifact.artifact_hash) == data
+
+    def test_rolls_pack_files(self, temp_dir):
+        store = PackedArtifactStore(temp_dir, compression="none", max_pack_bytes=1000)
+        hashes = [
+            store.store(random_bytes(600, seed=i), "t", "application/octet-stream").artifact_hash
+            for i in range(4)
+        ]
+        assert store.stats()["packs"] >= 3
+        for i, h in enumerate(hashes):
+            assert store.retrieve(h) == random_bytes(600, seed=i)
+
+    def test_persists_across_reopen(self, temp_dir):
+        store = PackedArtifactStore(temp_dir)
+        artifact = store.store(b"persistent", "test", "text/plain")
+        store.close()
+
+        reopened = PackedArtifactStore(temp_dir)
+        assert reopened.retrieve(artifact.artifact_hash) == b"persistent"
+        second = reopened.store(b"more", "test", "text/plain")
+        assert reopened.retrieve(second.artifact_hash) == b"more"
+
+    def test_reads_loose_files_from_file_backend(self, temp_dir):
+        loose = ArtifactStore(temp_dir).store(b"legacy", "test", "text/plain")
+        store = PackedArtifactStore(temp_dir)
+        assert store.exists(loose.artifact_hash)
+        assert store.retrieve(loose.artifact_hash) == b"legacy"
+
+    def test_delta_encoded_llm_inputs(self, temp_dir):
+        store = PackedArtifactStore(temp_dir)
+        encoder = LLMInputEncoder(store.store)
+        messages = [{"role": "user", "content": "hi"}]
+        encoder.store(messages, tools=[])
+        messages = messages + [{"role": "assistant", "content": "hello"}]
+        artifact = encoder.store(messages, tools=[])
+
+        with store.open(artifact.artifact_hash) as f:
+            assert b'"hello"' in f.read()
+
+    def test_unknown_compression_rejected(self, temp_dir):
+        with pytest.raises(ValueError):
+            PackedArtifactStore(temp_dir, compression="lz4")
+
+
+class TestPackBackendTraceStore:
+    def test_create_trace_store_with_pack_backend(self, temp_dir):
+        trace_store, artifact_store = create_trace_store(temp_dir, artifact_backend="pack")
+        assert isinstance(artifact_store, PackedArtifactStore)
+
+        video = temp_dir / "run.webm"
+        video.write_bytes(random_bytes(5000))
+        artifact = trace_store.store_video(
+            video,
+            VideoMetadata(
+                codec="vp9",
+                container="webm",
+                duration_ms=1000,
+                resolution=(640, 480),
+                fps=30.0,
+                timebase_offset=datetime.now(UTC),
+                span_id="span-1",
+            ),
+        )
+        assert trace_store.get_artifact(artifact.artifact_hash) is not None
+        assert trace_store.get_artifact_data(artifact.artifact_hash) == video.read_bytes()
+        trace_store.close()
+
+    def test_unknown_backend_rejected(self, temp_dir):
+        with pytest.raises(ValueError):
+            create_trace_store(temp_dir, artifact_backend="s3")
@@ -0,0 +1,135 @@
+"""
+Tests for streaming chunking with DocumentChunker.iter_chunks.
+"""
+
+import random
+
+from compymac.ingestion.chunker import DocumentChunker, Section
+
+TEXT = " ".join(
+    f"Sentence {i} is about topic {i % 5}{'!' if i % 3 else '.'}" + ("\n\n" if i % 11 == 0 else "")
+    for i in range(300)
+)
+
+
+def split_randomly(text: str, pieces: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(text)), pieces - 1))
+    return [text[i:j] for i, j in zip([0, *cuts], [*cuts, len(text)], strict=True)]
+
+
+def test_streamed_chunks_match_whole_text():
+    chunker = DocumentChunker(chunk_size=200, chunk_overlap=40, min_chunk_size=50)
+    expected = chunker.chunk(TEXT, doc_id="doc", metadata={"source": "test"})
+    for seed in range(5):
+        sections = split_randomly(TEXT, 40, seed)
+        streamed = list(chunker.iter_chunks(sections, doc_id="doc", metadata={"source": "test"}))
+        assert [vars(c) for c in streamed] == [vars(c) for c in expected]
+
+
+def test_global_offsets():
+    chunker = DocumentChunker(chunk_size=150, chunk_overlap=0)
+    text = "First sentence here. Second sentence here. Third one."
+    pages = ["First sentence ", "here. Second sentence here.", " Third one."]
+    chunks = list(chunker.iter_chunks(pages, doc_id="d"))
+    assert chunks[0].start_char == 0
+    assert chunks[-1].end_char == len(text)
+
+
+def test_chapter_sections_set_chapter_metadata():
+    chunker = DocumentChunker(chunk_size=100, chunk_overlap=0, min_chunk_size=10)
+    one = "One. " * 40
+    two = "Two. " * 40
+    sections = [
+        Section(one, chapter={"href": "one.html", "chapter_index": 1, "chapter_title": "One"}),
+        "\n\n",
+        Section(two, chapter={"href": "two.html", "chapter_index": 2, "chapter_title": "Two"}),
+    ]
+    chunks = list(chunker.iter_chunks(sections, doc_id="book"))
+
+    assert chunks[0].metadata["href"] == "one.html"
+    assert chunks[-1].metadata["href"] == "two.html"
+    assert chunks[-1].metadata["chapter_title"] == "Two"
+    assert "chapter_ranges" not in chunks[0].metadata
+
+    # Same as chunking the joined text with precomputed chapter ranges
+    ranges = [
+        {"href": "one.html", "chapter_index": 1, "chapter_title": "One",
+         "start_char": 0, "end_char": len(one)},
+        {"href": "two.html", "chapter_index": 2, "chapter_title": "Two",
+         "start_char": len(one) + 2, "end_char": len(one) + 2 + len(two)},
+    ]
+    whole = chunker.chunk(one + "\n\n" + two, doc_id="book", metadata={"chapter_ranges": ranges})
+    assert [vars(c) for c in chunks] == [vars(c) for c in whole]
+
+
+def test_section_metadata_added_to_chunks():
+    chunker = DocumentChunker(chunk_size=100, chunk_overlap=0, min_chunk_size=10)
+    found = {"parser": "pymupdf", "page_count": 2, "filename": "parsed.pdf"}
+    sections = [
+        Section("One. " * 40, metadata=found),
+        "\n\n",
+        Section("Two. " * 40, metadata=found),
+    ]
+    chunks = list(chunker.iter_chunks(sections, doc_id="d", metadata={"filename": "a.pdf"}))
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert chunk.metadata["parser"] == "pymupdf"
+        assert chunk.metadata["page_count"] == 2
+        # Metadata passed in wins over section metadata
+        assert chunk.metadata["filename"] == "a.pdf"
+
+
+def test_chunks_yielded_before_input_ends():
+    chunker = DocumentChunker(chunk_size=100, chunk_overlap=0)
+    consumed = []
+
+    def pages():
+        for i in range(50):
+            consumed.append(i)
+            yield f"Page {i} has one short sentence in it. "
+
+    stream = chunker.iter_chunks(pages(), doc_id="d")
+    next(stream)
+    assert len(consumed) < 10
+
+
+def test_blank_input_yields_nothing():
+    chunker = DocumentChunker()
+    assert list(chunker.iter_chunks(["  ", "\n", ""])) == []
+    assert chunker.chunk("   ") == []
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def test_offsets_index_joined_text_with_whitespace_runs():
+    chunker = DocumentChunker(chunk_size=200, chunk_overlap=40, min_chunk_size=50)
+    sections = split_randomly(TEXT, 40)
+    joined = "".join(sections)
+    chunks = list(chunker.iter_chunks(sections, doc_id="doc"))
+
+    assert chunks[-1].end_char == len(joined)
+    for chunk in chunks:
+        assert normalize(joined[chunk.start_char:chunk.end_char]) == normalize(chunk.content)
+
+
+def test_chapters_assigned_with_whitespace_runs():
+    chunker = DocumentChunker(chunk_size=120, chunk_overlap=20, min_chunk_size=10)
+    sections = [
+        Section(
+            "".join(f"Chapter {n} sentence {i}.\n\n   " for i in range(12)),
+            chapter={"href": f"ch{n}.html", "chapter_index": n, "chapter_title": f"Ch {n}"},
+        )
+        for n in range(1, 6)
+    ]
+    joined = "".join(section.text for section in sections)
+    chapter_length = len(sections[0].text)
+    chunks = list(chunker.iter_chunks(sections, doc_id="book"))
+
+    for chunk in chunks:
+        assert chunk.metadata["chapter_index"] == chunk.start_char // chapter_length + 1
+        assert normalize(joined[chunk.start_char:chunk.end_char]) == normalize(chunk.content)
+    assert {c.metadata["chapter_index"] for c in chunks} == {1, 2, 3, 4, 5}
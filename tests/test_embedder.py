@@ -0,0 +1,181 @@
+"""
+Tests for VeniceEmbedder batching, concurrency and rate limiting, run against
+a local stub of the embeddings endpoint.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from compymac.rate_limiter import RateLimiter, parse_retry_after
+from compymac.retrieval.embedder import VeniceEmbedder, plan_batches
+
+
+class StubEmbeddingServer:
+    """Serves POST /embeddings, embedding each text as [len(text), 1.0]."""
+
+    def __init__(self, delay: float = 0.0, rate_limited: int = 0, retry_after: str = "0.2"):
+        self.delay = delay
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.batches: list[list[str]] = []
+        self.request_times: list[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.request_times.append(time.monotonic())
+                    if stub.rate_limited > 0:
+                        stub.rate_limited -= 1
+                        self.send_response(429)
+                        self.send_header("Retry-After", stub.retry_after)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    stub.batches.append(body["input"])
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                # Return items out of order; the client must sort by index
+                data = [
+                    {"index": i, "embedding": [float(len(text)), 1.0]}
+                    for i, text in enumerate(body["input"])
+                ][::-1]
+                payload = json.dumps({"data": data}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubEmbeddingServer(delay=0.05)
+    yield server
+    server.close()
+
+
+def make_embedder(stub: StubEmbeddingServer, **kwargs) -> VeniceEmbedder:
+    return VeniceEmbedder(api_key="test-key", api_base=stub.url, **kwargs)
+
+
+class TestPlanBatches:
+    def test_splits_by_tokens_and_size(self):
+        texts = ["a" * 400, "b" * 400, "c" * 400, "d", "e", "f"]
+        # 100 tokens each for the first three
+        assert plan_batches(texts, max_batch_tokens=250, max_batch_size=10) == [
+            [0, 1], [2, 3, 4, 5]
+        ]
+        assert plan_batches(texts, max_batch_tokens=10_000, max_batch_size=4) == [
+            [0, 1, 2, 3], [4, 5]
+        ]
+
+    def test_oversized_text_gets_own_batch(self):
+        assert plan_batches(["x" * 1000, "y"], max_batch_tokens=10, max_batch_size=10) == [
+            [0], [1]
+        ]
+
+
+class TestConcurrentEmbedBatch:
+    def test_batches_run_concurrently_in_input_order(self, stub):
+        embedder = make_embedder(stub, max_batch_size=5, max_concurrency=4, cache_enabled=False)
+        texts = [f"text {i:03d}" + "x" * i for i in range(40)]
+
+        start = time.monotonic()
+        embeddings = embedder.embed_batch(texts)
+        elapsed = time.monotonic() - start
+
+        assert embeddings == [[float(len(t)), 1.0] for t in texts]
+        assert len(stub.batches) == 8
+        assert all(len(batch) <= 5 for batch in stub.batches)
+        assert stub.max_in_flight > 1
+        assert stub.max_in_flight <= 4
+        # 8 batches at 50ms each, 4 at a time
+        assert elapsed < 8 * 0.05
+        embedder.close()
+
+    def test_token_budget_limits_payload(self, stub):
+        embedder = make_embedder(stub, max_batch_tokens=100, cache_enabled=False)
+        embedder.embed_batch(["w" * 200] * 6)  # 50 tokens each
+        assert [len(batch) for batch in stub.batches] == [2, 2, 2]
+        embedder.close()
+
+    def test_only_uncached_texts_are_sent(self, stub):
+        embedder = make_embedder(stub, max_batch_size=2)
+        embedder.embed_batch(["a", "b"])
+        stub.batches.clear()
+
+        assert embedder.embed_batch(["a", "c", "b", "d"]) == [
+            [1.0, 1.0], [1.0, 1.0], [1.0, 1.0], [1.0, 1.0]
+        ]
+        assert stub.batches == [["c", "d"]]
+        embedder.close()
+
+
+class TestRateLimiting:
+    def test_retry_after_pauses_all_workers(self):
+        stub = StubEmbeddingServer(rate_limited=1, retry_after="0.3")
+        embedder = make_embedder(stub, max_batch_size=1, max_concurrency=3, cache_enabled=False)
+        try:
+            start = time.monotonic()
+            assert embedder.embed_batch(["a", "bb", "ccc"]) == [
+                [1.0, 1.0], [2.0, 1.0], [3.0, 1.0]
+            ]
+            assert time.monotonic() - start >= 0.3
+            assert embedder.rate_limiter.backoffs == 1
+            assert sorted(len(b[0]) for b in stub.batches) == [1, 2, 3]
+        finally:
+            embedder.close()
+            stub.close()
+
+    def test_gives_up_after_max_retries(self):
+        stub = StubEmbeddingServer(rate_limited=10, retry_after="0")
+        embedder = make_embedder(stub, max_retries=2, cache_enabled=False)
+        try:
+            with pytest.raises(Exception, match="after 2 retries"):
+                embedder.embed("a")
+        finally:
+            embedder.close()
+            stub.close()
+
+    def test_request_spacing(self):
+        limiter = RateLimiter(requests_per_second=20)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        assert time.monotonic() - start >= 4 * 0.05 - 0.01
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
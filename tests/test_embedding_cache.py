@@ -0,0 +1,94 @@
+"""
+Tests for the two-tier embedding cache and its use by VeniceEmbedder.
+"""
+
+import numpy as np
+import pytest
+
+from compymac.retrieval.embedder import VeniceEmbedder
+from compymac.retrieval.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    def test_lru_respects_byte_budget(self):
+        # Each 4-dim float32 vector costs 16 bytes
+        cache = EmbeddingCache(max_memory_bytes=48)
+        for i in range(3):
+            cache.put("m", f"h{i}", [float(i)] * 4)
+        cache.get("m", "h0")  # h0 becomes most recently used
+        cache.put("m", "h3", [3.0] * 4)
+
+        assert cache.get("m", "h1") is None
+        assert cache.get("m", "h0") is not None
+        assert cache.stats()["memory_bytes"] <= 48
+
+    def test_keys_include_model(self):
+        cache = EmbeddingCache()
+        cache.put("small", "h", [1.0, 2.0])
+        assert cache.get("large", "h") is None
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "embeddings.db")
+        cache.put_many("m", [("a", [1.0, 0.0]), ("b", [0.0, 1.0])])
+        cache.close()
+
+        reopened = EmbeddingCache(tmp_path / "embeddings.db", max_memory_bytes=1024)
+        found = reopened.get_many("m", ["a", "b", "c"])
+        assert set(found) == {"a", "b"}
+        np.testing.assert_array_equal(found["a"], [1.0, 0.0])
+        assert len(reopened) == 2
+
+        stats = reopened.stats()
+        assert stats["disk_hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+        # Disk hits are promoted, so the next lookup is served from memory
+        reopened.get("m", "a")
+        assert reopened.stats()["memory_hits"] == 1
+
+    def test_warm_promotes_without_counting(self, tmp_path):
+        EmbeddingCache(tmp_path / "embeddings.db").put("m", "a", [1.0])
+        cache = EmbeddingCache(tmp_path / "embeddings.db")
+
+        assert cache.warm("m", ["a", "missing"]) == 1
+        assert cache.stats()["memory_entries"] == 1
+        assert cache.stats()["misses"] == 0
+
+
+class CountingEmbedder(VeniceEmbedder):
+    """VeniceEmbedder whose API call is answered locally and counted."""
+
+    def __init__(self, **kwargs):
+        super().__init__(api_key="test-key", **kwargs)
+        self.api_texts: list[str] = []
+
+    def _call_api(self, texts: list[str]) -> list[list[float]]:
+        self.api_texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestVeniceEmbedderCache:
+    def test_persistent_cache_avoids_repeat_calls(self, tmp_path):
+        path = tmp_path / "embeddings.db"
+        first = CountingEmbedder(cache_path=path)
+        assert first.embed_batch(["one", "three"]) == [[3.0, 1.0], [5.0, 1.0]]
+        first.close()
+
+        second = CountingEmbedder(cache_path=path)
+        assert second.warm_cache(["one", "three", "seven"]) == 2
+        assert second.embed_batch(["one", "seven", "three"]) == [
+            [3.0, 1.0], [5.0, 1.0], [5.0, 1.0]
+        ]
+        assert second.api_texts == ["seven"]
+        assert second.embed("seven") == [5.0, 1.0]
+        assert second.api_texts == ["seven"]
+        assert second.cache_stats()["hit_rate"] == pytest.approx(3 / 4)
+        second.close()
+
+    def test_cache_disabled(self):
+        embedder = CountingEmbedder(cache_enabled=False)
+        embedder.embed("x")
+        embedder.embed("x")
+        assert embedder.api_texts == ["x", "x"]
+        embedder.close()
@@ -0,0 +1,157 @@
+"""
+Tests for the background ingestion job queue.
+"""
+
+import threading
+import time
+
+import pytest
+
+from compymac.ingestion.jobs import IngestionJobQueue, JobCancelledError, JobStatus
+
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.01)
+
+
+def submit(jobs: IngestionJobQueue, name: str = "doc"):
+    return jobs.submit(doc_id=name, file_path=f"/tmp/{name}.pdf", filename=f"{name}.pdf",
+                       doc_format="pdf")
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(handler, **kwargs) -> IngestionJobQueue:
+        jobs = IngestionJobQueue(handler, **kwargs)
+        queues.append(jobs)
+        return jobs
+
+    yield make
+    for jobs in queues:
+        jobs.shutdown()
+
+
+def test_concurrency_cap(make_queue):
+    release = threading.Event()
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def handler(job, report):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+
+    jobs = make_queue(handler, max_concurrency=2)
+    submitted = [submit(jobs, f"doc{i}") for i in range(5)]
+    wait_for(lambda: running[0] == 2)
+    time.sleep(0.05)
+    assert sum(job.status == JobStatus.RUNNING for job in submitted) == 2
+    assert sum(job.status == JobStatus.QUEUED for job in submitted) == 3
+
+    release.set()
+    wait_for(lambda: all(job.status == JobStatus.COMPLETED for job in submitted))
+    assert peak[0] == 2
+
+
+def test_progress_is_reported(make_queue):
+    def handler(job, report):
+        report(stage="parsing")
+        report(pages_parsed=2, pages_total=4)
+        report(pages_parsed=4, pages_total=4)
+        report(stage="embedding", chunks_total=10)
+        report(chunks_embedded=10)
+
+    events = []
+    jobs = make_queue(handler)
+    jobs.add_listener(lambda job: events.append((job.status, job.stage)))
+    job = submit(jobs)
+    wait_for(lambda: job.status == JobStatus.COMPLETED)
+
+    assert (job.pages_parsed, job.pages_total) == (4, 4)
+    assert (job.chunks_embedded, job.chunks_total) == (10, 10)
+    assert job.started_at is not None and job.finished_at >= job.started_at
+    assert events[0] == (JobStatus.QUEUED, "queued")
+    assert (JobStatus.RUNNING, "parsing") in events
+    assert (JobStatus.RUNNING, "embedding") in events
+    assert events[-1] == (JobStatus.COMPLETED, "completed")
+    assert jobs.get(job.id).to_dict()["status"] == "completed"
+
+
+def test_cancel_queued_job(make_queue):
+    release = threading.Event()
+    handled = []
+
+    def handler(job, report):
+        handled.append(job.doc_id)
+        release.wait(5)
+
+    jobs = make_queue(handler, max_concurrency=1)
+    first = submit(jobs, "first")
+    second = submit(jobs, "second")
+    wait_for(lambda: first.status == JobStatus.RUNNING)
+
+    assert jobs.cancel(second.id).status == JobStatus.CANCELLED
+    release.set()
+    wait_for(lambda: first.status == JobStatus.COMPLETED)
+    time.sleep(0.05)
+    assert handled == ["first"]
+    assert second.status == JobStatus.CANCELLED
+
+
+def test_cancel_running_job(make_queue):
+    started = threading.Event()
+    cleaned_up = threading.Event()
+
+    def handler(job, report):
+        started.set()
+        try:
+            for page in range(1000):
+                report(pages_parsed=page, pages_total=1000)
+                time.sleep(0.01)
+        except JobCancelledError:
+            cleaned_up.set()
+            raise
+
+    jobs = make_queue(handler)
+    job = submit(jobs)
+    started.wait(5)
+    jobs.cancel(job.id)
+    wait_for(lambda: job.status == JobStatus.CANCELLED)
+
+    assert cleaned_up.is_set()
+    assert job.pages_parsed < 999
+    # Finished jobs can't be cancelled again
+    assert jobs.cancel(job.id).status == JobStatus.CANCELLED
+
+
+def test_failed_job(make_queue):
+    def handler(job, report):
+        raise ValueError("corrupt PDF")
+
+    jobs = make_queue(handler)
+    job = submit(jobs)
+    wait_for(lambda: job.status == JobStatus.FAILED)
+    assert job.error == "corrupt PDF"
+    assert jobs.cancel("missing") is None
+
+
+def test_jobs_filtered_by_user_and_evicted(make_queue):
+    jobs = make_queue(lambda job, report: None, max_finished=2)
+    for i in range(3):
+        job = jobs.submit(doc_id=f"doc{i}", file_path="/tmp/a.pdf", filename="a.pdf",
+                          doc_format="pdf", user_id="alice" if i else "bob")
+        wait_for(lambda job=job: job.status == JobStatus.COMPLETED)
+    submit(jobs, "latest")
+
+    assert [job.doc_id for job in jobs.jobs("alice")] == ["doc1", "doc2"]
+    assert len(jobs.jobs()) == 3
@@ -0,0 +1,136 @@
+"""
+Tests for streaming, rolling-batch ingestion in IngestionPipeline.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from compymac.ingestion.chunker import DocumentChunker
+from compymac.ingestion.parsers import DocumentParser
+from compymac.ingestion.pipeline import IngestionPipeline
+from compymac.knowledge_store import KnowledgeStore
+from compymac.storage.sqlite_backend import SQLiteBackend
+
+PAGES = [f"Page {p} sentence {i} is here. " for p in range(20) for i in range(10)]
+
+
+class RecordingStore(KnowledgeStore):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.batches: list[int] = []
+
+    def store_batch(self, units):
+        self.batches.append(len(units))
+        super().store_batch(units)
+
+
+class PagedParser(DocumentParser):
+    """Yields PAGES as sections, noting how many chunks were stored at each page."""
+
+    def __init__(self, store: RecordingStore, fail_after: int | None = None):
+        super().__init__(use_docling=False, use_ocr=False, workers=1)
+        self.store = store
+        self.fail_after = fail_after
+        self.stored_at_page: list[int] = []
+
+    def iter_sections(self, file_path):
+        for i, page in enumerate(PAGES):
+            if i == self.fail_after:
+                raise ValueError("corrupt page")
+            self.stored_at_page.append(sum(self.store.batches))
+            yield page
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordingStore(SQLiteBackend(tmp_path / "knowledge.db"))
+
+
+@pytest.fixture
+def doc_file(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("".join(PAGES))
+    return path
+
+
+def make_pipeline(store, parser=None, batch_size=8):
+    return IngestionPipeline(
+        store,
+        chunker=DocumentChunker(chunk_size=200, chunk_overlap=20),
+        parser=parser,
+        batch_size=batch_size,
+    )
+
+
+def test_stores_in_rolling_batches_while_parsing(store, doc_file):
+    parser = PagedParser(store)
+    doc_id = make_pipeline(store, parser).ingest(doc_file, generate_embeddings=False)
+
+    expected = DocumentChunker(chunk_size=200, chunk_overlap=20).chunk("".join(PAGES))
+    assert sum(store.batches) == len(expected)
+    assert max(store.batches) <= 8
+    assert len(store.batches) > 1
+    # Chunks were stored before the last pages were parsed
+    assert parser.stored_at_page[-1] > 0
+
+    units = store.retrieve_by_source("document", doc_id, limit=1000)
+    assert sorted(u.content for u in units) == sorted(c.content for c in expected)
+
+
+def test_streamed_text_file_matches_whole_document_chunking(store, doc_file):
+    pipeline = make_pipeline(store, DocumentParser(use_docling=False, use_ocr=False))
+    doc_id = pipeline.ingest(doc_file, generate_embeddings=False)
+    units = store.retrieve_by_source("document", doc_id, limit=1000)
+    assert {u.metadata["chunk_index"] for u in units} == set(range(sum(store.batches)))
+    assert all(u.metadata["filename"] == "doc.txt" for u in units)
+
+
+def test_failed_parse_removes_stored_chunks(store, doc_file):
+    parser = PagedParser(store, fail_after=150)
+    pipeline = make_pipeline(store, parser)
+    with pytest.raises(ValueError, match="corrupt page"):
+        pipeline.ingest(doc_file, generate_embeddings=False)
+    assert sum(store.batches) > 0
+    doc_id = pipeline._generate_doc_id(doc_file)
+    assert store.retrieve_by_source("document", doc_id, limit=1000) == []
+
+
+def test_pdf_streams_from_parallel_extraction(store, tmp_path):
+    fitz = pytest.importorskip("fitz")
+    path = tmp_path / "book.pdf"
+    doc = fitz.open()
+    for i in range(60):
+        page = doc.new_page()
+        for line in range(30):
+            page.insert_text((72, 72 + line * 20), f"Page {i + 1} line {line}: revenue grew.")
+    doc.save(path)
+    doc.close()
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        """Notes how many chunks were stored as each page range is submitted."""
+
+        def __init__(self, max_workers):
+            super().__init__(max_workers)
+            self.stored_at_submit: list[int] = []
+
+        def submit(self, fn, *args, **kwargs):
+            self.stored_at_submit.append(sum(store.batches))
+            return super().submit(fn, *args, **kwargs)
+
+    with RecordingExecutor(max_workers=1) as executor:
+        parser = DocumentParser(use_docling=False, use_ocr=False, workers=1, executor=executor)
+        doc_id = make_pipeline(store, parser).ingest(path, generate_embeddings=False)
+
+    # Pages were extracted on the executor, and chunks stored before the last range
+    assert len(executor.stored_at_submit) > 2
+    assert executor.stored_at_submit[-1] > 0
+
+    units = store.retrieve_by_source("document", doc_id, limit=10000)
+    whole = DocumentParser(use_docling=False, use_ocr=False, workers=1).parse(path)
+    expected = DocumentChunker(chunk_size=200, chunk_overlap=20).chunk(whole.text)
+    assert sorted(u.content for u in units) == sorted(c.content for c in expected)
+    for unit in units:
+        assert unit.metadata["parser"] == "pymupdf"
+        assert unit.metadata["page_count"] == 60
+        assert unit.metadata["filename"] == "book.pdf"
@@ -0,0 +1,69 @@
+"""
+Tests for the incremental BM25 keyword index.
+"""
+
+import pytest
+
+from compymac.storage.keyword_index import KeywordIndex, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! C3PO's") == ["hello", "world", "c3po", "s"]
+
+
+class TestKeywordIndex:
+    def test_bm25_prefers_rare_terms_and_short_items(self):
+        index = KeywordIndex()
+        index.add("a", "the cache eviction policy")
+        index.add("b", "the the the policy")
+        index.add("c", "the cache eviction policy " + "filler " * 40)
+
+        scores = index.search("cache policy")
+        assert set(scores) == {"a", "b", "c"}
+        assert scores["a"] > scores["c"] > scores["b"]
+        assert "z" not in index.search("missing")
+
+    def test_term_frequency_saturates(self):
+        index = KeywordIndex()
+        index.add("once", "probe x x x x")
+        index.add("many", "probe probe probe probe probe")
+        index.add("other", "unrelated words here")
+        once, many = index.search("probe")["once"], index.search("probe")["many"]
+        assert once < many < once * (index.k1 + 1)
+
+    def test_prefix_matching(self):
+        index = KeywordIndex()
+        index.add("a", "readiness probes")
+        index.add("b", "a pro tip")
+        assert set(index.search("probe")) == {"a"}
+        # Short terms only match exactly
+        assert set(index.search("pr")) == set()
+        assert set(KeywordIndex(min_prefix_length=0).search("probe")) == set()
+
+    def test_incremental_updates_prune_postings(self):
+        index = KeywordIndex()
+        index.add_batch([("c1", "alpha beta"), ("c2", "beta gamma")], source_id="d1")
+        index.add("c3", "gamma delta", source_id="d2")
+        assert len(index) == 3
+
+        index.add("c1", "epsilon", source_id="d1")
+        assert "c1" not in index.search("alpha")
+        assert index.remove_source("d1") == 2
+        assert index.search("beta") == {}
+        assert "beta" not in index._postings
+        assert index._total_length == 2
+        assert index.remove("c3") and not index.remove("c3")
+        assert len(index) == 0 and index._postings == {}
+
+    def test_scoping_by_source(self):
+        index = KeywordIndex()
+        for doc in ("d1", "d2", "d3"):
+            index.add_batch([(f"{doc}-{i}", f"shared term {i}") for i in range(3)], doc)
+
+        scoped = index.search("shared", source_id=["d1", "d3"])
+        assert {item.split("-")[0] for item in scoped} == {"d1", "d3"}
+        assert set(index.search("shared", source_id="d2")) == {"d2-0", "d2-1", "d2-2"}
+        # Corpus statistics are global, so scores don't depend on the scope
+        unscoped = index.search("shared")
+        assert scoped["d1-0"] == pytest.approx(unscoped["d1-0"])
+        assert index.search("shared", source_id=[]) == {}
@@ -0,0 +1,178 @@
+"""
+Tests for KnowledgeStore: FTS5 keyword search and binary embedding storage.
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from compymac.knowledge_store import KnowledgeStore, MemoryUnit
+from compymac.storage.embedding_codec import decode_embedding, encode_embedding
+from compymac.storage.sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a KnowledgeStore on a fresh SQLite database."""
+    return KnowledgeStore(SQLiteBackend(tmp_path / "knowledge.db"))
+
+
+def unit(unit_id: str, content: str, source_id: str = "doc-1") -> MemoryUnit:
+    return MemoryUnit(
+        id=unit_id,
+        content=content,
+        embedding=None,
+        source_type="document",
+        source_id=source_id,
+        metadata={},
+        created_at=0.0,
+    )
+
+
+class TestFullTextSearch:
+    def test_uses_fts5(self, store):
+        assert store.backend.supports_full_text_search()
+        assert store.use_fts
+
+    def test_bm25_ranking(self, store):
+        store.store_batch([
+            unit("a", "the parser handles tokens"),
+            unit("b", "parser parser parser errors in the parser"),
+            unit("c", "unrelated notes about deployment"),
+        ])
+
+        results = store.retrieve("parser errors")
+        assert [r.memory_unit.id for r in results] == ["b", "a"]
+        assert results[0].score > results[1].score > 0
+        assert all(r.match_type == "keyword" for r in results)
+
+    def test_query_syntax_is_escaped(self, store):
+        store.store(unit("a", 'the "quoted" AND NOT operator'))
+        assert [r.memory_unit.id for r in store.retrieve('"quoted" NOT')] == ["a"]
+        assert store.retrieve("*") == []
+
+    def test_index_follows_updates_and_deletes(self, store):
+        store.store(unit("a", "original wording"))
+        store.store(unit("a", "revised wording"))
+
+        assert store.retrieve("original") == []
+        assert [r.memory_unit.id for r in store.retrieve("revised")] == ["a"]
+
+        store.delete("a")
+        assert store.retrieve("wording") == []
+
+    def test_source_filters(self, store):
+        store.store(unit("a", "shared keyword", source_id="doc-1"))
+        store.store(unit("b", "shared keyword", source_id="doc-2"))
+
+        results = store.retrieve("keyword", source_id="doc-2")
+        assert [r.memory_unit.id for r in results] == ["b"]
+
+    def test_migrates_existing_database(self, tmp_path):
+        db_path = tmp_path / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE memory_units (
+                    id TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    embedding TEXT,
+                    source_type TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    metadata TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX idx_memory_units_content ON memory_units(content)")
+            conn.execute(
+                "INSERT INTO memory_units VALUES "
+                "('old', 'legacy retrieval content', NULL, 'document', 'doc-1', '{}', 0)"
+            )
+
+        store = KnowledgeStore(SQLiteBackend(db_path))
+        assert [r.memory_unit.id for r in store.retrieve("retrieval")] == ["old"]
+        assert store.backend.fetch_one(
+            "SELECT 1 AS present FROM sqlite_master WHERE name = 'idx_memory_units_content'"
+        ) is None
+
+        # Reopening must not rebuild or duplicate the index
+        reopened = KnowledgeStore(SQLiteBackend(db_path))
+        assert len(reopened.retrieve("retrieval")) == 1
+
+
+class TestEmbeddingCodec:
+    def test_float32_roundtrip_is_zero_copy(self):
+        blob = encode_embedding([0.5, -1.25, 3.0])
+        vector = decode_embedding(blob)
+        assert vector.dtype == np.float32
+        assert vector.tolist() == [0.5, -1.25, 3.0]
+        assert not vector.flags.owndata
+        assert len(blob) == 8 + 3 * 4
+
+    def test_compact_dtypes(self):
+        values = np.linspace(-1, 1, 64, dtype=np.float32)
+        half = encode_embedding(values, "float16")
+        quarter = encode_embedding(values, "int8")
+        assert len(half) == 8 + 64 * 2
+        assert len(quarter) == 8 + 4 + 64
+        np.testing.assert_allclose(decode_embedding(half), values, atol=1e-3)
+        np.testing.assert_allclose(decode_embedding(quarter), values, atol=1 / 127)
+
+    def test_rejects_bad_input(self):
+        with pytest.raises(ValueError):
+            encode_embedding([1.0], "float64")
+        with pytest.raises(ValueError):
+            decode_embedding(b'[1.0, 2.0]')
+
+
+class TestBinaryEmbeddings:
+    def test_embeddings_stored_as_blobs(self, store):
+        embedded = unit("a", "text")
+        embedded.embedding = [0.1, 0.2, 0.3]
+        store.store(embedded)
+
+        row = store.backend.fetch_one(
+            "SELECT typeof(embedding) AS kind FROM memory_units WHERE id = 'a'"
+        )
+        assert row["kind"] == "blob"
+        loaded = store.get("a")
+        assert isinstance(loaded.embedding, np.ndarray)
+        np.testing.assert_allclose(loaded.embedding, [0.1, 0.2, 0.3], rtol=1e-6)
+
+    def test_quantized_store(self, tmp_path):
+        store = KnowledgeStore(SQLiteBackend(tmp_path / "k.db"), embedding_dtype="int8")
+        embedded = unit("a", "text")
+        embedded.embedding = [0.5, -1.0, 0.25]
+        store.store(embedded)
+        np.testing.assert_allclose(store.get("a").embedding, [0.5, -1.0, 0.25], atol=0.01)
+        assert store.vector_search([1.0, -2.0, 0.5])[0].memory_unit.id == "a"
+
+        with pytest.raises(ValueError):
+            KnowledgeStore(SQLiteBackend(tmp_path / "k.db"), embedding_dtype="bfloat16")
+
+    def test_migrates_json_embeddings(self, tmp_path):
+        db_path = tmp_path / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE memory_units (
+                    id TEXT PRIMARY KEY, content TEXT NOT NULL, embedding TEXT,
+                    source_type TEXT NOT NULL, source_id TEXT NOT NULL,
+                    metadata TEXT, created_at REAL NOT NULL
+                )
+            """)
+            conn.executemany(
+                "INSERT INTO memory_units VALUES (?, ?, ?, 'document', 'doc-1', '{}', 0)",
+                [
+                    ("a", "first", "[1.0, 0.0]"),
+                    ("b", "second", "[0.0, 1.0]"),
+                    ("c", "third", None),
+                ],
+            )
+
+        store = KnowledgeStore(SQLiteBackend(db_path))
+        kinds = store.backend.fetch_all(
+            "SELECT id, typeof(embedding) AS kind FROM memory_units ORDER BY id"
+        )
+        assert [row["kind"] for row in kinds] == ["blob", "blob", "null"]
+        assert store.vector_search([0.0, 1.0], limit=1)[0].memory_unit.id == "b"
+        assert store.get("c").embedding is None
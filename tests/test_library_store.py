@@ -0,0 +1,216 @@
+"""
+Tests for LibraryStore and its persistent SQLite implementation.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from compymac.retrieval.local_embedder import HashingEmbedder
+from compymac.storage.library_store import DocumentStatus, LibraryStore
+from compymac.storage.sqlite_library_store import SQLiteLibraryStore
+
+
+class CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder that records every text it embeds."""
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.texts: list[str] = []
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        self.texts.extend(texts)
+        return super().embed_batch(texts)
+
+
+CHUNKS = [
+    {"id": "k1", "content": "Kubernetes restarts pods when the liveness probe fails",
+     "metadata": {"page": 1}},
+    {"id": "k2", "content": "Readiness probes gate traffic to a pod", "metadata": {"page": 2}},
+    {"id": "k3", "content": "Sourdough needs a long cold fermentation", "metadata": {"page": 3}},
+]
+
+
+def add_document(library: LibraryStore, user_id: str = "user", chunks=CHUNKS):
+    doc = library.create_document(user_id, "guide.pdf", title="Guide")
+    library.update_document(
+        doc.id,
+        status=DocumentStatus.READY,
+        page_count=3,
+        chunks=chunks,
+        metadata={"author": "ops"},
+        navigation=[{"title": "Probes", "page": 1}],
+    )
+    return doc
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def library(request, tmp_path):
+    if request.param == "memory":
+        return LibraryStore(use_embeddings=False)
+    return SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+
+
+class TestLibraryStoreAPI:
+    def test_keyword_search(self, library):
+        doc = add_document(library)
+        other = add_document(library, chunks=[{"id": "x1", "content": "pod racing"}])
+
+        results = library.search_chunks("liveness probe", doc_ids=[doc.id])
+        assert [r["chunk_id"] for r in results] == ["k1", "k2"]
+        assert results[0]["keyword_score"] == 1.0
+        assert results[0]["page"] == 1
+        assert results[0]["metadata"]["format"] == "pdf"
+
+        assert {r["chunk_id"] for r in library.search_chunks("pod")} == {"k1", "k2", "x1"}
+        assert library.search_chunks("pod", doc_ids=["missing"]) == []
+        library.delete_document(other.id)
+        assert {r["chunk_id"] for r in library.search_chunks("pod")} == {"k1", "k2"}
+
+    def test_rechunking_replaces_chunks(self, library):
+        doc = add_document(library)
+        library.update_document(doc.id, chunks=[{"id": "n1", "content": "new probe text"}])
+        assert [r["chunk_id"] for r in library.search_chunks("probe")] == ["n1"]
+
+    def test_active_sources(self, library):
+        first, second = add_document(library), add_document(library)
+        assert library.add_active_source("s", second.id)
+        assert library.add_active_source("s", first.id)
+        assert library.add_active_source("s", first.id)
+        assert not library.add_active_source("s", "missing")
+        assert [d.id for d in library.get_active_sources("s")] == [second.id, first.id]
+
+        assert library.remove_active_source("s", second.id)
+        assert not library.remove_active_source("s", second.id)
+        library.delete_document(first.id)
+        assert library.get_active_sources("s") == []
+
+
+class TestConcurrentWriters:
+    @pytest.fixture(params=["memory", "sqlite"])
+    def make_library(self, request, tmp_path):
+        def make(embedder):
+            if request.param == "memory":
+                return LibraryStore(embedder=embedder)
+            return SQLiteLibraryStore(tmp_path / "library.db", embedder=embedder)
+        return make
+
+    def test_searches_run_while_a_document_embeds(self, make_library):
+        searched = []
+
+        class SearchingEmbedder(HashingEmbedder):
+            def embed_batch(self, texts):
+                # A request thread searching mid-ingestion is not blocked
+                reader = threading.Thread(
+                    target=lambda: searched.append(library.search_chunks("probe")),
+                    daemon=True,
+                )
+                reader.start()
+                reader.join(timeout=10)
+                return super().embed_batch(texts)
+
+        library = make_library(SearchingEmbedder(dim=64))
+        add_document(library)
+        assert len(searched) == 1
+
+    def test_delete_while_embedding_leaves_no_vectors(self, make_library):
+        class DeletingEmbedder(HashingEmbedder):
+            def embed_batch(self, texts):
+                library.delete_document(doc.id)
+                return super().embed_batch(texts)
+
+        library = make_library(DeletingEmbedder(dim=64))
+        doc = library.create_document("user", "guide.pdf")
+        library.update_document(doc.id, chunks=CHUNKS)
+
+        assert library.get_document(doc.id) is None
+        assert library._get_vector_index().similarities([1.0] * 64) == {}
+
+
+class TestSQLiteLibraryStore:
+    def test_survives_reopen(self, tmp_path):
+        library = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        doc = add_document(library)
+        library.add_active_source("s", doc.id)
+
+        reopened = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        assert reopened._documents == {}
+        loaded = reopened.get_document(doc.id)
+        assert loaded.to_dict() == doc.to_dict()
+        assert loaded.chunks == CHUNKS
+        assert loaded.metadata == {"author": "ops"}
+        assert [d.id for d in reopened.get_user_documents("user")] == [doc.id]
+        assert [d.id for d in reopened.get_active_sources("s")] == [doc.id]
+
+    def test_search_loads_only_matching_documents(self, tmp_path):
+        library = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        doc = add_document(library)
+        add_document(library, chunks=[{"id": "b1", "content": "bread"}])
+
+        reopened = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        results = reopened.search_chunks("liveness")
+        assert [r["chunk_id"] for r in results] == ["k1"]
+        assert list(reopened._documents) == [doc.id]
+
+    def test_embeddings_are_not_recomputed_after_restart(self, tmp_path):
+        embedder = CountingEmbedder()
+        library = SQLiteLibraryStore(tmp_path / "library.db", embedder=embedder)
+        add_document(library)
+        assert len(embedder.texts) == 3
+
+        restarted = CountingEmbedder()
+        reopened = SQLiteLibraryStore(tmp_path / "library.db", embedder=restarted)
+        results = reopened.search_chunks("pods restarted by failing liveness probes", top_k=1)
+        assert results[0]["chunk_id"] == "k1"
+        assert results[0]["vector_score"] > 0.5
+        assert restarted.texts == []
+        assert len(reopened._vector_index) == 3
+
+    def test_embedding_progress(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("compymac.storage.library_store._EMBEDDING_PROGRESS_BATCH", 2)
+        library = SQLiteLibraryStore(tmp_path / "library.db", embedder=CountingEmbedder())
+        doc = library.create_document("user", "guide.pdf")
+        progress = []
+        library.update_document(
+            doc.id, chunks=CHUNKS, embedding_progress=lambda *p: progress.append(p)
+        )
+        assert progress == [(2, 3), (3, 3)]
+        assert library.search_chunks("sourdough")[0]["chunk_id"] == "k3"
+        assert len(library._vector_index) == 3
+
+    def test_embeddings_from_another_model_are_ignored(self, tmp_path):
+        add_document(SQLiteLibraryStore(tmp_path / "library.db", embedder=CountingEmbedder()))
+        other = HashingEmbedder(dim=32)
+        reopened = SQLiteLibraryStore(tmp_path / "library.db", embedder=other)
+        assert reopened.search_chunks("sourdough")[0]["chunk_id"] == "k3"
+        assert len(reopened._vector_index) == 0
+
+    def test_without_fts(self, tmp_path):
+        library = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        library.use_fts = False
+        add_document(library)
+        assert [r["chunk_id"] for r in library.search_chunks("readiness")] == ["k2"]
+
+    @pytest.mark.parametrize("use_fts", [True, False])
+    def test_large_scope_filters_before_limit(self, tmp_path, monkeypatch, use_fts):
+        monkeypatch.setattr("compymac.storage.sqlite_library_store._PARAM_BATCH", 2)
+        library = SQLiteLibraryStore(
+            tmp_path / "library.db", use_embeddings=False, keyword_candidates=3
+        )
+        library.use_fts = use_fts and library.use_fts
+        for _ in range(6):
+            add_document(library, chunks=[{"content": "probe probe probe liveness probe"}])
+        scope = [add_document(library, chunks=[{"content": "one probe"}]).id for _ in range(3)]
+
+        results = library.search_chunks("probe", doc_ids=scope, top_k=10)
+        assert sorted(r["document_id"] for r in results) == sorted(scope)
+
+    def test_rechunking_is_atomic(self, tmp_path):
+        library = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        doc = add_document(library)
+        with pytest.raises(sqlite3.ProgrammingError):
+            library.update_document(doc.id, chunks=[{"content": object()}])
+
+        reopened = SQLiteLibraryStore(tmp_path / "library.db", use_embeddings=False)
+        assert [c["id"] for c in reopened.get_document(doc.id).chunks] == ["k1", "k2", "k3"]
@@ -0,0 +1,119 @@
+"""
+Tests for the Embedder protocol, the local HashingEmbedder and provider selection.
+"""
+
+import numpy as np
+import pytest
+
+from compymac.knowledge_store import KnowledgeStore, MemoryUnit
+from compymac.retrieval.embedder import Embedder, VeniceEmbedder, create_embedder
+from compymac.retrieval.hybrid import HybridRetriever
+from compymac.retrieval.local_embedder import HashingEmbedder
+from compymac.storage.library_store import LibraryStore
+from compymac.storage.sqlite_backend import SQLiteBackend
+
+
+class TestHashingEmbedder:
+    def test_shape_norm_and_determinism(self):
+        embedder = HashingEmbedder(dim=128)
+        vector = np.array(embedder.embed("Hello, world"))
+        assert vector.shape == (128,)
+        assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-6)
+        assert HashingEmbedder(dim=128).embed("Hello, world") == vector.tolist()
+        assert HashingEmbedder(dim=128, seed=1).embed("Hello, world") != vector.tolist()
+
+    def test_empty_text_is_zero_vector(self):
+        assert HashingEmbedder(dim=16).embed("") == [0.0] * 16
+
+    def test_similar_texts_score_higher(self):
+        embedder = HashingEmbedder()
+        query, near, far = (
+            np.array(v)
+            for v in embedder.embed_batch([
+                "configure the database connection pool",
+                "database connection pooling configuration",
+                "the cat sat quietly on the windowsill",
+            ])
+        )
+        assert query @ near > query @ far + 0.2
+
+    def test_idf_downweights_common_ngrams(self):
+        corpus = [f"the report covers topic {word}" for word in ("alpha", "beta", "gamma")]
+        plain = HashingEmbedder()
+        fitted = HashingEmbedder().fit(corpus)
+
+        def sim(embedder, a, b):
+            return float(np.dot(embedder.embed(a), embedder.embed(b)))
+
+        a, b = "the report covers topic alpha", "the report covers topic beta"
+        assert sim(fitted, a, b) < sim(plain, a, b)
+
+    def test_fit_changes_model_name(self):
+        corpus = ["the report covers topic alpha", "the report covers topic beta"]
+        plain = HashingEmbedder()
+        fitted = HashingEmbedder().fit(corpus)
+
+        # Embeddings differ after fitting, so cached/stored ones must not be reused
+        assert fitted.model != plain.model
+        assert fitted.model.startswith(plain.model)
+        assert HashingEmbedder().fit(corpus).model == fitted.model
+        assert HashingEmbedder().fit(corpus[:1]).model != fitted.model
+
+    def test_invalid_ngram_range(self):
+        with pytest.raises(ValueError):
+            HashingEmbedder(ngram_range=(4, 2))
+
+
+class TestCreateEmbedder:
+    def test_satisfies_protocol(self):
+        assert isinstance(HashingEmbedder(), Embedder)
+
+    def test_auto_without_key_is_local(self, monkeypatch):
+        monkeypatch.delenv("VENICE_API_KEY", raising=False)
+        monkeypatch.delenv("COMPYMAC_EMBEDDER", raising=False)
+        assert isinstance(create_embedder(), HashingEmbedder)
+        assert isinstance(create_embedder(api_key="test-key"), VeniceEmbedder)
+
+    def test_env_var_selects_provider(self, monkeypatch):
+        monkeypatch.setenv("COMPYMAC_EMBEDDER", "none")
+        assert create_embedder() is None
+        monkeypatch.setenv("COMPYMAC_EMBEDDER", "local")
+        assert isinstance(create_embedder(api_key="test-key"), HashingEmbedder)
+
+    def test_venice_without_key_and_unknown_provider_raise(self, monkeypatch):
+        monkeypatch.delenv("VENICE_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            create_embedder("venice")
+        with pytest.raises(ValueError, match="Unknown embedder provider"):
+            create_embedder("onnx")
+
+
+class TestLocalDenseRetrieval:
+    def test_library_store_vector_search(self):
+        library = LibraryStore(embedder=HashingEmbedder())
+        assert library.use_embeddings
+        doc = library.create_document("user", "notes.txt")
+        library.update_document(doc.id, chunks=[
+            {"id": "c1", "content": "Kubernetes pods restart when the liveness probe fails"},
+            {"id": "c2", "content": "Sourdough bread needs a long cold fermentation"},
+        ])
+        scores = library._vector_search("liveness probes restarting pods", [doc.id])
+        assert scores["c1"] > scores["c2"]
+
+    def test_library_store_embeddings_disabled(self):
+        library = LibraryStore(use_embeddings=False, embedder=HashingEmbedder())
+        assert not library.use_embeddings
+
+    def test_hybrid_retriever_dense_path(self, tmp_path):
+        embedder = HashingEmbedder()
+        store = KnowledgeStore(SQLiteBackend(tmp_path / "k.db"))
+        texts = ["retry with exponential backoff", "parse the PDF table of contents"]
+        for i, text in enumerate(texts):
+            store.store(MemoryUnit(
+                id=f"u{i}", content=text, embedding=embedder.embed(text),
+                source_type="doc", source_id="d", metadata={}, created_at=0.0,
+            ))
+        results = HybridRetriever(store, embedder=embedder)._dense_retrieve(
+            "exponential backoff retries", 2
+        )
+        assert results[0].memory_unit.id == "u0"
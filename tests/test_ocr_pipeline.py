@@ -0,0 +1,203 @@
+"""
+Tests for concurrent, pipelined OCR, run against a local stub of the
+chat-completions endpoint.
+"""
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from compymac.ingestion.ocr_provider import OCRClient
+from compymac.ingestion.page_pipeline import process_pages
+
+
+class StubOCRServer:
+    """
+    Serves POST /chat/completions, "transcribing" each image as its decoded bytes.
+
+    The first `rate_limited` requests get 429 and the next `server_errors`
+    get 500.
+    """
+
+    def __init__(self, delay: float = 0.0, rate_limited: int = 0, server_errors: int = 0):
+        self.delay = delay
+        self.rate_limited = rate_limited
+        self.server_errors = server_errors
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests += 1
+                    if stub.rate_limited > 0:
+                        stub.rate_limited -= 1
+                        return self._reply(429, b"", {"Retry-After": "0.2"})
+                    if stub.server_errors > 0:
+                        stub.server_errors -= 1
+                        return self._reply(500, b"")
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                url = body["messages"][0]["content"][1]["image_url"]["url"]
+                text = base64.b64decode(url.split(",", 1)[1]).decode(errors="replace")
+                payload = json.dumps({"choices": [{"message": {"content": text}}]}).encode()
+                self._reply(200, payload, {"Content-Type": "application/json"})
+
+            def _reply(self, status, payload, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubOCRServer(delay=0.05)
+    yield server
+    server.close()
+
+
+def make_client(stub: StubOCRServer, **kwargs) -> OCRClient:
+    return OCRClient(base_url=stub.url, model="stub", api_key="test-key", **kwargs)
+
+
+class TestProcessPages:
+    def test_bounded_queue_limits_rendered_pages(self):
+        rendered = 0
+        done = 0
+        max_ahead = 0
+        lock = threading.Lock()
+
+        def pages():
+            nonlocal rendered, max_ahead
+            for page_num in range(1, 21):
+                with lock:
+                    rendered += 1
+                    max_ahead = max(max_ahead, rendered - done)
+                yield page_num, b"img"
+
+        def analyze(image, page_num):
+            nonlocal done
+            time.sleep(0.01)
+            with lock:
+                done += 1
+            return page_num
+
+        assert process_pages(pages(), analyze, max_concurrency=2, max_queued=2) == list(
+            range(1, 21)
+        )
+        # Queued pages, pages being analyzed, and the one being put
+        assert max_ahead <= 2 + 2 + 1
+
+    def test_failed_page_yields_none(self):
+        def analyze(image, page_num):
+            if page_num == 2:
+                raise RuntimeError("boom")
+            return page_num
+
+        assert process_pages([(1, b""), (2, b""), (3, b"")], analyze) == [1, None, 3]
+
+    def test_render_failure_propagates(self):
+        def pages():
+            yield 1, b""
+            raise RuntimeError("render failed")
+
+        with pytest.raises(RuntimeError, match="render failed"):
+            process_pages(pages(), lambda image, page_num: page_num)
+
+
+class TestOCRPages:
+    def test_concurrent_in_page_order(self, stub):
+        client = make_client(stub, max_concurrency=4)
+        pages = [(n, f"text of page {n}".encode()) for n in range(1, 17)]
+
+        start = time.monotonic()
+        results = client.ocr_pages(pages)
+        elapsed = time.monotonic() - start
+
+        assert [r.page_num for r in results] == list(range(1, 17))
+        assert [r.text for r in results] == [f"text of page {n}" for n in range(1, 17)]
+        assert 1 < stub.max_in_flight <= 4
+        # 16 pages at 50ms each, 4 at a time
+        assert elapsed < 16 * 0.05
+        client.close()
+
+    def test_retry_after_and_server_errors_are_retried(self):
+        stub = StubOCRServer(rate_limited=1, server_errors=1)
+        client = make_client(stub, max_concurrency=2, retry_backoff=0.0)
+        try:
+            start = time.monotonic()
+            results = client.ocr_pages([(1, b"one"), (2, b"two")])
+            assert [r.text for r in results] == ["one", "two"]
+            assert all(r.confidence > 0 for r in results)
+            assert time.monotonic() - start >= 0.2
+            assert client.rate_limiter.backoffs == 1
+            assert stub.requests == 4
+        finally:
+            client.close()
+            stub.close()
+
+    def test_gives_up_after_max_retries(self):
+        stub = StubOCRServer(server_errors=10)
+        client = make_client(stub, max_retries=2, retry_backoff=0.0)
+        try:
+            [result] = client.ocr_pages([(1, b"one")])
+            assert result.confidence == 0.0
+            assert result.text.startswith("[OCR failed:")
+            assert stub.requests == 2
+        finally:
+            client.close()
+            stub.close()
+
+
+def test_parser_ocrs_scanned_pages_concurrently(stub, tmp_path):
+    fitz = pytest.importorskip("fitz")
+    from compymac.ingestion.parsers import DocumentParser
+
+    path = tmp_path / "scanned.pdf"
+    doc = fitz.open()
+    for _ in range(6):
+        doc.new_page()  # Blank pages need OCR
+    doc.save(path)
+    doc.close()
+
+    parser = DocumentParser(use_docling=False, use_ocr=False, workers=1)
+    parser._ocr_client = make_client(stub, max_concurrency=3)
+    result = parser.parse(path)
+
+    assert result.metadata["vision_ocr_pages"] == 6
+    assert [a["page_num"] for a in result.metadata["vision_ocr_results"]] == list(range(1, 7))
+    positions = [result.text.index(f"--- Page {n} ---") for n in range(1, 7)]
+    assert positions == sorted(positions)
+    assert 1 < stub.max_in_flight <= 3
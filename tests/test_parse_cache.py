@@ -0,0 +1,137 @@
+"""
+Tests for the content-addressed parse cache.
+"""
+
+import pytest
+
+from compymac.ingestion import parse_cache as parse_cache_module
+from compymac.ingestion.chunker import DocumentChunker
+from compymac.ingestion.parse_cache import ParseCache, file_sha256
+from compymac.ingestion.parsers import (
+    DocumentParser,
+    ParseResult,
+    PDFClassification,
+    TableResult,
+)
+from compymac.ingestion.pipeline import IngestionPipeline
+from compymac.knowledge_store import KnowledgeStore
+from compymac.storage.sqlite_backend import SQLiteBackend
+
+TEXT = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(200))
+
+
+class CountingParser(DocumentParser):
+    def __init__(self):
+        super().__init__(use_docling=False, use_ocr=False, workers=1)
+        self.calls = 0
+
+    def parse(self, file_path, progress=None):
+        self.calls += 1
+        return super().parse(file_path, progress)
+
+
+@pytest.fixture
+def doc_file(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text(TEXT)
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ParseCache(tmp_path / "parse_cache.db")
+    yield cache
+    cache.close()
+
+
+def test_repeat_upload_skips_parsing(cache, doc_file, tmp_path):
+    parser = CountingParser()
+    chunker = DocumentChunker(chunk_size=300, chunk_overlap=30)
+    first = cache.parse(doc_file, parser, chunker, doc_id="doc-a")
+
+    copy = tmp_path / "copy.md"
+    copy.write_bytes(doc_file.read_bytes())
+    second = cache.parse(copy, parser, chunker, doc_id="doc-b")
+
+    assert parser.calls == 1
+    assert not first.cached and second.cached
+    assert second.file_hash == first.file_hash == file_sha256(doc_file)
+    assert second.parse_result.text == first.parse_result.text
+    assert second.parse_result.metadata["filename"] == "copy.md"
+
+    # Chunks are rebuilt for the new document, exactly as fresh chunking would
+    expected = chunker.chunk(TEXT, doc_id="doc-b", metadata=second.parse_result.metadata)
+    assert [vars(c) for c in second.chunks] == [vars(c) for c in expected]
+    assert cache.stats()["hits"] == 1
+
+
+def test_persists_across_instances(doc_file, tmp_path):
+    parser = CountingParser()
+    chunker = DocumentChunker()
+    ParseCache(tmp_path / "c.db").parse(doc_file, parser, chunker)
+    reopened = ParseCache(tmp_path / "c.db")
+    assert reopened.parse(doc_file, parser, chunker).cached
+    assert parser.calls == 1
+
+
+def test_other_chunker_settings_reuse_parse(cache, doc_file):
+    parser = CountingParser()
+    small = cache.parse(doc_file, parser, DocumentChunker(chunk_size=200), doc_id="d")
+    large = cache.parse(doc_file, parser, DocumentChunker(chunk_size=800), doc_id="d")
+    assert parser.calls == 1
+    assert large.cached
+    assert len(large.chunks) < len(small.chunks)
+
+
+def test_invalidation(cache, doc_file, tmp_path, monkeypatch):
+    parser = CountingParser()
+    chunker = DocumentChunker()
+    result = cache.parse(doc_file, parser, chunker)
+
+    assert cache.invalidate(result.file_hash) == 1
+    assert not cache.parse(doc_file, parser, chunker).cached
+    assert parser.calls == 2
+
+    # New parser code: old entries can't be hit and are dropped on open
+    cache.close()
+    monkeypatch.setattr(parse_cache_module, "code_version", lambda: "changed")
+    reopened = ParseCache(tmp_path / "parse_cache.db")
+    assert len(reopened) == 0
+    assert not reopened.parse(doc_file, parser, chunker).cached
+    reopened.close()
+
+
+def test_failed_ocr_is_not_cached(cache, doc_file):
+    class FailedOCRParser(CountingParser):
+        def parse(self, file_path, progress=None):
+            result = super().parse(file_path, progress)
+            result.metadata["vision_ocr_errors"] = [{"page_num": 1, "error": "timeout"}]
+            return result
+
+    parser = FailedOCRParser()
+    cache.parse(doc_file, parser, DocumentChunker())
+    assert not cache.parse(doc_file, parser, DocumentChunker()).cached
+    assert parser.calls == 2
+
+
+def test_parse_result_round_trip():
+    result = ParseResult(
+        text="t",
+        metadata={"page_count": 1},
+        format="pdf",
+        classification=PDFClassification("digital", [1], [], 1.0),
+        tables=[TableResult(1, 0, "| a |", 0.9)],
+    )
+    restored = ParseResult.from_dict(result.to_dict())
+    assert restored.to_dict() == result.to_dict()
+
+
+def test_pipeline_reingest_uses_cache(doc_file, tmp_path):
+    parser = CountingParser()
+    store = KnowledgeStore(SQLiteBackend(tmp_path / "knowledge.db"))
+    pipeline = IngestionPipeline(store, parser=parser, parse_cache=ParseCache())
+
+    first = pipeline.ingest(doc_file, generate_embeddings=False)
+    second = pipeline.ingest(doc_file, generate_embeddings=False)
+    assert first == second
+    assert parser.calls == 1
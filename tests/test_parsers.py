@@ -0,0 +1,163 @@
+"""
+Tests for page-parallel PDF parsing in DocumentParser.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from compymac.ingestion import parsers  # noqa: E402
+from compymac.ingestion.parsers import DocumentParser, _page_ranges  # noqa: E402
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "report.pdf"
+    doc = fitz.open()
+    for i in range(12):
+        page = doc.new_page()
+        y = 72
+        for line in range(30):
+            page.insert_text((72, y), f"Page {i + 1} line {line}: quarterly revenue figures")
+            y += 20
+    # A blank page, classified as needing OCR
+    doc.new_page()
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def make_parser(**kwargs) -> DocumentParser:
+    return DocumentParser(use_docling=False, use_ocr=False, **kwargs)
+
+
+def test_page_ranges_cover_pages_in_order():
+    assert _page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert _page_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert _page_ranges(5, 1) == [(0, 5)]
+
+
+def test_parallel_matches_serial(pdf_path):
+    serial = make_parser(workers=1).parse(pdf_path)
+    parallel = make_parser(workers=2, parallel_min_pages=1).parse(pdf_path)
+
+    assert parallel.text == serial.text
+    assert parallel.classification.to_dict() == serial.classification.to_dict()
+    assert serial.classification.ocr_required_pages == [13]
+    assert serial.metadata["parse_workers"] == 1
+    assert parallel.metadata["parse_workers"] == 2
+
+    # Pages merged in order
+    positions = [parallel.text.index(f"--- Page {n} ---") for n in range(1, 13)]
+    assert positions == sorted(positions)
+
+
+def test_page_timings(pdf_path):
+    result = make_parser(workers=1).parse(pdf_path)
+    timings = result.metadata["page_timings_ms"]
+    assert len(timings) == result.metadata["page_count"] == 13
+    assert all(t >= 0 for t in timings)
+
+
+def test_small_pdf_parses_in_process(pdf_path):
+    result = make_parser(workers=4, parallel_min_pages=100).parse(pdf_path)
+    assert result.metadata["parse_workers"] == 1
+
+
+def test_shared_executor_reports_progress(pdf_path):
+    progress = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = make_parser(workers=2, executor=executor).parse(
+            pdf_path, progress=lambda done, total: progress.append((done, total))
+        )
+
+    assert result.text == make_parser(workers=1).parse(pdf_path).text
+    assert progress[-1] == (13, 13)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_progress_can_abort_parse(pdf_path):
+    def abort(done, total):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError, match="cancelled"):
+        make_parser(workers=1).parse(pdf_path, progress=abort)
+
+
+def test_workers_from_env(monkeypatch):
+    monkeypatch.setenv("COMPYMAC_PARSE_WORKERS", "3")
+    assert make_parser().workers == 3
+
+
+def joined(sections) -> str:
+    return "".join(s if isinstance(s, str) else s.text for s in sections)
+
+
+def test_iter_sections_matches_parse(pdf_path):
+    parser = make_parser(workers=1)
+    sections = list(parser.iter_sections(pdf_path))
+    assert len(sections) > 1
+    assert joined(sections) == parser.parse(pdf_path).text
+    pages = [s for s in sections if not isinstance(s, str)]
+    assert len(pages) == 12
+    assert all(s.metadata == {"parser": "pymupdf", "page_count": 13} for s in pages)
+
+
+def test_iter_sections_on_shared_executor(pdf_path, monkeypatch):
+    monkeypatch.setattr(parsers, "_STREAM_RANGE_PAGES", 2)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sections = list(make_parser(workers=1, executor=executor).iter_sections(pdf_path))
+    assert joined(sections) == make_parser(workers=1).parse(pdf_path).text
+
+
+def test_iter_sections_resumes_serially_if_pool_breaks(pdf_path, monkeypatch):
+    monkeypatch.setattr(parsers, "_STREAM_RANGE_PAGES", 2)
+
+    class BreakingExecutor(ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, fn, *args, **kwargs):
+            self.submitted += 1
+            if self.submitted > 3:
+                raise BrokenProcessPool("worker died")
+            return super().submit(fn, *args, **kwargs)
+
+    with BreakingExecutor(max_workers=1) as executor:
+        sections = list(make_parser(workers=1, executor=executor).iter_sections(pdf_path))
+    assert joined(sections) == make_parser(workers=1).parse(pdf_path).text
+
+
+def test_iter_sections_epub_chapters(tmp_path):
+    epub = pytest.importorskip("ebooklib.epub")
+    pytest.importorskip("bs4")
+    from compymac.ingestion.chunker import Section
+
+    book = epub.EpubBook()
+    book.set_identifier("id")
+    book.set_title("Book")
+    chapters = []
+    for i in range(3):
+        chapter = epub.EpubHtml(title=f"Chapter {i}", file_name=f"ch{i}.xhtml")
+        chapter.content = f"<h1>Title {i}</h1><p>Body of chapter {i}.</p>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.spine = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    path = tmp_path / "book.epub"
+    epub.write_epub(str(path), book)
+
+    parser = make_parser()
+    sections = list(parser.iter_sections(path))
+    result = parser.parse(path)
+
+    assert joined(sections) == result.text
+    chapter_titles = [s.chapter["chapter_title"] for s in sections if isinstance(s, Section)]
+    assert chapter_titles == [r["chapter_title"] for r in result.metadata["chapter_ranges"]]
+    assert all(
+        s.metadata == {"parser": "ebooklib", "epub_title": "Book", "epub_author": None}
+        for s in sections if isinstance(s, Section)
+    )
@@ -0,0 +1,160 @@
+"""
+Tests for the query-result cache and its use by HybridRetriever and LibrarianAgent.
+"""
+
+import time
+
+import pytest
+
+from compymac.ingestion.librarian_agent import LibrarianAgent
+from compymac.knowledge_store import KnowledgeStore, MemoryUnit
+from compymac.retrieval.hybrid import HybridRetriever
+from compymac.retrieval.result_cache import QueryResultCache, normalize_query
+from compymac.storage.library_store import LibraryStore
+from compymac.storage.sqlite_backend import SQLiteBackend
+from compymac.trace_store import SpanKind, TraceContext, create_trace_store
+
+
+class TestQueryResultCache:
+    def test_normalized_keys(self):
+        assert normalize_query("  Liveness   PROBE? ") == "liveness probe"
+        cache = QueryResultCache()
+        cache.put("ns", "Liveness probe", ("f",), 1, ["r"])
+        assert cache.get("ns", "liveness  probe!", ("f",), 1) == ["r"]
+        assert cache.get("ns", "liveness probe", ("other",), 1) is None
+
+    def test_generation_change_invalidates(self):
+        cache = QueryResultCache()
+        cache.put("ns", "q", None, 1, ["old"])
+        cache.put("other", "q", None, 7, ["kept"])
+        assert cache.get("ns", "q", None, 2) is None
+        assert len(cache) == 1
+        assert cache.get("other", "q", None, 7) == ["kept"]
+
+    def test_ttl_and_size_bound(self):
+        cache = QueryResultCache(max_entries=2, ttl_seconds=0.05)
+        cache.put("ns", "a", None, 0, 1)
+        cache.put("ns", "b", None, 0, 2)
+        cache.get("ns", "a", None, 0)
+        cache.put("ns", "c", None, 0, 3)
+        assert cache.get("ns", "b", None, 0) is None
+        assert cache.get("ns", "a", None, 0) == 1
+        time.sleep(0.06)
+        assert cache.get("ns", "a", None, 0) is None
+
+    def test_per_session_stats(self):
+        cache = QueryResultCache()
+        cache.put("ns", "q", None, 0, [])
+        cache.get("ns", "q", None, 0, session_id="s1")
+        cache.get("ns", "q", None, 0, session_id="s1")
+        cache.get("ns", "x", None, 0, session_id="s2")
+        assert cache.stats("s1")["hit_rate"] == 1.0
+        assert cache.stats("s2")["hit_rate"] == 0.0
+        assert cache.stats()["hit_rate"] == pytest.approx(2 / 3)
+        assert cache.stats("missing")["lookups"] == 0
+
+
+class CountingKeywordStore(KnowledgeStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retrieve_calls = 0
+
+    def retrieve(self, *args, **kwargs):
+        self.retrieve_calls += 1
+        return super().retrieve(*args, **kwargs)
+
+
+def test_hybrid_retriever_cache_invalidated_by_writes(tmp_path):
+    store = CountingKeywordStore(SQLiteBackend(tmp_path / "k.db"))
+    unit = MemoryUnit(
+        id="m1", content="retry with backoff", embedding=None,
+        source_type="note", source_id="n", metadata={}, created_at=0.0,
+    )
+    store.store(unit)
+    retriever = HybridRetriever(store, result_cache=QueryResultCache())
+
+    first = retriever.retrieve("Retry", session_id="s")
+    assert retriever.retrieve("retry", session_id="s") == first
+    assert store.retrieve_calls == 1
+
+    store.store(MemoryUnit(
+        id="m2", content="retry budget", embedding=None,
+        source_type="note", source_id="n", metadata={}, created_at=0.0,
+    ))
+    assert {r.memory_unit.id for r in retriever.retrieve("retry", session_id="s")} == {"m1", "m2"}
+    assert store.retrieve_calls == 2
+    assert retriever.result_cache.stats("s")["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_hybrid_retriever_records_retrievals_in_trace(tmp_path):
+    store = KnowledgeStore(SQLiteBackend(tmp_path / "k.db"))
+    store.store(MemoryUnit(
+        id="m1", content="retry with backoff", embedding=None,
+        source_type="note", source_id="n", metadata={}, created_at=0.0,
+    ))
+    trace_store, _ = create_trace_store(tmp_path / "traces")
+    trace_ctx = TraceContext(trace_store)
+    cache = QueryResultCache()
+    retriever = HybridRetriever(
+        store, result_cache=cache, get_trace_context=lambda: trace_ctx
+    )
+
+    retriever.retrieve("retry", session_id="s")
+    # Another retriever over the same database shares the cached results
+    reopened = KnowledgeStore(SQLiteBackend(tmp_path / "k.db"))
+    HybridRetriever(
+        reopened, result_cache=cache, get_trace_context=lambda: trace_ctx
+    ).retrieve("retry", session_id="s")
+
+    spans = [
+        span for span in trace_store.get_trace_spans(trace_ctx.trace_id)
+        if span.name == "hybrid:retrieve"
+    ]
+    assert [span.attributes["cache_hit"] for span in spans] == [False, True]
+    assert spans[-1].attributes["session_cache_hit_rate"] == 0.5
+    assert spans[-1].attributes["result_count"] == 1
+
+
+class TestLibrarianSearchCache:
+    def make_library(self):
+        library = LibraryStore(use_embeddings=False)
+        doc = library.create_document("user", "guide.pdf")
+        library.update_document(doc.id, chunks=[{"id": "c1", "content": "liveness probes"}])
+        return library, doc
+
+    def test_repeated_search_hits_cache_until_library_changes(self, monkeypatch):
+        library, doc = self.make_library()
+        calls = []
+        search = library.search_chunks
+        monkeypatch.setattr(
+            library, "search_chunks", lambda **kw: calls.append(kw) or search(**kw)
+        )
+        agent = LibrarianAgent(library, session_id="s")
+
+        assert agent._search("Liveness probes")[0]["chunk_id"] == "c1"
+        assert agent._search("liveness probes")[0]["chunk_id"] == "c1"
+        assert len(calls) == 1
+
+        # Scope changes are part of the key; library changes bump the generation
+        library.add_active_source("s", doc.id)
+        agent._search("liveness probes")
+        library.update_document(doc.id, chunks=[{"id": "c2", "content": "liveness checks"}])
+        assert agent._search("liveness probes")[0]["chunk_id"] == "c2"
+        assert len(calls) == 3
+
+    def test_hit_rate_recorded_in_trace(self, tmp_path):
+        library, _ = self.make_library()
+        trace_store, _ = create_trace_store(tmp_path)
+        trace_ctx = TraceContext(trace_store)
+        agent = LibrarianAgent(library, session_id="s", get_trace_context=lambda: trace_ctx)
+
+        agent._search("liveness")
+        agent._search("liveness")
+
+        spans = [
+            span for span in trace_store.get_trace_spans(trace_ctx.trace_id)
+            if span.kind == SpanKind.MEMORY_OPERATION
+        ]
+        assert [span.attributes["cache_hit"] for span in spans] == [False, True]
+        assert spans[-1].attributes["session_cache_hit_rate"] == 0.5
+        assert spans[-1].attributes["result_count"] == 1
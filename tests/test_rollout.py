@@ -396,6 +396,32 @@ class TestRolloutSelection:
         assert selection.selected_rollout.rollout_id == "high_score"
         assert "Highest score" in selection.selection_reason
 
+    def test_select_fewest_tokens_on_tie(self, mock_harness, mock_llm_client):
+        """Verify equally-scored rollouts are ranked by token usage."""
+        orchestrator = RolloutOrchestrator(
+            harness=mock_harness,
+            llm_client=mock_llm_client,
+        )
+
+        results = [
+            RolloutResult(
+                rollout_id=rollout_id,
+                config=RolloutConfig(rollout_id=rollout_id),
+                status=RolloutStatus.COMPLETED,
+                success=True,
+                final_result="Done",
+                execution_time_ms=5000,
+                step_count=2,
+                total_tokens=tokens,
+            )
+            for rollout_id, tokens in [("expensive", 9000), ("cheap", 1200)]
+        ]
+
+        selection = orchestrator._select_best_rollout(results)
+
+        assert selection.selected_rollout.rollout_id == "cheap"
+        assert "Fewest tokens" in selection.selection_reason
+
     def test_select_success_over_failure(self, mock_harness, mock_llm_client):
         """Verify selection prefers success over failure."""
         orchestrator = RolloutOrchestrator(
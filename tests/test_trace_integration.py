@@ -12,6 +12,7 @@ from pathlib import Path
 import pytest
 
 from compymac.agent_loop import AgentConfig, AgentLoop, ScriptedPolicy
+from compymac.llm import ChatResponse, TokenUsage
 from compymac.local_harness import LocalHarness
 from compymac.trace_store import (
     ArtifactStore,
@@ -237,6 +238,45 @@ class TestAgentLoopTracing:
         tool_spans = [s for s in spans if s.kind == SpanKind.TOOL_CALL]
         assert len(tool_spans) == 1
 
+    def test_llm_span_records_token_usage(
+        self, local_harness: LocalHarness, trace_context: TraceContext
+    ):
+        """Verify that token usage is captured on the LLM span and trace totals."""
+
+        class UsageLLMClient:
+            def chat(self, messages, tools=None, **kwargs):
+                return ChatResponse(
+                    content="Done",
+                    tool_calls=[],
+                    finish_reason="stop",
+                    raw_response={"model": "test-model"},
+                    usage=TokenUsage(prompt_tokens=120, completion_tokens=30, total_tokens=150),
+                )
+
+        loop = AgentLoop(
+            harness=local_harness,
+            llm_client=UsageLLMClient(),
+            config=AgentConfig(max_steps=2),
+            trace_context=trace_context,
+        )
+        loop.add_user_message("hello")
+        loop.run_step()
+        loop.run_step()
+
+        store = trace_context.trace_store
+        llm_spans = [
+            s for s in store.get_trace_spans(trace_context.trace_id)
+            if s.kind == SpanKind.LLM_CALL
+        ]
+        assert len(llm_spans) == 2
+        assert llm_spans[0].attributes["total_tokens"] == 150
+        assert llm_spans[0].attributes["model"] == "test-model"
+
+        usage = store.get_trace_usage(trace_context.trace_id)
+        assert (usage.llm_calls, usage.prompt_tokens, usage.total_tokens) == (2, 240, 300)
+        assert trace_context.usage.total_tokens == 300
+        assert store.get_session_overview(trace_context.trace_id).total_tokens == 300
+
     def test_agent_loop_with_trace_base_path(self, temp_dir: Path):
         """Verify that AgentLoop creates TraceStore when trace_base_path is provided."""
         harness = LocalHarness(full_output_dir=temp_dir / "outputs")
@@ -0,0 +1,246 @@
+"""
+Tests for trace retention, orphaned artifact collection and vacuum.
+"""
+
+import sqlite3
+import tempfile
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from compymac.storage.artifact_pack import PackedArtifactStore
+from compymac.trace_retention import RetentionEngine, RetentionPolicy
+from compymac.trace_store import (
+    ArtifactStore,
+    LLMInputEncoder,
+    SpanKind,
+    SpanStatus,
+    TraceStore,
+    generate_trace_id,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for tests."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def trace_store(temp_dir):
+    """Create a TraceStore for tests."""
+    store = TraceStore(temp_dir / "traces.db", ArtifactStore(temp_dir / "artifacts"))
+    yield store
+    store.close()
+
+
+LATER = datetime.now(UTC) + timedelta(days=10)
+
+
+def record_trace(
+    trace_store: TraceStore,
+    task: str = "workflow:bugfix",
+    status: SpanStatus | None = SpanStatus.OK,
+    payload: bytes | None = None,
+) -> tuple[str, str | None]:
+    """Record a trace with one root span and return (trace_id, artifact hash)."""
+    trace_id = generate_trace_id()
+    artifact_hash = None
+    if payload is not None:
+        artifact_hash = trace_store.store_artifact(payload, "tool_output", "text/plain").artifact_hash
+    span_id = trace_store.start_span(
+        trace_id, SpanKind.AGENT_TURN, task, "agent", input_artifact_hash=artifact_hash
+    )
+    if status is not None:
+        trace_store.end_span(trace_id, span_id, status)
+    return trace_id, artifact_hash
+
+
+def count(trace_store: TraceStore, table: str, trace_id: str) -> int:
+    with sqlite3.connect(trace_store.db_path) as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE trace_id = ?", (trace_id,)
+        ).fetchone()[0]
+
+
+class TestRetentionPolicy:
+    def test_requires_a_criterion(self):
+        with pytest.raises(ValueError):
+            RetentionPolicy()
+
+    def test_rejects_unknown_status(self):
+        with pytest.raises(ValueError):
+            RetentionPolicy(statuses=["done"])
+
+
+class TestTraceSelection:
+    def test_max_age(self, trace_store):
+        trace_id, _ = record_trace(trace_store)
+        engine = RetentionEngine(trace_store, [RetentionPolicy(max_age_days=7)])
+
+        assert engine.select_traces() == []
+        assert engine.select_traces(now=LATER) == [trace_id]
+
+    def test_status_filter_and_in_progress_protection(self, trace_store):
+        ok_id, _ = record_trace(trace_store)
+        error_id, _ = record_trace(trace_store, status=SpanStatus.ERROR)
+        open_id, _ = record_trace(trace_store, status=None)
+
+        engine = RetentionEngine(trace_store, [RetentionPolicy(max_age_days=1)])
+        assert set(engine.select_traces(now=LATER)) == {ok_id, error_id}
+
+        engine = RetentionEngine(
+            trace_store, [RetentionPolicy(statuses=["completed_with_errors"])]
+        )
+        assert engine.select_traces() == [error_id]
+
+        engine = RetentionEngine(trace_store, [RetentionPolicy(statuses=["in_progress"])])
+        assert engine.select_traces() == [open_id]
+
+    def test_checkpoint_only_fork_traces(self, trace_store):
+        trace_id, _ = record_trace(trace_store)
+        checkpoint = trace_store.create_checkpoint(trace_id, 1, "one", b'{"step": 1}')
+        fork_id, _ = trace_store.fork_from_checkpoint(checkpoint.checkpoint_id)
+        engine = RetentionEngine(trace_store, [RetentionPolicy(max_age_days=7)])
+
+        fork = next(t for t in engine.list_traces() if t.trace_id == fork_id)
+        assert fork.status == "completed"
+        assert fork.task == ""
+        assert engine.select_traces() == []
+        assert engine.select_traces(now=LATER) == sorted([trace_id, fork_id])
+
+    def test_keep_last_per_task(self, trace_store):
+        fix_ids = [record_trace(trace_store, task="fix")[0] for _ in range(3)]
+        review_id, _ = record_trace(trace_store, task="review")
+
+        engine = RetentionEngine(trace_store, [RetentionPolicy(keep_last_per_task=2)])
+        selected = engine.select_traces()
+        assert selected == [fix_ids[0]]
+        assert review_id not in selected
+
+
+class TestRetentionRun:
+    def test_dry_run_changes_nothing(self, trace_store):
+        trace_id, artifact_hash = record_trace(trace_store, payload=b"tool output")
+        engine = RetentionEngine(
+            trace_store, [RetentionPolicy(max_age_days=1)], artifact_grace_seconds=0
+        )
+
+        report = engine.run(dry_run=True, now=LATER)
+        assert report.trace_ids == [trace_id]
+        assert report.event_rows == 2
+        assert report.span_rows == 1
+        assert report.orphan_artifacts == 1
+        assert report.artifact_bytes == len(b"tool output")
+        assert count(trace_store, "trace_events", trace_id) == 2
+        assert trace_store.get_artifact_data(artifact_hash) == b"tool output"
+
+    def test_apply_deletes_traces_and_orphans(self, trace_store):
+        old_id, old_hash = record_trace(trace_store, payload=b"old output")
+        _, shared_hash = record_trace(trace_store, task="other", payload=b"shared")
+        trace_store.start_span(
+            old_id, SpanKind.TOOL_CALL, "read", "agent", input_artifact_hash=shared_hash
+        )
+        engine = RetentionEngine(
+            trace_store,
+            [RetentionPolicy(keep_last_per_task=0, statuses=["in_progress"])],
+            artifact_grace_seconds=0,
+        )
+
+        report = engine.run(dry_run=False, now=LATER)
+        assert report.trace_ids == [old_id]
+        for table in ("trace_events", "spans", "checkpoints"):
+            assert count(trace_store, table, old_id) == 0
+        assert trace_store.get_artifact(old_hash) is None
+        assert not trace_store.artifact_store.exists(old_hash)
+        assert trace_store.get_artifact_data(shared_hash) == b"shared"
+        assert report.reclaimed_artifact_bytes == len(b"old output")
+
+    def test_grace_period_protects_new_artifacts(self, trace_store):
+        artifact = trace_store.store_artifact(b"in flight", "tool_output", "text/plain")
+        engine = RetentionEngine(trace_store, [RetentionPolicy(max_age_days=1)])
+
+        assert engine.find_orphan_artifacts() == []
+        assert engine.find_orphan_artifacts(now=LATER) == [
+            (artifact.artifact_hash, len(b"in flight"))
+        ]
+
+    def test_grace_period_restarts_when_stored_again(self, trace_store):
+        artifact = trace_store.store_artifact(b"in flight", "tool_output", "text/plain")
+        engine = RetentionEngine(
+            trace_store, [RetentionPolicy(max_age_days=1)], artifact_grace_seconds=3600
+        )
+        assert trace_store.get_artifact(artifact.artifact_hash) is not None
+        with sqlite3.connect(trace_store.db_path) as conn:
+            two_days_ago = (datetime.now(UTC) - timedelta(days=2)).isoformat()
+            conn.execute(
+                "UPDATE artifacts SET created_ts = ?, last_stored_ts = ?",
+                (two_days_ago, two_days_ago),
+            )
+        assert engine.find_orphan_artifacts() == [(artifact.artifact_hash, len(b"in flight"))]
+
+        # The same content stored again for a span that is about to record it
+        again = trace_store.store_artifact(b"in flight", "tool_output", "text/plain")
+        assert engine.find_orphan_artifacts() == []
+        assert trace_store.get_artifact(again.artifact_hash).created_ts < datetime.now(UTC) - (
+            timedelta(days=1)
+        )
+
+    def test_delta_bases_stay_referenced(self, trace_store):
+        trace_id = generate_trace_id()
+        span_id = trace_store.start_span(trace_id, SpanKind.AGENT_TURN, "turn", "agent")
+        encoder = LLMInputEncoder(trace_store.store_artifact)
+        messages = [{"role": "user", "content": "hi"}]
+        encoder.store(messages, tools=[{"name": "bash"}])
+        latest = encoder.store(messages + [{"role": "assistant", "content": "hello"}], tools=[])
+        trace_store.end_span(trace_id, span_id, SpanStatus.OK, output_artifact_hash=latest.artifact_hash)
+
+        checkpoint_trace = generate_trace_id()
+        trace_store.start_span(checkpoint_trace, SpanKind.AGENT_TURN, "turn", "agent")
+        state = b'{"messages": [' + b", ".join(b'"message %d"' % i for i in range(50)) + b"]}"
+        trace_store.create_checkpoint(checkpoint_trace, 1, "one", state)
+        patched = trace_store.create_checkpoint(checkpoint_trace, 2, "two", state[:-2] + b', "x"]}')
+
+        engine = RetentionEngine(
+            trace_store, [RetentionPolicy(max_age_days=1)], artifact_grace_seconds=0
+        )
+        assert engine.find_orphan_artifacts(now=LATER) == []
+        assert trace_store.get_checkpoint_state(patched.checkpoint_id).endswith(b'"x"]}')
+
+    def test_vacuum_releases_pages(self, trace_store):
+        trace_ids = [
+            record_trace(trace_store, task=f"task-{i}", payload=b"x" * 2000 + bytes([i]))[0]
+            for i in range(50)
+        ]
+        trace_store.delete_traces(trace_ids)
+        assert trace_store.vacuum() > 0
+        with sqlite3.connect(trace_store.db_path) as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def test_vacuum_converts_legacy_database(self, temp_dir):
+        db_path = temp_dir / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE filler (x TEXT)")
+        store = TraceStore(db_path, ArtifactStore(temp_dir / "artifacts"))
+        store.vacuum()
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        store.close()
+
+
+class TestPackedArtifactDeletion:
+    def test_delete_and_compact(self, temp_dir):
+        store = PackedArtifactStore(temp_dir, compression="none")
+        keep = store.store(b"k" * 1000 + b"keep", "t", "application/octet-stream")
+        drop = store.store(bytes(range(256)) * 8, "t", "application/octet-stream")
+
+        assert store.delete([drop.artifact_hash]) == 2048
+        assert not store.exists(drop.artifact_hash)
+        # Force the pack holding both artifacts to be rewritten
+        store._pack_file.close()
+        store._pack_file = None
+        store._pack_id += 1
+        assert store.compact(min_dead_ratio=0.5) == 2048
+        assert store.retrieve(keep.artifact_hash) == b"k" * 1000 + b"keep"
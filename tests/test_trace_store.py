@@ -10,29 +10,41 @@ Tests cover:
 - Video metadata handling
 - Summary view generation
 - TraceContext convenience API
+- Durability modes of the batched writer
 """
 
+import json
+import sqlite3
 import tempfile
-from datetime import UTC, datetime
+import threading
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 import pytest
 
 from compymac.trace_store import (
+    CHECKPOINT_SNAPSHOT_INTERVAL,
+    DELTA_MAGIC,
     ArtifactStore,
+    DurabilityMode,
+    LLMInputEncoder,
     ProvenanceRelation,
     SpanKind,
     SpanStatus,
     SummaryEventLog,
     ToolProvenance,
     TraceContext,
+    TraceEvent,
     TraceEventType,
     TraceStore,
     VideoMetadata,
+    apply_json_patch,
     compute_hash,
     create_trace_store,
+    diff_json,
     generate_span_id,
     generate_trace_id,
+    span_duration_ms,
 )
 
 
@@ -124,6 +136,110 @@ class TestArtifactStore:
         assert artifact.metadata == metadata
 
 
+class TestArtifactHashCache:
+    """Test the raw-content hash cache that lets repeated payloads skip redaction."""
+
+    def _count_redactions(self, store, monkeypatch):
+        calls = []
+        original = store._scanner.redact
+
+        def counting_redact(text):
+            calls.append(text)
+            return original(text)
+
+        monkeypatch.setattr(store._scanner, "redact", counting_redact)
+        return calls
+
+    def test_repeated_payload_skips_redaction(self, artifact_store, monkeypatch):
+        calls = self._count_redactions(artifact_store, monkeypatch)
+        data = b'{"api_key": "sk-abcdefghijklmnopqrstuvwxyz123456"}'
+
+        first = artifact_store.store(data, "llm_input", "application/json")
+        second = artifact_store.store(data, "llm_input", "application/json")
+
+        assert len(calls) == 1
+        assert second.artifact_hash == first.artifact_hash
+        assert second.byte_len == first.byte_len
+        assert second.metadata == {"secrets_redacted": True}
+        assert artifact_store.hash_cache_stats()["hits"] == 1
+        assert artifact_store.hash_cache_stats()["misses"] == 1
+
+    def test_cache_persists_across_instances(self, temp_dir, monkeypatch):
+        data = b"plain text that has been seen before"
+        ArtifactStore(temp_dir / "artifacts").store(data, "test", "text/plain")
+
+        reopened = ArtifactStore(temp_dir / "artifacts", hash_cache_size=1)
+        calls = self._count_redactions(reopened, monkeypatch)
+        reopened.store(data, "test", "text/plain")
+
+        assert calls == []
+        assert reopened.hash_cache_stats()["hits"] == 1
+
+    def test_scanner_change_invalidates_cache(self, temp_dir, monkeypatch):
+        data = b"token=abcdefgh12345678"
+        ArtifactStore(temp_dir / "artifacts").store(data, "test", "text/plain")
+
+        from compymac.security import scanner as scanner_module
+
+        monkeypatch.setattr(
+            scanner_module.SecretScanner, "DEFAULT_PATTERNS", {"never": (r"(?!x)x", 0.9)}
+        )
+        reopened = ArtifactStore(temp_dir / "artifacts")
+        artifact = reopened.store(data, "test", "text/plain")
+
+        assert reopened.hash_cache_stats()["hits"] == 0
+        assert reopened.retrieve(artifact.artifact_hash) == data
+
+    def test_forget_drops_entries(self, artifact_store):
+        data = b"soon to be vacuumed"
+        artifact = artifact_store.store(data, "test", "text/plain")
+        artifact_store.hash_cache.forget([artifact.artifact_hash])
+
+        artifact_store.store(data, "test", "text/plain")
+        assert artifact_store.hash_cache_stats()["misses"] == 2
+
+    def test_delete_by_another_instance_is_noticed(self, temp_dir):
+        server = ArtifactStore(temp_dir / "artifacts")
+        retention = ArtifactStore(temp_dir / "artifacts")
+        data = b"shared by two stores"
+        artifact = server.store(data, "test", "text/plain")
+
+        retention.delete([artifact.artifact_hash])
+        again = server.store(data, "test", "text/plain")
+
+        assert again.artifact_hash == artifact.artifact_hash
+        assert server.exists(artifact.artifact_hash)
+        assert server.retrieve(artifact.artifact_hash) == data
+
+    def test_hits_skip_filesystem_check(self, artifact_store, monkeypatch):
+        data = b"stored once, hit twice"
+        artifact = artifact_store.store(data, "test", "text/plain")
+
+        def no_exists(artifact_hash):
+            raise AssertionError("cache hit checked the filesystem")
+
+        monkeypatch.setattr(artifact_store, "exists", no_exists)
+        again = artifact_store.store(data, "test", "text/plain")
+        assert again.artifact_hash == artifact.artifact_hash
+        assert artifact_store.hash_cache_stats()["hits"] == 1
+
+    def test_delete_without_cache_is_noticed(self, temp_dir):
+        server = ArtifactStore(temp_dir / "artifacts")
+        retention = ArtifactStore(temp_dir / "artifacts", redact_secrets=False)
+        assert retention.hash_cache is None
+        data = b"deleted by a store without a cache"
+        artifact = server.store(data, "test", "text/plain")
+
+        retention.delete([artifact.artifact_hash])
+        server.store(data, "test", "text/plain")
+
+        assert server.retrieve(artifact.artifact_hash) == data
+
+    def test_binary_content_bypasses_cache(self, artifact_store):
+        artifact_store.store(b"\x00\x01", "test", "application/octet-stream")
+        assert artifact_store.hash_cache_stats()["misses"] == 0
+
+
 class TestTraceStore:
     """Test the main TraceStore functionality."""
 
@@ -682,3 +798,531 @@ class TestAppendOnlySemantics:
         span_after_end = trace_store.reconstruct_span(trace_id, span_id)
         assert span_after_end.status == SpanStatus.OK
         assert span_after_end.end_ts is not None
+
+
+class TestBulkSpanReconstruction:
+    """Test single-scan span folding, paging and streaming."""
+
+    def _make_trace(self, trace_store, n_spans):
+        trace_id = generate_trace_id()
+        root = trace_store.start_span(trace_id, SpanKind.AGENT_TURN, "turn", "agent")
+        for i in range(n_spans - 1):
+            span_id = trace_store.start_span(
+                trace_id, SpanKind.TOOL_CALL, f"tool_{i}", "agent", parent_span_id=root
+            )
+            if i % 3 == 0:
+                trace_store.add_span_link(trace_id, span_id, root)
+            status = SpanStatus.ERROR if i % 5 == 0 else SpanStatus.OK
+            trace_store.end_span(trace_id, span_id, status)
+        trace_store.end_span(trace_id, root, SpanStatus.OK)
+        return trace_id
+
+    def test_matches_per_span_reconstruction(self, trace_store):
+        trace_id = self._make_trace(trace_store, 20)
+        spans = trace_store.get_trace_spans(trace_id)
+
+        assert len(spans) == 20
+        for span in spans:
+            single = trace_store.reconstruct_span(trace_id, span.span_id)
+            assert span.to_dict() == single.to_dict()
+
+    def test_paging(self, trace_store):
+        trace_id = self._make_trace(trace_store, 25)
+        all_spans = trace_store.get_trace_spans(trace_id)
+
+        page1 = trace_store.get_trace_spans(trace_id, offset=0, limit=10)
+        page2 = trace_store.get_trace_spans(trace_id, offset=10, limit=10)
+        page3 = trace_store.get_trace_spans(trace_id, offset=20, limit=10)
+
+        paged = page1 + page2 + page3
+        assert [s.span_id for s in paged] == [s.span_id for s in all_spans]
+        assert len(page3) == 5
+
+    def test_streaming(self, trace_store):
+        trace_id = self._make_trace(trace_store, 23)
+        all_spans = trace_store.get_trace_spans(trace_id)
+
+        streamed = list(trace_store.iter_trace_spans(trace_id, page_size=4))
+        assert [s.to_dict() for s in streamed] == [s.to_dict() for s in all_spans]
+
+    def test_streaming_empty_trace(self, trace_store):
+        assert list(trace_store.iter_trace_spans(generate_trace_id())) == []
+
+    def test_fold_ignores_orphan_events(self, trace_store):
+        trace_id = generate_trace_id()
+        trace_store.end_span(trace_id, "span-orphan", SpanStatus.OK)
+        span_id = trace_store.start_span(trace_id, SpanKind.TOOL_CALL, "test", "actor")
+
+        spans = trace_store.get_trace_spans(trace_id)
+        assert [s.span_id for s in spans] == [span_id]
+
+
+class TestMaterializedSpans:
+    """Test the spans table maintained alongside the event log."""
+
+    def test_span_row_tracks_lifecycle(self, trace_store):
+        trace_id = generate_trace_id()
+        provenance = ToolProvenance("bash", "abc", "1.0.0")
+        span_id = trace_store.start_span(
+            trace_id, SpanKind.TOOL_CALL, "tool:bash", "harness", tool_provenance=provenance
+        )
+
+        [record] = trace_store.list_span_records(trace_id)
+        assert record.status == SpanStatus.STARTED
+        assert record.tool_name == "bash"
+        assert record.end_ts is None
+
+        trace_store.end_span(
+            trace_id, span_id, SpanStatus.ERROR,
+            error_class="RuntimeError", error_message="boom",
+        )
+
+        [record] = trace_store.list_span_records(trace_id)
+        span = trace_store.reconstruct_span(trace_id, span_id)
+        assert record.status == SpanStatus.ERROR
+        assert record.end_ts == span.end_ts
+        assert record.duration_ms is not None
+        assert record.duration_ms == span.duration_ms
+        assert record.error_message == "boom"
+
+    def test_filters_by_kind_and_status(self, trace_store):
+        trace_id = generate_trace_id()
+        llm = trace_store.start_span(trace_id, SpanKind.LLM_CALL, "llm_chat", "llm")
+        tool = trace_store.start_span(trace_id, SpanKind.TOOL_CALL, "tool:x", "harness")
+        trace_store.end_span(trace_id, llm, SpanStatus.OK)
+        trace_store.end_span(trace_id, tool, SpanStatus.ERROR)
+
+        assert [r.span_id for r in trace_store.list_span_records(trace_id, kind=SpanKind.LLM_CALL)] == [llm]
+        assert [r.span_id for r in trace_store.list_span_records(trace_id, status=SpanStatus.ERROR)] == [tool]
+
+    def test_token_counts_from_end_attributes(self, trace_store):
+        trace_id = generate_trace_id()
+        span_id = trace_store.start_span(trace_id, SpanKind.LLM_CALL, "llm_chat", "llm")
+        trace_store.end_span(
+            trace_id, span_id, SpanStatus.OK,
+            additional_attributes={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        )
+
+        [record] = trace_store.list_span_records(trace_id)
+        assert (record.prompt_tokens, record.completion_tokens, record.total_tokens) == (10, 5, 15)
+
+    def test_trace_usage_accumulates(self, trace_store):
+        trace_id = generate_trace_id()
+        for prompt, completion in [(10, 5), (20, 7)]:
+            span_id = trace_store.start_span(trace_id, SpanKind.LLM_CALL, "llm_chat", "llm")
+            trace_store.end_span(
+                trace_id, span_id, SpanStatus.OK,
+                additional_attributes={
+                    "prompt_tokens": prompt,
+                    "completion_tokens": completion,
+                    "total_tokens": prompt + completion,
+                    "model": "m1",
+                },
+            )
+        tool = trace_store.start_span(trace_id, SpanKind.TOOL_CALL, "tool", "harness")
+        trace_store.end_span(trace_id, tool, SpanStatus.OK)
+
+        usage = trace_store.get_trace_usage(trace_id)
+        assert usage.to_dict() == {
+            "trace_id": trace_id,
+            "llm_calls": 2,
+            "prompt_tokens": 30,
+            "completion_tokens": 12,
+            "total_tokens": 42,
+        }
+        [first, _] = trace_store.list_span_records(trace_id, kind=SpanKind.LLM_CALL)
+        assert first.model == "m1"
+        assert trace_store.get_session_overview(trace_id).total_tokens == 42
+
+    def test_rebuild_backfills_usage_from_output_artifacts(self, trace_store):
+        trace_id = generate_trace_id()
+        output = trace_store.store_artifact(
+            b'{"content": "hi", "usage": {"prompt_tokens": 8, "completion_tokens": 2, "total_tokens": 10}}',
+            "llm_output",
+            "application/json",
+        )
+        span_id = trace_store.start_span(trace_id, SpanKind.LLM_CALL, "llm_chat", "llm")
+        # Legacy span: usage only in the output artifact
+        trace_store.end_span(trace_id, span_id, SpanStatus.OK, output_artifact_hash=output.artifact_hash)
+        assert trace_store.get_trace_usage(trace_id).total_tokens == 0
+
+        trace_store.rebuild_span_table(trace_id)
+
+        assert trace_store.get_trace_usage(trace_id).total_tokens == 10
+        [record] = trace_store.list_span_records(trace_id)
+        assert record.prompt_tokens == 8
+
+    def test_rebuild_matches_live_rows(self, trace_store):
+        trace_id = generate_trace_id()
+        for i in range(5):
+            span_id = trace_store.start_span(trace_id, SpanKind.TOOL_CALL, f"t{i}", "harness")
+            trace_store.end_span(trace_id, span_id, SpanStatus.OK)
+        before = [r.to_dict() for r in trace_store.list_span_records(trace_id)]
+
+        assert trace_store.rebuild_span_table(trace_id) == 5
+
+        assert [r.to_dict() for r in trace_store.list_span_records(trace_id)] == before
+
+    def test_span_duration_rounds_half_up(self):
+        start = datetime(2025, 1, 1, tzinfo=UTC)
+        assert span_duration_ms(start, start + timedelta(microseconds=1499)) == 1
+        assert span_duration_ms(start, start + timedelta(microseconds=2500)) == 3
+        assert span_duration_ms(start, start + timedelta(days=1, microseconds=400)) == 86400000
+
+    def test_existing_database_is_migrated(self, temp_dir, artifact_store):
+        db_path = temp_dir / "traces.db"
+        store = TraceStore(db_path, artifact_store)
+        trace_id = generate_trace_id()
+        span_id = store.start_span(trace_id, SpanKind.TOOL_CALL, "tool", "harness")
+        store.end_span(trace_id, span_id, SpanStatus.OK)
+        store.close()
+
+        # Simulate a database from before the spans table existed
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE spans")
+        conn.commit()
+        conn.close()
+
+        reopened = TraceStore(db_path, artifact_store)
+        [record] = reopened.list_span_records(trace_id)
+        assert record.span_id == span_id
+        assert record.status == SpanStatus.OK
+        reopened.close()
+
+
+class TestLLMInputEncoder:
+    """Test delta-encoded llm_input artifacts."""
+
+    TOOLS = [{"type": "function", "function": {"name": "bash", "parameters": {}}}]
+
+    def _conversation(self, steps):
+        messages = [{"role": "system", "content": "You are a test agent."}]
+        history = []
+        for i in range(steps):
+            messages = messages + [
+                {"role": "assistant", "content": f"step {i} " + "x" * 200},
+                {"role": "tool", "content": f"result {i}", "tool_call_id": f"c{i}"},
+            ]
+            history.append(messages)
+        return history
+
+    def test_retrieve_rebuilds_full_payload(self, trace_store):
+        encoder = LLMInputEncoder(trace_store.store_artifact)
+        for messages in self._conversation(10):
+            artifact = encoder.store(messages, self.TOOLS, metadata={"step": len(messages)})
+            data = trace_store.get_artifact_data(artifact.artifact_hash)
+            assert data == json.dumps({"messages": messages, "tools": self.TOOLS}).encode()
+
+    def test_deltas_are_small(self, trace_store):
+        encoder = LLMInputEncoder(trace_store.store_artifact)
+        stored = 0
+        full = 0
+        for messages in self._conversation(30):
+            artifact = encoder.store(messages, self.TOOLS)
+            stored += artifact.byte_len
+            full += len(json.dumps({"messages": messages, "tools": self.TOOLS}))
+        assert stored * 4 < full
+
+    def test_chain_length_is_capped(self, trace_store):
+        encoder = LLMInputEncoder(trace_store.store_artifact, max_chain=3)
+        depths = []
+        for messages in self._conversation(9):
+            artifact = encoder.store(messages, self.TOOLS)
+            record = trace_store.get_artifact(artifact.artifact_hash)
+            depths.append(record.metadata["chain_depth"])
+        assert depths == [0, 1, 2, 3, 0, 1, 2, 3, 0]
+
+    def test_rewritten_history_starts_snapshot(self, trace_store):
+        encoder = LLMInputEncoder(trace_store.store_artifact)
+        history = self._conversation(4)
+        encoder.store(history[-1], self.TOOLS)
+
+        compressed = [history[-1][0], {"role": "user", "content": "summary"}]
+        compressed += [{"role": "assistant", "content": "next"}] * 3
+        artifact = encoder.store(compressed, self.TOOLS)
+
+        assert trace_store.get_artifact(artifact.artifact_hash).metadata["encoding"] == "snapshot"
+        data = trace_store.get_artifact_data(artifact.artifact_hash)
+        assert json.loads(data)["messages"] == compressed
+
+    def test_tool_schemas_stored_once(self, trace_store):
+        stored_types = []
+
+        def store(**kwargs):
+            stored_types.append(kwargs["artifact_type"])
+            return trace_store.store_artifact(**kwargs)
+
+        encoder = LLMInputEncoder(store)
+        for messages in self._conversation(5):
+            encoder.store(messages, self.TOOLS)
+        assert stored_types.count("tool_schemas") == 1
+        assert stored_types.count("llm_input") == 5
+
+
+class TestDurabilityModes:
+    """Test the single-connection writer in each durability mode."""
+
+    @pytest.mark.parametrize("mode", list(DurabilityMode))
+    def test_span_roundtrip(self, temp_dir, artifact_store, mode):
+        store = TraceStore(temp_dir / "traces.db", artifact_store, durability=mode)
+        trace_id = generate_trace_id()
+        span_id = store.start_span(trace_id, SpanKind.TOOL_CALL, "test", "actor")
+        store.end_span(trace_id, span_id, SpanStatus.OK)
+
+        span = store.reconstruct_span(trace_id, span_id)
+        assert span.status == SpanStatus.OK
+        store.close()
+
+    def test_wal_journal_mode(self, trace_store):
+        conn = sqlite3.connect(trace_store.db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_async_flush_is_barrier(self, temp_dir, artifact_store):
+        store = TraceStore(
+            temp_dir / "traces.db",
+            artifact_store,
+            durability=DurabilityMode.ASYNC,
+            batch_size=16,
+            batch_interval_ms=50,
+        )
+        trace_id = generate_trace_id()
+        for i in range(40):
+            store.start_span(trace_id, SpanKind.TOOL_CALL, f"tool_{i}", "actor")
+        store.flush()
+
+        # Read through an independent connection, bypassing the store
+        conn = sqlite3.connect(store.db_path)
+        count = conn.execute(
+            "SELECT COUNT(*) FROM trace_events WHERE trace_id = ?", (trace_id,)
+        ).fetchone()[0]
+        conn.close()
+        assert count == 40
+        store.close()
+
+    def test_group_commit_from_many_threads(self, temp_dir, artifact_store):
+        store = TraceStore(
+            temp_dir / "traces.db", artifact_store, durability=DurabilityMode.GROUP
+        )
+        trace_id = generate_trace_id()
+
+        def worker(n: int) -> None:
+            for i in range(10):
+                span_id = store.start_span(trace_id, SpanKind.TOOL_CALL, f"t{n}_{i}", f"actor_{n}")
+                store.end_span(trace_id, span_id, SpanStatus.OK)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(store.get_events(trace_id=trace_id)) == 160
+        store.close()
+
+    def test_group_commit_surfaces_write_errors(self, temp_dir, artifact_store):
+        store = TraceStore(
+            temp_dir / "traces.db", artifact_store, durability=DurabilityMode.GROUP
+        )
+        event = TraceEvent(
+            event_id="evt-1",
+            timestamp=datetime.now(UTC),
+            event_type=TraceEventType.SPAN_LINK,
+            trace_id="trace-x",
+            span_id="span-x",
+            data={"linked_span_id": "span-y"},
+        )
+        store._append_event(event)
+        with pytest.raises(sqlite3.IntegrityError):
+            store._append_event(event)
+
+        # The failed write does not poison later batches
+        store.add_span_link("trace-x", "span-x", "span-z")
+        assert len(store.get_events(trace_id="trace-x")) == 2
+        store.close()
+
+    def test_checkpoint_is_durable_in_async_mode(self, temp_dir, artifact_store):
+        store = TraceStore(
+            temp_dir / "traces.db",
+            artifact_store,
+            durability=DurabilityMode.ASYNC,
+            batch_interval_ms=1000,
+        )
+        trace_id = generate_trace_id()
+        store.start_span(trace_id, SpanKind.AGENT_TURN, "turn", "agent")
+        checkpoint = store.create_checkpoint(trace_id, 1, "step 1", b'{"messages": []}')
+
+        conn = sqlite3.connect(store.db_path)
+        events = conn.execute(
+            "SELECT COUNT(*) FROM trace_events WHERE trace_id = ?", (trace_id,)
+        ).fetchone()[0]
+        checkpoints = conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE checkpoint_id = ?",
+            (checkpoint.checkpoint_id,),
+        ).fetchone()[0]
+        conn.close()
+        assert events == 1
+        assert checkpoints == 1
+        store.close()
+
+    def test_close_is_idempotent(self, temp_dir, artifact_store):
+        store = TraceStore(
+            temp_dir / "traces.db", artifact_store, durability=DurabilityMode.ASYNC
+        )
+        store.close()
+        store.close()
+        with pytest.raises(RuntimeError):
+            store.start_span(generate_trace_id(), SpanKind.TOOL_CALL, "late", "actor")
+
+
+def checkpoint_state(step: int) -> bytes:
+    """A growing agent state, as SWEWorkflow.create_checkpoint serializes it."""
+    messages = [{"role": "user", "content": f"message {i} " + "x" * 200} for i in range(step)]
+    return json.dumps({"step": step, "messages": messages, "phase": "edit"}).encode()
+
+
+class TestCheckpointPatches:
+    """Test patch-encoded checkpoint state and copy-on-write forks."""
+
+    def test_diff_and_apply_roundtrip(self):
+        old = {"a": 1, "b": [1, 2], "c": {"d/e": "x"}, "gone": True}
+        new = {"a": 2, "b": [1, 2, 3], "c": {"d/e": "y", "f~": None}}
+        ops = diff_json(old, new)
+        assert apply_json_patch(json.loads(json.dumps(old)), ops) == new
+        assert apply_json_patch([1, 2, 3], diff_json([1, 2, 3], [1])) == [1]
+        assert apply_json_patch({"a": 1}, diff_json({"a": 1}, [1])) == [1]
+
+    def test_checkpoints_stored_as_patches(self, trace_store):
+        trace_id = generate_trace_id()
+        checkpoints = [
+            trace_store.create_checkpoint(trace_id, step, f"step {step}", checkpoint_state(step))
+            for step in range(1, 6)
+        ]
+
+        raw = trace_store.artifact_store.retrieve_raw(checkpoints[-1].state_artifact_hash)
+        assert raw.startswith(DELTA_MAGIC)
+        assert len(raw) < len(checkpoint_state(5)) // 2
+        for step, checkpoint in enumerate(checkpoints, start=1):
+            assert trace_store.get_checkpoint_state(checkpoint.checkpoint_id) == (
+                checkpoint_state(step)
+            )
+
+    def test_patch_chain_is_bounded(self, trace_store):
+        trace_id = generate_trace_id()
+        for step in range(1, CHECKPOINT_SNAPSHOT_INTERVAL + 3):
+            checkpoint = trace_store.create_checkpoint(
+                trace_id, step, f"step {step}", checkpoint_state(step)
+            )
+            raw = trace_store.artifact_store.retrieve_raw(checkpoint.state_artifact_hash)
+            if raw.startswith(DELTA_MAGIC):
+                depth = json.loads(raw[len(DELTA_MAGIC):])["depth"]
+                assert depth <= CHECKPOINT_SNAPSHOT_INTERVAL
+
+    def test_non_canonical_state_stored_whole(self, trace_store):
+        trace_id = generate_trace_id()
+        trace_store.create_checkpoint(trace_id, 1, "one", checkpoint_state(3))
+        pretty = json.dumps(json.loads(checkpoint_state(4)), indent=2).encode()
+        checkpoint = trace_store.create_checkpoint(trace_id, 2, "two", pretty)
+
+        assert checkpoint.state_artifact_hash == compute_hash(pretty)
+        assert trace_store.get_checkpoint_state(checkpoint.checkpoint_id) == pretty
+
+    def test_patches_continue_after_reopen(self, temp_dir, artifact_store):
+        trace_id = generate_trace_id()
+        store = TraceStore(temp_dir / "traces.db", artifact_store)
+        store.create_checkpoint(trace_id, 1, "one", checkpoint_state(5))
+        store.close()
+
+        reopened = TraceStore(temp_dir / "traces.db", artifact_store)
+        checkpoint = reopened.create_checkpoint(trace_id, 2, "two", checkpoint_state(6))
+        raw = artifact_store.retrieve_raw(checkpoint.state_artifact_hash)
+        assert raw.startswith(DELTA_MAGIC)
+        assert reopened.get_checkpoint_state(checkpoint.checkpoint_id) == checkpoint_state(6)
+
+    def test_fork_shares_parent_state(self, trace_store):
+        trace_id = generate_trace_id()
+        parent = trace_store.create_checkpoint(trace_id, 3, "parent", checkpoint_state(3))
+
+        new_trace_id, forked = trace_store.fork_from_checkpoint(parent.checkpoint_id)
+        assert forked.state_artifact_hash == parent.state_artifact_hash
+        assert forked.parent_checkpoint_id == parent.checkpoint_id
+
+        child = trace_store.create_checkpoint(new_trace_id, 4, "child", checkpoint_state(4))
+        raw = trace_store.artifact_store.retrieve_raw(child.state_artifact_hash)
+        assert json.loads(raw[len(DELTA_MAGIC):])["base"] == parent.state_artifact_hash
+        assert trace_store.get_checkpoint_state(child.checkpoint_id) == checkpoint_state(4)
+
+    def test_compaction_shortens_chains(self, trace_store):
+        trace_id = generate_trace_id()
+        checkpoints = [
+            trace_store.create_checkpoint(trace_id, step, f"step {step}", checkpoint_state(step))
+            for step in range(1, 9)
+        ]
+
+        rewritten = trace_store.compact_checkpoints(trace_id, max_depth=2)
+        assert rewritten > 0
+        for step, checkpoint in enumerate(checkpoints, start=1):
+            current = trace_store.get_checkpoint(checkpoint.checkpoint_id)
+            raw = trace_store.artifact_store.retrieve_raw(current.state_artifact_hash)
+            if raw.startswith(DELTA_MAGIC):
+                assert json.loads(raw[len(DELTA_MAGIC):])["depth"] <= 2
+            assert trace_store.get_checkpoint_state(checkpoint.checkpoint_id) == (
+                checkpoint_state(step)
+            )
+
+
+class TestTail:
+    """Test cursor-based incremental reads of a trace."""
+
+    def test_tail_returns_only_new_events(self, trace_store):
+        trace_id = generate_trace_id()
+        other_trace = generate_trace_id()
+        span_id = trace_store.start_span(trace_id, SpanKind.AGENT_TURN, "turn", "agent")
+        trace_store.start_span(other_trace, SpanKind.AGENT_TURN, "turn", "agent")
+
+        first = trace_store.tail(trace_id)
+        assert [e.event_type for _, e in first] == [TraceEventType.SPAN_START]
+
+        cursor = first[-1][0]
+        assert trace_store.tail(trace_id, after_cursor=cursor) == []
+
+        trace_store.end_span(trace_id, span_id, SpanStatus.OK)
+        new = trace_store.tail(trace_id, after_cursor=cursor)
+        assert [e.event_type for _, e in new] == [TraceEventType.SPAN_END]
+        assert new[0][0] > cursor
+        assert trace_store.latest_cursor(trace_id) == new[0][0]
+        assert trace_store.latest_cursor() >= new[0][0]
+
+    def test_tail_pages_with_limit(self, trace_store):
+        trace_id = generate_trace_id()
+        for i in range(5):
+            trace_store.start_span(trace_id, SpanKind.TOOL_CALL, f"tool-{i}", "agent")
+
+        cursor, names = 0, []
+        while page := trace_store.tail(trace_id, after_cursor=cursor, limit=2):
+            cursor = page[-1][0]
+            names.extend(e.data["name"] for _, e in page)
+        assert names == [f"tool-{i}" for i in range(5)]
+
+    def test_open_tail_follows_through_one_connection(self, trace_store, monkeypatch):
+        trace_id = generate_trace_id()
+        for i in range(3):
+            trace_store.start_span(trace_id, SpanKind.TOOL_CALL, f"tool-{i}", "agent")
+        trace_store.flush()
+
+        connects = []
+        real_connect = sqlite3.connect
+        monkeypatch.setattr(
+            sqlite3, "connect", lambda *a, **kw: connects.append(a) or real_connect(*a, **kw)
+        )
+        with trace_store.open_tail(trace_id) as tail:
+            assert [e.data["name"] for _, e in tail.poll(limit=2)] == ["tool-0", "tool-1"]
+            # A full page is followed up even though nothing was committed since
+            assert [e.data["name"] for _, e in tail.poll(limit=2)] == ["tool-2"]
+            assert tail.poll() == []
+
+            trace_store.start_span(trace_id, SpanKind.TOOL_CALL, "tool-3", "agent")
+            trace_store.flush()
+            assert [e.data["name"] for _, e in tail.poll()] == ["tool-3"]
+            assert len(connects) == 1
+            assert tail.cursor == trace_store.latest_cursor(trace_id)
@@ -0,0 +1,257 @@
+"""
+Tests for the in-process NumPy vector index and the stores built on it.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from compymac.knowledge_store import KnowledgeStore, MemoryUnit
+from compymac.retrieval.hybrid import HybridRetriever
+from compymac.storage.library_store import LibraryStore
+from compymac.storage.sqlite_backend import SQLiteBackend
+from compymac.storage.vector_index import IVFIndex, VectorIndex, recall_at_k
+
+
+def random_vector(rng: random.Random, dim: int = 16) -> list[float]:
+    return [rng.uniform(-1, 1) for _ in range(dim)]
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b, strict=True))
+    return dot / (sum(x * x for x in a) ** 0.5 * sum(y * y for y in b) ** 0.5)
+
+
+class KeywordEmbedder:
+    """Embeds text as counts of a few fixed words."""
+
+    WORDS = ("cat", "dog", "fish", "bird")
+
+    def embed(self, text: str) -> list[float]:
+        words = text.lower().split()
+        return [float(words.count(w)) for w in self.WORDS]
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed(t) for t in texts]
+
+
+class TestVectorIndex:
+    def test_matches_brute_force_top_k(self):
+        rng = random.Random(0)
+        vectors = {f"v{i}": random_vector(rng) for i in range(500)}
+        index = VectorIndex()
+        index.add_batch(list(vectors), list(vectors.values()))
+        query = random_vector(rng)
+
+        expected = sorted(vectors, key=lambda v: cosine(query, vectors[v]), reverse=True)[:10]
+        hits = index.search(query, k=10)
+        assert [item_id for item_id, _ in hits] == expected
+        assert hits[0][1] == pytest.approx(cosine(query, vectors[expected[0]]), abs=1e-5)
+
+    def test_upsert_and_remove(self):
+        index = VectorIndex()
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("c", [1.0, 1.0])
+        index.add("a", [0.0, 2.0])
+
+        assert len(index) == 3
+        assert index.search([0.0, 1.0], k=1)[0][0] in {"a", "b"}
+        assert index.remove("a")
+        assert not index.remove("a")
+        assert "a" not in index
+        assert [item_id for item_id, _ in index.search([0.0, 1.0], k=5)] == ["b", "c"]
+
+    def test_filters(self):
+        index = VectorIndex()
+        index.add("a", [1.0, 0.0], source_type="doc", source_id="d1")
+        index.add("b", [1.0, 0.1], source_type="doc", source_id="d2")
+        index.add("c", [1.0, 0.2], source_type="note", source_id="d2")
+
+        assert [i for i, _ in index.search([1.0, 0.0], source_type="doc")] == ["a", "b"]
+        assert [i for i, _ in index.search([1.0, 0.0], source_id="d2")] == ["b", "c"]
+        assert [i for i, _ in index.search([1.0, 0.0], source_id=["d1", "d2"])] == ["a", "b", "c"]
+        assert index.search([1.0, 0.0], source_type="doc", source_id="d3") == []
+
+        assert index.remove_source("d2") == 2
+        assert len(index) == 1
+
+    def test_rejects_dimension_mismatch(self):
+        index = VectorIndex()
+        index.add("a", [1.0, 0.0])
+        with pytest.raises(ValueError):
+            index.add("b", [1.0, 0.0, 0.0])
+        assert index.search([1.0, 0.0, 0.0]) == []
+        assert index.search([0.0, 0.0]) == []
+
+    def test_grows_past_initial_capacity(self):
+        index = VectorIndex()
+        for i in range(1000):
+            index.add(f"v{i}", [float(i), 1.0])
+        assert len(index) == 1000
+        assert index.search([1.0, 0.0], k=1)[0][0] == "v999"
+
+
+def clustered(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    return (centers[rng.integers(0, 20, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+class TestIVFIndex:
+    def test_exact_until_trained(self):
+        index = IVFIndex(min_train_size=100)
+        index.add_batch([f"v{i}" for i in range(50)], clustered(50))
+        assert not index.trained
+
+    def test_recall_against_exact(self):
+        vectors = clustered(5000)
+        ids = [f"v{i}" for i in range(5000)]
+        exact = VectorIndex()
+        exact.add_batch(ids, vectors)
+        ivf = IVFIndex(n_lists=32, n_probe=4, min_train_size=1000)
+        ivf.add_batch(ids, vectors)
+
+        assert ivf.trained
+        queries = clustered(50, seed=1)
+        assert recall_at_k(ivf, exact, queries, k=10) >= 0.9
+        # Probing every list is exhaustive
+        ivf.n_probe = 32
+        assert recall_at_k(ivf, exact, queries, k=10) == 1.0
+
+    def test_incremental_insert_and_remove_after_training(self):
+        vectors = clustered(2000)
+        ivf = IVFIndex(n_lists=16, n_probe=16, min_train_size=1000)
+        ivf.add_batch([f"v{i}" for i in range(1000)], vectors[:1000])
+        for i in range(1000, 1100):
+            ivf.add(f"v{i}", vectors[i], source_id="late")
+
+        assert ivf.search(vectors[1050], k=1)[0][0] == "v1050"
+        assert ivf.remove("v1050")
+        assert ivf.search(vectors[1050], k=1)[0][0] != "v1050"
+        assert {i for i, _ in ivf.search(vectors[1060], k=200, source_id="late")} <= {
+            f"v{i}" for i in range(1000, 1100)
+        }
+
+    def test_retrains_after_growth(self):
+        ivf = IVFIndex(n_lists=4, min_train_size=100, retrain_factor=2.0)
+        vectors = clustered(400)
+        ivf.add_batch([f"v{i}" for i in range(100)], vectors[:100])
+        assert ivf._trained_size == 100
+        ivf.add_batch([f"v{i}" for i in range(100, 400)], vectors[100:])
+        assert ivf._trained_size == 400
+
+    def test_save_and_load(self, tmp_path):
+        vectors = clustered(1200)
+        ivf = IVFIndex(n_lists=8, n_probe=2, min_train_size=1000)
+        ivf.add_batch([f"v{i}" for i in range(1200)], vectors, source_ids=["s"] * 1200)
+        ivf.save(tmp_path / "index.npz", {"generation": 7})
+
+        loaded = IVFIndex(n_probe=2)
+        assert loaded.load(tmp_path / "index.npz") == {"generation": 7}
+        assert loaded.trained and len(loaded) == 1200
+        assert loaded.search(vectors[5], k=3, source_id="s") == ivf.search(vectors[5], k=3)
+
+        with pytest.raises(ValueError):
+            VectorIndex().load(tmp_path / "index.npz")
+
+
+class TestKnowledgeStoreVectorSearch:
+    @pytest.fixture
+    def store(self, tmp_path):
+        return KnowledgeStore(SQLiteBackend(tmp_path / "knowledge.db"))
+
+    def unit(self, unit_id: str, embedding: list[float] | None, source_id: str = "s1"):
+        return MemoryUnit(
+            id=unit_id,
+            content=f"content {unit_id}",
+            embedding=embedding,
+            source_type="document",
+            source_id=source_id,
+            metadata={},
+            created_at=0.0,
+        )
+
+    def test_no_row_cap(self, store):
+        store.store_batch([self.unit(f"u{i}", [1.0, i / 2000]) for i in range(1500)])
+        # The best match is the last row inserted, past the old 1,000 row limit
+        hits = store.vector_search([1.0, 1.0], limit=1)
+        assert hits[0].memory_unit.id == "u1499"
+        assert hits[0].match_type == "vector"
+
+    def test_index_tracks_store_and_delete(self, store):
+        store.store(self.unit("a", [1.0, 0.0]))
+        assert [r.memory_unit.id for r in store.vector_search([1.0, 0.0])] == ["a"]
+
+        store.store(self.unit("b", [0.0, 1.0], source_id="s2"))
+        store.store(self.unit("a", None))
+        assert [r.memory_unit.id for r in store.vector_search([1.0, 0.0])] == ["b"]
+        assert store.vector_search([1.0, 0.0], source_id="s1") == []
+
+        store.delete("b")
+        assert store.vector_search([1.0, 0.0]) == []
+
+    def test_empty_embedding_does_not_fix_dimension(self, store):
+        store.vector_search([1.0, 0.0])  # Load the index before storing
+        store.store(self.unit("empty", []))
+        store.store(self.unit("a", [1.0, 0.0]))
+
+        assert store._vector_index.dim == 2
+        assert [r.memory_unit.id for r in store.vector_search([1.0, 0.0])] == ["a"]
+
+    def test_persists_ivf_index_next_to_database(self, tmp_path):
+        db_path = tmp_path / "knowledge.db"
+        vectors = clustered(300)
+        store = KnowledgeStore(SQLiteBackend(db_path), vector_index=IVFIndex(min_train_size=200))
+        store.store_batch([self.unit(f"u{i}", vectors[i].tolist()) for i in range(300)])
+        assert store.vector_index.trained
+        assert store.index_path == tmp_path / "knowledge.db.ivf.npz"
+        assert store.index_path.exists()
+
+        # A matching generation loads the saved file as-is
+        reopened = KnowledgeStore(SQLiteBackend(db_path), vector_index=IVFIndex())
+        assert reopened.vector_index.trained
+        assert reopened.vector_search(vectors[7].tolist(), limit=1)[0].memory_unit.id == "u7"
+
+        # A write from elsewhere makes it stale: centroids are reused, rows reloaded
+        store.store(self.unit("new", vectors[0].tolist()))
+        stale = KnowledgeStore(SQLiteBackend(db_path), vector_index=IVFIndex())
+        assert len(stale.vector_index) == 301
+        assert stale.vector_index.trained
+
+    def test_hybrid_retriever_uses_index(self, store):
+        embedder = KeywordEmbedder()
+        for i, text in enumerate(["cat cat", "dog", "fish bird"]):
+            store.store(MemoryUnit(
+                id=f"m{i}", content=text, embedding=embedder.embed(text),
+                source_type="note", source_id="n", metadata={}, created_at=0.0,
+            ))
+
+        retriever = HybridRetriever(store, embedder=embedder)
+        dense = retriever._dense_retrieve("cat", limit=2)
+        assert [r.memory_unit.id for r in dense] == ["m0", "m1"]
+        assert dense[0].score == pytest.approx(1.0)
+
+
+class TestLibraryStoreVectorSearch:
+    def test_search_chunks_scores_with_index(self):
+        library = LibraryStore(embedder=KeywordEmbedder())
+
+        doc = library.create_document("user", "pets.pdf")
+        other = library.create_document("user", "fish.pdf")
+        library.update_document(doc.id, chunks=[
+            {"id": "c1", "content": "cat cat", "metadata": {"page": 1}},
+            {"id": "c2", "content": "dog", "metadata": {"page": 2}},
+        ])
+        library.update_document(other.id, chunks=[{"id": "c3", "content": "fish"}])
+
+        results = library.search_chunks("cat", doc_ids=[doc.id])
+        assert [r["chunk_id"] for r in results] == ["c1", "c2"]
+        assert results[0]["vector_score"] == pytest.approx(1.0)
+
+        # Re-chunking replaces the old embeddings; deleting drops them
+        library.update_document(doc.id, chunks=[{"id": "c4", "content": "bird"}])
+        assert "c1" not in library._vector_index
+        library.delete_document(other.id)
+        assert "c3" not in library._vector_index
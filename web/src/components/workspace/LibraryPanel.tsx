@@ -10,6 +10,9 @@ import { isEpubLocator, isPdfLocator } from '@/types/citation'
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
+// How often to poll the status of ingestion jobs started by an upload
+const JOB_POLL_INTERVAL_MS = 1000
+
 interface NavigationEntry {
   id: string
   title: string
@@ -27,7 +30,7 @@ interface Document {
   filename: string
   title: string
   page_count: number
-  status: 'processing' | 'ready' | 'error'
+  status: 'pending' | 'processing' | 'ready' | 'failed'
   created_at: number
   file_size_bytes: number
   chunk_count: number
@@ -39,6 +42,22 @@ interface Document {
   navigation: NavigationEntry[]
 }
 
+// Background ingestion job returned by the upload endpoints
+interface IngestionJob {
+  id: string
+  doc_id: string
+  filename: string
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
+  stage: string
+  pages_parsed: number
+  pages_total: number
+  chunks_total: number
+  chunks_embedded: number
+  error: string | null
+}
+
+const FINISHED_JOB_STATUSES: IngestionJob['status'][] = ['completed', 'failed', 'cancelled']
+
 interface DocumentChunk {
   id: string
   content: string
@@ -346,6 +365,7 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
   const [activeTab, setActiveTab] = useState<ViewTab>('original')
   const [isLoading, setIsLoading] = useState(false)
   const [isUploading, setIsUploading] = useState(false)
+  const [pendingJobIds, setPendingJobIds] = useState<string[]>([])
   const [searchQuery, setSearchQuery] = useState('')
   const [copied, setCopied] = useState(false)
   const [expandedNodes, setExpandedNodes] = useState<Set<string>>(new Set())
@@ -367,6 +387,65 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
     fetchDocuments()
   }, [])
 
+  // Keep the latest selection for the job poller, which outlives renders
+  const selectedDocRef = useRef<Document | null>(null)
+  useEffect(() => {
+    selectedDocRef.current = selectedDoc
+  }, [selectedDoc])
+
+  // Poll ingestion jobs started by uploads; refresh the library as they finish
+  useEffect(() => {
+    if (pendingJobIds.length === 0) return
+    let cancelled = false
+    let polling = false
+
+    const poll = async () => {
+      if (polling) return
+      polling = true
+      try {
+        const finished: IngestionJob[] = []
+        const gone: string[] = []
+        await Promise.all(pendingJobIds.map(async jobId => {
+          try {
+            const response = await fetch(`${API_BASE}/api/ingestion/jobs/${jobId}`)
+            if (response.status === 404) {
+              // Evicted or lost on a server restart; stop tracking it
+              gone.push(jobId)
+              return
+            }
+            const job: IngestionJob = await response.json()
+            if (FINISHED_JOB_STATUSES.includes(job.status)) {
+              finished.push(job)
+            }
+          } catch (error) {
+            console.error('Failed to fetch ingestion job:', error)
+          }
+        }))
+        if (cancelled || (finished.length === 0 && gone.length === 0)) return
+
+        const done = new Set([...gone, ...finished.map(job => job.id)])
+        setPendingJobIds(ids => ids.filter(id => !done.has(id)))
+        await fetchDocuments()
+        const selectedId = selectedDocRef.current?.id
+        if (selectedId && (gone.length > 0 || finished.some(job => job.doc_id === selectedId))) {
+          await selectDocument(selectedId)
+        }
+        const failed = finished.filter(job => job.status === 'failed')
+        if (failed.length > 0) {
+          setToast({ message: `Failed to ingest ${failed.map(job => job.filename).join(', ')}`, type: 'error' })
+        }
+      } finally {
+        polling = false
+      }
+    }
+
+    const timer = setInterval(poll, JOB_POLL_INTERVAL_MS)
+    return () => {
+      cancelled = true
+      clearInterval(timer)
+    }
+  }, [pendingJobIds])
+
   // Phase 7: Cleanup highlight on unmount to prevent memory leaks
   useEffect(() => {
     return () => {
@@ -560,6 +639,9 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
         body: formData,
       })
       const data = await response.json()
+      if (data.job_id) {
+        setPendingJobIds(ids => [...ids, data.job_id])
+      }
       if (data.id) {
         await fetchDocuments()
         await selectDocument(data.id)
@@ -606,9 +688,16 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
       })
       const data = await response.json()
       console.log('Batch upload result:', data)
+      const queued = (data.results || []).filter(
+        (r: { status: string; id: string; job_id?: string }) => r.status === 'queued'
+      )
+      const jobIds: string[] = queued.map((r: { job_id?: string }) => r.job_id).filter(Boolean)
+      if (jobIds.length > 0) {
+        setPendingJobIds(ids => [...ids, ...jobIds])
+      }
       await fetchDocuments()
       // Select the first successfully uploaded document
-      const firstSuccess = data.results?.find((r: { status: string; id: string }) => r.status === 'ready')
+      const firstSuccess = queued[0]
       if (firstSuccess?.id) {
         await selectDocument(firstSuccess.id)
       }
@@ -751,6 +840,12 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
           <span className="text-sm font-medium text-white">Document Library</span>
         </div>
         <div className="flex items-center gap-2">
+          {pendingJobIds.length > 0 && (
+            <span className="flex items-center gap-1 text-xs text-slate-400" title="Documents being parsed and indexed">
+              <Loader2 className="w-3 h-3 animate-spin" />
+              Ingesting {pendingJobIds.length}
+            </span>
+          )}
           <input
             ref={fileInputRef}
             type="file"
@@ -1052,6 +1147,9 @@ export function LibraryPanel({ isMaximized }: LibraryPanelProps) {
                             <p className="text-slate-300"><span className="text-slate-500">Size:</span> {formatFileSize(selectedDoc.file_size_bytes)}</p>
                             <p className="text-slate-300"><span className="text-slate-500">Uploaded:</span> {formatDate(selectedDoc.created_at)}</p>
                             <p className="text-slate-300"><span className="text-slate-500">Status:</span> {selectedDoc.status}</p>
+                            {selectedDoc.error && (
+                              <p className="text-red-400"><span className="text-slate-500">Error:</span> {selectedDoc.error}</p>
+                            )}
                             <p className="text-slate-300"><span className="text-slate-500">Chunks:</span> {selectedDoc.chunk_count}</p>
                           </div>
                         </div>